@@ -0,0 +1,128 @@
+"""
+Benchmark de aritmética de montos: Decimal(str(float)) frente a Dinero
+
+Compara dos caminos calientes con la representación anterior (Decimal,
+convirtiendo el float de la interfaz con Decimal(str()) en cada capa que
+lo recibe) y con la actual (una sola conversión a Dinero en el borde y
+comparaciones sobre sus enteros de centavos):
+
+- retiro: validar efectivo del cajero, saldo, límite diario y límite
+  global, y construir la operación y el débito de la cuenta
+- suma: acumular los montos de un historial (totales del día, extractos)
+
+Uso (desde la carpeta proyect):
+    python -m benchmarks.benchmark_dinero --iteraciones 200000
+"""
+import argparse
+import timeit
+from decimal import Decimal
+
+from modelo.Dinero import Dinero
+
+
+def retiro_decimal(monto: float, efectivo: Decimal, saldo: Decimal, retirado: Decimal,
+                   limite: Decimal, limite_global: Decimal):
+    """
+    Camino anterior: cada capa (Cajero, Operacion, Cuenta) convierte el
+    float con Decimal(str()) y compara Decimales
+    """
+    if efectivo < Decimal(str(monto)):              # Cajero.procesar_retiro
+        return None
+    monto_dec = Decimal(str(monto))                 # Operacion.__init__
+    if saldo < monto_dec:                           # Banco.validar_transaccion
+        return None
+    acumulado = retirado + monto_dec
+    if acumulado > limite or acumulado > limite_global:
+        return None
+    monto_dec = Decimal(str(monto))                 # Cuenta.retirar
+    return saldo - monto_dec, acumulado
+
+
+def retiro_dinero(monto: float, efectivo: Dinero, saldo: Dinero, retirado: Dinero,
+                  limite: Dinero, limite_global: Dinero):
+    """
+    Camino actual: una conversión en el borde; las capas siguientes
+    reciben Dinero (desde() lo devuelve tal cual) y comparan centavos
+    """
+    monto = Dinero.desde(monto)                     # Cajero.procesar_retiro
+    centavos = monto.centavos
+    if efectivo.centavos < centavos:
+        return None
+    monto = Dinero.desde(monto)                     # Operacion.__init__
+    if saldo.centavos < centavos:                   # Banco.validar_transaccion
+        return None
+    acumulado = retirado.centavos + centavos
+    if acumulado > limite.centavos or acumulado > limite_global.centavos:
+        return None
+    monto = Dinero.desde(monto)                     # Cuenta.retirar
+    return saldo.centavos - centavos, acumulado
+
+
+def suma_decimal(montos: list) -> Decimal:
+    """
+    Suma de un historial de montos Decimal
+    """
+    return sum(montos, Decimal(0))
+
+
+def suma_dinero(montos: list) -> Dinero:
+    """
+    Suma de un historial de montos Dinero sobre sus centavos
+    """
+    return Dinero(sum([monto.centavos for monto in montos]))
+
+
+def medir(funcion, argumentos: tuple, iteraciones: int, repeticiones: int) -> float:
+    """
+    Mide el mejor tiempo por operación
+
+    Args:
+        funcion: Función a medir
+        argumentos: Argumentos de la llamada
+        iteraciones: Llamadas por repetición
+        repeticiones: Repeticiones (se toma la mejor)
+
+    Returns:
+        float: Nanosegundos por operación
+    """
+    tiempos = timeit.repeat(lambda: funcion(*argumentos), number=iteraciones, repeat=repeticiones)
+    return min(tiempos) / iteraciones * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aritmética de montos: Decimal frente a Dinero")
+    parser.add_argument('--iteraciones', type=int, default=100000,
+                        help="Operaciones por repetición")
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help="Repeticiones (se reporta la mejor)")
+    parser.add_argument('--historial', type=int, default=1000,
+                        help="Montos sumados por operación de suma")
+    args = parser.parse_args()
+
+    monto = 123.45
+    valores = ('100000.00', '5000.00', '200.00', '1000.00', '5000.00')
+    resultados = [(
+        'retiro',
+        medir(retiro_decimal, (monto, *map(Decimal, valores)),
+              args.iteraciones, args.repeticiones),
+        medir(retiro_dinero, (monto, *map(Dinero.desde, valores)),
+              args.iteraciones, args.repeticiones),
+    )]
+
+    montos = [f"{(i * 7919) % 100000 / 100:.2f}" for i in range(args.historial)]
+    iteraciones_suma = max(1, args.iteraciones // args.historial)
+    resultados.append((
+        f"suma x{args.historial}",
+        medir(suma_decimal, ([Decimal(m) for m in montos],),
+              iteraciones_suma, args.repeticiones),
+        medir(suma_dinero, ([Dinero.desde(m) for m in montos],),
+              iteraciones_suma, args.repeticiones),
+    ))
+
+    print(f"{'camino':<12} {'Decimal ns':>12} {'Dinero ns':>12} {'aceleración':>12}")
+    for nombre, ns_decimal, ns_dinero in resultados:
+        print(f"{nombre:<12} {ns_decimal:>12.1f} {ns_dinero:>12.1f} {ns_decimal / ns_dinero:>11.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Benchmark de lectura de historial: objetos ORM polimórficos frente a
+OperacionResumen
+
+Carga N operaciones de una cuenta en una BD SQLite en memoria y mide, para
+cada camino de lectura, la latencia (mejor de varias repeticiones) y el
+pico de memoria asignada (tracemalloc) al materializar todo el historial.
+
+Uso (desde la carpeta proyect):
+    python -m benchmarks.benchmark_historial --filas 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+
+def crear_app() -> Flask:
+    """
+    Crea una aplicación con una BD SQLite en memoria
+
+    Returns:
+        Flask: Aplicación con las tablas creadas
+    """
+    from data.database import db, importar_modelos
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        importar_modelos()
+        db.create_all()
+    return app
+
+
+def cargar_operaciones(filas: int) -> int:
+    """
+    Inserta una cuenta y sus operaciones (mezcla de tipos) por lotes
+
+    Args:
+        filas: Operaciones a insertar
+
+    Returns:
+        int: Id de la cuenta
+    """
+    from data.database import db
+    from modelo.Banco import Banco
+    from modelo.Cliente import Cliente
+    from modelo.cuenta import Cuenta
+    from modelo.Dinero import Dinero
+    from modelo.Operacion import Operacion
+
+    banco = Banco("Banco", "BNC")
+    cliente = Cliente("Ana", "Pérez", "1")
+    cliente.banco = banco
+    cuenta = Cuenta("0001", 1000.0)
+    cuenta.titular = cliente
+    db.session.add_all([banco, cliente, cuenta])
+    db.session.commit()
+
+    tipos = [
+        ('retiro', {}),
+        ('deposito', {'tipo_deposito': 'EFECTIVO'}),
+        ('consulta_saldo', {'saldo_consultado': Dinero(100000)}),
+        ('pago_recibo', {'nombre_servicio': 'Energía', 'numero_referencia': 'REF-1', 'nit_recibo': '900'}),
+        ('compra_entradas', {'nombre_evento': 'Concierto', 'codigo_entrada': 'ENT-1', 'cantidad': 2}),
+    ]
+    inicio = datetime.now() - timedelta(minutes=filas)
+    tabla = Operacion.__table__
+
+    lote = []
+    for i in range(filas):
+        tipo, extra = tipos[i % len(tipos)]
+        lote.append({
+            'tipo': tipo,
+            'fecha': inicio + timedelta(minutes=i),
+            'monto': Dinero(1000 + i % 5000),
+            'descripcion': f"Operación {i}",
+            'exitosa': i % 10 != 0,
+            'mensaje_error': None,
+            'cuenta_id': cuenta.id,
+            'cajero_id': None,
+            'tipo_deposito': None, 'saldo_consultado': None, 'nombre_servicio': None,
+            'nit_recibo': None, 'numero_referencia': None, 'nombre_evento': None,
+            'codigo_entrada': None, 'cantidad': None,
+            **extra,
+        })
+        if len(lote) == 10000:
+            db.session.execute(tabla.insert(), lote)
+            lote = []
+    if lote:
+        db.session.execute(tabla.insert(), lote)
+    db.session.commit()
+    return cuenta.id
+
+
+def medir(leer, repeticiones: int) -> dict:
+    """
+    Mide latencia y pico de memoria de una lectura completa
+
+    Args:
+        leer: Función que devuelve la lista de operaciones
+        repeticiones: Repeticiones de latencia (se toma la mejor)
+
+    Returns:
+        dict: filas, ms y MiB
+    """
+    from data.database import db
+
+    tiempos = []
+    for _ in range(repeticiones):
+        db.session.expunge_all()
+        gc.collect()
+        inicio = time.perf_counter()
+        resultado = leer()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        filas = len(resultado)
+        del resultado
+
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    resultado = leer()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+
+    return {'filas': filas, 'ms': min(tiempos), 'mib': pico / 2 ** 20}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Historial: ORM polimórfico frente a OperacionResumen")
+    parser.add_argument('--filas', type=int, default=100000,
+                        help="Operaciones de la cuenta")
+    parser.add_argument('--repeticiones', type=int, default=3,
+                        help="Repeticiones de latencia (se reporta la mejor)")
+    args = parser.parse_args()
+
+    app = crear_app()
+    with app.app_context():
+        from modelo.RegistroOperaciones import RegistroOperaciones
+
+        cuenta_id = cargar_operaciones(args.filas)
+        registro = RegistroOperaciones.get_instance()
+
+        caminos = {
+            'ORM (with_polymorphic)': lambda: registro.consulta_por_cuenta(cuenta_id).all(),
+            'OperacionResumen': lambda: registro.obtener_resumenes(registro.consulta_por_cuenta(cuenta_id)),
+        }
+
+        resultados = {nombre: medir(leer, args.repeticiones) for nombre, leer in caminos.items()}
+
+    print(f"{'camino':<24} {'filas':>8} {'ms':>10} {'MiB pico':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<24} {r['filas']:>8} {r['ms']:>10.1f} {r['mib']:>10.1f}")
+
+    orm, ligero = resultados['ORM (with_polymorphic)'], resultados['OperacionResumen']
+    print(f"\nLatencia: {orm['ms'] / ligero['ms']:.2f}x  Memoria: {orm['mib'] / ligero['mib']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark de latencia de verificación de PIN por costo bcrypt
+
+Mide p50/p99 de bcrypt.checkpw para cada costo en la máquina actual y
+sugiere el mayor costo cuyo p99 queda dentro del objetivo de latencia.
+
+Uso (desde la carpeta proyect):
+    python -m benchmarks.benchmark_pin --costos 8,10,12 --muestras 50
+"""
+import argparse
+import time
+from typing import List
+
+from modelo.hash_pin import hashear_pin, comprobar_pin
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """
+    Calcula un percentil por rango más cercano
+
+    Args:
+        valores: Muestras
+        p: Percentil (0-100)
+
+    Returns:
+        float: Valor del percentil
+    """
+    ordenados = sorted(valores)
+    indice = max(0, min(len(ordenados) - 1, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def medir_costo(costo: int, muestras: int, pin: str = "1234") -> dict:
+    """
+    Mide la latencia de verificación para un costo
+
+    Args:
+        costo: Costo bcrypt
+        muestras: Número de verificaciones a medir
+        pin: PIN de prueba
+
+    Returns:
+        dict: Latencias en milisegundos
+    """
+    pin_hash = hashear_pin(pin, costo)
+    comprobar_pin(pin, pin_hash)  # Calentamiento
+
+    latencias = []
+    for _ in range(muestras):
+        inicio = time.perf_counter()
+        comprobar_pin(pin, pin_hash)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'costo': costo,
+        'p50_ms': percentil(latencias, 50),
+        'p99_ms': percentil(latencias, 99),
+        'max_ms': max(latencias),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de verificación de PIN por costo bcrypt")
+    parser.add_argument('--costos', default="8,9,10,11,12,13",
+                        help="Costos a medir separados por coma")
+    parser.add_argument('--muestras', type=int, default=30,
+                        help="Verificaciones por costo")
+    parser.add_argument('--objetivo-ms', type=float, default=250.0,
+                        help="Latencia p99 máxima aceptable")
+    args = parser.parse_args()
+
+    costos = [int(c) for c in args.costos.split(',')]
+    recomendado = None
+
+    print(f"{'costo':>5} {'p50 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}")
+    for costo in costos:
+        r = medir_costo(costo, args.muestras)
+        print(f"{r['costo']:>5} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['max_ms']:>10.2f}")
+        if r['p99_ms'] <= args.objetivo_ms:
+            recomendado = costo if recomendado is None else max(recomendado, costo)
+
+    if recomendado is None:
+        print(f"\nNingún costo cumple p99 <= {args.objetivo_ms} ms")
+    else:
+        print(f"\nCosto recomendado (p99 <= {args.objetivo_ms} ms): {recomendado}")
+        print(f"Aplicar con Tarjeta.configurar_costo_bcrypt({recomendado})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""
+Generador de carga concurrente sobre cajeros
+
+Siembra N cuentas con tarjeta y M cajeros en una BD local y simula sesiones
+de clientes desde varios hilos (y opcionalmente varios procesos). Cada
+sesión inserta la tarjeta, verifica el PIN, hace de una a tres operaciones
+según la mezcla (retiro, depósito, consulta de saldo) y expulsa la tarjeta.
+Cada hilo atiende un cajero propio.
+
+Al final reporta el throughput, los percentiles de latencia por operación y
+los conflictos de bloqueo reportados por la BD (incluidos los reintentados).
+También verifica los invariantes:
+- la conciliación de saldos contra el historial;
+- que no haya saldos negativos;
+- que los montos confirmados a los clientes coincidan con los registrados.
+
+Uso (desde la carpeta proyect):
+    python -m benchmarks.carga_cajeros --cuentas 1000 --cajeros 8 --procesos 2 --sesiones 200
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import numpy as np
+from flask import Flask
+
+PIN = "1234"
+SALDO_INICIAL = 5000.00
+LIMITE_DIARIO = 3000.00
+EFECTIVO_CAJERO = 10000000.00
+MEZCLA = "retiro=50,deposito=30,consulta=20"
+
+# Montos de retiro y depósito: múltiplos de 10 en este rango
+MONTO_MINIMO = 10
+MONTO_MAXIMO = 200
+
+
+def crear_app(uri: str, crear_tablas: bool = False) -> Flask:
+    """
+    Crea una aplicación sobre la BD de la prueba
+
+    Args:
+        uri: URI de la BD
+        crear_tablas: Si se crean las tablas
+
+    Returns:
+        Flask: Aplicación
+    """
+    from data.database import db, importar_modelos
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    db.init_app(app)
+
+    with app.app_context():
+        importar_modelos()
+        if crear_tablas:
+            db.create_all()
+    return app
+
+
+def numero_tarjeta(indice: int) -> str:
+    """
+    Número de la tarjeta sembrada para la cuenta indice
+    """
+    return f"4000-0000-{indice // 10000:04d}-{indice % 10000:04d}"
+
+
+def sembrar(cuentas: int, cajeros: int, costo_bcrypt: int) -> List[int]:
+    """
+    Crea el banco, las cuentas con su titular y tarjeta, y los cajeros
+
+    Args:
+        cuentas: Cuentas a crear
+        cajeros: Cajeros a crear
+        costo_bcrypt: Costo bcrypt de los PINs
+
+    Returns:
+        List[int]: Ids de los cajeros
+    """
+    from data.database import db
+    from modelo.Banco import Banco
+    from modelo.Cliente import Cliente
+    from modelo.cuenta import Cuenta
+    from modelo.Tarjeta import Tarjeta
+    from servicio.Cajero import Cajero
+
+    Tarjeta.configurar_costo_bcrypt(costo_bcrypt)
+
+    banco = Banco("Banco de carga", "CARGA", limite_max_diario_global=LIMITE_DIARIO)
+    db.session.add(banco)
+
+    for i in range(cuentas):
+        cliente = Cliente(f"Cliente {i}", "Carga", f"DOC{i:08d}")
+        cliente.banco = banco
+        cuenta = Cuenta(f"CARGA-{i:08d}", SALDO_INICIAL, LIMITE_DIARIO)
+        cuenta.titular = cliente
+        db.session.add_all([cliente, cuenta, Tarjeta(numero_tarjeta(i), PIN, cuenta)])
+        if i % 1000 == 999:
+            db.session.flush()
+
+    lista = [Cajero(f"CARGA{i:04d}", "Prueba de carga", EFECTIVO_CAJERO) for i in range(cajeros)]
+    for cajero in lista:
+        cajero.banco = banco
+    db.session.add_all(lista)
+    db.session.commit()
+    return [cajero.id for cajero in lista]
+
+
+def leer_mezcla(texto: str) -> Dict[str, float]:
+    """
+    Convierte 'retiro=50,deposito=30,consulta=20' en pesos por operación
+
+    Args:
+        texto: Mezcla de operaciones
+
+    Returns:
+        dict: Operación -> peso
+    """
+    mezcla = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip()
+        if nombre not in ('retiro', 'deposito', 'consulta'):
+            raise ValueError(f"Operación desconocida en la mezcla: {nombre}")
+        mezcla[nombre] = float(peso)
+    if not mezcla or sum(mezcla.values()) <= 0:
+        raise ValueError("La mezcla debe tener algún peso positivo")
+    return mezcla
+
+
+def _nuevas_metricas() -> dict:
+    return {
+        'latencias': {},          # operación -> [ms]
+        'resultados': {},         # operación -> {'ok', 'rechazada', 'error'} -> n
+        'retirado': 0,            # centavos confirmados al cliente
+        'depositado': 0,
+        'conflictos': 0,
+        'errores': [],            # primeros mensajes de error
+    }
+
+
+def _registrar(metricas: dict, operacion: str, ms: float, exito: bool, mensaje: str) -> None:
+    """
+    Acumula la latencia y el resultado de una operación
+    """
+    metricas['latencias'].setdefault(operacion, []).append(ms)
+    resultados = metricas['resultados'].setdefault(operacion, {'ok': 0, 'rechazada': 0, 'error': 0})
+    if exito:
+        resultados['ok'] += 1
+    elif mensaje.startswith("Error"):
+        resultados['error'] += 1
+        if len(metricas['errores']) < 10:
+            metricas['errores'].append(f"{operacion}: {mensaje}")
+    else:
+        resultados['rechazada'] += 1
+
+
+def _combinar(total: dict, parcial: dict) -> None:
+    """
+    Suma las métricas de un hilo o proceso al total
+    """
+    for operacion, valores in parcial['latencias'].items():
+        total['latencias'].setdefault(operacion, []).extend(valores)
+    for operacion, conteo in parcial['resultados'].items():
+        destino = total['resultados'].setdefault(operacion, {'ok': 0, 'rechazada': 0, 'error': 0})
+        for clave, valor in conteo.items():
+            destino[clave] += valor
+    for clave in ('retirado', 'depositado', 'conflictos'):
+        total[clave] += parcial[clave]
+    total['errores'].extend(parcial['errores'][:10 - len(total['errores'])])
+
+
+def _trabajador(app: Flask, cajero_id: int, sesiones: int, cuentas: int,
+                mezcla: Dict[str, float], semilla: int, metricas: dict) -> None:
+    """
+    Simula sesiones de clientes en un cajero
+
+    Args:
+        app: Aplicación
+        cajero_id: Cajero que atiende este hilo
+        sesiones: Sesiones a simular
+        cuentas: Cuentas sembradas
+        mezcla: Pesos de cada operación
+        semilla: Semilla aleatoria del hilo
+        metricas: Métricas del hilo (se completan aquí)
+    """
+    from data.database import db
+    from modelo.Dinero import Dinero
+    from servicio.Cajero import Cajero
+
+    aleatorio = random.Random(semilla)
+    operaciones, pesos = list(mezcla), list(mezcla.values())
+
+    def medir(operacion, llamada):
+        inicio = time.perf_counter()
+        try:
+            resultado = llamada()
+        except Exception as e:
+            db.session.rollback()
+            resultado = (False, f"Error: {e}")
+        exito, mensaje = resultado[0], resultado[-1]
+        _registrar(metricas, operacion, (time.perf_counter() - inicio) * 1000, exito, mensaje)
+        return exito
+
+    with app.app_context():
+        try:
+            for _ in range(sesiones):
+                cajero = db.session.get(Cajero, cajero_id)
+                numero = numero_tarjeta(aleatorio.randrange(cuentas))
+
+                if not medir('sesion', lambda: cajero.iniciar_sesion(numero)):
+                    continue
+                try:
+                    if not medir('pin', lambda: cajero.verificar_pin(PIN)):
+                        continue
+                    tarjeta = cajero.tarjeta_insertada
+                    for operacion in aleatorio.choices(operaciones, pesos, k=aleatorio.randint(1, 3)):
+                        monto = Dinero.desde(aleatorio.randrange(MONTO_MINIMO, MONTO_MAXIMO + 1, 10))
+                        if operacion == 'retiro':
+                            if medir('retiro', lambda: cajero.procesar_retiro(tarjeta, monto)):
+                                metricas['retirado'] += monto.centavos
+                        elif operacion == 'deposito':
+                            if medir('deposito', lambda: cajero.procesar_deposito(tarjeta, monto)):
+                                metricas['depositado'] += monto.centavos
+                        else:
+                            medir('consulta', lambda: cajero.consultar_saldo(tarjeta))
+                finally:
+                    cajero.expulsar_tarjeta()
+                    db.session.close()
+        finally:
+            db.session.remove()
+
+
+def ejecutar_carga(uri: str, cajero_ids: List[int], sesiones: int, cuentas: int,
+                   mezcla: Dict[str, float], semilla: int,
+                   commit_agrupado: bool = False) -> dict:
+    """
+    Corre un hilo por cajero en este proceso
+
+    Args:
+        uri: URI de la BD
+        cajero_ids: Cajeros de este proceso (uno por hilo)
+        sesiones: Sesiones por hilo
+        cuentas: Cuentas sembradas
+        mezcla: Pesos de cada operación
+        semilla: Semilla base
+        commit_agrupado: Si se activa el CoordinadorCommit
+
+    Returns:
+        dict: Métricas combinadas de los hilos
+    """
+    from sqlalchemy import event
+    from sqlalchemy.exc import DBAPIError
+    from data.concurrencia import es_bloqueo, es_conflicto
+    from data.database import db
+    from servicio.VerificadorPin import VerificadorPin
+
+    app = crear_app(uri)
+    total = _nuevas_metricas()
+    lock = threading.Lock()
+
+    with app.app_context():
+        motor = db.engine
+
+        def contar_conflicto(contexto):
+            error = contexto.sqlalchemy_exception
+            if isinstance(error, DBAPIError) and (es_bloqueo(error) or es_conflicto(error)):
+                with lock:
+                    total['conflictos'] += 1
+
+        event.listen(motor, 'handle_error', contar_conflicto)
+
+        if commit_agrupado:
+            from data.commit_agrupado import CoordinadorCommit
+            CoordinadorCommit.activar(app)
+
+        parciales = [_nuevas_metricas() for _ in cajero_ids]
+        hilos = [
+            threading.Thread(target=_trabajador, name=f"carga-{cajero_id}",
+                             args=(app, cajero_id, sesiones, cuentas, mezcla,
+                                   semilla + cajero_id, parcial))
+            for cajero_id, parcial in zip(cajero_ids, parciales)
+        ]
+        try:
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+        finally:
+            if commit_agrupado:
+                CoordinadorCommit.desactivar()
+            # El pool de bcrypt de este proceso no se cierra solo al salir
+            # de un proceso hijo: sin esto el worker espera a sus procesos
+            VerificadorPin.get_instance().cerrar()
+            event.remove(motor, 'handle_error', contar_conflicto)
+
+    for parcial in parciales:
+        _combinar(total, parcial)
+    return total
+
+
+def verificar_invariantes(metricas: dict) -> Dict[str, int]:
+    """
+    Verifica saldos e historial tras la carga
+
+    Args:
+        metricas: Métricas combinadas (montos confirmados a los clientes)
+
+    Returns:
+        dict: Violaciones encontradas por invariante
+    """
+    from data.database import db
+    from modelo.cuenta import Cuenta
+    from modelo.Dinero import Dinero
+    from modelo.Operacion import Operacion
+    from servicio.Cajero import Cajero
+    from servicio.Conciliacion import Conciliacion
+
+    conciliacion = Conciliacion().ejecutar()
+
+    negativos = db.session.execute(
+        db.select(db.func.count()).select_from(Cuenta).where(Cuenta.saldo < Dinero(0))
+    ).scalar() + db.session.execute(
+        db.select(db.func.count()).select_from(Cajero).where(Cajero.monto_cajero < Dinero(0))
+    ).scalar()
+
+    def total_registrado(tipo: str) -> int:
+        suma = db.session.execute(
+            db.select(db.func.coalesce(db.func.sum(Operacion.monto), 0))
+            .where(Operacion.tipo == tipo, Operacion.exitosa == True)
+        ).scalar()
+        return Dinero.desde(suma).centavos
+
+    return {
+        'discrepancias de conciliación': len(conciliacion.discrepancias),
+        'saldos negativos': negativos,
+        'retiros confirmados != registrados': int(total_registrado('retiro') != metricas['retirado']),
+        'depósitos confirmados != registrados': int(total_registrado('deposito') != metricas['depositado']),
+    }
+
+
+def imprimir_reporte(metricas: dict, segundos: float, invariantes: Dict[str, int]) -> None:
+    """
+    Imprime throughput, latencias, conflictos e invariantes
+    """
+    total = sum(len(v) for v in metricas['latencias'].values())
+    print(f"\n{total} operaciones en {segundos:.2f} s: {total / segundos:.1f} ops/s")
+    print(f"\n{'operación':<10} {'n':>7} {'ok':>7} {'rechaz.':>7} {'error':>6} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for operacion in ('sesion', 'pin', 'retiro', 'deposito', 'consulta'):
+        latencias = metricas['latencias'].get(operacion)
+        if not latencias:
+            continue
+        r = metricas['resultados'][operacion]
+        p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+        print(f"{operacion:<10} {len(latencias):>7} {r['ok']:>7} {r['rechazada']:>7} {r['error']:>6} "
+              f"{p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {max(latencias):>8.2f}")
+
+    print(f"\nConflictos de bloqueo reportados por la BD: {metricas['conflictos']}")
+    for mensaje in metricas['errores']:
+        print(f"  {mensaje}")
+
+    print("\nInvariantes:")
+    for nombre, violaciones in invariantes.items():
+        print(f"  {'OK ' if violaciones == 0 else 'FALLA'} {nombre}: {violaciones}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga concurrente sobre cajeros")
+    parser.add_argument('--cuentas', type=int, default=1000, help="Cuentas sembradas")
+    parser.add_argument('--cajeros', type=int, default=8, help="Cajeros sembrados (uno por hilo)")
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos; los cajeros se reparten entre ellos")
+    parser.add_argument('--sesiones', type=int, default=100, help="Sesiones de cliente por cajero")
+    parser.add_argument('--mezcla', default=MEZCLA, help="Pesos de retiro, deposito y consulta")
+    parser.add_argument('--bd', default=None, help="URI de la BD (por defecto un SQLite temporal)")
+    parser.add_argument('--costo-bcrypt', type=int, default=4, help="Costo bcrypt de los PINs sembrados")
+    parser.add_argument('--commit-agrupado', action='store_true', help="Activar el CoordinadorCommit")
+    parser.add_argument('--semilla', type=int, default=1, help="Semilla aleatoria")
+    args = parser.parse_args()
+
+    if args.cuentas < 1 or args.cajeros < 1 or args.procesos < 1:
+        parser.error("cuentas, cajeros y procesos deben ser al menos 1")
+    if args.procesos > args.cajeros:
+        parser.error("Cada proceso necesita al menos un cajero")
+    try:
+        mezcla = leer_mezcla(args.mezcla)
+    except ValueError as e:
+        parser.error(str(e))
+
+    uri = args.bd or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='carga_'), 'carga.db')}"
+    app = crear_app(uri, crear_tablas=True)
+    with app.app_context():
+        print(f"Sembrando {args.cuentas} cuentas y {args.cajeros} cajeros en {uri}")
+        cajero_ids = sembrar(args.cuentas, args.cajeros, args.costo_bcrypt)
+
+    grupos = [cajero_ids[i::args.procesos] for i in range(args.procesos)]
+    argumentos = (args.sesiones, args.cuentas, mezcla, args.semilla, args.commit_agrupado)
+
+    inicio = time.perf_counter()
+    if args.procesos == 1:
+        metricas = ejecutar_carga(uri, grupos[0], *argumentos)
+    else:
+        metricas = _nuevas_metricas()
+        # spawn: cada proceso crea su propio pool de VerificadorPin, y con
+        # fork heredaría hilos y locks del pool del proceso padre
+        with ProcessPoolExecutor(max_workers=args.procesos,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futuros = [pool.submit(ejecutar_carga, uri, grupo, *argumentos) for grupo in grupos]
+            for futuro in futuros:
+                _combinar(metricas, futuro.result())
+    segundos = time.perf_counter() - inicio
+
+    with app.app_context():
+        invariantes = verificar_invariantes(metricas)
+    imprimir_reporte(metricas, segundos, invariantes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Escritura asíncrona de la auditoría de sesiones de cajero
+
+Los eventos se encolan en memoria sin tocar la BD (registrar no bloquea) y
+un hilo los inserta por lotes en eventos_sesion con un solo INSERT por
+lote. Si la cola se llena, los eventos nuevos se descartan y se cuentan:
+la auditoría nunca frena la atención en el cajero.
+"""
+import queue
+import threading
+from datetime import datetime
+from typing import List, Optional
+from data.database import db
+
+TAMANO_LOTE = 500
+INTERVALO_S = 0.5
+CAPACIDAD = 100000
+
+
+class AuditoriaSesiones:
+    """
+    Hilo que persiste los eventos de sesión encolados
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, app, tamano_lote: int = TAMANO_LOTE,
+                 intervalo_s: float = INTERVALO_S, capacidad: int = CAPACIDAD):
+        if tamano_lote < 1:
+            raise ValueError("El tamaño de lote debe ser al menos 1")
+        self.app = app
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo_s
+        self._cola: 'queue.Queue[dict]' = queue.Queue(maxsize=capacidad)
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.escritos = 0
+        self.descartados = 0
+        self.fallos = 0
+        self.ultimo_error: Optional[str] = None
+
+    @classmethod
+    def activar(cls, app=None, tamano_lote: int = TAMANO_LOTE,
+                intervalo_s: float = INTERVALO_S,
+                capacidad: int = CAPACIDAD) -> 'AuditoriaSesiones':
+        """
+        Arranca el escritor de auditoría (idempotente)
+
+        Args:
+            app: Aplicación Flask (por defecto la del contexto actual)
+            tamano_lote: Eventos máximos por INSERT
+            intervalo_s: Espera máxima por nuevos eventos
+            capacidad: Eventos pendientes máximos en la cola
+
+        Returns:
+            AuditoriaSesiones: Instancia activa
+        """
+        from flask import current_app
+
+        with cls._lock_instancia:
+            if cls._instance is None:
+                app = app or current_app._get_current_object()
+                cls._instance = cls(app, tamano_lote, intervalo_s, capacidad)
+                cls._instance._iniciar()
+            return cls._instance
+
+    @classmethod
+    def desactivar(cls) -> None:
+        """
+        Detiene el escritor tras persistir los eventos pendientes
+        """
+        with cls._lock_instancia:
+            instancia, cls._instance = cls._instance, None
+        if instancia is not None:
+            instancia.cerrar()
+
+    @classmethod
+    def get_instance(cls) -> Optional['AuditoriaSesiones']:
+        """
+        Obtiene el escritor activo
+
+        Returns:
+            AuditoriaSesiones o None si no está activo
+        """
+        return cls._instance
+
+    def _iniciar(self) -> None:
+        """
+        Arranca el hilo escritor
+        """
+        self._hilo = threading.Thread(
+            target=self._bucle, name="auditoria-sesiones", daemon=True
+        )
+        self._hilo.start()
+
+    def cerrar(self) -> None:
+        """
+        Detiene el hilo; los eventos ya encolados se escriben antes
+        """
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join()
+            self._hilo = None
+
+    def registrar(self, cajero_id: int, tarjeta_id: Optional[int], evento: str,
+                  detalle: Optional[str] = None) -> bool:
+        """
+        Encola un evento de sesión sin esperar a la BD
+
+        Args:
+            cajero_id: Id del cajero
+            tarjeta_id: Id de la tarjeta de la sesión
+            evento: Tipo de evento ('insercion', 'expulsion', ...)
+            detalle: Texto adicional
+
+        Returns:
+            bool: False si la cola estaba llena y el evento se descartó
+        """
+        try:
+            self._cola.put_nowait({
+                'cajero_id': cajero_id,
+                'tarjeta_id': tarjeta_id,
+                'evento': evento,
+                'fecha': datetime.now(),
+                'detalle': detalle,
+            })
+            return True
+        except queue.Full:
+            with self._lock:
+                self.descartados += 1
+            return False
+
+    def estadisticas(self) -> dict:
+        """
+        Obtiene los contadores del escritor
+
+        Returns:
+            dict: Eventos escritos, descartados, pendientes, fallos y último error
+        """
+        with self._lock:
+            return {
+                'escritos': self.escritos,
+                'descartados': self.descartados,
+                'pendientes': self._cola.qsize(),
+                'fallos': self.fallos,
+                'ultimo_error': self.ultimo_error,
+            }
+
+    def _tomar_lote(self) -> List[dict]:
+        """
+        Espera el primer evento (hasta el intervalo) y toma los demás
+        pendientes sin esperar, hasta completar el lote
+
+        Returns:
+            list: Eventos del lote (vacía si no llegó ninguno)
+        """
+        try:
+            lote = [self._cola.get(timeout=self.intervalo)]
+        except queue.Empty:
+            return []
+        while len(lote) < self.tamano_lote:
+            try:
+                lote.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _bucle(self) -> None:
+        """
+        Escribe lotes hasta que se pida detener y la cola quede vacía
+        """
+        with self.app.app_context():
+            try:
+                while not (self._detener.is_set() and self._cola.empty()):
+                    lote = self._tomar_lote()
+                    if lote:
+                        self._escribir(lote)
+            finally:
+                db.session.remove()
+
+    def _escribir(self, lote: List[dict]) -> None:
+        """
+        Inserta un lote de eventos; si falla, el lote se pierde y se cuenta
+
+        Args:
+            lote: Eventos a insertar
+        """
+        from modelo.EventoSesion import EventoSesion
+
+        try:
+            db.session.execute(db.insert(EventoSesion), lote)
+            db.session.commit()
+            with self._lock:
+                self.escritos += len(lote)
+        except Exception as e:
+            db.session.rollback()
+            with self._lock:
+                self.fallos += 1
+                self.ultimo_error = str(e)
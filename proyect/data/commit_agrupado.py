@@ -0,0 +1,292 @@
+"""
+Commit agrupado de operaciones del ATM
+
+En modo normal cada operación confirma su propia transacción (un fsync por
+acción del cajero). Con el coordinador activo, las operaciones de sesiones
+concurrentes se encolan, se aplican durante una ventana de pocos
+milisegundos en una única transacción (cada una en su SAVEPOINT, de modo que
+el fallo de una no afecta a las demás) y se confirman con un solo commit.
+Cada llamador recibe su resultado solo después de que ese commit terminó,
+así que la durabilidad por operación se mantiene.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple, TypeVar
+from sqlalchemy.exc import DBAPIError
+from data.concurrencia import es_conflicto, reintentar_transaccion
+from data.database import db
+
+T = TypeVar('T')
+
+# Valores por defecto de la ventana de agrupación
+VENTANA_MS = 5.0
+MAX_LOTE = 64
+
+_FIN = object()
+
+
+class CoordinadorCommit:
+    """
+    Hilo coordinador que aplica y confirma por lotes las unidades de trabajo
+    enviadas por los cajeros.
+
+    Una unidad es una función sin argumentos que trabaja sobre db.session
+    (la sesión del hilo coordinador) y devuelve un valor independiente de la
+    sesión; no debe confirmar ni deshacer la transacción.
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, app, ventana_ms: float = VENTANA_MS, max_lote: int = MAX_LOTE):
+        if max_lote < 1:
+            raise ValueError("El tamaño máximo de lote debe ser al menos 1")
+        self.app = app
+        self.ventana = ventana_ms / 1000
+        self.max_lote = max_lote
+        self._cola: 'queue.Queue' = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.lotes = 0
+        self.unidades = 0
+        self.lotes_fallidos = 0
+
+    @classmethod
+    def activar(cls, app=None, ventana_ms: float = VENTANA_MS,
+                max_lote: int = MAX_LOTE) -> 'CoordinadorCommit':
+        """
+        Activa el modo de commit agrupado (idempotente)
+
+        Args:
+            app: Aplicación Flask (por defecto la del contexto actual)
+            ventana_ms: Tiempo máximo que se espera para completar un lote
+            max_lote: Unidades máximas por commit
+
+        Returns:
+            CoordinadorCommit: Instancia activa
+        """
+        from flask import current_app
+
+        with cls._lock_instancia:
+            if cls._instance is None:
+                app = app or current_app._get_current_object()
+                cls._instance = cls(app, ventana_ms, max_lote)
+                cls._instance._iniciar()
+            return cls._instance
+
+    @classmethod
+    def desactivar(cls) -> None:
+        """
+        Vuelve al modo de un commit por operación, esperando a que se
+        confirmen las unidades pendientes
+        """
+        with cls._lock_instancia:
+            instancia, cls._instance = cls._instance, None
+        if instancia is not None:
+            instancia.cerrar()
+
+    @classmethod
+    def get_instance(cls) -> Optional['CoordinadorCommit']:
+        """
+        Obtiene el coordinador activo
+
+        Returns:
+            CoordinadorCommit o None si el modo agrupado no está activo
+        """
+        return cls._instance
+
+    def _iniciar(self) -> None:
+        """
+        Arranca el hilo coordinador
+        """
+        self._hilo = threading.Thread(
+            target=self._bucle, name="coordinador-commit", daemon=True
+        )
+        self._hilo.start()
+
+    def enviar(self, unidad: Callable[[], T]) -> 'Future[T]':
+        """
+        Encola una unidad de trabajo
+
+        Args:
+            unidad: Función a aplicar en el próximo lote
+
+        Returns:
+            Future: Se resuelve con el valor de la unidad una vez confirmado
+            el lote (o con su excepción)
+        """
+        if self._hilo is None or not self._hilo.is_alive():
+            raise RuntimeError("El coordinador de commit no está activo")
+
+        futuro: 'Future[T]' = Future()
+        self._cola.put((unidad, futuro))
+        return futuro
+
+    def ejecutar(self, unidad: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """
+        Encola una unidad y espera a que su lote quede confirmado
+
+        Args:
+            unidad: Función a aplicar
+            timeout: Segundos máximos de espera
+
+        Returns:
+            El valor devuelto por la unidad
+        """
+        return self.enviar(unidad).result(timeout)
+
+    def cerrar(self) -> None:
+        """
+        Detiene el hilo tras confirmar lo que quede en la cola
+        """
+        if self._hilo is not None:
+            self._cola.put(_FIN)
+            self._hilo.join()
+            self._hilo = None
+
+    def estadisticas(self) -> dict:
+        """
+        Obtiene los contadores del coordinador
+
+        Returns:
+            dict: Lotes, unidades, lotes fallidos y tamaño promedio de lote
+        """
+        with self._lock:
+            return {
+                'lotes': self.lotes,
+                'unidades': self.unidades,
+                'lotes_fallidos': self.lotes_fallidos,
+                'tamano_promedio': (self.unidades / self.lotes) if self.lotes > 0 else 0
+            }
+
+    # --- Hilo coordinador ---
+
+    def _bucle(self) -> None:
+        """
+        Recolecta y confirma lotes hasta recibir la señal de fin
+        """
+        with self.app.app_context():
+            try:
+                terminar = False
+                while not terminar:
+                    lote, terminar = self._recolectar()
+                    if lote:
+                        self._procesar(lote)
+            finally:
+                db.session.remove()
+
+    def _recolectar(self) -> Tuple[List[tuple], bool]:
+        """
+        Espera la primera unidad y agrega las que lleguen dentro de la
+        ventana, hasta el tamaño máximo de lote
+
+        Returns:
+            tuple: (lote, terminar)
+        """
+        item = self._cola.get()
+        if item is _FIN:
+            return [], True
+
+        lote = [item]
+        limite = time.monotonic() + self.ventana
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                item = self._cola.get(timeout=restante)
+            except queue.Empty:
+                break
+            if item is _FIN:
+                return lote, True
+            lote.append(item)
+        return lote, False
+
+    def _procesar(self, lote: List[tuple]) -> None:
+        """
+        Aplica cada unidad en su SAVEPOINT, confirma una sola vez y resuelve
+        los futuros. Si el commit del lote falla, cada unidad se reintenta
+        en su propia transacción para aislar a la que lo provocó; las
+        unidades que chocaron por serialización o deadlock se repiten en
+        su propia transacción después del commit del lote.
+
+        Args:
+            lote: Pares (unidad, futuro)
+        """
+        lote = [(unidad, futuro) for unidad, futuro in lote
+                if futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+
+        resultados = []
+        en_conflicto = []
+        try:
+            self._abrir_transaccion()
+            for unidad, futuro in lote:
+                try:
+                    with db.session.begin_nested():
+                        resultados.append((futuro, unidad(), None))
+                except DBAPIError as e:
+                    if es_conflicto(e):
+                        en_conflicto.append((unidad, futuro))
+                    else:
+                        resultados.append((futuro, None, e))
+                except Exception as e:
+                    resultados.append((futuro, None, e))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            with self._lock:
+                self.lotes_fallidos += 1
+            self._procesar_individual(lote)
+            return
+
+        with self._lock:
+            self.lotes += 1
+            self.unidades += len(lote) - len(en_conflicto)
+
+        for futuro, valor, error in resultados:
+            if error is not None:
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(valor)
+
+        if en_conflicto:
+            self._procesar_individual(en_conflicto)
+
+    def _procesar_individual(self, lote: List[tuple]) -> None:
+        """
+        Aplica y confirma cada unidad por separado, repitiendo su
+        transacción ante un fallo de serialización o un deadlock
+
+        Args:
+            lote: Pares (unidad, futuro)
+        """
+        def transaccion(unidad):
+            self._abrir_transaccion()
+            valor = unidad()
+            db.session.commit()
+            return valor
+
+        for unidad, futuro in lote:
+            try:
+                valor = reintentar_transaccion(lambda: transaccion(unidad))
+            except Exception as e:
+                db.session.rollback()
+                futuro.set_exception(e)
+            else:
+                futuro.set_result(valor)
+
+    @staticmethod
+    def _abrir_transaccion() -> None:
+        """
+        Abre la transacción del lote antes del primer SAVEPOINT
+
+        pysqlite no emite BEGIN antes de un SAVEPOINT, y en SQLite un
+        SAVEPOINT fuera de transacción se confirma al liberarse (un fsync
+        por unidad); por eso se abre explícitamente.
+        """
+        conexion = db.session.connection()
+        if conexion.dialect.name == 'sqlite' and not conexion.connection.dbapi_connection.in_transaction:
+            conexion.exec_driver_sql('BEGIN IMMEDIATE')
@@ -0,0 +1,194 @@
+"""
+Actualizaciones atómicas y reintentos ante conflictos de concurrencia
+
+Los saldos (cuentas y efectivo de cajeros) se modifican con un único
+UPDATE condicional (p. ej. saldo = saldo - :m WHERE saldo >= :m) en lugar de
+leer, comparar y escribir desde Python, de modo que dos cajeros operando
+sobre la misma cuenta no pueden pasar ambos la validación.
+"""
+import random
+import time
+from typing import Callable, Optional, TypeVar
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from data.database import db, sesion_de
+
+T = TypeVar('T')
+
+# Reintentos ante bloqueos/deadlocks
+MAX_INTENTOS = 5
+ESPERA_BASE = 0.01   # segundos
+ESPERA_MAXIMA = 0.5  # segundos
+
+# Lock no disponible: solo falla la sentencia, que puede repetirse en la
+# misma transacción
+_BLOQUEO_POSTGRES = {'55P03'}  # lock no disponible
+_BLOQUEO_MYSQL = {1205}        # lock wait timeout
+_MENSAJES_SQLITE = ('database is locked', 'database table is locked')
+
+# Serialización y deadlock: la transacción queda condenada (su instantánea
+# o sus bloqueos volverían a chocar), hay que repetirla completa
+_CONFLICTO_POSTGRES = {'40001', '40P01'}  # serialización, deadlock
+_CONFLICTO_MYSQL = {1213}                 # deadlock
+
+
+def _codigo_mysql(error: DBAPIError):
+    """
+    Código de error numérico del driver MySQL (None en otros backends)
+    """
+    original = error.orig
+    if original is not None and original.args and isinstance(original.args[0], int):
+        return original.args[0]
+    return None
+
+
+def es_bloqueo(error: DBAPIError) -> bool:
+    """
+    Indica si un error de la BD es un lock no disponible, que se reintenta
+    repitiendo la sentencia en un SAVEPOINT (ver ejecutar_con_reintentos)
+
+    Args:
+        error: Error lanzado por SQLAlchemy
+
+    Returns:
+        bool: True si vale la pena reintentar la sentencia
+    """
+    if getattr(error.orig, 'pgcode', None) in _BLOQUEO_POSTGRES:
+        return True
+    if _codigo_mysql(error) in _BLOQUEO_MYSQL:
+        return True
+    return any(mensaje in str(error.orig) for mensaje in _MENSAJES_SQLITE)
+
+
+def es_conflicto(error: DBAPIError) -> bool:
+    """
+    Indica si un error de la BD es un fallo de serialización o un
+    deadlock, que se reintenta repitiendo toda la transacción (ver
+    reintentar_transaccion)
+
+    Args:
+        error: Error lanzado por SQLAlchemy
+
+    Returns:
+        bool: True si vale la pena repetir la transacción
+    """
+    if getattr(error.orig, 'pgcode', None) in _CONFLICTO_POSTGRES:
+        return True
+    return _codigo_mysql(error) in _CONFLICTO_MYSQL
+
+
+def _esperar(intento: int) -> None:
+    """
+    Espera exponencial acotada, con variación aleatoria, antes de reintentar
+
+    Args:
+        intento: Número de intento fallido (desde 0)
+    """
+    espera = min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** intento)
+    time.sleep(espera * random.uniform(0.5, 1.0))
+
+
+def ejecutar_con_reintentos(funcion: Callable[[], T],
+                            max_intentos: int = MAX_INTENTOS,
+                            sesion: Optional[Session] = None) -> T:
+    """
+    Ejecuta una función dentro de un SAVEPOINT y la reintenta con espera
+    exponencial acotada si la BD reporta un lock no disponible. Los
+    conflictos de serialización y deadlocks se propagan: los reintenta
+    reintentar_transaccion en el nivel de la transacción.
+
+    Args:
+        funcion: Trabajo a ejecutar sobre la sesión
+        max_intentos: Intentos máximos
+        sesion: Sesión del SAVEPOINT (por defecto db.session)
+
+    Returns:
+        El valor devuelto por la función
+    """
+    if sesion is None:
+        sesion = db.session()
+    for intento in range(max_intentos):
+        try:
+            with sesion.begin_nested():
+                return funcion()
+        except DBAPIError as e:
+            if intento == max_intentos - 1 or not es_bloqueo(e):
+                raise
+            _esperar(intento)
+
+
+def reintentar_transaccion(funcion: Callable[[], T],
+                           max_intentos: int = MAX_INTENTOS,
+                           sesion: Optional[Session] = None) -> T:
+    """
+    Ejecuta una transacción completa (la función aplica el trabajo y
+    confirma) y, si la BD reporta un fallo de serialización o un deadlock,
+    la deshace y la repite desde el principio con espera exponencial
+    acotada. La función debe poder repetirse tras el rollback.
+
+    Args:
+        funcion: Trabajo que termina con el commit de la sesión
+        max_intentos: Intentos máximos
+        sesion: Sesión a deshacer entre intentos (por defecto db.session)
+
+    Returns:
+        El valor devuelto por la función
+    """
+    if sesion is None:
+        sesion = db.session()
+    for intento in range(max_intentos):
+        try:
+            return funcion()
+        except DBAPIError as e:
+            if intento == max_intentos - 1 or not es_conflicto(e):
+                raise
+            sesion.rollback()
+            _esperar(intento)
+
+
+def actualizar_condicional(objeto, condiciones: list, valores: dict) -> bool:
+    """
+    Aplica un UPDATE de una sola sentencia sobre la fila de un objeto,
+    solo si se cumplen las condiciones, y sincroniza los atributos
+    modificados en el objeto
+
+    Args:
+        objeto: Instancia ORM (con columna id)
+        condiciones: Condiciones adicionales del WHERE
+        valores: Atributo -> expresión SQL del nuevo valor
+
+    Returns:
+        bool: True si la fila se actualizó
+    """
+    modelo = type(objeto)
+    sesion = sesion_de(objeto)
+    if objeto.id is None:
+        sesion.flush()
+
+    sentencia = (
+        db.update(modelo)
+        .where(modelo.id == objeto.id, *condiciones)
+        .values(**valores)
+        .execution_options(synchronize_session=False)
+    )
+
+    # Con RETURNING se evita releer la fila después del UPDATE
+    usar_returning = sesion.get_bind().dialect.update_returning
+    if usar_returning:
+        sentencia = sentencia.returning(*(getattr(modelo, atributo) for atributo in valores))
+
+    def _ejecutar():
+        resultado = sesion.execute(sentencia)
+        return resultado.first() if usar_returning else resultado.rowcount == 1
+
+    fila = ejecutar_con_reintentos(_ejecutar, sesion=sesion)
+
+    if usar_returning and fila is not None:
+        for atributo, valor in zip(valores, fila):
+            set_committed_value(objeto, atributo, valor)
+        return True
+
+    # Sin RETURNING, o si la condición falló: releer en el próximo acceso
+    sesion.expire(objeto, list(valores))
+    return bool(fila)
@@ -2,9 +2,7 @@
 Configuración de la base de datos con SQLAlchemy
 """
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
-
-from BACKEND.services import Cajero
+from sqlalchemy.orm import DeclarativeBase, Session, object_session
 
 class Base(DeclarativeBase):
     """Clase base para todos los modelos"""
@@ -14,6 +12,36 @@ class Base(DeclarativeBase):
 db = SQLAlchemy(model_class=Base)
 
 
+def sesion_de(objeto) -> Session:
+    """
+    Sesión a la que pertenece un objeto ORM (db.session si aún no está en
+    ninguna), para que el modelo opere sobre la sesión que lo cargó y no
+    siempre sobre la del contexto de app (p. ej. la sesión síncrona de una
+    AsyncSession en servicio.CajeroAsync)
+    
+    Args:
+        objeto: Instancia ORM
+        
+    Returns:
+        Session: Sesión del objeto
+    """
+    return object_session(objeto) or db.session()
+
+
+def importar_modelos():
+    """
+    Importa todos los modelos para que SQLAlchemy los conozca y pueda
+    resolver sus relaciones (un modelo sin importar deja sin configurar
+    los mappers que lo referencian)
+    """
+    from modelo import (
+        Banco, Cliente, cuenta, Tarjeta, Operacion, RegistroOperaciones,
+        EstadisticaCuenta, PuntoControlSaldo, EventoOperacion, OffsetConsumidor,
+        EventoSesion, Casete, ParticionOperaciones, ContadorNumeracion
+    )
+    from servicio import Cajero
+
+
 def init_db(app):
     """
     Inicializa la base de datos con la aplicación Flask
@@ -24,13 +52,15 @@ def init_db(app):
     db.init_app(app)
     
     with app.app_context():
-        # Importar todos los modelos para que SQLAlchemy los conozca
-        from modelo import (
-            Banco, Cliente, Cuenta, Tarjeta, Operacion, RegistroOperaciones
-        )
+        importar_modelos()
         
         # Crear todas las tablas
         db.create_all()
+        
+        # Completar columnas e índices nuevos en BDs existentes
+        from data.migraciones import aplicar_migraciones
+        for cambio in aplicar_migraciones():
+            print(f" {cambio}")
         print(" Base de datos inicializada correctamente")
 
 
@@ -0,0 +1,542 @@
+"""
+Diario binario de operaciones (solo anexado) con lectura por mmap
+
+Con el diario activo, cada transacción que crea o modifica operaciones
+agrega al archivo un registro de ancho fijo por operación (id, tipo,
+cuenta, cajero, monto en centavos, fecha y estado), todos con una única
+escritura y con fsync, antes del commit en la BD (escritura anticipada):
+una caída después del commit no pierde operaciones confirmadas. Tras el
+commit se agrega una marca de confirmación de la transacción (o una de
+descarte si la BD la deshizo). Las marcas no se sincronizan: si una caída
+pierde la marca, los registros de esa transacción quedan "en duda" y
+confirmar_en_duda() los resuelve contra la BD. Los análisis solo usan
+registros confirmados.
+
+Cada proceso escritor debe usar su propio archivo: el número de
+transacción que une registros y marcas es un contador del escritor.
+
+La lectura mapea el archivo en memoria y lo expone como un arreglo
+estructurado de NumPy sin copiar los datos, para reconstruir saldos y
+contadores o alimentar análisis sin consultar la BD.
+
+Formato:
+    cabecera: MAGIA (8 bytes), versión (uint32), tamaño de registro (uint32)
+    registros: DTYPE_REGISTRO, little-endian, uno tras otro; en las marcas
+        id es el número de transacción y el resto de los campos vale 0
+
+La versión 1 escribía después del commit y sin marcas (sus registros
+tienen clase 0, ya confirmada); se sigue leyendo.
+"""
+import mmap
+import os
+import struct
+import threading
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+RUTA_DIARIO = 'diario_operaciones.bin'
+MAGIA = b'CTMDIAR\x00'
+VERSION = 2
+VERSIONES_LEGIBLES = (1, 2)
+
+# Código de cada tipo de operación (0 = otro)
+CODIGOS_TIPO = {
+    'deposito': 1,
+    'retiro': 2,
+    'pago_recibo': 3,
+    'compra_entradas': 4,
+    'consulta_saldo': 5,
+}
+
+# Clase de cada registro
+CLASE_CONFIRMADA = 0        # operación escrita tras el commit (versión 1)
+CLASE_PENDIENTE = 1         # operación escrita antes del commit
+CLASE_MARCA_COMMIT = 2      # la transacción se confirmó en la BD
+CLASE_MARCA_DESCARTE = 3    # la BD deshizo la transacción
+
+# Registro de ancho fijo (40 bytes)
+DTYPE_REGISTRO = np.dtype([
+    ('id', '<i8'),
+    ('fecha', '<M8[us]'),
+    ('centavos', '<i8'),
+    ('cuenta_id', '<i4'),
+    ('cajero_id', '<i4'),      # 0 si no hay cajero
+    ('tipo', 'u1'),
+    ('exitosa', 'u1'),
+    ('efectivo', 'u1'),        # 1 si es un depósito en efectivo
+    ('clase', 'u1'),
+    ('transaccion', '<u4'),
+])
+
+_CABECERA = struct.Struct('<8sII')
+_CLAVE_PENDIENTES = 'diario_pendientes'
+_CLAVE_TRANSACCION = 'diario_transaccion'
+
+
+class DiarioOperaciones:
+    """
+    Escritor del diario binario, enganchado a los eventos de la sesión
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, ruta: str = RUTA_DIARIO, sincronizar: bool = True):
+        self.ruta = ruta
+        self.sincronizar = sincronizar
+        self._lock = threading.Lock()
+        self._descriptor = os.open(ruta, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if os.fstat(self._descriptor).st_size == 0:
+            os.write(self._descriptor, _CABECERA.pack(MAGIA, VERSION, DTYPE_REGISTRO.itemsize))
+            self._transaccion = 0
+        else:
+            # Las transacciones siguen la numeración del archivo
+            existentes = leer_diario(ruta)
+            self._transaccion = int(existentes['transaccion'].max()) if len(existentes) else 0
+        self.registros = 0
+
+    @classmethod
+    def activar(cls, ruta: str = RUTA_DIARIO, sincronizar: bool = True) -> 'DiarioOperaciones':
+        """
+        Activa el diario (idempotente)
+
+        Args:
+            ruta: Archivo del diario (se crea si no existe)
+            sincronizar: Si es True (por defecto), fsync de los registros
+                antes del commit. Con False, una caída del sistema operativo
+                puede perder registros de transacciones ya confirmadas.
+
+        Returns:
+            DiarioOperaciones: Instancia activa
+        """
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls(ruta, sincronizar)
+                event.listen(Session, 'after_flush', _al_hacer_flush)
+                event.listen(Session, 'before_commit', _antes_de_confirmar)
+                event.listen(Session, 'after_commit', _despues_de_confirmar)
+                event.listen(Session, 'after_rollback', _despues_de_deshacer)
+            return cls._instance
+
+    @classmethod
+    def desactivar(cls) -> None:
+        """
+        Deja de escribir el diario y cierra el archivo
+        """
+        with cls._lock_instancia:
+            instancia, cls._instance = cls._instance, None
+            if instancia is None:
+                return
+            event.remove(Session, 'after_flush', _al_hacer_flush)
+            event.remove(Session, 'before_commit', _antes_de_confirmar)
+            event.remove(Session, 'after_commit', _despues_de_confirmar)
+            event.remove(Session, 'after_rollback', _despues_de_deshacer)
+        instancia.cerrar()
+
+    @classmethod
+    def get_instance(cls) -> Optional['DiarioOperaciones']:
+        """
+        Obtiene el diario activo
+
+        Returns:
+            DiarioOperaciones o None si el diario no está activo
+        """
+        return cls._instance
+
+    def escribir(self, registros: np.ndarray) -> int:
+        """
+        Agrega los registros de una transacción al final del archivo con
+        una sola escritura (y fsync si corresponde)
+
+        Args:
+            registros: Arreglo con dtype DTYPE_REGISTRO; se les asigna
+                clase pendiente y el número de transacción
+
+        Returns:
+            int: Número de transacción para su marca
+        """
+        with self._lock:
+            self._transaccion += 1
+            registros['clase'] = CLASE_PENDIENTE
+            registros['transaccion'] = self._transaccion
+            self._escribir(registros.tobytes())
+            if self.sincronizar:
+                os.fsync(self._descriptor)
+            self.registros += len(registros)
+            return self._transaccion
+
+    def marcar(self, transaccion: int, confirmada: bool) -> None:
+        """
+        Agrega la marca de confirmación o descarte de una transacción (sin
+        fsync: si se pierde, la transacción queda en duda)
+
+        Args:
+            transaccion: Número devuelto por escribir()
+            confirmada: Si la BD confirmó la transacción
+        """
+        marca = np.zeros(1, dtype=DTYPE_REGISTRO)
+        marca['id'] = transaccion
+        marca['clase'] = CLASE_MARCA_COMMIT if confirmada else CLASE_MARCA_DESCARTE
+        marca['transaccion'] = transaccion
+        with self._lock:
+            self._escribir(marca.tobytes())
+
+    def _escribir(self, datos: bytes) -> None:
+        """
+        Escribe bytes al final del archivo (con el lock tomado)
+
+        Args:
+            datos: Registros serializados
+        """
+        if self._descriptor is None:
+            raise OSError("El diario está cerrado")
+        escritos = os.write(self._descriptor, datos)
+        if escritos != len(datos):
+            raise OSError(f"Escritura incompleta en el diario ({escritos} de {len(datos)} bytes)")
+
+    def cerrar(self) -> None:
+        """
+        Cierra el archivo del diario
+        """
+        with self._lock:
+            if self._descriptor is not None:
+                os.close(self._descriptor)
+                self._descriptor = None
+
+
+def _a_registro(operacion) -> tuple:
+    """
+    Convierte una operación en una tupla con el orden de DTYPE_REGISTRO
+
+    Args:
+        operacion: Operación persistida (con id)
+
+    Returns:
+        tuple: Valores del registro
+    """
+    return (
+        operacion.id,
+        np.datetime64(operacion.fecha, 'us'),
+        operacion.monto.centavos if operacion.monto is not None else 0,
+        operacion.cuenta_id,
+        operacion.cajero_id or 0,
+        CODIGOS_TIPO.get(operacion.tipo, 0),
+        1 if operacion.exitosa else 0,
+        1 if getattr(operacion, 'tipo_deposito', None) == 'EFECTIVO' else 0,
+        CLASE_PENDIENTE,
+        0,
+    )
+
+
+def _al_hacer_flush(sesion, contexto) -> None:
+    """
+    Anota las operaciones creadas o modificadas en la transacción
+    """
+    from modelo.Operacion import Operacion
+
+    pendientes = sesion.info.setdefault(_CLAVE_PENDIENTES, set())
+    for objeto in list(sesion.new) + list(sesion.dirty):
+        if isinstance(objeto, Operacion):
+            pendientes.add(objeto)
+
+
+def _antes_de_confirmar(sesion) -> None:
+    """
+    Escribe en el diario los valores finales de las operaciones anotadas
+    (las de SAVEPOINTs deshechos ya no están en la sesión y se descartan)
+    antes de que la BD confirme la transacción
+    """
+    # También se dispara al liberar un SAVEPOINT: solo cuenta la externa
+    if sesion.in_nested_transaction():
+        return
+    if not sesion.info.get(_CLAVE_PENDIENTES) and not sesion.new and not sesion.dirty:
+        return
+    sesion.flush()
+
+    pendientes = sesion.info.pop(_CLAVE_PENDIENTES, set())
+    registros = [
+        _a_registro(operacion) for operacion in pendientes
+        if inspect(operacion).persistent and operacion in sesion
+    ]
+    diario = DiarioOperaciones.get_instance()
+    if registros and diario is not None:
+        registros.sort(key=lambda registro: registro[0])
+        # Si la escritura falla, la excepción impide el commit
+        sesion.info[_CLAVE_TRANSACCION] = diario.escribir(np.array(registros, dtype=DTYPE_REGISTRO))
+
+
+def _despues_de_confirmar(sesion) -> None:
+    """
+    Marca como confirmada la transacción escrita antes del commit
+    """
+    transaccion = sesion.info.pop(_CLAVE_TRANSACCION, None)
+    diario = DiarioOperaciones.get_instance()
+    if transaccion is not None and diario is not None:
+        diario.marcar(transaccion, confirmada=True)
+
+
+def _despues_de_deshacer(sesion) -> None:
+    """
+    Descarta lo anotado en una transacción deshecha y, si ya se había
+    escrito (falló el commit), la marca como descartada
+    """
+    sesion.info.pop(_CLAVE_PENDIENTES, None)
+    transaccion = sesion.info.pop(_CLAVE_TRANSACCION, None)
+    diario = DiarioOperaciones.get_instance()
+    if transaccion is not None and diario is not None:
+        diario.marcar(transaccion, confirmada=False)
+
+
+def _validar_cabecera(ruta: str) -> None:
+    """
+    Verifica que el archivo sea un diario compatible
+
+    Args:
+        ruta: Archivo del diario
+    """
+    with open(ruta, 'rb') as archivo:
+        cabecera = archivo.read(_CABECERA.size)
+    if len(cabecera) < _CABECERA.size:
+        raise ValueError(f"{ruta} no tiene cabecera de diario")
+    magia, version, tamano = _CABECERA.unpack(cabecera)
+    if magia != MAGIA:
+        raise ValueError(f"{ruta} no es un diario de operaciones")
+    if version not in VERSIONES_LEGIBLES or tamano != DTYPE_REGISTRO.itemsize:
+        raise ValueError(f"Versión de diario no soportada en {ruta}: {version} ({tamano} bytes)")
+
+
+def leer_diario(ruta: str = RUTA_DIARIO) -> np.ndarray:
+    """
+    Mapea el diario en memoria como arreglo estructurado (sin copiar)
+
+    Un registro incompleto al final (escritura interrumpida por una caída)
+    se ignora. La vista incluye marcas y registros sin confirmar; ver
+    registros_confirmados() y registros_en_duda().
+
+    Args:
+        ruta: Archivo del diario
+
+    Returns:
+        np.ndarray: Vista de solo lectura con dtype DTYPE_REGISTRO
+    """
+    _validar_cabecera(ruta)
+    tamano = os.path.getsize(ruta) - _CABECERA.size
+    cantidad = tamano // DTYPE_REGISTRO.itemsize
+    if cantidad == 0:
+        return np.empty(0, dtype=DTYPE_REGISTRO)
+
+    with open(ruta, 'rb') as archivo:
+        # El mapa sigue vivo mientras exista el arreglo que lo referencia
+        mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    return np.frombuffer(mapa, dtype=DTYPE_REGISTRO, count=cantidad, offset=_CABECERA.size)
+
+
+def _transacciones(registros: np.ndarray, clase: int) -> np.ndarray:
+    """
+    Números de transacción con una marca de la clase dada
+
+    Args:
+        registros: Registros del diario
+        clase: CLASE_MARCA_COMMIT o CLASE_MARCA_DESCARTE
+
+    Returns:
+        np.ndarray: Números de transacción ordenados
+    """
+    return np.unique(registros['transaccion'][registros['clase'] == clase])
+
+
+def registros_confirmados(registros: np.ndarray) -> np.ndarray:
+    """
+    Registros de operaciones cuya transacción se confirmó en la BD
+
+    Args:
+        registros: Registros del diario
+
+    Returns:
+        np.ndarray: Registros de operaciones (sin marcas)
+    """
+    clase = registros['clase']
+    confirmadas = np.isin(registros['transaccion'],
+                          _transacciones(registros, CLASE_MARCA_COMMIT))
+    return registros[(clase == CLASE_CONFIRMADA) | ((clase == CLASE_PENDIENTE) & confirmadas)]
+
+
+def registros_en_duda(registros: np.ndarray) -> np.ndarray:
+    """
+    Registros escritos antes del commit cuya transacción no tiene marca
+    (caída entre la escritura y la marca)
+
+    Args:
+        registros: Registros del diario
+
+    Returns:
+        np.ndarray: Registros de operaciones en duda
+    """
+    con_marca = np.union1d(_transacciones(registros, CLASE_MARCA_COMMIT),
+                           _transacciones(registros, CLASE_MARCA_DESCARTE))
+    pendientes = registros['clase'] == CLASE_PENDIENTE
+    return registros[pendientes & ~np.isin(registros['transaccion'], con_marca)]
+
+
+def confirmar_en_duda(registros: np.ndarray) -> np.ndarray:
+    """
+    Resuelve contra la BD los registros en duda: una operación en duda se
+    confirmó si existe en la BD con el mismo monto y estado. Debe llamarse
+    dentro de un contexto de aplicación Flask.
+
+    Args:
+        registros: Registros del diario
+
+    Returns:
+        np.ndarray: Registros en duda que la BD confirma
+    """
+    from data.database import db
+    from data.particiones import ParticionesOperaciones
+
+    en_duda = registros_en_duda(registros)
+    if not len(en_duda):
+        return en_duda
+
+    fechas = en_duda['fecha'].astype(object)
+    tablas = ParticionesOperaciones.get_instance().tablas_para_rango(min(fechas), max(fechas))
+    ids = [int(i) for i in np.unique(en_duda['id'])]
+    en_bd = {}
+    for tabla in tablas:
+        for fila in db.session.execute(
+            db.select(tabla.c.id, tabla.c.monto, tabla.c.exitosa).where(tabla.c.id.in_(ids))
+        ):
+            centavos = fila.monto.centavos if fila.monto is not None else 0
+            en_bd[fila.id] = (centavos, 1 if fila.exitosa else 0)
+
+    coincide = np.array([
+        en_bd.get(int(registro['id'])) == (int(registro['centavos']), int(registro['exitosa']))
+        for registro in en_duda
+    ], dtype=bool)
+    return en_duda[coincide]
+
+
+def _ultimas_versiones(registros: np.ndarray) -> np.ndarray:
+    """
+    Se queda con el último registro confirmado de cada operación (una
+    operación modificada después de confirmada aparece más de una vez)
+
+    Args:
+        registros: Registros del diario
+
+    Returns:
+        np.ndarray: Registros confirmados sin ids repetidos
+    """
+    registros = registros_confirmados(registros)
+    ids = registros['id'][::-1]
+    _, primeros = np.unique(ids, return_index=True)
+    return registros[::-1][primeros]
+
+
+def _sumar_por_id(ids: np.ndarray, montos: np.ndarray) -> Dict[int, 'Dinero']:
+    """
+    Suma montos en centavos agrupados por id
+
+    Args:
+        ids: Id de cada monto
+        montos: Centavos
+
+    Returns:
+        dict: id -> Dinero (solo ids con movimientos)
+    """
+    from modelo.Dinero import Dinero
+
+    if ids.size == 0:
+        return {}
+    sumas = np.rint(np.bincount(ids, weights=montos)).astype(np.int64)
+    presentes = np.flatnonzero(np.bincount(ids))
+    return {int(i): Dinero(int(sumas[i])) for i in presentes}
+
+
+def netos_por_cuenta(registros: np.ndarray) -> Dict[int, 'Dinero']:
+    """
+    Movimiento neto de saldo por cuenta (depósitos menos retiros, pagos y
+    compras exitosos)
+
+    Args:
+        registros: Registros del diario
+
+    Returns:
+        dict: cuenta_id -> neto
+    """
+    registros = _ultimas_versiones(registros)
+    signo = np.zeros(len(CODIGOS_TIPO) + 1, dtype=np.int64)
+    signo[CODIGOS_TIPO['deposito']] = 1
+    signo[[CODIGOS_TIPO['retiro'], CODIGOS_TIPO['pago_recibo'], CODIGOS_TIPO['compra_entradas']]] = -1
+
+    montos = signo[registros['tipo']] * registros['centavos'] * registros['exitosa']
+    mueve = montos != 0
+    return _sumar_por_id(registros['cuenta_id'][mueve].astype(np.int64), montos[mueve])
+
+
+def netos_por_cajero(registros: np.ndarray) -> Dict[int, 'Dinero']:
+    """
+    Movimiento neto de efectivo por cajero (depósitos en efectivo menos
+    retiros exitosos)
+
+    Args:
+        registros: Registros del diario
+
+    Returns:
+        dict: cajero_id -> neto
+    """
+    registros = _ultimas_versiones(registros)
+    tipo = registros['tipo']
+    signo = np.where((tipo == CODIGOS_TIPO['deposito']) & (registros['efectivo'] == 1), 1,
+                     np.where(tipo == CODIGOS_TIPO['retiro'], -1, 0))
+
+    montos = signo * registros['centavos'] * registros['exitosa']
+    mueve = (montos != 0) & (registros['cajero_id'] > 0)
+    return _sumar_por_id(registros['cajero_id'][mueve].astype(np.int64), montos[mueve])
+
+
+def retiros_del_dia(registros: np.ndarray, dia: Optional[date] = None) -> Dict[int, 'Dinero']:
+    """
+    Total retirado por cuenta en un día (contador diario de retiros)
+
+    Args:
+        registros: Registros del diario
+        dia: Día (por defecto hoy)
+
+    Returns:
+        dict: cuenta_id -> total retirado
+    """
+    dia = np.datetime64(dia or date.today(), 'D')
+    registros = _ultimas_versiones(registros)
+    del_dia = (
+        (registros['tipo'] == CODIGOS_TIPO['retiro'])
+        & (registros['exitosa'] == 1)
+        & (registros['fecha'].astype('M8[D]') == dia)
+    )
+    return _sumar_por_id(registros['cuenta_id'][del_dia].astype(np.int64),
+                         registros['centavos'][del_dia])
+
+
+def contar_por_tipo(registros: np.ndarray) -> Dict[str, Dict[str, int]]:
+    """
+    Operaciones exitosas y fallidas por tipo
+
+    Args:
+        registros: Registros del diario
+
+    Returns:
+        dict: tipo -> {'exitosas': n, 'fallidas': n}
+    """
+    registros = _ultimas_versiones(registros)
+    tamano = len(CODIGOS_TIPO) + 1
+    exitosas = np.bincount(registros['tipo'], weights=registros['exitosa'], minlength=tamano)
+    totales = np.bincount(registros['tipo'], minlength=tamano)
+
+    nombres: List[str] = ['otro'] + sorted(CODIGOS_TIPO, key=CODIGOS_TIPO.get)
+    return {
+        nombre: {'exitosas': int(exitosas[codigo]), 'fallidas': int(totales[codigo] - exitosas[codigo])}
+        for codigo, nombre in enumerate(nombres)
+        if totales[codigo]
+    }
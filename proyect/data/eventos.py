@@ -0,0 +1,403 @@
+"""
+Despacho de eventos de operaciones desde la bandeja de salida (outbox)
+
+RegistroOperaciones escribe un EventoOperacion en la misma transacción que
+cada operación (ver RegistroOperaciones.activar_outbox), así que solo se
+publican operaciones confirmadas. El despachador recorre la tabla por lotes
+en orden de id y entrega cada lote a cada destino; el offset de un destino
+(OffsetConsumidor) avanza solo tras una entrega exitosa, de modo que ante
+fallos o caídas los eventos se repiten (entrega al menos una vez) y los
+consumidores deben tolerar duplicados usando el id del evento.
+
+Los ids se asignan al insertar, no al confirmar: una transacción puede
+confirmar después que otra con un id mayor. Cada pasada registra como
+hueco del destino todo id menor que el último entregado que todavía no
+vio, y en las pasadas siguientes entrega los que aparecen (fuera de
+orden). Un hueco que no aparece en espera_huecos_s se da por deshecho.
+
+Los eventos que ya recibieron todos los destinos (hasta el menor offset o
+hueco pendiente) se eliminan de la tabla.
+"""
+import json
+import os
+import queue
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Union
+from data.database import db
+
+TAMANO_LOTE = 500
+INTERVALO_S = 0.5
+
+# Tiempo que se espera un id faltante antes de darlo por deshecho (debe
+# superar la duración de la transacción más larga que registra operaciones)
+ESPERA_HUECOS_S = 300.0
+
+# Huecos máximos por destino; si un salto de ids deja más, se descartan los
+# más antiguos
+MAX_HUECOS = 10000
+
+
+class DestinoEventos(ABC):
+    """
+    Destino de eventos; su nombre identifica su offset
+    """
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+
+    @abstractmethod
+    def entregar(self, eventos: List[dict]) -> None:
+        """
+        Entrega un lote de eventos (ordenados por id, aunque los de
+        huecos llegan después de otros con id mayor); si lanza una
+        excepción, el lote se reintenta completo
+
+        Args:
+            eventos: Eventos serializables a JSON
+        """
+        pass
+
+    def cerrar(self) -> None:
+        """Libera los recursos del destino"""
+        pass
+
+
+class DestinoArchivo(DestinoEventos):
+    """
+    Agrega los eventos a un archivo JSONL, sincronizado en disco por lote
+    """
+
+    def __init__(self, ruta: str, nombre: str = 'archivo'):
+        super().__init__(nombre)
+        self.ruta = ruta
+
+    def entregar(self, eventos: List[dict]) -> None:
+        datos = ''.join(json.dumps(evento, ensure_ascii=False) + '\n' for evento in eventos)
+        with open(self.ruta, 'a', encoding='utf-8') as archivo:
+            archivo.write(datos)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+
+
+class DestinoCola(DestinoEventos):
+    """
+    Pone los eventos en una cola del proceso (para consumidores en hilos)
+    """
+
+    def __init__(self, cola: Optional['queue.Queue'] = None, nombre: str = 'cola'):
+        super().__init__(nombre)
+        self.cola = cola if cola is not None else queue.Queue()
+
+    def entregar(self, eventos: List[dict]) -> None:
+        for evento in eventos:
+            self.cola.put(evento)
+
+
+class DestinoSocket(DestinoEventos):
+    """
+    Envía los eventos como JSON por líneas a un socket local: una ruta de
+    socket Unix o un par (host, puerto) TCP. La conexión se abre al primer
+    envío y se reabre tras un error.
+    """
+
+    def __init__(self, direccion: Union[str, Tuple[str, int]], nombre: str = 'socket',
+                 timeout: float = 5.0):
+        super().__init__(nombre)
+        self.direccion = direccion
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+
+    def _conectar(self) -> socket.socket:
+        if isinstance(self.direccion, str):
+            conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conexion.settimeout(self.timeout)
+            conexion.connect(self.direccion)
+        else:
+            conexion = socket.create_connection(self.direccion, timeout=self.timeout)
+        return conexion
+
+    def entregar(self, eventos: List[dict]) -> None:
+        datos = ''.join(json.dumps(evento, ensure_ascii=False) + '\n' for evento in eventos)
+        try:
+            if self._socket is None:
+                self._socket = self._conectar()
+            self._socket.sendall(datos.encode('utf-8'))
+        except OSError:
+            self.cerrar()
+            raise
+
+    def cerrar(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+def _a_evento(fila) -> dict:
+    """
+    Convierte una fila de la bandeja de salida en un evento serializable
+
+    Args:
+        fila: Fila de outbox_operaciones
+
+    Returns:
+        dict: Evento
+    """
+    return {
+        'id': fila.id,
+        'operacion_id': fila.operacion_id,
+        'tipo': fila.tipo,
+        'fecha': fila.fecha.isoformat(),
+        'monto': str(fila.monto) if fila.monto is not None else None,
+        'exitosa': bool(fila.exitosa),
+        'mensaje_error': fila.mensaje_error,
+        'cuenta_id': fila.cuenta_id,
+        'cajero_id': fila.cajero_id,
+    }
+
+
+class DespachadorEventos:
+    """
+    Hilo que entrega los eventos de la bandeja de salida a los destinos
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, app, destinos: List[DestinoEventos],
+                 tamano_lote: int = TAMANO_LOTE, intervalo_s: float = INTERVALO_S,
+                 espera_huecos_s: float = ESPERA_HUECOS_S):
+        if tamano_lote < 1:
+            raise ValueError("El tamaño de lote debe ser al menos 1")
+        if not destinos:
+            raise ValueError("Se necesita al menos un destino")
+        nombres = [destino.nombre for destino in destinos]
+        if len(set(nombres)) != len(nombres):
+            raise ValueError("Los nombres de los destinos deben ser únicos")
+        self.app = app
+        self.destinos = list(destinos)
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo_s
+        self.espera_huecos = espera_huecos_s
+        # (destino, id) -> instante (time.monotonic) en que se vio el hueco
+        self._huecos_vistos: Dict[Tuple[str, int], float] = {}
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.entregados = 0
+        self.fallos = 0
+        self.ultimo_error: Optional[str] = None
+
+    @classmethod
+    def activar(cls, destinos: List[DestinoEventos], app=None,
+                tamano_lote: int = TAMANO_LOTE, intervalo_s: float = INTERVALO_S,
+                espera_huecos_s: float = ESPERA_HUECOS_S) -> 'DespachadorEventos':
+        """
+        Arranca el despachador (idempotente)
+
+        Args:
+            destinos: Destinos de los eventos
+            app: Aplicación Flask (por defecto la del contexto actual)
+            tamano_lote: Eventos máximos por entrega
+            intervalo_s: Espera entre pasadas cuando no hay eventos
+            espera_huecos_s: Espera máxima de un id faltante
+
+        Returns:
+            DespachadorEventos: Instancia activa
+        """
+        from flask import current_app
+
+        with cls._lock_instancia:
+            if cls._instance is None:
+                app = app or current_app._get_current_object()
+                cls._instance = cls(app, destinos, tamano_lote, intervalo_s, espera_huecos_s)
+                cls._instance._iniciar()
+            return cls._instance
+
+    @classmethod
+    def desactivar(cls) -> None:
+        """
+        Detiene el despachador tras la pasada en curso
+        """
+        with cls._lock_instancia:
+            instancia, cls._instance = cls._instance, None
+        if instancia is not None:
+            instancia.cerrar()
+
+    @classmethod
+    def get_instance(cls) -> Optional['DespachadorEventos']:
+        """
+        Obtiene el despachador activo
+
+        Returns:
+            DespachadorEventos o None si no está activo
+        """
+        return cls._instance
+
+    def _iniciar(self) -> None:
+        """
+        Arranca el hilo despachador
+        """
+        self._hilo = threading.Thread(
+            target=self._bucle, name="despachador-eventos", daemon=True
+        )
+        self._hilo.start()
+
+    def cerrar(self) -> None:
+        """
+        Detiene el hilo y cierra los destinos
+        """
+        if self._hilo is not None:
+            self._detener.set()
+            self._hilo.join()
+            self._hilo = None
+        for destino in self.destinos:
+            destino.cerrar()
+
+    def estadisticas(self) -> dict:
+        """
+        Obtiene los contadores del despachador
+
+        Returns:
+            dict: Eventos entregados, entregas fallidas y último error
+        """
+        with self._lock:
+            return {
+                'entregados': self.entregados,
+                'fallos': self.fallos,
+                'ultimo_error': self.ultimo_error,
+            }
+
+    def _bucle(self) -> None:
+        """
+        Despacha mientras haya eventos; si no, espera el intervalo
+        """
+        with self.app.app_context():
+            try:
+                while not self._detener.is_set():
+                    if self.despachar() == 0:
+                        self._detener.wait(self.intervalo)
+            finally:
+                db.session.remove()
+
+    def despachar(self) -> int:
+        """
+        Hace una pasada: entrega a cada destino los eventos de sus huecos
+        que ya aparecieron y un lote de eventos posteriores a su offset, y
+        elimina los ya recibidos por todos
+
+        Returns:
+            int: Eventos entregados en la pasada (sumando destinos)
+        """
+        from modelo.EventoOperacion import EventoOperacion
+        from modelo.OffsetConsumidor import OffsetConsumidor
+
+        tabla = EventoOperacion.__table__
+        entregados = 0
+
+        for destino in self.destinos:
+            try:
+                offset, huecos = OffsetConsumidor.obtener_con_huecos(destino.nombre)
+                tardias = []
+                if huecos:
+                    tardias = db.session.execute(
+                        db.select(tabla).where(tabla.c.id.in_(huecos)).order_by(tabla.c.id)
+                    ).all()
+                filas = db.session.execute(
+                    db.select(tabla)
+                    .where(tabla.c.id > offset)
+                    .order_by(tabla.c.id)
+                    .limit(self.tamano_lote)
+                ).all()
+                db.session.commit()
+
+                nuevo_offset = filas[-1].id if filas else offset
+                pendientes = self._actualizar_huecos(
+                    destino.nombre, huecos, [fila.id for fila in tardias],
+                    offset, [fila.id for fila in filas]
+                )
+                if not tardias and not filas:
+                    if pendientes != huecos:
+                        OffsetConsumidor.avanzar(destino.nombre, offset, pendientes)
+                        db.session.commit()
+                    continue
+
+                destino.entregar([_a_evento(fila) for fila in tardias + filas])
+
+                OffsetConsumidor.avanzar(destino.nombre, nuevo_offset, pendientes)
+                db.session.commit()
+                entregados += len(tardias) + len(filas)
+            except Exception as e:
+                db.session.rollback()
+                with self._lock:
+                    self.fallos += 1
+                    self.ultimo_error = f"{destino.nombre}: {e}"
+
+        with self._lock:
+            self.entregados += entregados
+
+        if entregados:
+            self._depurar()
+        return entregados
+
+    def _actualizar_huecos(self, destino: str, huecos: List[int], aparecidos: List[int],
+                           offset: int, ids: List[int]) -> List[int]:
+        """
+        Calcula los huecos de un destino tras una pasada: quita los que
+        aparecieron o vencieron y agrega los ids faltantes del lote nuevo
+
+        Args:
+            destino: Nombre del destino
+            huecos: Huecos antes de la pasada
+            aparecidos: Ids de huecos que aparecieron en la pasada
+            offset: Offset antes de la pasada
+            ids: Ids del lote nuevo, ordenados
+
+        Returns:
+            List[int]: Huecos pendientes, ordenados
+        """
+        ahora = time.monotonic()
+        pendientes = set(huecos) - set(aparecidos)
+        # Un destino nuevo empieza en el primer evento que encuentra (los
+        # anteriores pueden estar depurados)
+        anterior = offset if offset or huecos or not ids else ids[0] - 1
+        for id_evento in ids:
+            pendientes.update(range(anterior + 1, id_evento))
+            anterior = id_evento
+
+        for id_evento in set(huecos) - pendientes:
+            self._huecos_vistos.pop((destino, id_evento), None)
+        for id_evento in list(pendientes):
+            visto = self._huecos_vistos.setdefault((destino, id_evento), ahora)
+            if ahora - visto >= self.espera_huecos:
+                # Transacción deshecha (o más larga que la espera)
+                pendientes.discard(id_evento)
+                del self._huecos_vistos[(destino, id_evento)]
+
+        pendientes = sorted(pendientes)
+        for id_evento in pendientes[:-MAX_HUECOS]:
+            self._huecos_vistos.pop((destino, id_evento), None)
+        return pendientes[-MAX_HUECOS:]
+
+    def _depurar(self) -> None:
+        """
+        Elimina los eventos que ya recibieron todos los destinos (sin pasar
+        del menor hueco pendiente, que puede confirmar más tarde)
+        """
+        from modelo.EventoOperacion import EventoOperacion
+        from modelo.OffsetConsumidor import OffsetConsumidor
+
+        minimo = OffsetConsumidor.minimo_pendiente(destino.nombre for destino in self.destinos)
+        try:
+            db.session.execute(
+                db.delete(EventoOperacion).where(EventoOperacion.id <= minimo)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception as e:
+            # Se reintenta en la próxima pasada con entregas
+            db.session.rollback()
+            with self._lock:
+                self.fallos += 1
+                self.ultimo_error = f"depuración: {e}"
@@ -0,0 +1,178 @@
+"""
+Migraciones de esquema para bases de datos existentes
+
+db.create_all() solo crea las tablas que faltan: no agrega columnas ni
+índices nuevos a tablas que ya existen. aplicar_migraciones() completa esas
+diferencias y puede ejecutarse varias veces sin efecto adicional.
+"""
+from typing import List
+from sqlalchemy import inspect
+from data.database import db
+
+
+def _agregar_columnas_faltantes(conexion, tabla, existentes: set) -> List[str]:
+    """
+    Agrega a una tabla las columnas del modelo que no existen en la BD.
+    Se crean como NULL y se rellenan con el default del modelo si lo tiene.
+
+    Args:
+        conexion: Conexión abierta en transacción
+        tabla: Tabla del modelo
+        existentes: Nombres de columnas presentes en la BD
+
+    Returns:
+        List[str]: Descripción de los cambios aplicados
+    """
+    dialecto = conexion.dialect
+    preparador = dialecto.identifier_preparer
+    cambios = []
+
+    for columna in tabla.columns:
+        if columna.name in existentes:
+            continue
+
+        conexion.exec_driver_sql(
+            f"ALTER TABLE {preparador.format_table(tabla)} "
+            f"ADD COLUMN {preparador.format_column(columna)} "
+            f"{columna.type.compile(dialect=dialecto)}"
+        )
+
+        if columna.default is not None and columna.default.is_scalar:
+            conexion.execute(
+                tabla.update()
+                .where(columna.is_(None))
+                .values({columna: columna.default.arg})
+            )
+
+        cambios.append(f"Columna {tabla.name}.{columna.name} agregada")
+
+    return cambios
+
+
+def _crear_indices_faltantes(conexion, tabla, existentes: set) -> List[str]:
+    """
+    Crea los índices declarados en el modelo que no existen en la BD
+
+    Args:
+        conexion: Conexión abierta en transacción
+        tabla: Tabla del modelo
+        existentes: Nombres de índices presentes en la BD
+
+    Returns:
+        List[str]: Descripción de los cambios aplicados
+    """
+    cambios = []
+
+    for indice in tabla.indexes:
+        if indice.name in existentes:
+            continue
+        indice.create(bind=conexion)
+        cambios.append(f"Índice {indice.name} creado en {tabla.name}")
+
+    return cambios
+
+
+def _activar_autoincremento_sqlite(conexion, tabla, minimo_id: int) -> List[str]:
+    """
+    Reconstruye en SQLite una tabla declarada con sqlite_autoincrement que
+    se creó sin AUTOINCREMENT (SQLite no permite agregarlo con ALTER
+    TABLE): copia las filas a una tabla nueva, elimina la anterior y
+    renombra la nueva. El contador arranca en el mayor de minimo_id y el
+    id más alto copiado.
+
+    Args:
+        conexion: Conexión abierta en transacción
+        tabla: Tabla del modelo
+        minimo_id: Último id ya asignado que no debe volver a usarse
+
+    Returns:
+        List[str]: Descripción de los cambios aplicados
+    """
+    from sqlalchemy import MetaData
+    from sqlalchemy.schema import CreateTable
+
+    if conexion.dialect.name != 'sqlite' or not tabla.dialect_options['sqlite']['autoincrement']:
+        return []
+    sql = conexion.execute(
+        db.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :nombre"),
+        {'nombre': tabla.name}
+    ).scalar()
+    if sql is None or 'AUTOINCREMENT' in sql.upper():
+        return []
+
+    # La tabla nueva se crea sin índices (sus nombres chocarían con los de
+    # la anterior) y se le agregan después de renombrarla
+    nueva = tabla.to_metadata(MetaData(), name=f"{tabla.name}_migracion")
+    columnas = ', '.join(f'"{columna.name}"' for columna in tabla.columns)
+    conexion.execute(CreateTable(nueva))
+    conexion.exec_driver_sql(
+        f'INSERT INTO "{nueva.name}" ({columnas}) SELECT {columnas} FROM "{tabla.name}"'
+    )
+    conexion.exec_driver_sql(f'DROP TABLE "{tabla.name}"')
+    conexion.exec_driver_sql(f'ALTER TABLE "{nueva.name}" RENAME TO "{tabla.name}"')
+    for indice in tabla.indexes:
+        indice.create(bind=conexion)
+
+    secuencia = conexion.exec_driver_sql(
+        "SELECT seq FROM sqlite_sequence WHERE name = ?", (tabla.name,)
+    ).scalar()
+    if secuencia is None:
+        conexion.exec_driver_sql(
+            "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (tabla.name, minimo_id)
+        )
+    elif secuencia < minimo_id:
+        conexion.exec_driver_sql(
+            "UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (minimo_id, tabla.name)
+        )
+
+    return [f"Tabla {tabla.name} reconstruida con AUTOINCREMENT"]
+
+
+def aplicar_migraciones() -> List[str]:
+    """
+    Crea tablas, columnas e índices que falten respecto a los modelos.
+    Debe llamarse dentro de un contexto de aplicación Flask.
+
+    Returns:
+        List[str]: Descripción de los cambios aplicados
+    """
+    from data.particiones import ParticionesOperaciones
+
+    cambios = []
+
+    # Las tablas frías de operaciones siguen el esquema de la tabla caliente
+    cambios += [
+        f"Tabla {nombre} registrada en el catálogo de particiones"
+        for nombre in ParticionesOperaciones.get_instance().registrar_existentes()
+    ]
+    particiones = ParticionesOperaciones.get_instance().tablas_frias()
+
+    with db.engine.begin() as conexion:
+        db.metadata.create_all(bind=conexion)
+        inspector = inspect(conexion)
+
+        for tabla in [*db.metadata.tables.values(), *particiones]:
+            columnas = {c['name'] for c in inspector.get_columns(tabla.name)}
+            indices = {i['name'] for i in inspector.get_indexes(tabla.name)}
+
+            cambios += _agregar_columnas_faltantes(conexion, tabla, columnas)
+            cambios += _crear_indices_faltantes(conexion, tabla, indices)
+
+        # Los ids de eventos no pueden bajar de los offsets de los
+        # consumidores, aunque la bandeja de salida esté vacía
+        offsets = db.metadata.tables['offsets_consumidor']
+        cambios += _activar_autoincremento_sqlite(
+            conexion, db.metadata.tables['outbox_operaciones'],
+            conexion.execute(db.select(db.func.max(offsets.c.ultimo_id))).scalar() or 0
+        )
+
+        if "Columna cajeros.tiene_casetes agregada" in cambios:
+            # Cajeros que ya tenían casetes antes de existir la columna
+            cajeros, casetes = db.metadata.tables['cajeros'], db.metadata.tables['casetes']
+            conexion.execute(
+                cajeros.update()
+                .where(cajeros.c.id.in_(db.select(casetes.c.cajero_id)))
+                .values(tiene_casetes=True)
+            )
+
+    return cambios
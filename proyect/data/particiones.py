@@ -0,0 +1,448 @@
+"""
+Partición en caliente/frío de la tabla de operaciones
+
+La tabla 'operaciones' (caliente) conserva los meses recientes, que son los
+que usan el cajero y las consultas habituales. mover_a_frio() traslada los
+meses anteriores, por lotes, a tablas mensuales con el mismo esquema
+(operaciones_<año>_<mes>), y tablas_para_rango() indica qué tablas pueden
+contener operaciones de un rango de fechas, de modo que RegistroOperaciones
+solo consulte esas.
+
+Las tablas frías existentes se registran en el catálogo
+'particiones_operaciones' (ParticionOperaciones). Cada proceso guarda el
+catálogo en memoria y lo relee al trasladar o eliminar una tabla, o pasados
+VIGENCIA_CATALOGO_S segundos: una tabla creada o eliminada por otro proceso
+se ve, como mucho, tras ese intervalo (o antes con invalidar_catalogo()).
+
+Las operaciones leídas de tablas frías son de solo lectura: su fila ya no
+está en 'operaciones'.
+"""
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import inspect
+from data.database import db
+
+PREFIJO = 'operaciones_'
+MESES_CALIENTES = 3
+TAMANO_LOTE = 5000
+# Segundos que se usa el catálogo en memoria antes de releerlo
+VIGENCIA_CATALOGO_S = 30.0
+
+_PATRON = re.compile(rf"^{PREFIJO}(\d{{4}})_(\d{{2}})$")
+
+# Fecha mínima de la tabla caliente aún no leída (None es tabla vacía)
+_SIN_LEER = object()
+
+# Las tablas frías no forman parte de los modelos (create_all no las crea)
+metadata_particiones = db.MetaData()
+
+
+def _inicio_mes(anio: int, mes: int) -> datetime:
+    return datetime(anio, mes, 1)
+
+
+def _mes_siguiente(anio: int, mes: int) -> Tuple[int, int]:
+    return (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+
+
+def _restar_meses(anio: int, mes: int, meses: int) -> Tuple[int, int]:
+    total = anio * 12 + (mes - 1) - meses
+    return total // 12, total % 12 + 1
+
+
+class ParticionesOperaciones:
+    """
+    Registro de las tablas frías mensuales de operaciones
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, vigencia_catalogo_s: float = VIGENCIA_CATALOGO_S):
+        self._tablas: Dict[Tuple[int, int], 'db.Table'] = {}
+        self._fecha_minima_caliente = _SIN_LEER
+        self._vigencia_catalogo_s = vigencia_catalogo_s
+        # Momento (time.monotonic) de la última lectura del catálogo
+        self._catalogo_leido: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'ParticionesOperaciones':
+        """
+        Obtiene la instancia compartida
+
+        Returns:
+            ParticionesOperaciones: Instancia única
+        """
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @staticmethod
+    def tabla_caliente() -> 'db.Table':
+        """
+        Tabla de operaciones recientes (la mapeada por Operacion)
+
+        Returns:
+            Table: Tabla 'operaciones'
+        """
+        from modelo.Operacion import Operacion
+        return Operacion.__table__
+
+    def _definir_tabla(self, anio: int, mes: int) -> 'db.Table':
+        """
+        Define (sin crear) la tabla fría de un mes, con las columnas e
+        índices de la tabla caliente
+
+        Args:
+            anio: Año
+            mes: Mes
+
+        Returns:
+            Table: Tabla del mes
+        """
+        nombre = f"{PREFIJO}{anio:04d}_{mes:02d}"
+        if nombre in metadata_particiones.tables:
+            return metadata_particiones.tables[nombre]
+
+        caliente = self.tabla_caliente()
+        tabla = db.Table(nombre, metadata_particiones, *[
+            db.Column(c.name, c.type, primary_key=c.primary_key,
+                      nullable=c.nullable, autoincrement=False)
+            for c in caliente.columns
+        ])
+        for indice in caliente.indexes:
+            db.Index(
+                indice.name.replace(caliente.name, nombre, 1),
+                *[tabla.c[columna.name] for columna in indice.columns]
+            )
+        return tabla
+
+    @staticmethod
+    def _meses_catalogo(conexion) -> set:
+        """
+        Lee del catálogo los meses con tabla fría
+
+        Args:
+            conexion: Conexión abierta
+
+        Returns:
+            set: (año, mes) de cada tabla fría
+        """
+        from modelo.ParticionOperaciones import ParticionOperaciones
+
+        catalogo = ParticionOperaciones.__table__
+        return {
+            (fila.anio, fila.mes)
+            for fila in conexion.execute(db.select(catalogo.c.anio, catalogo.c.mes))
+        }
+
+    def _descubrir(self, forzar: bool = False) -> None:
+        """
+        Sincroniza las tablas frías conocidas con el catálogo de la BD (en
+        una conexión propia, para no abrir una transacción en la sesión),
+        si la copia en memoria venció o se invalidó
+
+        Args:
+            forzar: Releer el catálogo aunque la copia siga vigente
+        """
+        ahora = time.monotonic()
+        if (not forzar and self._catalogo_leido is not None
+                and ahora - self._catalogo_leido < self._vigencia_catalogo_s):
+            return
+
+        with db.engine.connect() as conexion:
+            meses = self._meses_catalogo(conexion)
+        for mes in self._tablas.keys() - meses:
+            del self._tablas[mes]
+        for mes in meses - self._tablas.keys():
+            self._tablas[mes] = self._definir_tabla(*mes)
+        self._catalogo_leido = ahora
+
+    def invalidar_catalogo(self) -> None:
+        """
+        Descarta la copia en memoria del catálogo (p. ej. tras trasladar o
+        eliminar tablas desde otro proceso): la próxima consulta lo relee
+        """
+        with self._lock:
+            self._catalogo_leido = None
+            self._fecha_minima_caliente = _SIN_LEER
+
+    def registrar_existentes(self) -> List[str]:
+        """
+        Agrega al catálogo las tablas frías que existen en la BD sin estar
+        registradas (creadas antes del catálogo)
+
+        Returns:
+            List[str]: Nombres de las tablas registradas
+        """
+        from modelo.ParticionOperaciones import ParticionOperaciones
+
+        catalogo = ParticionOperaciones.__table__
+        registradas = []
+        with self._lock, db.engine.begin() as conexion:
+            catalogo.create(bind=conexion, checkfirst=True)
+            conocidas = set(conexion.execute(db.select(catalogo.c.nombre)).scalars())
+            for nombre in inspect(conexion).get_table_names():
+                coincidencia = _PATRON.match(nombre)
+                if coincidencia and nombre not in conocidas:
+                    conexion.execute(catalogo.insert().values(
+                        anio=int(coincidencia.group(1)), mes=int(coincidencia.group(2)),
+                        nombre=nombre, creada=datetime.now()
+                    ))
+                    registradas.append(nombre)
+            self._catalogo_leido = None
+        return registradas
+
+    def tablas_frias(self) -> List['db.Table']:
+        """
+        Obtiene las tablas frías, de la más reciente a la más antigua
+
+        Returns:
+            List[Table]: Tablas mensuales
+        """
+        with self._lock:
+            self._descubrir()
+            return [self._tablas[mes] for mes in sorted(self._tablas, reverse=True)]
+
+    def _get_fecha_minima_caliente(self) -> Optional[datetime]:
+        """
+        Fecha de la operación más antigua de la tabla caliente (con el
+        índice por fecha). Se guarda hasta el próximo traslado: las
+        operaciones nuevas son siempre posteriores, así que un valor
+        desactualizado solo hace incluir la tabla caliente de más.
+
+        Returns:
+            datetime o None si la tabla caliente está vacía
+        """
+        if self._fecha_minima_caliente is _SIN_LEER:
+            caliente = self.tabla_caliente()
+            self._fecha_minima_caliente = db.session.execute(
+                db.select(db.func.min(caliente.c.fecha))
+            ).scalar()
+        return self._fecha_minima_caliente
+
+    def tablas_para_rango(self, inicio: Optional[datetime] = None,
+                          fin: Optional[datetime] = None,
+                          conexion=None) -> List['db.Table']:
+        """
+        Tablas que pueden contener operaciones del rango [inicio, fin],
+        de la más reciente a la más antigua
+
+        Args:
+            inicio: Fecha inicial (None = sin límite)
+            fin: Fecha final (None = sin límite)
+            conexion: Conexión de una lectura consistente; el catálogo se
+                lee en ella para que las tablas coincidan con lo que ve
+
+        Returns:
+            List[Table]: Tabla caliente (si aplica) y tablas frías que se solapan
+        """
+        with self._lock:
+            if conexion is None:
+                self._descubrir()
+                frias = dict(self._tablas)
+            else:
+                frias = {mes: self._definir_tabla(*mes) for mes in self._meses_catalogo(conexion)}
+            tablas = []
+
+            if not frias or fin is None:
+                tablas.append(self.tabla_caliente())
+            else:
+                if conexion is None:
+                    minima = self._get_fecha_minima_caliente()
+                else:
+                    caliente = self.tabla_caliente()
+                    minima = conexion.execute(db.select(db.func.min(caliente.c.fecha))).scalar()
+                if minima is None or fin >= minima:
+                    tablas.append(self.tabla_caliente())
+
+            for mes in sorted(frias, reverse=True):
+                desde = _inicio_mes(*mes)
+                hasta = _inicio_mes(*_mes_siguiente(*mes))
+                if (fin is None or desde <= fin) and (inicio is None or inicio < hasta):
+                    tablas.append(frias[mes])
+            return tablas
+
+    def mover_a_frio(self, meses_calientes: int = MESES_CALIENTES,
+                     tamano_lote: int = TAMANO_LOTE) -> Dict[str, int]:
+        """
+        Traslada a tablas mensuales las operaciones anteriores a los últimos
+        meses_calientes meses (incluido el actual), por lotes de id y
+        confirmando cada lote
+
+        Args:
+            meses_calientes: Meses que permanecen en la tabla caliente
+            tamano_lote: Operaciones máximas por lote
+
+        Returns:
+            dict: Tabla fría -> operaciones trasladadas
+        """
+        if meses_calientes < 1:
+            raise ValueError("Debe quedar al menos un mes en la tabla caliente")
+
+        hoy = datetime.now()
+        corte = _inicio_mes(*_restar_meses(hoy.year, hoy.month, meses_calientes - 1))
+        caliente = self.tabla_caliente()
+        movidas = {}
+
+        # Donde el próximo id sale del máximo de la tabla, la fila con el
+        # id más alto se queda en caliente para que no se reutilicen ids
+        # ya trasladados
+        conservar = None
+        if self._reutiliza_ids(caliente):
+            conservar = db.session.execute(db.select(db.func.max(caliente.c.id))).scalar()
+
+        while True:
+            mas_antigua = db.session.execute(
+                db.select(db.func.min(caliente.c.fecha))
+                .where(caliente.c.fecha < corte, caliente.c.id != conservar)
+            ).scalar()
+            if mas_antigua is None:
+                break
+
+            mes = (mas_antigua.year, mas_antigua.month)
+            tabla = self._crear_tabla(*mes)
+            desde = _inicio_mes(*mes)
+            hasta = min(_inicio_mes(*_mes_siguiente(*mes)), corte)
+            movidas[tabla.name] = self._mover_mes(caliente, tabla, desde, hasta,
+                                                  tamano_lote, conservar)
+
+        # Los objetos de operaciones trasladadas ya no tienen fila caliente
+        db.session.expire_all()
+        with self._lock:
+            self._fecha_minima_caliente = _SIN_LEER
+        return movidas
+
+    def _crear_tabla(self, anio: int, mes: int) -> 'db.Table':
+        """
+        Crea (si no existe) y registra la tabla fría de un mes
+
+        Args:
+            anio: Año
+            mes: Mes
+
+        Returns:
+            Table: Tabla del mes
+        """
+        from modelo.ParticionOperaciones import ParticionOperaciones
+
+        catalogo = ParticionOperaciones.__table__
+        with self._lock:
+            self._descubrir(forzar=True)
+            tabla = self._tablas.get((anio, mes))
+            if tabla is None:
+                tabla = self._definir_tabla(anio, mes)
+                with db.engine.begin() as conexion:
+                    tabla.create(bind=conexion, checkfirst=True)
+                    conexion.execute(catalogo.insert().values(
+                        anio=anio, mes=mes, nombre=tabla.name, creada=datetime.now()
+                    ))
+                self._tablas[(anio, mes)] = tabla
+            return tabla
+
+    @staticmethod
+    def _reutiliza_ids(caliente) -> bool:
+        """
+        Indica si la BD asigna el próximo id como máximo + 1 (y reutilizaría
+        ids si se trasladan las filas con los ids más altos): SQLite sin
+        AUTOINCREMENT (tablas creadas antes de activarlo) y MySQL, que antes
+        de 8.0 recalcula el contador al reiniciar
+
+        Args:
+            caliente: Tabla de operaciones
+
+        Returns:
+            bool: True si hay que conservar la fila con el id más alto
+        """
+        dialecto = db.engine.dialect.name
+        if dialecto in ('mysql', 'mariadb'):
+            return True
+        if dialecto != 'sqlite':
+            return False
+        sql = db.session.execute(
+            db.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :nombre"),
+            {'nombre': caliente.name}
+        ).scalar()
+        return 'AUTOINCREMENT' not in (sql or '').upper()
+
+    @staticmethod
+    def _mover_mes(caliente, tabla, desde: datetime, hasta: datetime,
+                   tamano_lote: int, conservar: Optional[int] = None) -> int:
+        """
+        Copia y elimina de la tabla caliente las operaciones de [desde, hasta)
+
+        Args:
+            caliente: Tabla de origen
+            tabla: Tabla fría de destino
+            desde: Fecha inicial (incluida)
+            hasta: Fecha final (excluida)
+            tamano_lote: Operaciones máximas por lote
+            conservar: Id que no se traslada (ver _reutiliza_ids)
+
+        Returns:
+            int: Operaciones trasladadas
+        """
+        en_rango = (caliente.c.fecha >= desde, caliente.c.fecha < hasta,
+                    caliente.c.id != conservar)
+        columnas = [c.name for c in caliente.columns]
+        movidas = 0
+
+        while True:
+            ids = db.session.execute(
+                db.select(caliente.c.id).where(*en_rango)
+                .order_by(caliente.c.id).limit(tamano_lote)
+            ).scalars().all()
+            if not ids:
+                return movidas
+
+            lote = (*en_rango, caliente.c.id.between(ids[0], ids[-1]))
+            try:
+                db.session.execute(tabla.insert().from_select(
+                    columnas, db.select(*[caliente.c[c] for c in columnas]).where(*lote)
+                ))
+                resultado = db.session.execute(db.delete(caliente).where(*lote))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            movidas += resultado.rowcount
+
+    def eliminar_si_vencida(self, tabla, fecha_limite: datetime) -> bool:
+        """
+        Elimina una tabla fría vacía cuyo mes termina antes de la fecha
+        límite de una purga
+
+        Args:
+            tabla: Tabla purgada
+            fecha_limite: Fecha límite de la purga
+
+        Returns:
+            bool: True si la tabla se eliminó
+        """
+        coincidencia = _PATRON.match(tabla.name)
+        if coincidencia is None:
+            return False
+
+        from modelo.ParticionOperaciones import ParticionOperaciones
+
+        mes = (int(coincidencia.group(1)), int(coincidencia.group(2)))
+        if _inicio_mes(*_mes_siguiente(*mes)) > fecha_limite:
+            return False
+
+        catalogo = ParticionOperaciones.__table__
+        with self._lock:
+            hay_filas = db.session.execute(db.select(tabla.c.id).limit(1)).first()
+            db.session.commit()
+            if hay_filas is not None:
+                return False
+            with db.engine.begin() as conexion:
+                conexion.execute(db.delete(catalogo).where(catalogo.c.nombre == tabla.name))
+                tabla.drop(bind=conexion, checkfirst=True)
+            self._tablas.pop(mes, None)
+            self._catalogo_leido = None
+            metadata_particiones.remove(tabla)
+            return True
@@ -0,0 +1,144 @@
+"""
+Verificación de planes de ejecución de las consultas del registro
+
+Ejecuta EXPLAIN sobre cada consulta de RegistroOperaciones y falla si
+alguna recorre completa la tabla de operaciones en lugar de usar un índice.
+
+Uso (desde la carpeta proyect):
+    python -m data.planes_consulta sqlite:///banco.db
+"""
+import re
+from typing import Dict, List
+from data.database import db
+
+# Tablas que no deben recorrerse completas (incluye sus particiones
+# mensuales operaciones_<año>_<mes>, ver data.particiones)
+TABLAS_VIGILADAS = ('operaciones',)
+_SUFIJO_PARTICION = r"(_\d{4}_\d{2})?"
+
+
+def _sql_literal(consulta) -> str:
+    """
+    Compila una consulta con los parámetros incrustados
+
+    Args:
+        consulta: Query o Select de SQLAlchemy
+
+    Returns:
+        str: SQL listo para anteponer EXPLAIN
+    """
+    sentencia = getattr(consulta, 'statement', consulta)
+    return str(sentencia.compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={'literal_binds': True}
+    ))
+
+
+def explicar(consulta) -> List[str]:
+    """
+    Obtiene el plan de ejecución de una consulta
+
+    Args:
+        consulta: Query o Select de SQLAlchemy
+
+    Returns:
+        List[str]: Líneas del plan
+    """
+    dialecto = db.engine.dialect.name
+    sql = _sql_literal(consulta)
+
+    with db.engine.connect() as conexion:
+        if dialecto == 'sqlite':
+            filas = conexion.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+            return [fila[-1] for fila in filas]
+
+        if dialecto == 'postgresql':
+            # Sin esta opción el planificador prefiere Seq Scan en tablas
+            # pequeñas aunque exista un índice utilizable
+            conexion.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            return [fila[0] for fila in conexion.exec_driver_sql(f"EXPLAIN {sql}")]
+
+        if dialecto in ('mysql', 'mariadb'):
+            filas = conexion.exec_driver_sql(f"EXPLAIN {sql}").mappings()
+            return [f"{fila['table']} type={fila['type']} key={fila['key']}" for fila in filas]
+
+    raise ValueError(f"Dialecto no soportado para EXPLAIN: {dialecto}")
+
+
+def es_escaneo_completo(plan: List[str]) -> bool:
+    """
+    Indica si un plan recorre completa alguna tabla vigilada
+
+    Args:
+        plan: Líneas devueltas por explicar()
+
+    Returns:
+        bool: True si hay un recorrido completo de tabla
+    """
+    for linea in plan:
+        for tabla in TABLAS_VIGILADAS:
+            # SQLite: "SCAN operaciones" sin índice
+            if re.match(rf"^SCAN {tabla}{_SUFIJO_PARTICION}\b", linea) and 'USING' not in linea:
+                return True
+            # PostgreSQL
+            if re.search(rf"Seq Scan on {tabla}{_SUFIJO_PARTICION}\b", linea):
+                return True
+            # MySQL / MariaDB
+            if re.match(rf"^{tabla}{_SUFIJO_PARTICION} ", linea) and 'type=ALL' in linea:
+                return True
+    return False
+
+
+def verificar_planes_registro(cuenta_id: int = 1, cajero_id: int = 1) -> Dict[str, List[str]]:
+    """
+    Revisa el plan de cada consulta de RegistroOperaciones
+
+    Args:
+        cuenta_id: Id de cuenta de ejemplo
+        cajero_id: Id de cajero de ejemplo
+
+    Returns:
+        dict: Nombre de consulta -> plan
+
+    Raises:
+        RuntimeError: Si alguna consulta hace un recorrido completo
+    """
+    from modelo.RegistroOperaciones import RegistroOperaciones
+
+    consultas = RegistroOperaciones.get_instance().consultas_registradas(cuenta_id, cajero_id)
+    planes = {nombre: explicar(consulta) for nombre, consulta in consultas.items()}
+
+    fallidas = [nombre for nombre, plan in planes.items() if es_escaneo_completo(plan)]
+    if fallidas:
+        detalle = '\n'.join(f"  {nombre}: {' | '.join(planes[nombre])}" for nombre in fallidas)
+        raise RuntimeError(f"Consultas con recorrido completo de tabla:\n{detalle}")
+
+    return planes
+
+
+# Script para ejecutar desde línea de comandos
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from flask import Flask
+    from data.database import importar_modelos
+
+    parser = argparse.ArgumentParser(description="Planes de ejecución de las consultas del registro")
+    parser.add_argument('bd', help="URI de la BD a revisar (p. ej. sqlite:///banco.db)")
+    parser.add_argument('--cuenta', type=int, default=1, help="Id de cuenta de ejemplo")
+    parser.add_argument('--cajero', type=int, default=1, help="Id de cajero de ejemplo")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.bd
+    db.init_app(app)
+
+    with app.app_context():
+        importar_modelos()
+        try:
+            planes = verificar_planes_registro(args.cuenta, args.cajero)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        for nombre, plan in planes.items():
+            print(f"✅ {nombre}: {' | '.join(plan)}")
@@ -0,0 +1,345 @@
+"""
+Purga por lotes de operaciones antiguas con archivo comprimido
+
+Las operaciones anteriores a la fecha límite se recorren en lotes acotados
+por rango de id, tanto en la tabla caliente como en las tablas frías
+mensuales (ver data.particiones). Cada lote se escribe primero en archivos
+JSONL comprimidos (gzip) particionados por mes de la operación y luego se
+elimina con un único DELETE por rango, confirmando lote a lote. Un archivo
+de control permite reanudar una purga interrumpida con la misma fecha
+límite y el mismo tamaño de lote: el lote en curso pudo quedar archivado
+sin eliminarse, y al repetirlo con los mismos límites de id su archivo se
+sobrescribe en lugar de duplicar las operaciones en otro.
+
+Estructura del archivo:
+    <directorio>/<año>/<mes>/operaciones_<primer id>_<último id>.jsonl.gz
+"""
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Optional
+from data.database import db
+
+DIRECTORIO_ARCHIVO = 'archivo_operaciones'
+TAMANO_LOTE = 5000
+ARCHIVO_CONTROL = 'purga_en_curso.json'
+
+
+def purgar_operaciones(fecha_limite: datetime,
+                       directorio: str = DIRECTORIO_ARCHIVO,
+                       tamano_lote: int = TAMANO_LOTE) -> int:
+    """
+    Archiva y elimina las operaciones anteriores a una fecha
+
+    Si hay una purga interrumpida en el directorio, primero se completa con
+    su propia fecha límite y tamaño de lote.
+
+    Args:
+        fecha_limite: Fecha límite (exclusiva)
+        directorio: Directorio raíz del archivo
+        tamano_lote: Operaciones máximas por lote
+
+    Returns:
+        int: Operaciones eliminadas (incluidas las de la purga reanudada)
+    """
+    if tamano_lote < 1:
+        raise ValueError("El tamaño de lote debe ser al menos 1")
+
+    eliminadas = reanudar_purga(directorio, tamano_lote)
+    return eliminadas + _purgar(directorio, tamano_lote, fecha_limite)
+
+
+def reanudar_purga(directorio: str = DIRECTORIO_ARCHIVO,
+                   tamano_lote: int = TAMANO_LOTE) -> int:
+    """
+    Completa una purga interrumpida, si la hay, con el tamaño de lote con
+    el que empezó
+
+    Args:
+        directorio: Directorio raíz del archivo
+        tamano_lote: Operaciones máximas por lote, solo si el punto de
+            control no lo registra (creado por una versión anterior)
+
+    Returns:
+        int: Operaciones eliminadas al reanudar
+    """
+    control = _leer_control(directorio)
+    if control is None:
+        return 0
+    control.setdefault('tamano_lote', tamano_lote)
+    return _purgar(directorio, **control)
+
+
+def _purgar(directorio: str, tamano_lote: int, fecha_limite: datetime,
+            tabla: Optional[str] = None, ultimo_id: int = 0,
+            eliminadas: int = 0) -> int:
+    """
+    Purga, de la más antigua a la tabla caliente, las tablas que pueden
+    contener operaciones anteriores a la fecha límite (ver
+    data.particiones). Las tablas frías que quedan vacías y completamente
+    antes de la fecha límite se eliminan.
+
+    Args:
+        directorio: Directorio raíz del archivo
+        tamano_lote: Operaciones máximas por lote
+        fecha_limite: Fecha límite (exclusiva)
+        tabla: Tabla en curso al interrumpirse (None = desde el principio)
+        ultimo_id: Último id ya purgado de esa tabla
+        eliminadas: Operaciones eliminadas antes de la interrupción
+
+    Returns:
+        int: Operaciones eliminadas en esta llamada
+    """
+    from data.particiones import ParticionesOperaciones
+
+    particiones = ParticionesOperaciones.get_instance()
+    tablas = list(reversed(particiones.tablas_para_rango(None, fecha_limite)))
+    nombres = [t.name for t in tablas]
+    if tabla in nombres:
+        tablas = tablas[nombres.index(tabla):]
+    else:
+        ultimo_id = 0
+
+    inicio = eliminadas
+    for actual in tablas:
+        eliminadas = _purgar_tabla(directorio, tamano_lote, fecha_limite,
+                                   actual, ultimo_id, eliminadas)
+        ultimo_id = 0
+        particiones.eliminar_si_vencida(actual, fecha_limite)
+
+    _borrar_control(directorio)
+    return eliminadas - inicio
+
+
+def _purgar_tabla(directorio: str, tamano_lote: int, fecha_limite: datetime,
+                  tabla, ultimo_id: int, eliminadas: int) -> int:
+    """
+    Recorre los lotes de una tabla a partir de ultimo_id hasta agotar las
+    operaciones anteriores a la fecha límite
+
+    Args:
+        directorio: Directorio raíz del archivo
+        tamano_lote: Operaciones máximas por lote
+        fecha_limite: Fecha límite (exclusiva)
+        tabla: Tabla caliente o fría
+        ultimo_id: Último id ya purgado
+        eliminadas: Operaciones eliminadas hasta ahora
+
+    Returns:
+        int: Operaciones eliminadas hasta ahora (acumulado)
+    """
+    _escribir_control(directorio, fecha_limite, tabla.name, ultimo_id, eliminadas,
+                      tamano_lote)
+
+    while True:
+        filas = db.session.execute(
+            db.select(tabla)
+            .where(tabla.c.id > ultimo_id, tabla.c.fecha < fecha_limite)
+            .order_by(tabla.c.id)
+            .limit(tamano_lote)
+        ).mappings().all()
+
+        if not filas:
+            return eliminadas
+
+        primer_id, ultimo_id = filas[0]['id'], filas[-1]['id']
+
+        # Primero el archivo (durable), luego el borrado
+        _archivar_lote(directorio, filas, primer_id, ultimo_id)
+
+        try:
+            resultado = db.session.execute(
+                db.delete(tabla).where(
+                    tabla.c.id.between(primer_id, ultimo_id),
+                    tabla.c.fecha < fecha_limite
+                )
+            )
+            _descontar_resumen(filas)
+            _consolidar_aperturas(filas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        eliminadas += resultado.rowcount
+        _escribir_control(directorio, fecha_limite, tabla.name, ultimo_id, eliminadas,
+                      tamano_lote)
+
+
+def _archivar_lote(directorio: str, filas: List[dict],
+                   primer_id: int, ultimo_id: int) -> None:
+    """
+    Escribe un lote en un archivo gzip por mes de operación
+
+    Cada archivo se escribe con un nombre temporal y se reemplaza de forma
+    atómica, de modo que reanudar un lote ya archivado lo sobrescribe con
+    el mismo contenido.
+
+    Args:
+        directorio: Directorio raíz del archivo
+        filas: Filas del lote (ordenadas por id)
+        primer_id: Primer id del lote
+        ultimo_id: Último id del lote
+    """
+    por_mes = defaultdict(list)
+    for fila in filas:
+        por_mes[(fila['fecha'].year, fila['fecha'].month)].append(fila)
+
+    for (anio, mes), filas_mes in por_mes.items():
+        carpeta = os.path.join(directorio, f"{anio:04d}", f"{mes:02d}")
+        os.makedirs(carpeta, exist_ok=True)
+
+        ruta = os.path.join(carpeta, f"operaciones_{primer_id}_{ultimo_id}.jsonl.gz")
+        temporal = ruta + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            with gzip.GzipFile(fileobj=archivo, mode='wb') as comprimido:
+                for fila in filas_mes:
+                    linea = json.dumps(dict(fila), default=str, ensure_ascii=False)
+                    comprimido.write(linea.encode('utf-8') + b'\n')
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+
+
+def _descontar_resumen(filas: List[dict]) -> None:
+    """
+    Resta las operaciones purgadas del resumen por cuenta, para que siga
+    coincidiendo con el historial (ver RegistroOperaciones.activar_resumen)
+
+    Args:
+        filas: Filas eliminadas
+    """
+    from modelo.Dinero import Dinero
+    from modelo.EstadisticaCuenta import EstadisticaCuenta
+    from modelo.RegistroOperaciones import RegistroOperaciones
+
+    if not RegistroOperaciones.get_instance().usar_resumen:
+        return
+
+    totales = defaultdict(lambda: [0, 0, Dinero(0), Dinero(0)])
+    for fila in filas:
+        total = totales[fila['cuenta_id']]
+        total[0] += 1
+        if fila['exitosa']:
+            total[1] += 1
+            if fila['monto'] is not None:
+                if fila['tipo'] == 'retiro':
+                    total[2] += fila['monto']
+                elif fila['tipo'] == 'deposito':
+                    total[3] += fila['monto']
+
+    for cuenta_id, (operaciones, exitosas, retirado, depositado) in totales.items():
+        EstadisticaCuenta.descontar(cuenta_id, operaciones, exitosas, retirado, depositado)
+
+
+def _consolidar_aperturas(filas: List[dict]) -> None:
+    """
+    Suma el neto de las operaciones purgadas al saldo de apertura de sus
+    cuentas y al efectivo cargado de sus cajeros, para que la conciliación
+    (ver servicio.Conciliacion) siga cuadrando sin ese historial. Las
+    aperturas desconocidas (NULL) siguen en NULL.
+
+    Args:
+        filas: Filas eliminadas
+    """
+    from modelo.Dinero import Dinero
+    from modelo.cuenta import Cuenta
+    from servicio.Cajero import Cajero
+
+    por_cuenta = defaultdict(lambda: Dinero(0))
+    por_cajero = defaultdict(lambda: Dinero(0))
+    for fila in filas:
+        if not fila['exitosa'] or fila['monto'] is None:
+            continue
+        if fila['tipo'] == 'deposito':
+            por_cuenta[fila['cuenta_id']] += fila['monto']
+            if fila['cajero_id'] is not None and fila['tipo_deposito'] == 'EFECTIVO':
+                por_cajero[fila['cajero_id']] += fila['monto']
+        elif fila['tipo'] in ('retiro', 'pago_recibo', 'compra_entradas'):
+            por_cuenta[fila['cuenta_id']] -= fila['monto']
+            if fila['cajero_id'] is not None and fila['tipo'] == 'retiro':
+                por_cajero[fila['cajero_id']] -= fila['monto']
+
+    for modelo, columna, netos in ((Cuenta, Cuenta.saldo_apertura, por_cuenta),
+                                   (Cajero, Cajero.efectivo_cargado, por_cajero)):
+        for id_, neto in netos.items():
+            if neto:
+                db.session.execute(
+                    db.update(modelo)
+                    .where(modelo.id == id_, columna.is_not(None))
+                    .values({columna: columna + neto})
+                )
+
+
+def _ruta_control(directorio: str) -> str:
+    return os.path.join(directorio, ARCHIVO_CONTROL)
+
+
+def _leer_control(directorio: str) -> Optional[dict]:
+    """
+    Lee el punto de control de una purga interrumpida
+
+    Args:
+        directorio: Directorio raíz del archivo
+
+    Returns:
+        dict: fecha_limite, tabla, ultimo_id, eliminadas y tamano_lote (si
+        está registrado), o None si no hay
+    """
+    try:
+        with open(_ruta_control(directorio), encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+    except FileNotFoundError:
+        return None
+
+    control = {
+        'fecha_limite': datetime.fromisoformat(datos['fecha_limite']),
+        'tabla': datos.get('tabla'),
+        'ultimo_id': int(datos['ultimo_id']),
+        'eliminadas': int(datos['eliminadas']),
+    }
+    if 'tamano_lote' in datos:
+        control['tamano_lote'] = int(datos['tamano_lote'])
+    return control
+
+
+def _escribir_control(directorio: str, fecha_limite: datetime, tabla: str,
+                      ultimo_id: int, eliminadas: int, tamano_lote: int) -> None:
+    """
+    Guarda el punto de control de forma atómica
+
+    Args:
+        directorio: Directorio raíz del archivo
+        fecha_limite: Fecha límite de la purga
+        tabla: Tabla en curso
+        ultimo_id: Último id purgado de la tabla
+        eliminadas: Operaciones eliminadas hasta ahora
+        tamano_lote: Operaciones máximas por lote
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta = _ruta_control(directorio)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump({
+            'fecha_limite': fecha_limite.isoformat(),
+            'tabla': tabla,
+            'ultimo_id': ultimo_id,
+            'eliminadas': eliminadas,
+            'tamano_lote': tamano_lote,
+        }, archivo)
+    os.replace(temporal, ruta)
+
+
+def _borrar_control(directorio: str) -> None:
+    """
+    Elimina el punto de control al terminar la purga
+
+    Args:
+        directorio: Directorio raíz del archivo
+    """
+    try:
+        os.remove(_ruta_control(directorio))
+    except FileNotFoundError:
+        pass
@@ -5,6 +5,7 @@ from typing import List, Optional
 from datetime import date
 from data.database import db
 from .Operacion import Operacion
+from .Dinero import Dinero, TipoDinero
 
 class Banco(db.Model):
     """
@@ -15,16 +16,19 @@ class Banco(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     codigo = db.Column(db.String(20), unique=True, nullable=False)
-    limite_max_diario_global = db.Column(db.Numeric(15, 2), default=5000.00)
+    limite_max_diario_global = db.Column(TipoDinero, default=Dinero(500000))
     
     # Relaciones
     clientes = db.relationship('Cliente', back_populates='banco', cascade='all, delete-orphan')
     cajeros = db.relationship('Cajero', back_populates='banco', cascade='all, delete-orphan')
     
+    # Prefijo (BIN) de las tarjetas emitidas por el banco
+    BIN_TARJETA = "453201"
+    
     def __init__(self, nombre: str, codigo: str, limite_max_diario_global: float = 5000.00):
         self.nombre = nombre
         self.codigo = codigo
-        self.limite_max_diario_global = limite_max_diario_global
+        self.limite_max_diario_global = Dinero.desde(limite_max_diario_global)
     
     def emitir_tarjeta(self, cuenta) -> 'Tarjeta':
         """
@@ -62,28 +66,36 @@ class Banco(db.Model):
         tarjeta.invalidar()
         db.session.commit()
     
-    def validar_transaccion(self, cuenta: 'Cuenta', monto: float) -> bool:
+    def validar_transaccion(self, cuenta: 'Cuenta', monto: Dinero,
+                            total_retirado_hoy: Optional[Dinero] = None) -> bool:
         """
         Valida si una transacción puede realizarse
         
         Args:
             cuenta: Cuenta que realizará la transacción
             monto: Monto de la transacción
+            total_retirado_hoy: Total ya retirado hoy, si se conoce
+                (p. ej. desde ContextoSesion); si no, se consulta
             
         Returns:
             bool: True si la transacción es válida
         """
+        # Comparaciones sobre enteros de centavos, sin crear objetos Dinero
+        centavos = Dinero.desde(monto).centavos
+        
         # Validar saldo suficiente
-        if cuenta.saldo < monto:
+        if cuenta.saldo.centavos < centavos:
             return False
         
         # Validar límite diario de la cuenta
-        total_retirado_hoy = self.get_total_retirado_hoy(cuenta, date.today())
-        if total_retirado_hoy + monto > cuenta.limite_diario:
+        if total_retirado_hoy is None:
+            total_retirado_hoy = self.get_total_retirado_hoy(cuenta, date.today())
+        acumulado = total_retirado_hoy.centavos + centavos
+        if acumulado > cuenta.limite_diario.centavos:
             return False
         
         # Validar límite global del banco
-        if total_retirado_hoy + monto > self.limite_max_diario_global:
+        if acumulado > self.limite_max_diario_global.centavos:
             return False
         
         return True
@@ -100,30 +112,85 @@ class Banco(db.Model):
         registro = RegistroOperaciones.get_instance()
         registro.registrar(operacion)
     
-    def get_total_retirado_hoy(self, cuenta: 'Cuenta', fecha: date) -> float:
+    def get_total_retirado_hoy(self, cuenta: 'Cuenta', fecha: date) -> Dinero:
         """
         Obtiene el total retirado hoy de una cuenta
         
+        Usa el contador diario de la cuenta (O(1)); solo para fechas
+        anteriores al último retiro se recurre al historial de operaciones.
+        
         Args:
             cuenta: Cuenta a consultar
             fecha: Fecha de consulta
             
         Returns:
-            float: Total retirado en el día
+            Dinero: Total retirado en el día
         """
-        from modelo.Operacion import Retiro
-        from datetime import datetime
+        if cuenta.ultima_fecha_retiro is None or fecha >= cuenta.ultima_fecha_retiro:
+            return cuenta.get_total_retiros_hoy(fecha)
         
-        inicio_dia = datetime.combine(fecha, datetime.min.time())
-        fin_dia = datetime.combine(fecha, datetime.max.time())
+        from modelo.RegistroOperaciones import RegistroOperaciones
+        return RegistroOperaciones.get_instance().obtener_total_retiros_fecha(cuenta, fecha)
+    
+    def emitir_tarjetas_lote(self, cuentas: List['Cuenta'], pin: str = "1234") -> List['Tarjeta']:
+        """
+        Emite tarjetas para varias cuentas en una sola operación.
+        Los números salen de bloques Luhn reservados, los PINs se hashean
+        en paralelo y las filas se insertan con un insert masivo.
+        
+        Args:
+            cuentas: Cuentas que recibirán tarjeta
+            pin: PIN inicial de las tarjetas
+            
+        Returns:
+            List[Tarjeta]: Tarjetas creadas, en el orden de las cuentas
+        """
+        from modelo.Tarjeta import Tarjeta, EstadoTarjeta
+        from servicio.VerificadorPin import VerificadorPin
         
-        total = db.session.query(db.func.sum(Retiro.monto)).filter(
-            Retiro.cuenta_id == cuenta.id,
-            Retiro.fecha >= inicio_dia,
-            Retiro.fecha <= fin_dia
-        ).scalar()
+        if not cuentas:
+            return []
         
-        return float(total) if total else 0.0
+        if not pin or len(pin) != 4 or not pin.isdigit():
+            raise ValueError("El PIN debe ser de 4 dígitos numéricos")
+        
+        # Las cuentas nuevas necesitan id antes del insert masivo
+        if any(cuenta.id is None for cuenta in cuentas):
+            db.session.flush()
+        
+        numeros = self._reservar_numeros_tarjeta(len(cuentas))
+        costo = Tarjeta.COSTO_BCRYPT_OBJETIVO
+        hashes = VerificadorPin.get_instance().hashear_lote([pin] * len(cuentas), costo)
+        
+        filas = [
+            {
+                'numero_tarjeta': numero,
+                'pin_hash': pin_hash,
+                'pin_costo': costo,
+                'estado': EstadoTarjeta.ACTIVA,
+                'intentos_fallidos': 0,
+                'max_intentos': 3,
+                'cuenta_id': cuenta.id,
+            }
+            for cuenta, numero, pin_hash in zip(cuentas, numeros, hashes)
+        ]
+        
+        if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+            return list(db.session.scalars(
+                db.insert(Tarjeta).returning(Tarjeta, sort_by_parameter_order=True),
+                filas
+            ))
+        
+        # Sin RETURNING ordenado (p. ej. MySQL): insertar y releer por rango
+        # de número, que es único
+        db.session.execute(db.insert(Tarjeta), filas)
+        por_numero = {
+            tarjeta.numero_tarjeta: tarjeta
+            for tarjeta in db.session.scalars(
+                db.select(Tarjeta).where(Tarjeta.numero_tarjeta.between(min(numeros), max(numeros)))
+            )
+        }
+        return [por_numero[numero] for numero in numeros]
     
     def _generar_numero_tarjeta(self) -> str:
         """
@@ -132,23 +199,88 @@ class Banco(db.Model):
         Returns:
             str: Número de tarjeta formato XXXX-XXXX-XXXX-XXXX
         """
-        import random
+        return self._reservar_numeros_tarjeta(1)[0]
+    
+    def _reservar_numeros_tarjeta(self, cantidad: int) -> List[str]:
+        """
+        Reserva números de tarjeta únicos y válidos según Luhn.
+        
+        Los identificadores bajo el BIN del banco salen de un contador en la
+        BD (ContadorNumeracion), que se avanza con un UPDATE atómico en la
+        transacción en curso: dos emisiones concurrentes reciben bloques
+        disjuntos. Los números emitidos antes del contador (elegidos al
+        azar) se descartan con una consulta por rango (el formato fijo hace
+        que el orden de texto coincida con el numérico).
+        
+        Args:
+            cantidad: Números a reservar
+            
+        Returns:
+            List[str]: Números formato XXXX-XXXX-XXXX-XXXX
+        """
+        from modelo.ContadorNumeracion import ContadorNumeracion
         from modelo.Tarjeta import Tarjeta
         
-        while True:
-            # Generar 16 dígitos
-            digitos = [str(random.randint(0, 9)) for _ in range(16)]
-            numero = '-'.join([
-                ''.join(digitos[0:4]),
-                ''.join(digitos[4:8]),
-                ''.join(digitos[8:12]),
-                ''.join(digitos[12:16])
-            ])
+        digitos_cuenta = 15 - len(self.BIN_TARJETA)
+        max_identificador = 10 ** digitos_cuenta
+        numeros: List[str] = []
+        
+        while len(numeros) < cantidad:
+            faltantes = cantidad - len(numeros)
+            inicio = ContadorNumeracion.reservar(
+                f"tarjetas-{self.BIN_TARJETA}", faltantes, max_identificador
+            )
+            
+            bloque = [
+                self._formatear_numero_tarjeta(
+                    self._completar_luhn(f"{self.BIN_TARJETA}{i:0{digitos_cuenta}d}")
+                )
+                for i in range(inicio, inicio + faltantes)
+            ]
             
-            # Verificar que no exista
-            existe = Tarjeta.query.filter_by(numero_tarjeta=numero).first()
-            if not existe:
-                return numero
+            existentes = set(db.session.scalars(
+                db.select(Tarjeta.numero_tarjeta).where(
+                    Tarjeta.numero_tarjeta.between(bloque[0], bloque[-1])
+                )
+            ))
+            numeros.extend(n for n in bloque if n not in existentes)
+        
+        return numeros
+    
+    @staticmethod
+    def _completar_luhn(parcial: str) -> str:
+        """
+        Agrega el dígito verificador Luhn a un número parcial
+        
+        Args:
+            parcial: Dígitos sin verificador
+            
+        Returns:
+            str: Número completo
+        """
+        total = 0
+        # Desde la derecha, el primer dígito del parcial queda en posición par
+        for i, caracter in enumerate(reversed(parcial)):
+            d = int(caracter)
+            if i % 2 == 0:
+                d *= 2
+                if d > 9:
+                    d -= 9
+            total += d
+        return parcial + str((10 - total % 10) % 10)
+    
+    @staticmethod
+    def _formatear_numero_tarjeta(digitos: str) -> str:
+        """
+        Da formato XXXX-XXXX-XXXX-XXXX a 16 dígitos
+        
+        Args:
+            digitos: 16 dígitos
+            
+        Returns:
+            str: Número formateado
+        """
+        return '-'.join(digitos[i:i + 4] for i in range(0, 16, 4))
     
     def agregar_cliente(self, cliente: 'Cliente') -> None:
         """
@@ -0,0 +1,194 @@
+"""
+Clase CacheTarjetas - Caché LRU/TTL de búsquedas de tarjeta por número
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set
+
+
+class EntradaTarjeta(NamedTuple):
+    """
+    Columnas de una tarjeta guardadas en caché (ver Tarjeta.a_entrada_cache)
+    y estado de su cuenta
+    """
+    id: int
+    cuenta_id: int
+    cuenta_activa: bool
+    estado: str
+    pin_hash: str
+    pin_costo: Optional[int]
+    intentos_fallidos: int
+    max_intentos: int
+
+
+class CacheTarjetas:
+    """
+    Caché acotado (LRU con expiración por TTL) del número de tarjeta a sus
+    columnas y al estado de su cuenta, para que Tarjeta.buscar_por_numero
+    reconstruya la tarjeta sin consultar la BD (en cualquier sesión) y
+    Tarjeta.puede_usarse no cargue la cuenta. Las entradas se invalidan
+    cuando la tarjeta cambia de estado, de intentos o de PIN y cuando su
+    cuenta se activa o desactiva; los cambios hechos por otros procesos se
+    ven al vencer el TTL.
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, capacidad: int = 10000, ttl_segundos: float = 60.0):
+        self.capacidad = capacidad
+        self.ttl_segundos = ttl_segundos
+        self._entradas: 'OrderedDict[str, tuple[float, EntradaTarjeta]]' = OrderedDict()
+        self._por_cuenta: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    @classmethod
+    def get_instance(cls) -> 'CacheTarjetas':
+        """
+        Obtiene la instancia compartida del caché
+
+        Returns:
+            CacheTarjetas: Instancia única
+        """
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _quitar(self, numero_tarjeta: str) -> bool:
+        """
+        Elimina una entrada y su referencia por cuenta (debe llamarse con el
+        lock tomado)
+
+        Args:
+            numero_tarjeta: Número de tarjeta
+
+        Returns:
+            bool: True si la entrada existía
+        """
+        item = self._entradas.pop(numero_tarjeta, None)
+        if item is None:
+            return False
+        numeros = self._por_cuenta.get(item[1].cuenta_id)
+        if numeros is not None:
+            numeros.discard(numero_tarjeta)
+            if not numeros:
+                del self._por_cuenta[item[1].cuenta_id]
+        return True
+
+    def _leer(self, numero_tarjeta: str) -> Optional[EntradaTarjeta]:
+        """
+        Lee una entrada vigente (debe llamarse con el lock tomado)
+
+        Args:
+            numero_tarjeta: Número de tarjeta
+
+        Returns:
+            EntradaTarjeta o None si no existe o expiró
+        """
+        item = self._entradas.get(numero_tarjeta)
+        if item is None:
+            return None
+
+        expira, entrada = item
+        if expira < time.monotonic():
+            self._quitar(numero_tarjeta)
+            return None
+
+        self._entradas.move_to_end(numero_tarjeta)
+        return entrada
+
+    def consultar(self, numero_tarjeta: str) -> Optional[EntradaTarjeta]:
+        """
+        Busca una tarjeta en caché sin afectar los contadores
+
+        Args:
+            numero_tarjeta: Número de tarjeta
+
+        Returns:
+            EntradaTarjeta o None si no está en caché
+        """
+        with self._lock:
+            return self._leer(numero_tarjeta)
+
+    def registrar(self, acierto: bool) -> None:
+        """
+        Cuenta una búsqueda resuelta (acierto) o no (fallo) con el caché
+
+        Args:
+            acierto: Si la búsqueda evitó la consulta a la BD
+        """
+        with self._lock:
+            if acierto:
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+
+    def guardar(self, numero_tarjeta: str, entrada: EntradaTarjeta) -> None:
+        """
+        Guarda una tarjeta en caché, expulsando la menos usada si está lleno
+
+        Args:
+            numero_tarjeta: Número de tarjeta
+            entrada: Datos a guardar
+        """
+        with self._lock:
+            self._quitar(numero_tarjeta)
+            self._entradas[numero_tarjeta] = (time.monotonic() + self.ttl_segundos, entrada)
+            self._por_cuenta.setdefault(entrada.cuenta_id, set()).add(numero_tarjeta)
+            while len(self._entradas) > self.capacidad:
+                self._quitar(next(iter(self._entradas)))
+
+    def invalidar(self, numero_tarjeta: str) -> None:
+        """
+        Elimina una tarjeta del caché
+
+        Args:
+            numero_tarjeta: Número de tarjeta
+        """
+        with self._lock:
+            if self._quitar(numero_tarjeta):
+                self.invalidaciones += 1
+
+    def invalidar_cuenta(self, cuenta_id: int) -> None:
+        """
+        Elimina del caché las tarjetas de una cuenta
+
+        Args:
+            cuenta_id: Id de la cuenta
+        """
+        with self._lock:
+            for numero_tarjeta in list(self._por_cuenta.get(cuenta_id, ())):
+                self._quitar(numero_tarjeta)
+                self.invalidaciones += 1
+
+    def limpiar(self) -> None:
+        """
+        Vacía el caché y reinicia los contadores
+        """
+        with self._lock:
+            self._entradas.clear()
+            self._por_cuenta.clear()
+            self.aciertos = 0
+            self.fallos = 0
+            self.invalidaciones = 0
+
+    def estadisticas(self) -> dict:
+        """
+        Obtiene los contadores del caché
+
+        Returns:
+            dict: Aciertos, fallos, invalidaciones, tamaño y tasa de aciertos
+        """
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'invalidaciones': self.invalidaciones,
+                'tamano': len(self._entradas),
+                'tasa_aciertos': (self.aciertos / consultas * 100) if consultas > 0 else 0
+            }
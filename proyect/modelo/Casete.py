@@ -0,0 +1,97 @@
+"""
+Clase Casete - Casete de billetes de una denominación en un cajero
+"""
+from data.database import db
+from modelo.Dinero import Dinero, TipoDinero
+from data.concurrencia import actualizar_condicional
+
+
+class Casete(db.Model):
+    """
+    Casete de billetes de una sola denominación dentro de un Cajero. Los
+    retiros se entregan desde los casetes según el plan del Dispensador;
+    el efectivo recibido en depósitos va a la bandeja de depósitos y solo
+    suma a Cajero.monto_cajero, no a los casetes.
+    """
+    __tablename__ = 'casetes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cajero_id = db.Column(db.Integer, db.ForeignKey('cajeros.id'), nullable=False)
+    denominacion = db.Column(TipoDinero, nullable=False)
+    cantidad = db.Column(db.Integer, default=0, nullable=False)
+    capacidad = db.Column(db.Integer, nullable=False)
+
+    # Relaciones
+    cajero = db.relationship('Cajero', back_populates='casetes')
+
+    __table_args__ = (
+        db.Index('ix_casetes_cajero', 'cajero_id'),
+    )
+
+    def __init__(self, denominacion, capacidad: int, cantidad: int = 0):
+        denominacion = Dinero.desde(denominacion)
+        if denominacion.centavos <= 0:
+            raise ValueError("La denominación debe ser positiva")
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1 billete")
+        if not 0 <= cantidad <= capacidad:
+            raise ValueError("La cantidad de billetes debe estar entre 0 y la capacidad")
+        self.denominacion = denominacion
+        self.capacidad = capacidad
+        self.cantidad = cantidad
+
+    def get_total(self) -> Dinero:
+        """
+        Obtiene el efectivo del casete
+
+        Returns:
+            Dinero: Denominación por cantidad de billetes
+        """
+        return self.denominacion * self.cantidad
+
+    def get_nivel(self) -> float:
+        """
+        Obtiene la fracción ocupada del casete
+
+        Returns:
+            float: Entre 0 (vacío) y 1 (lleno)
+        """
+        return self.cantidad / self.capacidad
+
+    def retirar_billetes(self, billetes: int) -> bool:
+        """
+        Descuenta billetes con un UPDATE condicional
+        (cantidad = cantidad - n WHERE cantidad >= n)
+
+        Args:
+            billetes: Billetes entregados
+
+        Returns:
+            bool: True si había billetes suficientes
+        """
+        return actualizar_condicional(
+            self,
+            [Casete.cantidad >= billetes],
+            {'cantidad': Casete.cantidad - billetes}
+        )
+
+    def cargar_billetes(self, billetes: int) -> bool:
+        """
+        Agrega billetes con un UPDATE condicional que respeta la capacidad
+
+        Args:
+            billetes: Billetes cargados
+
+        Returns:
+            bool: True si cabían en el casete
+        """
+        if billetes < 1:
+            raise ValueError("Se debe cargar al menos un billete")
+        return actualizar_condicional(
+            self,
+            [Casete.cantidad + billetes <= Casete.capacidad],
+            {'cantidad': Casete.cantidad + billetes}
+        )
+
+    def __repr__(self):
+        return f"<Casete ${self.denominacion} x {self.cantidad}/{self.capacidad}>"
@@ -0,0 +1,80 @@
+"""
+Clase ContadorNumeracion - Contadores para reservar bloques de números
+"""
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from data.database import db
+
+
+class ContadorNumeracion(db.Model):
+    """
+    Siguiente valor libre de una numeración (p. ej. los números de tarjeta
+    de un BIN). Un bloque se reserva con un UPDATE atómico que avanza el
+    contador, así que dos transacciones concurrentes nunca reciben valores
+    solapados: la segunda espera el bloqueo de la fila y parte del valor
+    que dejó la primera. Si la transacción se deshace, el bloque vuelve a
+    quedar libre.
+    """
+    __tablename__ = 'contadores_numeracion'
+
+    nombre = db.Column(db.String(64), primary_key=True)
+    siguiente = db.Column(db.BigInteger, default=0, nullable=False)
+
+    @classmethod
+    def reservar(cls, nombre: str, cantidad: int, maximo: int,
+                 sesion: Optional[Session] = None) -> int:
+        """
+        Reserva un bloque de valores consecutivos en la transacción en curso
+
+        Args:
+            nombre: Nombre de la numeración
+            cantidad: Valores a reservar
+            maximo: Límite (exclusivo) de la numeración
+            sesion: Sesión de la transacción (por defecto db.session)
+
+        Returns:
+            int: Primer valor del bloque [inicio, inicio + cantidad)
+        """
+        if cantidad < 1:
+            raise ValueError("Se debe reservar al menos un valor")
+        sesion = sesion or db.session()
+        cls._crear_si_falta(nombre, sesion)
+
+        sentencia = (
+            db.update(cls)
+            .where(cls.nombre == nombre, cls.siguiente + cantidad <= maximo)
+            .values(siguiente=cls.siguiente + cantidad)
+            .execution_options(synchronize_session=False)
+        )
+        if sesion.get_bind().dialect.update_returning:
+            fin = sesion.execute(sentencia.returning(cls.siguiente)).scalar()
+        elif sesion.execute(sentencia).rowcount == 1:
+            # La fila queda bloqueada por el UPDATE: la lectura es la propia
+            fin = sesion.execute(db.select(cls.siguiente).where(cls.nombre == nombre)).scalar()
+        else:
+            fin = None
+        if fin is None:
+            raise ValueError(f"No quedan valores disponibles en la numeración {nombre}")
+        return fin - cantidad
+
+    @classmethod
+    def _crear_si_falta(cls, nombre: str, sesion: Session) -> None:
+        """
+        Crea el contador en cero si no existe (si otra transacción lo crea
+        primero, se usa el suyo)
+
+        Args:
+            nombre: Nombre de la numeración
+            sesion: Sesión de la transacción
+        """
+        if sesion.execute(db.select(cls.nombre).where(cls.nombre == nombre)).first():
+            return
+        try:
+            with sesion.begin_nested():
+                sesion.execute(db.insert(cls).values(nombre=nombre, siguiente=0))
+        except IntegrityError:
+            pass
+
+    def __repr__(self):
+        return f"<ContadorNumeracion {self.nombre} - siguiente {self.siguiente}>"
@@ -0,0 +1,126 @@
+"""
+Clase ContextoSesion - Datos de una sesión de cajero cargados en una consulta
+"""
+from datetime import date
+from typing import Optional
+from data.database import db
+from modelo.Dinero import Dinero
+
+
+class ContextoSesion:
+    """
+    Tarjeta, cuenta, titular, política de límites del banco y total
+    retirado hoy (contador diario de la cuenta), obtenidos con una sola
+    consulta al iniciar la sesión y reutilizados por las operaciones del
+    Cajero mientras dure.
+    """
+    __slots__ = (
+        'tarjeta', 'cuenta', 'titular', 'banco',
+        'limite_diario', 'limite_global', 'total_retirado_hoy', 'fecha'
+    )
+
+    def __init__(self, tarjeta, cuenta, titular, banco,
+                 total_retirado_hoy: Dinero, fecha: date):
+        self.tarjeta = tarjeta
+        self.cuenta = cuenta
+        self.titular = titular
+        self.banco = banco
+        self.limite_diario = cuenta.limite_diario
+        self.limite_global = banco.limite_max_diario_global
+        self.total_retirado_hoy = total_retirado_hoy
+        self.fecha = fecha
+
+    @staticmethod
+    def cargar(numero_tarjeta: str) -> Optional['ContextoSesion']:
+        """
+        Carga el contexto de sesión de una tarjeta en un solo viaje a la BD
+
+        Args:
+            numero_tarjeta: Número de tarjeta insertada
+
+        Returns:
+            ContextoSesion o None si la tarjeta no existe
+        """
+        from modelo.Tarjeta import Tarjeta
+        from modelo.CacheTarjetas import CacheTarjetas
+        from modelo.cuenta import Cuenta
+        from modelo.Cliente import Cliente
+        from modelo.Banco import Banco
+
+        hoy = date.today()
+
+        fila = db.session.execute(
+            db.select(Tarjeta, Cuenta, Cliente, Banco)
+            .join(Cuenta, Tarjeta.cuenta_id == Cuenta.id)
+            .join(Cliente, Cuenta.titular_id == Cliente.id)
+            .join(Banco, Cliente.banco_id == Banco.id)
+            .where(Tarjeta.numero_tarjeta == numero_tarjeta)
+        ).first()
+
+        if fila is None:
+            return None
+
+        tarjeta, cuenta, titular, banco = fila
+
+        CacheTarjetas.get_instance().guardar(
+            numero_tarjeta, tarjeta.a_entrada_cache(cuenta.activa)
+        )
+
+        return ContextoSesion(
+            tarjeta, cuenta, titular, banco,
+            cuenta.get_total_retiros_hoy(hoy), hoy
+        )
+
+    def es_de(self, tarjeta: 'Tarjeta') -> bool:
+        """
+        Indica si el contexto corresponde a la tarjeta dada
+
+        Args:
+            tarjeta: Tarjeta a comparar
+
+        Returns:
+            bool: True si es la misma tarjeta
+        """
+        return tarjeta is not None and tarjeta.id == self.tarjeta.id
+
+    def get_total_retirado_hoy(self) -> Dinero:
+        """
+        Obtiene el total retirado hoy (se reinicia si la sesión cruzó la
+        medianoche)
+
+        Returns:
+            Dinero: Total retirado en el día
+        """
+        if self.fecha != date.today():
+            self.total_retirado_hoy = Dinero(0)
+            self.fecha = date.today()
+        return self.total_retirado_hoy
+
+    def permite_retiro(self, monto: Dinero) -> bool:
+        """
+        Valida un retiro contra el límite diario de la cuenta y el límite
+        global del banco cargados con el contexto, sin releer la cuenta ni
+        el banco (el saldo lo valida el UPDATE condicional de Cuenta.retirar)
+
+        Args:
+            monto: Monto a retirar
+
+        Returns:
+            bool: True si el retiro no excede ningún límite
+        """
+        acumulado = self.get_total_retirado_hoy().centavos + monto.centavos
+        return (acumulado <= self.limite_diario.centavos
+                and acumulado <= self.limite_global.centavos)
+
+    def registrar_retiro(self, monto: Dinero) -> None:
+        """
+        Acumula un retiro exitoso en el total del día
+
+        Args:
+            monto: Monto retirado
+        """
+        self.total_retirado_hoy = self.get_total_retirado_hoy() + monto
+
+    def __repr__(self):
+        return (f"<ContextoSesion {self.tarjeta.numero_tarjeta} - "
+                f"Retirado hoy: ${self.total_retirado_hoy}>")
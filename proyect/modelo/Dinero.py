@@ -0,0 +1,186 @@
+"""
+Clase Dinero - Montos en punto fijo como enteros de centavos
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import cast, func, type_coerce
+from sqlalchemy.types import BigInteger, TypeDecorator, Numeric
+
+_CENTAVO = Decimal('0.01')
+
+# Por debajo de este valor (en centavos) el error de redondeo de
+# float * 100 es menor que la tolerancia usada en desde()
+_MAXIMO_ESCALADO_EXACTO = 1e9
+_TOLERANCIA_MITAD = 1e-6
+
+
+class Dinero:
+    """
+    Monto monetario inmutable guardado como entero de centavos.
+
+    La aritmética y las comparaciones son operaciones de enteros; solo se
+    convierte desde/hacia float, str o Decimal en los bordes (entrada del
+    usuario y columnas de la BD, ver TipoDinero).
+    """
+    __slots__ = ('centavos',)
+
+    def __init__(self, centavos: int = 0):
+        self.centavos = centavos
+
+    @classmethod
+    def desde(cls, valor) -> 'Dinero':
+        """
+        Convierte un valor a Dinero
+
+        Args:
+            valor: Dinero, int (unidades), float, str o Decimal
+
+        Returns:
+            Dinero: Monto equivalente redondeado al centavo
+        """
+        tipo = type(valor)
+        if tipo is cls:
+            return valor
+        if tipo is int:
+            return cls(valor * 100)
+        if tipo is float:
+            # Lejos de una mitad de centavo, redondear el float escalado da
+            # el mismo resultado que redondear su decimal
+            escalado = valor * 100
+            if -_MAXIMO_ESCALADO_EXACTO < escalado < _MAXIMO_ESCALADO_EXACTO:
+                centavos = round(escalado)
+                if abs(abs(escalado - centavos) - 0.5) > _TOLERANCIA_MITAD:
+                    return cls(centavos)
+            # Cerca de una mitad: repr da el decimal más corto que representa
+            # al float (1.005 y no 1.00499999...), y se redondea como desde str
+            valor = Decimal(repr(valor))
+        elif tipo is not Decimal:
+            valor = Decimal(str(valor))
+        return cls(int(valor.quantize(_CENTAVO, rounding=ROUND_HALF_UP).scaleb(2)))
+
+    def a_decimal(self) -> Decimal:
+        """
+        Convierte a Decimal con dos decimales (para la BD)
+
+        Returns:
+            Decimal: Monto exacto
+        """
+        return Decimal(self.centavos).scaleb(-2)
+
+    # --- Aritmética ---
+
+    def __add__(self, otro) -> 'Dinero':
+        if type(otro) is not Dinero:
+            otro = Dinero.desde(otro)
+        return Dinero(self.centavos + otro.centavos)
+
+    __radd__ = __add__
+
+    def __sub__(self, otro) -> 'Dinero':
+        if type(otro) is not Dinero:
+            otro = Dinero.desde(otro)
+        return Dinero(self.centavos - otro.centavos)
+
+    def __rsub__(self, otro) -> 'Dinero':
+        return Dinero.desde(otro) - self
+
+    def __mul__(self, factor: int) -> 'Dinero':
+        if type(factor) is not int:
+            return NotImplemented
+        return Dinero(self.centavos * factor)
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> 'Dinero':
+        return Dinero(-self.centavos)
+
+    def __abs__(self) -> 'Dinero':
+        return Dinero(abs(self.centavos))
+
+    # --- Comparaciones ---
+
+    # Solo se compara con otro Dinero, igual que __eq__: igualar con números
+    # rompería la relación entre __eq__ y __hash__ (Dinero(100) == 1 con
+    # hashes distintos), y ordenar con ellos haría Dinero(0) <= 0 y
+    # Dinero(0) >= 0 verdaderos con Dinero(0) == 0 falso. Además un int
+    # podría leerse como centavos (Dinero(5)) o unidades (Dinero.desde(5)).
+
+    def __eq__(self, otro) -> bool:
+        if type(otro) is not Dinero:
+            return NotImplemented
+        return self.centavos == otro.centavos
+
+    def __lt__(self, otro) -> bool:
+        if type(otro) is not Dinero:
+            return NotImplemented
+        return self.centavos < otro.centavos
+
+    def __le__(self, otro) -> bool:
+        if type(otro) is not Dinero:
+            return NotImplemented
+        return self.centavos <= otro.centavos
+
+    def __gt__(self, otro) -> bool:
+        if type(otro) is not Dinero:
+            return NotImplemented
+        return self.centavos > otro.centavos
+
+    def __ge__(self, otro) -> bool:
+        if type(otro) is not Dinero:
+            return NotImplemented
+        return self.centavos >= otro.centavos
+
+    def __hash__(self) -> int:
+        return hash(self.centavos)
+
+    def __bool__(self) -> bool:
+        return self.centavos != 0
+
+    # --- Conversiones ---
+
+    def __float__(self) -> float:
+        return self.centavos / 100
+
+    def __str__(self) -> str:
+        signo = '-' if self.centavos < 0 else ''
+        unidades, centavos = divmod(abs(self.centavos), 100)
+        return f"{signo}{unidades}.{centavos:02d}"
+
+    def __format__(self, especificacion: str) -> str:
+        if not especificacion:
+            return str(self)
+        return format(self.a_decimal(), especificacion)
+
+    def __repr__(self):
+        return f"Dinero('{self}')"
+
+
+class TipoDinero(TypeDecorator):
+    """
+    Columna NUMERIC(15, 2) que se lee y escribe como Dinero
+    """
+    impl = Numeric(15, 2)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return Dinero.desde(value).a_decimal()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Dinero.desde(value)
+
+
+def expresion_centavos(columna):
+    """
+    Expresión SQL de un monto como entero de centavos, para sumar y
+    comparar montos en la BD o leerlos sin crear objetos Dinero
+
+    Args:
+        columna: Columna monetaria (TipoDinero o NUMERIC)
+
+    Returns:
+        Expresión entera
+    """
+    return cast(func.round(type_coerce(columna, Numeric(15, 2)) * 100), BigInteger)
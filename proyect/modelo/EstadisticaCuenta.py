@@ -0,0 +1,114 @@
+"""
+Clase EstadisticaCuenta - Resumen incremental de operaciones por cuenta
+"""
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from data.database import db
+from modelo.Dinero import Dinero, TipoDinero
+
+
+class EstadisticaCuenta(db.Model):
+    """
+    Totales de operaciones de una cuenta, actualizados por
+    RegistroOperaciones.registrar con cada operación (si el resumen está
+    activo), para leer las estadísticas por clave primaria en lugar de
+    agregar todo el historial.
+    """
+    __tablename__ = 'estadisticas_cuenta'
+
+    cuenta_id = db.Column(db.Integer, db.ForeignKey('cuentas.id'), primary_key=True)
+    total_operaciones = db.Column(db.Integer, default=0, nullable=False)
+    operaciones_exitosas = db.Column(db.Integer, default=0, nullable=False)
+    total_retirado = db.Column(TipoDinero, default=Dinero(0), nullable=False)
+    total_depositado = db.Column(TipoDinero, default=Dinero(0), nullable=False)
+
+    @classmethod
+    def acumular(cls, cuenta_id: int, exitosa: bool, retirado: Dinero,
+                 depositado: Dinero, sesion: Optional[Session] = None) -> bool:
+        """
+        Suma una operación al resumen de la cuenta con un UPDATE atómico
+
+        Args:
+            cuenta_id: Id de la cuenta
+            exitosa: Si la operación fue exitosa
+            retirado: Monto retirado por la operación
+            depositado: Monto depositado por la operación
+            sesion: Sesión de la operación (por defecto db.session)
+
+        Returns:
+            bool: False si la cuenta aún no tiene resumen
+        """
+        sesion = sesion or db.session()
+        resultado = sesion.execute(
+            db.update(cls)
+            .where(cls.cuenta_id == cuenta_id)
+            .values(
+                total_operaciones=cls.total_operaciones + 1,
+                operaciones_exitosas=cls.operaciones_exitosas + (1 if exitosa else 0),
+                total_retirado=cls.total_retirado + retirado,
+                total_depositado=cls.total_depositado + depositado
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return resultado.rowcount == 1
+
+    @classmethod
+    def descontar(cls, cuenta_id: int, operaciones: int, exitosas: int,
+                  retirado: Dinero, depositado: Dinero) -> None:
+        """
+        Resta operaciones eliminadas del historial (ver data.purga)
+
+        Args:
+            cuenta_id: Id de la cuenta
+            operaciones: Operaciones eliminadas
+            exitosas: Cuántas de ellas eran exitosas
+            retirado: Suma de sus retiros exitosos
+            depositado: Suma de sus depósitos exitosos
+        """
+        db.session.execute(
+            db.update(cls)
+            .where(cls.cuenta_id == cuenta_id)
+            .values(
+                total_operaciones=cls.total_operaciones - operaciones,
+                operaciones_exitosas=cls.operaciones_exitosas - exitosas,
+                total_retirado=cls.total_retirado - retirado,
+                total_depositado=cls.total_depositado - depositado
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def crear(cls, cuenta_id: int, total_operaciones: int, operaciones_exitosas: int,
+              total_retirado: Dinero, total_depositado: Dinero,
+              sesion: Optional[Session] = None) -> bool:
+        """
+        Crea el resumen de una cuenta a partir de sus totales actuales
+
+        Args:
+            cuenta_id: Id de la cuenta
+            total_operaciones: Operaciones registradas
+            operaciones_exitosas: Operaciones exitosas
+            total_retirado: Suma de retiros exitosos
+            total_depositado: Suma de depósitos exitosos
+            sesion: Sesión de la operación (por defecto db.session)
+
+        Returns:
+            bool: False si otra transacción lo creó primero
+        """
+        sesion = sesion or db.session()
+        try:
+            with sesion.begin_nested():
+                sesion.execute(db.insert(cls).values(
+                    cuenta_id=cuenta_id,
+                    total_operaciones=total_operaciones,
+                    operaciones_exitosas=operaciones_exitosas,
+                    total_retirado=total_retirado,
+                    total_depositado=total_depositado
+                ))
+            return True
+        except IntegrityError:
+            return False
+
+    def __repr__(self):
+        return f"<EstadisticaCuenta {self.cuenta_id} - {self.total_operaciones} operaciones>"
@@ -0,0 +1,64 @@
+"""
+Clase EventoOperacion - Evento de operación en la bandeja de salida (outbox)
+"""
+from datetime import datetime
+from data.database import db
+from modelo.Dinero import TipoDinero
+
+
+class EventoOperacion(db.Model):
+    """
+    Copia de una operación registrada, escrita en la misma transacción que
+    la operación (ver RegistroOperaciones.registrar), para publicarla a los
+    consumidores sin que tengan que consultar 'operaciones'. El id es la
+    posición del evento en el flujo (ver data.eventos).
+    """
+    __tablename__ = 'outbox_operaciones'
+    # Sin AUTOINCREMENT, SQLite reutiliza los ids al depurarse la tabla y
+    # los eventos nuevos quedarían por debajo de los offsets de los
+    # consumidores (ver data.migraciones para las tablas existentes)
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Sin FOREIGN KEY: la operación puede trasladarse a una tabla fría o
+    # purgarse antes de que el evento se elimine
+    operacion_id = db.Column(db.Integer, nullable=False)
+    tipo = db.Column(db.String(50), nullable=False)
+    fecha = db.Column(db.DateTime, nullable=False)
+    monto = db.Column(TipoDinero, nullable=True)
+    exitosa = db.Column(db.Boolean, nullable=False)
+    mensaje_error = db.Column(db.String(200))
+    cuenta_id = db.Column(db.Integer, nullable=False)
+    cajero_id = db.Column(db.Integer)
+    registrado = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+    # El id de la operación se completa al insertarla (en el mismo flush)
+    operacion = db.relationship(
+        'Operacion',
+        primaryjoin='foreign(EventoOperacion.operacion_id) == Operacion.id'
+    )
+
+    @classmethod
+    def desde(cls, operacion) -> 'EventoOperacion':
+        """
+        Crea el evento de una operación
+
+        Args:
+            operacion: Operación registrada
+
+        Returns:
+            EventoOperacion: Evento sin agregar a la sesión
+        """
+        return cls(
+            operacion=operacion,
+            tipo=operacion.tipo,
+            fecha=operacion.fecha,
+            monto=operacion.monto,
+            exitosa=bool(operacion.exitosa),
+            mensaje_error=operacion.mensaje_error,
+            cuenta_id=operacion.cuenta.id if operacion.cuenta is not None else operacion.cuenta_id,
+            cajero_id=operacion.cajero.id if operacion.cajero is not None else operacion.cajero_id
+        )
+
+    def __repr__(self):
+        return f"<EventoOperacion {self.id} {self.tipo} - operación {self.operacion_id}>"
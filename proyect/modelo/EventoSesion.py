@@ -0,0 +1,29 @@
+"""
+Clase EventoSesion - Registro de auditoría de las sesiones de cajero
+"""
+from datetime import datetime
+from data.database import db
+
+
+class EventoSesion(db.Model):
+    """
+    Evento de una sesión de cajero (inserción, autenticación, expulsión).
+    Las sesiones activas viven en memoria (servicio.GestorSesiones); solo
+    estos eventos se persisten, en segundo plano y por lotes (ver
+    data.auditoria.AuditoriaSesiones).
+    """
+    __tablename__ = 'eventos_sesion'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cajero_id = db.Column(db.Integer, nullable=False)
+    tarjeta_id = db.Column(db.Integer, nullable=True)
+    evento = db.Column(db.String(30), nullable=False)
+    fecha = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    detalle = db.Column(db.String(200), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_eventos_sesion_cajero_fecha', 'cajero_id', 'fecha'),
+    )
+
+    def __repr__(self):
+        return f"<EventoSesion {self.evento} cajero {self.cajero_id} - {self.fecha}>"
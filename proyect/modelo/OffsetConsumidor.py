@@ -0,0 +1,104 @@
+"""
+Clase OffsetConsumidor - Posición de cada consumidor en el flujo de eventos
+"""
+import json
+from datetime import datetime
+from typing import Iterable, List, Tuple
+from data.database import db
+
+
+class OffsetConsumidor(db.Model):
+    """
+    Último evento (EventoOperacion.id) entregado a cada consumidor. Avanza
+    solo después de una entrega exitosa, así que una caída entre la entrega
+    y el avance repite eventos (entrega al menos una vez).
+
+    Los huecos son ids menores que ultimo_id que el consumidor todavía no
+    vio: eventos de transacciones que confirmaron después que otras con
+    ids mayores (o que se deshicieron y nunca aparecerán).
+    """
+    __tablename__ = 'offsets_consumidor'
+
+    consumidor = db.Column(db.String(100), primary_key=True)
+    ultimo_id = db.Column(db.Integer, default=0, nullable=False)
+    huecos = db.Column(db.Text)  # lista JSON de ids pendientes
+    actualizado = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+    @classmethod
+    def obtener(cls, consumidor: str) -> int:
+        """
+        Obtiene el offset de un consumidor
+
+        Args:
+            consumidor: Nombre del consumidor
+
+        Returns:
+            int: Último id entregado (0 si nunca recibió eventos)
+        """
+        ultimo = db.session.execute(
+            db.select(cls.ultimo_id).where(cls.consumidor == consumidor)
+        ).scalar()
+        return ultimo or 0
+
+    @classmethod
+    def obtener_con_huecos(cls, consumidor: str) -> Tuple[int, List[int]]:
+        """
+        Obtiene el offset de un consumidor y sus huecos
+
+        Args:
+            consumidor: Nombre del consumidor
+
+        Returns:
+            tuple: (último id entregado, ids de huecos ordenados)
+        """
+        fila = db.session.execute(
+            db.select(cls.ultimo_id, cls.huecos).where(cls.consumidor == consumidor)
+        ).first()
+        if fila is None:
+            return 0, []
+        return fila.ultimo_id or 0, sorted(json.loads(fila.huecos or '[]'))
+
+    @classmethod
+    def avanzar(cls, consumidor: str, ultimo_id: int,
+                huecos: Iterable[int] = ()) -> None:
+        """
+        Registra el último evento entregado (sin retroceder) y los huecos
+        pendientes, sin confirmar
+
+        Args:
+            consumidor: Nombre del consumidor
+            ultimo_id: Id del último evento entregado
+            huecos: Ids menores no vistos todavía
+        """
+        huecos = json.dumps(sorted(huecos)) if huecos else None
+        resultado = db.session.execute(
+            db.update(cls)
+            .where(cls.consumidor == consumidor, cls.ultimo_id <= ultimo_id)
+            .values(ultimo_id=ultimo_id, huecos=huecos, actualizado=datetime.now())
+            .execution_options(synchronize_session=False)
+        )
+        if resultado.rowcount == 0 and db.session.get(cls, consumidor) is None:
+            db.session.add(cls(consumidor=consumidor, ultimo_id=ultimo_id, huecos=huecos,
+                               actualizado=datetime.now()))
+
+    @classmethod
+    def minimo_pendiente(cls, consumidores: Iterable[str]) -> int:
+        """
+        Mayor id tal que todos los eventos hasta él ya los vieron todos los
+        consumidores (menor offset y menor hueco - 1)
+
+        Args:
+            consumidores: Nombres de los consumidores
+
+        Returns:
+            int: Id hasta el que se puede depurar (0 si ninguno)
+        """
+        minimo = None
+        for consumidor in consumidores:
+            ultimo, huecos = cls.obtener_con_huecos(consumidor)
+            limite = min([ultimo, *(hueco - 1 for hueco in huecos)])
+            minimo = limite if minimo is None else min(minimo, limite)
+        return minimo or 0
+
+    def __repr__(self):
+        return f"<OffsetConsumidor {self.consumidor} - {self.ultimo_id}>"
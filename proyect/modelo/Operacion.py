@@ -1,14 +1,29 @@
 """
 Clase Operacion - Clase base abstracta para operaciones del ATM
 """
-from abc import ABC, abstractmethod
+from abc import ABCMeta, abstractmethod
 from datetime import datetime
-from typing import Optional
-from decimal import Decimal
-from data.database import db
+from typing import NamedTuple, Optional
+from data.database import db, sesion_de
+from modelo.Dinero import Dinero, TipoDinero
 
 
-class Operacion(db.Model, ABC):
+class ResultadoOperacion(NamedTuple):
+    """
+    Resultado de una operación ya confirmada, independiente de la sesión
+    """
+    exitosa: bool
+    mensaje_error: Optional[str]
+    monto: Optional[Dinero]
+
+
+class _MetaOperacion(type(db.Model), ABCMeta):
+    """
+    Metaclase del modelo declarativo con soporte de métodos abstractos
+    """
+
+
+class Operacion(db.Model, metaclass=_MetaOperacion):
     """
     Clase abstracta base para todas las operaciones
     """
@@ -17,7 +32,7 @@ class Operacion(db.Model, ABC):
     id = db.Column(db.Integer, primary_key=True)
     tipo = db.Column(db.String(50), nullable=False)  # Discriminador para herencia
     fecha = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    monto = db.Column(db.Numeric(15, 2), nullable=True)
+    monto = db.Column(TipoDinero, nullable=True)
     descripcion = db.Column(db.Text)
     exitosa = db.Column(db.Boolean, default=False)
     mensaje_error = db.Column(db.String(200))
@@ -30,6 +45,19 @@ class Operacion(db.Model, ABC):
     cuenta = db.relationship('Cuenta', back_populates='operaciones')
     cajero = db.relationship('Cajero', back_populates='operaciones')
     
+    # Índices para las consultas de RegistroOperaciones (filtran por cuenta
+    # o cajero y ordenan por fecha). Ver data.migraciones para BDs existentes.
+    __table_args__ = (
+        db.Index('ix_operaciones_cuenta_fecha', 'cuenta_id', 'fecha'),
+        db.Index('ix_operaciones_cuenta_tipo_fecha', 'cuenta_id', 'tipo', 'fecha'),
+        db.Index('ix_operaciones_cuenta_exitosa_fecha', 'cuenta_id', 'exitosa', 'fecha'),
+        db.Index('ix_operaciones_cajero_fecha', 'cajero_id', 'fecha'),
+        db.Index('ix_operaciones_fecha', 'fecha'),
+        # Sin AUTOINCREMENT, SQLite reutiliza ids al vaciarse la tabla
+        # caliente y chocarían con los de las tablas frías
+        {'sqlite_autoincrement': True},
+    )
+    
     # Herencia de tabla única
     __mapper_args__ = {
         'polymorphic_identity': 'operacion',
@@ -37,37 +65,103 @@ class Operacion(db.Model, ABC):
         'with_polymorphic': '*'
     }
     
-    def __init__(self, cuenta, monto: Optional[float] = None, descripcion: str = ""):
+    def __init__(self, cuenta, monto: Optional[Dinero] = None, descripcion: str = ""):
         self.cuenta = cuenta
-        self.monto = Decimal(str(monto)) if monto else None
+        self.monto = Dinero.desde(monto) if monto else None
         self.descripcion = descripcion
         self.fecha = datetime.now()
     
+    # Prefijo del mensaje ante errores no previstos (ver _mensaje_de_error)
+    prefijo_error = "Error inesperado"
+    
     @abstractmethod
-    def ejecutar(self) -> bool:
+    def _aplicar(self) -> bool:
         """
-        Ejecuta la operación (debe ser implementado por subclases)
+        Aplica la lógica de la operación sobre la sesión, sin confirmar
+        (debe ser implementado por subclases)
         
         Returns:
             bool: True si la operación fue exitosa
         """
         pass
     
+    def aplicar(self) -> bool:
+        """
+        Aplica la operación y la registra, dejando la confirmación al
+        llamador (ejecutar o el coordinador de commit agrupado)
+        
+        Returns:
+            bool: True si la operación fue exitosa
+        """
+        from modelo.RegistroOperaciones import RegistroOperaciones
+        
+        exito = self._aplicar()
+        RegistroOperaciones.get_instance().registrar(self)
+        return exito
+    
+    def ejecutar(self) -> bool:
+        """
+        Ejecuta la operación y la confirma en su propia transacción (la de
+        la sesión a la que pertenece), repitiéndola completa ante un fallo
+        de serialización o un deadlock
+        
+        Returns:
+            bool: True si la operación fue exitosa
+        """
+        from data.concurrencia import reintentar_transaccion
+        
+        sesion = sesion_de(self)
+        
+        def transaccion() -> bool:
+            # Tras un rollback la operación (pendiente) sale de la sesión
+            sesion.add(self)
+            exito = self.aplicar()
+            sesion.commit()
+            return exito
+        
+        try:
+            return reintentar_transaccion(transaccion, sesion=sesion)
+        except Exception as e:
+            self.marcar_fallida(self._mensaje_de_error(e))
+            sesion.rollback()
+            return False
+    
+    def resultado(self) -> ResultadoOperacion:
+        """
+        Copia el resultado de la operación (para usarlo fuera de la sesión)
+        
+        Returns:
+            ResultadoOperacion: Éxito, mensaje de error y monto
+        """
+        return ResultadoOperacion(bool(self.exitosa), self.mensaje_error, self.monto)
+    
+    def _mensaje_de_error(self, error: Exception) -> str:
+        """
+        Mensaje a registrar cuando la operación lanza una excepción
+        
+        Args:
+            error: Excepción capturada
+            
+        Returns:
+            str: Mensaje de error
+        """
+        if isinstance(error, ValueError):
+            return str(error)
+        return f"{self.prefijo_error}: {str(error)}"
+    
     def marcar_exitosa(self) -> None:
-        """Marca la operación como exitosa"""
+        """Marca la operación como exitosa (se persiste al confirmar)"""
         self.exitosa = True
-        db.session.flush()
     
     def marcar_fallida(self, mensaje: str) -> None:
         """
-        Marca la operación como fallida
+        Marca la operación como fallida (se persiste al confirmar)
         
         Args:
             mensaje: Mensaje de error
         """
         self.exitosa = False
         self.mensaje_error = mensaje
-        db.session.flush()
     
     def __repr__(self):
         return f"<{self.__class__.__name__} ${self.monto} - {self.fecha}>"
@@ -81,42 +175,51 @@ class Retiro(Operacion):
         'polymorphic_identity': 'retiro'
     }
     
-    def __init__(self, cuenta, monto: float, cajero=None):
+    def __init__(self, cuenta, monto: Dinero, cajero=None):
         super().__init__(cuenta, monto, f"Retiro de efectivo - ${monto}")
         self.cajero = cajero
     
-    def ejecutar(self) -> bool:
+    def _aplicar(self) -> bool:
         """
-        Ejecuta el retiro de la cuenta
+        Aplica el retiro de la cuenta
         
         Returns:
             bool: True si el retiro fue exitoso
         """
-        try:
-            # Validar que el cajero tenga efectivo suficiente
-            if self.cajero and self.cajero.monto_cajero < float(self.monto):
-                self.marcar_fallida("Cajero sin efectivo suficiente")
-                return False
-            
-            # Intentar realizar el retiro
-            self.cuenta.retirar(float(self.monto))
-            
-            # Actualizar efectivo del cajero
-            if self.cajero:
-                self.cajero.monto_cajero -= float(self.monto)
-            
-            self.marcar_exitosa()
-            db.session.commit()
-            return True
-            
-        except ValueError as e:
-            self.marcar_fallida(str(e))
-            db.session.rollback()
+        # Validar que el cajero tenga efectivo suficiente
+        if self.cajero and self.cajero.monto_cajero.centavos < self.monto.centavos:
+            self.marcar_fallida("Cajero sin efectivo suficiente")
             return False
-        except Exception as e:
-            self.marcar_fallida(f"Error inesperado: {str(e)}")
-            db.session.rollback()
+        
+        # Billetes a entregar, si el cajero tiene casetes
+        plan = None
+        if self.cajero and self.cajero.tiene_casetes:
+            plan = self.cajero.plan_dispensado(self.monto)
+            if plan is None:
+                self.marcar_fallida("El cajero no puede entregar ese monto con los billetes disponibles")
+                return False
+        
+        # Débito de la cuenta y del efectivo del cajero en un mismo
+        # SAVEPOINT: si el cajero se quedó sin efectivo entre la
+        # validación y el débito, se deshace también el de la cuenta
+        transaccion = sesion_de(self).begin_nested()
+        try:
+            # Actualiza saldo y contador diario en un UPDATE condicional
+            exito, mensaje = self.cuenta.retirar(self.monto)
+            if exito and self.cajero and not self.cajero.entregar_efectivo(self.monto, plan):
+                exito, mensaje = False, "Cajero sin efectivo suficiente"
+        except Exception:
+            transaccion.rollback()
+            raise
+        
+        if not exito:
+            transaccion.rollback()
+            self.marcar_fallida(mensaje)
             return False
+        transaccion.commit()
+        
+        self.marcar_exitosa()
+        return True
 
 
 class Deposito(Operacion):
@@ -129,45 +232,38 @@ class Deposito(Operacion):
         'polymorphic_identity': 'deposito'
     }
     
-    def __init__(self, cuenta, monto: float, tipo_deposito: str = 'EFECTIVO', cajero=None):
+    def __init__(self, cuenta, monto: Dinero, tipo_deposito: str = 'EFECTIVO', cajero=None):
         super().__init__(cuenta, monto, f"Depósito {tipo_deposito} - ${monto}")
         self.tipo_deposito = tipo_deposito
         self.cajero = cajero
     
-    def ejecutar(self) -> bool:
+    def _aplicar(self) -> bool:
         """
-        Ejecuta el depósito en la cuenta
+        Aplica el depósito en la cuenta
         
         Returns:
             bool: True si el depósito fue exitoso
         """
-        try:
-            # Realizar el depósito
-            self.cuenta.depositar(float(self.monto))
-            
-            # Actualizar efectivo del cajero si es depósito de efectivo
-            if self.cajero and self.tipo_deposito == 'EFECTIVO':
-                self.cajero.monto_cajero += float(self.monto)
-            
-            self.marcar_exitosa()
-            db.session.commit()
-            return True
-            
-        except ValueError as e:
-            self.marcar_fallida(str(e))
-            db.session.rollback()
-            return False
-        except Exception as e:
-            self.marcar_fallida(f"Error inesperado: {str(e)}")
-            db.session.rollback()
+        # Realizar el depósito (UPDATE atómico)
+        if not self.cuenta.depositar(self.monto):
+            self.marcar_fallida("Monto de depósito inválido")
             return False
+        
+        # Actualizar efectivo del cajero si es depósito de efectivo
+        if self.cajero and self.tipo_deposito == 'EFECTIVO':
+            self.cajero.recibir_efectivo(self.monto)
+        
+        self.marcar_exitosa()
+        return True
 
 
 class ConsultaSaldo(Operacion):
     """
     Operación de consulta de saldo
     """
-    saldo_consultado = db.Column(db.Numeric(15, 2))
+    saldo_consultado = db.Column(TipoDinero)
+    
+    prefijo_error = "Error al consultar saldo"
     
     __mapper_args__ = {
         'polymorphic_identity': 'consulta_saldo'
@@ -177,24 +273,17 @@ class ConsultaSaldo(Operacion):
         super().__init__(cuenta, None, "Consulta de saldo")
         self.cajero = cajero
     
-    def ejecutar(self) -> bool:
+    def _aplicar(self) -> bool:
         """
-        Ejecuta la consulta de saldo
+        Aplica la consulta de saldo
         
         Returns:
             bool: True si la consulta fue exitosa
         """
-        try:
-            self.saldo_consultado = Decimal(str(self.cuenta.consultar_saldo()))
-            self.monto = self.saldo_consultado
-            self.marcar_exitosa()
-            db.session.commit()
-            return True
-            
-        except Exception as e:
-            self.marcar_fallida(f"Error al consultar saldo: {str(e)}")
-            db.session.rollback()
-            return False
+        self.saldo_consultado = self.cuenta.consultar_saldo()
+        self.monto = self.saldo_consultado
+        self.marcar_exitosa()
+        return True
 
 
 class PagoRecibo(Operacion):
@@ -205,11 +294,13 @@ class PagoRecibo(Operacion):
     nit_recibo = db.Column(db.String(20))
     numero_referencia = db.Column(db.String(50))
     
+    prefijo_error = "Error al procesar pago"
+    
     __mapper_args__ = {
         'polymorphic_identity': 'pago_recibo'
     }
     
-    def __init__(self, cuenta, monto: float, nombre_servicio: str, 
+    def __init__(self, cuenta, monto: Dinero, nombre_servicio: str, 
                  numero_referencia: str, nit_recibo: str = "", cajero=None):
         super().__init__(cuenta, monto, f"Pago de {nombre_servicio} - ${monto}")
         self.nombre_servicio = nombre_servicio
@@ -217,30 +308,20 @@ class PagoRecibo(Operacion):
         self.nit_recibo = nit_recibo
         self.cajero = cajero
     
-    def ejecutar(self) -> bool:
+    def _aplicar(self) -> bool:
         """
-        Ejecuta el pago del recibo
+        Aplica el pago del recibo
         
         Returns:
             bool: True si el pago fue exitoso
         """
-        try:
-            # Validar saldo suficiente
-            if self.cuenta.saldo < self.monto:
-                self.marcar_fallida("Saldo insuficiente para pago")
-                return False
-            
-            # Realizar el pago (débito de la cuenta)
-            self.cuenta.saldo -= self.monto
-            
-            self.marcar_exitosa()
-            db.session.commit()
-            return True
-            
-        except Exception as e:
-            self.marcar_fallida(f"Error al procesar pago: {str(e)}")
-            db.session.rollback()
+        # Realizar el pago (débito condicional de la cuenta)
+        if not self.cuenta.debitar(self.monto):
+            self.marcar_fallida("Saldo insuficiente para pago")
             return False
+        
+        self.marcar_exitosa()
+        return True
 
 
 class CompraEntradas(Operacion):
@@ -251,42 +332,34 @@ class CompraEntradas(Operacion):
     codigo_entrada = db.Column(db.String(50))
     cantidad = db.Column(db.Integer)
     
+    prefijo_error = "Error al procesar compra"
+    
     __mapper_args__ = {
         'polymorphic_identity': 'compra_entradas'
     }
     
-    def __init__(self, cuenta, monto: float, nombre_evento: str, 
+    def __init__(self, cuenta, monto: Dinero, nombre_evento: str, 
                  cantidad: int, cajero=None):
         super().__init__(cuenta, monto, f"Compra {cantidad} entrada(s) - {nombre_evento}")
         self.nombre_evento = nombre_evento
         self.cantidad = cantidad
         self.cajero = cajero
     
-    def ejecutar(self) -> bool:
+    def _aplicar(self) -> bool:
         """
-        Ejecuta la compra de entradas
+        Aplica la compra de entradas
         
         Returns:
             bool: True si la compra fue exitosa
         """
-        try:
-            # Validar saldo suficiente
-            if self.cuenta.saldo < self.monto:
-                self.marcar_fallida("Saldo insuficiente para compra")
-                return False
-            
-            # Generar código de entrada
-            import random
-            self.codigo_entrada = f"ENT-{random.randint(100000, 999999)}"
-            
-            # Realizar el pago
-            self.cuenta.saldo -= self.monto
-            
-            self.marcar_exitosa()
-            db.session.commit()
-            return True
-            
-        except Exception as e:
-            self.marcar_fallida(f"Error al procesar compra: {str(e)}")
-            db.session.rollback()
+        # Realizar el pago (débito condicional de la cuenta)
+        if not self.cuenta.debitar(self.monto):
+            self.marcar_fallida("Saldo insuficiente para compra")
             return False
+        
+        # Generar código de entrada
+        import random
+        self.codigo_entrada = f"ENT-{random.randint(100000, 999999)}"
+        
+        self.marcar_exitosa()
+        return True
@@ -0,0 +1,37 @@
+"""
+Clase OperacionResumen - Vista de solo lectura de una operación
+"""
+from datetime import datetime
+from typing import Optional
+from modelo.Dinero import Dinero
+
+
+class OperacionResumen:
+    """
+    Datos de una operación necesarios para extractos y comprobantes,
+    leídos como columnas sueltas (sin construir la Operacion polimórfica ni
+    sus columnas específicas de cada subclase)
+    """
+    __slots__ = (
+        'id', 'tipo', 'fecha', 'monto', 'descripcion',
+        'exitosa', 'mensaje_error', 'cuenta_id', 'cajero_id'
+    )
+
+    # Columnas de Operacion que se seleccionan, en el orden de __init__
+    COLUMNAS = __slots__
+
+    def __init__(self, id: int, tipo: str, fecha: datetime, monto: Optional[Dinero],
+                 descripcion: Optional[str], exitosa: bool, mensaje_error: Optional[str],
+                 cuenta_id: int, cajero_id: Optional[int]):
+        self.id = id
+        self.tipo = tipo
+        self.fecha = fecha
+        self.monto = monto
+        self.descripcion = descripcion
+        self.exitosa = exitosa
+        self.mensaje_error = mensaje_error
+        self.cuenta_id = cuenta_id
+        self.cajero_id = cajero_id
+
+    def __repr__(self):
+        return f"<OperacionResumen {self.tipo} ${self.monto} - {self.fecha}>"
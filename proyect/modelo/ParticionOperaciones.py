@@ -0,0 +1,23 @@
+"""
+Clase ParticionOperaciones - Catálogo de las tablas frías de operaciones
+"""
+from datetime import datetime
+from data.database import db
+
+
+class ParticionOperaciones(db.Model):
+    """
+    Tabla fría mensual de operaciones existente en la BD (ver
+    data.particiones). Se agrega al crear la tabla y se elimina al borrarla,
+    en la misma transacción, así que todos los procesos ven las mismas
+    particiones sin inspeccionar el esquema.
+    """
+    __tablename__ = 'particiones_operaciones'
+
+    anio = db.Column(db.Integer, primary_key=True)
+    mes = db.Column(db.Integer, primary_key=True)
+    nombre = db.Column(db.String(64), unique=True, nullable=False)
+    creada = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        return f"<ParticionOperaciones {self.nombre}>"
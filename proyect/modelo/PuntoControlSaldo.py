@@ -0,0 +1,114 @@
+"""
+Clase PuntoControlSaldo - Saldo de cada cuenta en un instante de corte
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from data.database import db
+from modelo.Dinero import TipoDinero
+
+# Días que se conservan los puntos de control diarios (los de inicio de
+# mes, es decir, cierre del mes anterior, se conservan siempre)
+DIAS_DIARIOS = 90
+
+
+class PuntoControlSaldo(db.Model):
+    """
+    Saldo de una cuenta con todas sus operaciones anteriores al corte
+    (fecha < corte) aplicadas, para calcular saldos históricos a partir del
+    punto más cercano en lugar de recorrer todo el historial (ver
+    RegistroOperaciones.obtener_saldo_a_fecha).
+    """
+    __tablename__ = 'puntos_control_saldo'
+
+    id = db.Column(db.Integer, primary_key=True)
+    cuenta_id = db.Column(db.Integer, db.ForeignKey('cuentas.id'), nullable=False)
+    fecha = db.Column(db.DateTime, nullable=False)
+    saldo = db.Column(TipoDinero, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_puntos_control_cuenta_fecha', 'cuenta_id', 'fecha', unique=True),
+        db.Index('ix_puntos_control_fecha', 'fecha'),
+    )
+
+    @classmethod
+    def generar(cls, corte: Optional[datetime] = None) -> int:
+        """
+        Crea el punto de control de todas las cuentas en un corte, con un
+        único INSERT ... SELECT: saldo actual menos el neto de las
+        operaciones posteriores al corte. Las cuentas que ya tienen punto en
+        ese corte se omiten.
+
+        Debe ejecutarse cuando ya no haya operaciones en curso anteriores al
+        corte (p. ej. el corte de medianoche unos minutos después).
+
+        Args:
+            corte: Instante de corte (por defecto la medianoche de hoy)
+
+        Returns:
+            int: Puntos de control creados
+        """
+        from modelo.cuenta import Cuenta
+        from modelo.RegistroOperaciones import RegistroOperaciones
+
+        if corte is None:
+            corte = datetime.combine(datetime.now().date(), datetime.min.time())
+
+        netos = RegistroOperaciones.get_instance().consulta_netos_por_cuenta(corte).subquery()
+        existente = db.select(cls.id).where(cls.cuenta_id == Cuenta.id, cls.fecha == corte)
+
+        try:
+            resultado = db.session.execute(
+                db.insert(cls).from_select(
+                    ['cuenta_id', 'fecha', 'saldo'],
+                    db.select(
+                        Cuenta.id,
+                        db.literal(corte, db.DateTime),
+                        db.type_coerce(Cuenta.saldo - db.func.coalesce(netos.c.neto, 0), TipoDinero)
+                    )
+                    .select_from(Cuenta)
+                    .outerjoin(netos, netos.c.cuenta_id == Cuenta.id)
+                    .where(~existente.exists())
+                )
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return resultado.rowcount
+
+    @classmethod
+    def depurar(cls, dias_diarios: int = DIAS_DIARIOS) -> int:
+        """
+        Elimina los puntos de control diarios más antiguos que dias_diarios,
+        conservando los de inicio de mes
+
+        Args:
+            dias_diarios: Días que se conservan todos los puntos
+
+        Returns:
+            int: Puntos eliminados
+        """
+        limite = datetime.now() - timedelta(days=dias_diarios)
+        cortes = db.session.execute(
+            db.select(cls.fecha).where(cls.fecha < limite).distinct()
+        ).scalars().all()
+
+        diarios = [
+            corte for corte in cortes
+            if not (corte.day == 1 and corte.time() == datetime.min.time())
+        ]
+        if not diarios:
+            return 0
+
+        try:
+            resultado = db.session.execute(
+                db.delete(cls).where(cls.fecha.in_(diarios))
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return resultado.rowcount
+
+    def __repr__(self):
+        return f"<PuntoControlSaldo cuenta {self.cuenta_id} ${self.saldo} - {self.fecha}>"
@@ -1,9 +1,60 @@
 """
 Clase RegistroOperaciones - Patrón Singleton para registro de operaciones
 """
-from typing import List, Optional
+import base64
+import json
+from typing import Iterator, List, Optional
 from datetime import datetime, date
 from modelo.Operacion import Operacion
+from modelo.Dinero import Dinero, TipoDinero
+from modelo.OperacionResumen import OperacionResumen
+
+# Operaciones por página en los iteradores de historial
+TAMANO_PAGINA = 500
+
+# Tipos que restan del saldo de la cuenta (los depósitos suman)
+TIPOS_DEBITO = ('retiro', 'pago_recibo', 'compra_entradas')
+
+# Clave de configuración de la app que activa el resumen incremental por
+# cuenta (tabla estadisticas_cuenta, ver RegistroOperaciones.usar_resumen)
+CLAVE_RESUMEN = 'RESUMEN_ESTADISTICAS'
+
+# Clave de configuración de la app que activa la publicación de eventos en
+# la bandeja de salida (ver RegistroOperaciones.usar_outbox)
+CLAVE_OUTBOX = 'OUTBOX_OPERACIONES'
+
+
+def codificar_cursor(fecha: datetime, operacion_id: int) -> str:
+    """
+    Codifica la posición (fecha, id) de la última operación entregada
+    
+    Args:
+        fecha: Fecha de la operación
+        operacion_id: Id de la operación
+        
+    Returns:
+        str: Cursor opaco (base64 urlsafe)
+    """
+    datos = json.dumps({'f': fecha.isoformat(), 'i': operacion_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decodifica un cursor generado por codificar_cursor
+    
+    Args:
+        cursor: Cursor recibido de la UI o API
+        
+    Returns:
+        tuple: (fecha, id)
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return datetime.fromisoformat(datos['f']), int(datos['i'])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
 
 
 class RegistroOperaciones:
@@ -42,13 +93,648 @@ class RegistroOperaciones:
         Args:
             operacion: Operación a registrar
         """
+        from data.database import sesion_de
+        
+        # Se persiste con la confirmación de la transacción de la operación
+        # (Operacion.ejecutar o el coordinador de commit agrupado), en la
+        # sesión a la que pertenece
+        sesion = sesion_de(operacion)
+        if operacion not in sesion:
+            sesion.add(operacion)
+        
+        if self.usar_resumen:
+            self._actualizar_resumen(operacion, sesion)
+        
+        if self.usar_outbox:
+            from modelo.EventoOperacion import EventoOperacion
+            sesion.add(EventoOperacion.desde(operacion))
+    
+    @property
+    def usar_resumen(self) -> bool:
+        """
+        Si el resumen incremental por cuenta está activo, según la clave
+        CLAVE_RESUMEN de la configuración de la app. Se lee en cada registro
+        y no se guarda en el singleton: todos los procesos que comparten la
+        BD toman la misma configuración, así que ninguno registra
+        operaciones sin sumarlas al resumen.
+        """
+        from flask import current_app, has_app_context
+        
+        return has_app_context() and bool(current_app.config.get(CLAVE_RESUMEN, False))
+    
+    def activar_resumen(self) -> None:
+        """
+        Activa el resumen incremental en la configuración de la app actual
+        (para activarlo al desplegar, configurar CLAVE_RESUMEN y ejecutar
+        esta función una vez)
+        
+        Los resúmenes existentes se descartan, ya que pueden no incluir las
+        operaciones registradas mientras estuvo inactivo; cada cuenta lo
+        reconstruye con una agregación al registrar su siguiente operación.
+        """
+        from flask import current_app
+        from data.database import db
+        from modelo.EstadisticaCuenta import EstadisticaCuenta
+        
+        db.session.execute(db.delete(EstadisticaCuenta))
+        db.session.commit()
+        current_app.config[CLAVE_RESUMEN] = True
+    
+    def desactivar_resumen(self) -> None:
+        """
+        Desactiva el resumen incremental en la configuración de la app
+        actual (las estadísticas vuelven a calcularse sobre el historial)
+        """
+        from flask import current_app
+        
+        current_app.config[CLAVE_RESUMEN] = False
+    
+    @property
+    def usar_outbox(self) -> bool:
+        """
+        Si la publicación de eventos está activa, según la clave
+        CLAVE_OUTBOX de la configuración de la app. Como usar_resumen, se
+        lee en cada registro: ningún proceso que comparta la configuración
+        registra operaciones sin su evento.
+        """
+        from flask import current_app, has_app_context
+        
+        return has_app_context() and bool(current_app.config.get(CLAVE_OUTBOX, False))
+    
+    def activar_outbox(self) -> None:
+        """
+        Activa la publicación de eventos en la configuración de la app
+        actual: cada operación registrada escribe además un EventoOperacion
+        en su misma transacción, que data.eventos.DespachadorEventos entrega
+        a los consumidores (para activarla al desplegar, configurar
+        CLAVE_OUTBOX)
+        """
+        from flask import current_app
+        
+        current_app.config[CLAVE_OUTBOX] = True
+    
+    def desactivar_outbox(self) -> None:
+        """
+        Desactiva la publicación de eventos en la configuración de la app
+        actual
+        """
+        from flask import current_app
+        
+        current_app.config[CLAVE_OUTBOX] = False
+    
+    def _actualizar_resumen(self, operacion: Operacion, sesion) -> None:
+        """
+        Suma una operación al resumen de su cuenta en la misma transacción
+        
+        Args:
+            operacion: Operación registrada
+            sesion: Sesión de la operación
+        """
+        from modelo.EstadisticaCuenta import EstadisticaCuenta
+        
+        cuenta_id = operacion.cuenta.id if operacion.cuenta is not None else operacion.cuenta_id
+        exitosa = bool(operacion.exitosa)
+        retirado = depositado = Dinero(0)
+        if exitosa and operacion.monto is not None:
+            if operacion.tipo == 'retiro':
+                retirado = operacion.monto
+            elif operacion.tipo == 'deposito':
+                depositado = operacion.monto
+        
+        if EstadisticaCuenta.acumular(cuenta_id, exitosa, retirado, depositado, sesion):
+            return
+        
+        # Primera operación de la cuenta con el resumen activo: se crea desde
+        # el historial (la consulta ya incluye esta operación por el autoflush)
+        total, exitosas, total_retirado, total_depositado = \
+            self.consulta_estadisticas(cuenta_id, sesion).one()
+        if not EstadisticaCuenta.crear(cuenta_id, total, exitosas or 0,
+                                       total_retirado or Dinero(0),
+                                       total_depositado or Dinero(0), sesion):
+            # Otra transacción lo creó primero sin ver esta operación
+            EstadisticaCuenta.acumular(cuenta_id, exitosa, retirado, depositado, sesion)
+    
+    # --- Consultas base (reutilizadas por los métodos de lectura) ---
+    
+    def _entidad(self, inicio: Optional[datetime] = None,
+                 fin: Optional[datetime] = None, conexion=None):
+        """
+        Entidad sobre la que consultar un rango de fechas: Operacion si solo
+        la tabla caliente puede contenerlo, o un alias sobre la unión de las
+        tablas que se solapan con el rango (ver data.particiones)
+        
+        Args:
+            inicio: Fecha inicial (None = sin límite)
+            fin: Fecha final (None = sin límite)
+            conexion: Conexión en la que leer el catálogo de particiones
+                (por defecto una propia)
+            
+        Returns:
+            Operacion o alias equivalente
+        """
+        from data.database import db
+        from data.particiones import ParticionesOperaciones
+        from sqlalchemy.orm import aliased
+        
+        tablas = ParticionesOperaciones.get_instance().tablas_para_rango(inicio, fin, conexion)
+        if tablas == [Operacion.__table__]:
+            return Operacion
+        
+        union = db.union_all(*[db.select(tabla) for tabla in tablas])
+        return aliased(Operacion, union.subquery('operaciones_particionadas'),
+                       adapt_on_names=True)
+    
+    def consulta_por_cuenta(self, cuenta_id: int):
+        """
+        Consulta de las operaciones de una cuenta, más recientes primero
+        
+        Args:
+            cuenta_id: Id de la cuenta
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
         from data.database import db
         
-        # La operación ya está en la sesión, solo necesitamos asegurarnos
-        # de que se persista
-        if operacion not in db.session:
-            db.session.add(operacion)
-        db.session.flush()
+        op = self._entidad()
+        return db.session.query(op).filter(
+            op.cuenta_id == cuenta_id
+        ).order_by(op.fecha.desc(), op.id.desc())
+    
+    def consulta_por_cuenta_y_fecha(self, cuenta_id: int,
+                                    fecha_inicio: date, fecha_fin: date):
+        """
+        Consulta de las operaciones de una cuenta en un rango de fechas
+        
+        Args:
+            cuenta_id: Id de la cuenta
+            fecha_inicio: Fecha inicial
+            fecha_fin: Fecha final
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        from data.database import db
+        
+        inicio = datetime.combine(fecha_inicio, datetime.min.time())
+        fin = datetime.combine(fecha_fin, datetime.max.time())
+        
+        op = self._entidad(inicio, fin)
+        return db.session.query(op).filter(
+            op.cuenta_id == cuenta_id,
+            op.fecha >= inicio,
+            op.fecha <= fin
+        ).order_by(op.fecha.desc(), op.id.desc())
+    
+    def consulta_por_tipo(self, cuenta_id: int, tipo: str):
+        """
+        Consulta de las operaciones de un tipo de una cuenta
+        
+        Args:
+            cuenta_id: Id de la cuenta
+            tipo: Tipo de operación
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        from data.database import db
+        
+        op = self._entidad()
+        return db.session.query(op).filter(
+            op.cuenta_id == cuenta_id,
+            op.tipo == tipo
+        ).order_by(op.fecha.desc(), op.id.desc())
+    
+    def consulta_por_estado(self, cuenta_id: int, exitosa: bool):
+        """
+        Consulta de las operaciones exitosas o fallidas de una cuenta
+        
+        Args:
+            cuenta_id: Id de la cuenta
+            exitosa: True para exitosas, False para fallidas
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        from data.database import db
+        
+        op = self._entidad()
+        return db.session.query(op).filter(
+            op.cuenta_id == cuenta_id,
+            op.exitosa == exitosa
+        ).order_by(op.fecha.desc(), op.id.desc())
+    
+    def consulta_por_cajero(self, cajero_id: int,
+                            fecha_inicio: date, fecha_fin: date):
+        """
+        Consulta de las operaciones de un cajero en un rango de fechas
+        
+        Args:
+            cajero_id: Id del cajero
+            fecha_inicio: Fecha inicial
+            fecha_fin: Fecha final
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        from data.database import db
+        
+        inicio = datetime.combine(fecha_inicio, datetime.min.time())
+        fin = datetime.combine(fecha_fin, datetime.max.time())
+        
+        op = self._entidad(inicio, fin)
+        return db.session.query(op).filter(
+            op.cajero_id == cajero_id,
+            op.fecha >= inicio,
+            op.fecha <= fin
+        ).order_by(op.fecha.desc(), op.id.desc())
+    
+    def consulta_total_retiros_fecha(self, cuenta_id: int, fecha: date):
+        """
+        Consulta de la suma de retiros exitosos de una cuenta en una fecha
+        
+        Args:
+            cuenta_id: Id de la cuenta
+            fecha: Fecha a consultar
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        from data.database import db
+        
+        inicio = datetime.combine(fecha, datetime.min.time())
+        fin = datetime.combine(fecha, datetime.max.time())
+        
+        op = self._entidad(inicio, fin)
+        return db.session.query(db.func.sum(op.monto)).filter(
+            op.cuenta_id == cuenta_id,
+            op.tipo == 'retiro',
+            op.fecha >= inicio,
+            op.fecha <= fin,
+            op.exitosa == True
+        )
+    
+    def consulta_antiguas(self, fecha_limite: datetime):
+        """
+        Consulta de las operaciones de la tabla caliente anteriores a una
+        fecha (las tablas frías se purgan por separado, ver data.purga)
+        
+        Args:
+            fecha_limite: Fecha límite (exclusiva)
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        return Operacion.query.filter(
+            Operacion.fecha < fecha_limite
+        )
+    
+    def consulta_estadisticas(self, cuenta_id: int, sesion=None):
+        """
+        Consulta de los totales de una cuenta en una sola pasada (agregados
+        condicionales): operaciones, exitosas, total retirado y depositado
+        
+        Args:
+            cuenta_id: Id de la cuenta
+            sesion: Sesión de la consulta (por defecto db.session)
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        from data.database import db
+        
+        if sesion is None:
+            sesion = db.session()
+            op = self._entidad()
+        else:
+            op = self._entidad(conexion=sesion.connection())
+        
+        def suma_exitosas(tipo: str):
+            return db.func.sum(db.case(
+                (db.and_(op.tipo == tipo, op.exitosa == True), op.monto),
+                else_=db.literal(Dinero(0), TipoDinero)
+            ))
+        
+        return sesion.query(
+            db.func.count(op.id),
+            db.func.sum(db.case((op.exitosa == True, 1), else_=0)),
+            suma_exitosas('retiro'),
+            suma_exitosas('deposito')
+        ).filter(op.cuenta_id == cuenta_id)
+    
+    def consulta_movimientos(self, cuenta_id: int, fecha_inicio: date, fecha_fin: date):
+        """
+        Consulta de las operaciones exitosas que mueven el saldo de una
+        cuenta (depósitos, retiros, pagos y compras) en un rango de fechas
+        
+        Args:
+            cuenta_id: Id de la cuenta
+            fecha_inicio: Fecha inicial
+            fecha_fin: Fecha final
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        consulta = self.consulta_por_cuenta_y_fecha(cuenta_id, fecha_inicio, fecha_fin)
+        op = consulta.column_descriptions[0]['entity']
+        return consulta.filter(
+            op.exitosa == True,
+            op.tipo.in_(('deposito',) + TIPOS_DEBITO)
+        )
+    
+    def _expresion_neto(self, op):
+        """
+        Suma con signo de los montos exitosos de una entidad de operaciones:
+        los depósitos suman y los retiros, pagos y compras restan
+        
+        Args:
+            op: Operacion o alias (ver _entidad)
+            
+        Returns:
+            Expresión de agregado
+        """
+        from data.database import db
+        
+        return db.func.coalesce(db.func.sum(db.case(
+            (db.and_(op.tipo == 'deposito', op.exitosa == True), op.monto),
+            (db.and_(op.tipo.in_(TIPOS_DEBITO), op.exitosa == True), -op.monto),
+            else_=db.literal(Dinero(0), TipoDinero)
+        )), db.literal(Dinero(0), TipoDinero))
+    
+    def consulta_neto(self, cuenta_id: int, desde: datetime,
+                      hasta: Optional[datetime] = None):
+        """
+        Consulta del movimiento neto de saldo de una cuenta en [desde, hasta)
+        
+        Args:
+            cuenta_id: Id de la cuenta
+            desde: Fecha inicial (incluida)
+            hasta: Fecha final (excluida; None = sin límite)
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        from data.database import db
+        
+        op = self._entidad(desde, hasta)
+        consulta = db.session.query(self._expresion_neto(op)).filter(
+            op.cuenta_id == cuenta_id,
+            op.fecha >= desde
+        )
+        if hasta is not None:
+            consulta = consulta.filter(op.fecha < hasta)
+        return consulta
+    
+    def consulta_netos_por_cuenta(self, desde: datetime):
+        """
+        Consulta del movimiento neto de saldo de cada cuenta desde una fecha
+        (ver PuntoControlSaldo.generar)
+        
+        Args:
+            desde: Fecha inicial (incluida)
+            
+        Returns:
+            Query: Consulta sin ejecutar con columnas cuenta_id y neto
+        """
+        from data.database import db
+        
+        op = self._entidad(desde, None)
+        return db.session.query(
+            op.cuenta_id, self._expresion_neto(op).label('neto')
+        ).filter(op.fecha >= desde).group_by(op.cuenta_id)
+    
+    def consultas_registradas(self, cuenta_id: int = 1, cajero_id: int = 1) -> dict:
+        """
+        Consultas que ejecuta el registro, con parámetros de ejemplo, para
+        revisar sus planes de ejecución (ver data.planes_consulta)
+        
+        Args:
+            cuenta_id: Id de cuenta de ejemplo
+            cajero_id: Id de cajero de ejemplo
+            
+        Returns:
+            dict: Nombre -> Query
+        """
+        hoy = date.today()
+        
+        return {
+            'por_cuenta': self.consulta_por_cuenta(cuenta_id),
+            'por_cuenta_y_fecha': self.consulta_por_cuenta_y_fecha(cuenta_id, hoy, hoy),
+            'ultimas_n': self.consulta_por_cuenta(cuenta_id).limit(10),
+            'pagina_por_cuenta': self.consulta_despues_de(
+                self.consulta_por_cuenta(cuenta_id),
+                codificar_cursor(datetime.combine(hoy, datetime.min.time()), 1)
+            ).limit(TAMANO_PAGINA),
+            'por_tipo': self.consulta_por_tipo(cuenta_id, 'retiro'),
+            'exitosas': self.consulta_por_estado(cuenta_id, True),
+            'fallidas': self.consulta_por_estado(cuenta_id, False),
+            'por_cajero': self.consulta_por_cajero(cajero_id, hoy, hoy),
+            'total_retiros_fecha': self.consulta_total_retiros_fecha(cuenta_id, hoy),
+            'estadisticas': self.consulta_estadisticas(cuenta_id),
+            'neto_desde_punto_control': self.consulta_neto(
+                cuenta_id, datetime.combine(hoy, datetime.min.time()), datetime.now()
+            ),
+            'resumen_por_cuenta': self.proyectar(self.consulta_por_cuenta(cuenta_id)),
+            'movimientos_extracto': self.proyectar(self.consulta_movimientos(cuenta_id, hoy, hoy)),
+            'antiguas': self.consulta_antiguas(datetime.combine(hoy, datetime.min.time())),
+        }
+    
+    # --- Paginación por clave (fecha, id) ---
+    
+    def consulta_despues_de(self, consulta, cursor: str):
+        """
+        Restringe una consulta a las operaciones posteriores al cursor en
+        orden (fecha, id) descendente
+        
+        Args:
+            consulta: Consulta base (ver consulta_por_*)
+            cursor: Cursor de la última operación entregada
+            
+        Returns:
+            Query: Consulta sin ejecutar
+        """
+        from data.database import db
+        
+        fecha, operacion_id = decodificar_cursor(cursor)
+        op = consulta.column_descriptions[0]['entity']
+        return consulta.filter(db.or_(
+            op.fecha < fecha,
+            db.and_(op.fecha == fecha, op.id < operacion_id)
+        ))
+    
+    def obtener_pagina(self, consulta, tamano_pagina: int = TAMANO_PAGINA,
+                       cursor: Optional[str] = None) -> tuple[List[Operacion], Optional[str]]:
+        """
+        Obtiene una página de una consulta ordenada por fecha e id
+        descendentes, continuando después del cursor (sin OFFSET)
+        
+        Args:
+            consulta: Consulta base (ver consulta_por_*)
+            tamano_pagina: Operaciones por página
+            cursor: Cursor devuelto por la página anterior
+            
+        Returns:
+            tuple: (operaciones, cursor de la página siguiente o None)
+        """
+        if tamano_pagina < 1:
+            raise ValueError("El tamaño de página debe ser al menos 1")
+        
+        if cursor is not None:
+            consulta = self.consulta_despues_de(consulta, cursor)
+        
+        operaciones = consulta.limit(tamano_pagina).all()
+        
+        if len(operaciones) < tamano_pagina:
+            return operaciones, None
+        ultima = operaciones[-1]
+        return operaciones, codificar_cursor(ultima.fecha, ultima.id)
+    
+    def iterar(self, consulta, tamano_pagina: int = TAMANO_PAGINA,
+               cursor: Optional[str] = None) -> Iterator[Operacion]:
+        """
+        Recorre una consulta página a página, cargando a lo sumo
+        tamano_pagina operaciones a la vez
+        
+        Args:
+            consulta: Consulta base (ver consulta_por_*)
+            tamano_pagina: Operaciones por página
+            cursor: Cursor desde el cual continuar
+            
+        Yields:
+            Operacion: Operaciones en orden de fecha descendente
+        """
+        while True:
+            operaciones, cursor = self.obtener_pagina(consulta, tamano_pagina, cursor)
+            yield from operaciones
+            if cursor is None:
+                return
+    
+    def iterar_por_cuenta(self, cuenta: 'Cuenta', tamano_pagina: int = TAMANO_PAGINA,
+                          cursor: Optional[str] = None) -> Iterator[Operacion]:
+        """
+        Recorre todas las operaciones de una cuenta (ver obtener_por_cuenta)
+        
+        Args:
+            cuenta: Cuenta a consultar
+            tamano_pagina: Operaciones por página
+            cursor: Cursor desde el cual continuar
+            
+        Yields:
+            Operacion: Operaciones de la cuenta
+        """
+        return self.iterar(self.consulta_por_cuenta(cuenta.id), tamano_pagina, cursor)
+    
+    def iterar_por_tipo(self, cuenta: 'Cuenta', tipo: str,
+                        tamano_pagina: int = TAMANO_PAGINA,
+                        cursor: Optional[str] = None) -> Iterator[Operacion]:
+        """
+        Recorre las operaciones de un tipo (ver obtener_por_tipo)
+        
+        Args:
+            cuenta: Cuenta a consultar
+            tipo: Tipo de operación ('retiro', 'deposito', etc.)
+            tamano_pagina: Operaciones por página
+            cursor: Cursor desde el cual continuar
+            
+        Yields:
+            Operacion: Operaciones del tipo
+        """
+        return self.iterar(self.consulta_por_tipo(cuenta.id, tipo), tamano_pagina, cursor)
+    
+    def iterar_exitosas(self, cuenta: 'Cuenta', tamano_pagina: int = TAMANO_PAGINA,
+                        cursor: Optional[str] = None) -> Iterator[Operacion]:
+        """
+        Recorre las operaciones exitosas (ver obtener_exitosas)
+        
+        Args:
+            cuenta: Cuenta a consultar
+            tamano_pagina: Operaciones por página
+            cursor: Cursor desde el cual continuar
+            
+        Yields:
+            Operacion: Operaciones exitosas
+        """
+        return self.iterar(self.consulta_por_estado(cuenta.id, True), tamano_pagina, cursor)
+    
+    def iterar_fallidas(self, cuenta: 'Cuenta', tamano_pagina: int = TAMANO_PAGINA,
+                        cursor: Optional[str] = None) -> Iterator[Operacion]:
+        """
+        Recorre las operaciones fallidas (ver obtener_fallidas)
+        
+        Args:
+            cuenta: Cuenta a consultar
+            tamano_pagina: Operaciones por página
+            cursor: Cursor desde el cual continuar
+            
+        Yields:
+            Operacion: Operaciones fallidas
+        """
+        return self.iterar(self.consulta_por_estado(cuenta.id, False), tamano_pagina, cursor)
+    
+    # --- Lecturas livianas (extractos y comprobantes) ---
+    
+    def proyectar(self, consulta):
+        """
+        Reduce una consulta a las columnas de OperacionResumen, sin cargar
+        las columnas de las subclases ni construir objetos ORM
+        
+        Args:
+            consulta: Consulta base (ver consulta_por_*)
+            
+        Returns:
+            Query: Consulta de filas (conserva filtros y orden)
+        """
+        op = consulta.column_descriptions[0]['entity']
+        return consulta.with_entities(*[getattr(op, columna) for columna in OperacionResumen.COLUMNAS])
+    
+    def obtener_resumenes(self, consulta) -> List[OperacionResumen]:
+        """
+        Ejecuta una consulta como lista de OperacionResumen
+        
+        Args:
+            consulta: Consulta base (ver consulta_por_*)
+            
+        Returns:
+            List[OperacionResumen]: Operaciones
+        """
+        return [OperacionResumen(*fila) for fila in self.proyectar(consulta)]
+    
+    def iterar_resumenes(self, consulta, tamano_pagina: int = TAMANO_PAGINA,
+                         cursor: Optional[str] = None) -> Iterator[OperacionResumen]:
+        """
+        Recorre una consulta como OperacionResumen, página a página
+        
+        Args:
+            consulta: Consulta base (ver consulta_por_*)
+            tamano_pagina: Operaciones por página
+            cursor: Cursor desde el cual continuar
+            
+        Yields:
+            OperacionResumen: Operaciones en orden de fecha descendente
+        """
+        for fila in self.iterar(self.proyectar(consulta), tamano_pagina, cursor):
+            yield OperacionResumen(*fila)
+    
+    def iterar_resumenes_cronologico(self, consulta,
+                                     tamano_lote: int = TAMANO_PAGINA) -> Iterator[OperacionResumen]:
+        """
+        Recorre una consulta como OperacionResumen en orden (fecha, id)
+        ascendente, con una sola consulta leída del cursor por lotes (para
+        saldos corridos, que necesitan el orden cronológico)
+        
+        Args:
+            consulta: Consulta base (ver consulta_por_*)
+            tamano_lote: Filas leídas por lote
+            
+        Yields:
+            OperacionResumen: Operaciones de la más antigua a la más reciente
+        """
+        op = consulta.column_descriptions[0]['entity']
+        ordenada = self.proyectar(consulta).order_by(None).order_by(op.fecha.asc(), op.id.asc())
+        for fila in ordenada.yield_per(tamano_lote):
+            yield OperacionResumen(*fila)
+    
+    # --- Lecturas ---
     
     def obtener_por_cuenta(self, cuenta: 'Cuenta') -> List[Operacion]:
         """
@@ -60,9 +746,7 @@ class RegistroOperaciones:
         Returns:
             List[Operacion]: Lista de operaciones
         """
-        return Operacion.query.filter_by(
-            cuenta_id=cuenta.id
-        ).order_by(Operacion.fecha.desc()).all()
+        return self.consulta_por_cuenta(cuenta.id).all()
     
     def obtener_por_cuenta_y_fecha(self, cuenta: 'Cuenta', 
                                    fecha_inicio: date, 
@@ -78,14 +762,7 @@ class RegistroOperaciones:
         Returns:
             List[Operacion]: Lista de operaciones
         """
-        inicio = datetime.combine(fecha_inicio, datetime.min.time())
-        fin = datetime.combine(fecha_fin, datetime.max.time())
-        
-        return Operacion.query.filter(
-            Operacion.cuenta_id == cuenta.id,
-            Operacion.fecha >= inicio,
-            Operacion.fecha <= fin
-        ).order_by(Operacion.fecha.desc()).all()
+        return self.consulta_por_cuenta_y_fecha(cuenta.id, fecha_inicio, fecha_fin).all()
     
     def obtener_ultimas_n(self, cuenta: 'Cuenta', n: int = 10) -> List[Operacion]:
         """
@@ -98,9 +775,7 @@ class RegistroOperaciones:
         Returns:
             List[Operacion]: Lista de operaciones
         """
-        return Operacion.query.filter_by(
-            cuenta_id=cuenta.id
-        ).order_by(Operacion.fecha.desc()).limit(n).all()
+        return self.consulta_por_cuenta(cuenta.id).limit(n).all()
     
     def obtener_por_tipo(self, cuenta: 'Cuenta', tipo: str) -> List[Operacion]:
         """
@@ -113,10 +788,7 @@ class RegistroOperaciones:
         Returns:
             List[Operacion]: Lista de operaciones
         """
-        return Operacion.query.filter_by(
-            cuenta_id=cuenta.id,
-            tipo=tipo
-        ).order_by(Operacion.fecha.desc()).all()
+        return self.consulta_por_tipo(cuenta.id, tipo).all()
     
     def obtener_exitosas(self, cuenta: 'Cuenta') -> List[Operacion]:
         """
@@ -128,10 +800,7 @@ class RegistroOperaciones:
         Returns:
             List[Operacion]: Lista de operaciones exitosas
         """
-        return Operacion.query.filter_by(
-            cuenta_id=cuenta.id,
-            exitosa=True
-        ).order_by(Operacion.fecha.desc()).all()
+        return self.consulta_por_estado(cuenta.id, True).all()
     
     def obtener_fallidas(self, cuenta: 'Cuenta') -> List[Operacion]:
         """
@@ -143,41 +812,113 @@ class RegistroOperaciones:
         Returns:
             List[Operacion]: Lista de operaciones fallidas
         """
-        return Operacion.query.filter_by(
-            cuenta_id=cuenta.id,
-            exitosa=False
-        ).order_by(Operacion.fecha.desc()).all()
+        return self.consulta_por_estado(cuenta.id, False).all()
     
-    def obtener_total_retiros_hoy(self, cuenta: 'Cuenta') -> float:
+    def obtener_por_cajero(self, cajero: 'Cajero',
+                           fecha_inicio: date,
+                           fecha_fin: date) -> List[Operacion]:
         """
-        Obtiene el total retirado hoy de una cuenta
+        Obtiene las operaciones de un cajero en un rango de fechas
+        
+        Args:
+            cajero: Cajero a consultar
+            fecha_inicio: Fecha inicial
+            fecha_fin: Fecha final
+            
+        Returns:
+            List[Operacion]: Lista de operaciones
+        """
+        return self.consulta_por_cajero(cajero.id, fecha_inicio, fecha_fin).all()
+    
+    def obtener_total_retiros_hoy(self, cuenta: 'Cuenta') -> Dinero:
+        """
+        Obtiene el total retirado hoy de una cuenta (contador diario de la
+        cuenta, sin recorrer el historial)
+        
+        Args:
+            cuenta: Cuenta a consultar
+            
+        Returns:
+            Dinero: Total retirado hoy
+        """
+        return cuenta.get_total_retiros_hoy()
+    
+    def obtener_total_retiros_fecha(self, cuenta: 'Cuenta', fecha: date) -> Dinero:
+        """
+        Obtiene el total de retiros exitosos de una cuenta en una fecha
+        pasada, sumando el historial de operaciones
+        
+        Args:
+            cuenta: Cuenta a consultar
+            fecha: Fecha a consultar
+            
+        Returns:
+            Dinero: Total retirado en la fecha
+        """
+        total = self.consulta_total_retiros_fecha(cuenta.id, fecha).scalar()
+        
+        return total if total is not None else Dinero(0)
+    
+    def obtener_saldo_a_fecha(self, cuenta: 'Cuenta', fecha) -> Dinero:
+        """
+        Obtiene el saldo de una cuenta en un instante pasado
+        
+        Parte del punto de control (ver PuntoControlSaldo) más cercano, ya
+        sea anterior (sumando las operaciones desde él) o posterior o el
+        saldo actual (restando las operaciones hasta él), de modo que solo
+        se recorren las operaciones entre ese punto y la fecha pedida. Si
+        ese tramo incluye operaciones ya purgadas el resultado no es exacto.
         
         Args:
             cuenta: Cuenta a consultar
+            fecha: Instante (datetime) o día (date, saldo al cierre del día)
             
         Returns:
-            float: Total retirado hoy
+            Dinero: Saldo con las operaciones anteriores al instante
         """
+        from datetime import timedelta
         from data.database import db
-        from modelo.Operacion import Retiro
+        from modelo.cuenta import Cuenta
+        from modelo.PuntoControlSaldo import PuntoControlSaldo
         
-        hoy = date.today()
-        inicio = datetime.combine(hoy, datetime.min.time())
-        fin = datetime.combine(hoy, datetime.max.time())
+        if not isinstance(fecha, datetime):
+            fecha = datetime.combine(fecha + timedelta(days=1), datetime.min.time())
+        
+        anterior = db.session.execute(
+            db.select(PuntoControlSaldo.fecha, PuntoControlSaldo.saldo)
+            .where(PuntoControlSaldo.cuenta_id == cuenta.id, PuntoControlSaldo.fecha <= fecha)
+            .order_by(PuntoControlSaldo.fecha.desc()).limit(1)
+        ).first()
+        posterior = db.session.execute(
+            db.select(PuntoControlSaldo.fecha, PuntoControlSaldo.saldo)
+            .where(PuntoControlSaldo.cuenta_id == cuenta.id, PuntoControlSaldo.fecha > fecha)
+            .order_by(PuntoControlSaldo.fecha.asc()).limit(1)
+        ).first()
+        
+        if anterior is not None and anterior.fecha == fecha:
+            return anterior.saldo
         
-        total = db.session.query(db.func.sum(Retiro.monto)).filter(
-            Retiro.cuenta_id == cuenta.id,
-            Retiro.fecha >= inicio,
-            Retiro.fecha <= fin,
-            Retiro.exitosa == True
-        ).scalar()
+        # Base posterior: el punto siguiente o, si no hay, el saldo actual
+        # (que incluye todas las operaciones, sin límite superior)
+        if posterior is not None:
+            hasta, saldo_posterior = posterior.fecha, posterior.saldo
+        else:
+            hasta, saldo_posterior = None, db.session.execute(
+                db.select(Cuenta.saldo).where(Cuenta.id == cuenta.id)
+            ).scalar_one()
         
-        return float(total) if total else 0.0
+        if anterior is not None and fecha - anterior.fecha <= (hasta or datetime.now()) - fecha:
+            return anterior.saldo + self.consulta_neto(cuenta.id, anterior.fecha, fecha).scalar()
+        
+        return saldo_posterior - self.consulta_neto(cuenta.id, fecha, hasta).scalar()
     
     def obtener_estadisticas_cuenta(self, cuenta: 'Cuenta') -> dict:
         """
         Obtiene estadísticas de operaciones de una cuenta
         
+        Con el resumen activo es una lectura por clave primaria; si no (o si
+        la cuenta aún no tiene resumen), una sola consulta de agregados.
+        
         Args:
             cuenta: Cuenta a analizar
             
@@ -185,61 +926,60 @@ class RegistroOperaciones:
             dict: Estadísticas de la cuenta
         """
         from data.database import db
-        from modelo.Operacion import Retiro, Deposito
-        
-        # Total de operaciones
-        total_ops = Operacion.query.filter_by(cuenta_id=cuenta.id).count()
+        from modelo.EstadisticaCuenta import EstadisticaCuenta
         
-        # Operaciones exitosas
-        exitosas = Operacion.query.filter_by(
-            cuenta_id=cuenta.id, 
-            exitosa=True
-        ).count()
+        fila = None
+        if self.usar_resumen:
+            fila = db.session.execute(
+                db.select(
+                    EstadisticaCuenta.total_operaciones,
+                    EstadisticaCuenta.operaciones_exitosas,
+                    EstadisticaCuenta.total_retirado,
+                    EstadisticaCuenta.total_depositado
+                ).where(EstadisticaCuenta.cuenta_id == cuenta.id)
+            ).first()
         
-        # Total retirado
-        total_retirado = db.session.query(db.func.sum(Retiro.monto)).filter(
-            Retiro.cuenta_id == cuenta.id,
-            Retiro.exitosa == True
-        ).scalar() or 0
+        if fila is None:
+            fila = self.consulta_estadisticas(cuenta.id).one()
         
-        # Total depositado
-        total_depositado = db.session.query(db.func.sum(Deposito.monto)).filter(
-            Deposito.cuenta_id == cuenta.id,
-            Deposito.exitosa == True
-        ).scalar() or 0
+        total_ops, exitosas, total_retirado, total_depositado = fila
+        exitosas = exitosas or 0
         
         return {
             'total_operaciones': total_ops,
             'operaciones_exitosas': exitosas,
             'operaciones_fallidas': total_ops - exitosas,
-            'total_retirado': float(total_retirado),
-            'total_depositado': float(total_depositado),
+            'total_retirado': float(total_retirado or 0),
+            'total_depositado': float(total_depositado or 0),
             'tasa_exito': (exitosas / total_ops * 100) if total_ops > 0 else 0
         }
     
-    def limpiar_operaciones_antiguas(self, dias: int = 365) -> int:
+    def limpiar_operaciones_antiguas(self, dias: int = 365,
+                                     directorio: Optional[str] = None,
+                                     tamano_lote: Optional[int] = None) -> int:
         """
-        Limpia operaciones antiguas del sistema
+        Limpia operaciones antiguas del sistema, archivándolas antes en
+        archivos comprimidos por mes (ver data.purga)
+        
+        Se procesa por lotes acotados con un DELETE por lote, así que la
+        memoria y la duración de cada transacción no dependen del volumen;
+        si se interrumpe, la siguiente llamada completa la purga pendiente.
         
         Args:
             dias: Días de antigüedad para eliminar
+            directorio: Directorio del archivo (por defecto DIRECTORIO_ARCHIVO)
+            tamano_lote: Operaciones por lote (por defecto TAMANO_LOTE)
             
         Returns:
             int: Número de operaciones eliminadas
         """
-        from data.database import db
         from datetime import timedelta
+        from data.purga import purgar_operaciones, DIRECTORIO_ARCHIVO, TAMANO_LOTE
         
         fecha_limite = datetime.now() - timedelta(days=dias)
         
-        operaciones_antiguas = Operacion.query.filter(
-            Operacion.fecha < fecha_limite
-        ).all()
-        
-        count = len(operaciones_antiguas)
-        
-        for op in operaciones_antiguas:
-            db.session.delete(op)
-        
-        db.session.commit()
-        return count
+        return purgar_operaciones(
+            fecha_limite,
+            directorio or DIRECTORIO_ARCHIVO,
+            tamano_lote or TAMANO_LOTE
+        )
@@ -3,8 +3,12 @@ Clase Tarjeta - Representa una tarjeta débito asociada a una cuenta
 """
 from enum import Enum
 from typing import Optional
-import bcrypt
-from data.database import db
+from data.database import db, sesion_de
+from modelo.CacheTarjetas import CacheTarjetas, EntradaTarjeta
+from modelo.hash_pin import (
+    hashear_pin, comprobar_pin, costo_de_hash, validar_costo,
+    COSTO_BCRYPT_POR_DEFECTO
+)
 
 
 class EstadoTarjeta(str, Enum):
@@ -26,6 +30,7 @@ class Tarjeta(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     numero_tarjeta = db.Column(db.String(20), unique=True, nullable=False, index=True)
     pin_hash = db.Column(db.String(100), nullable=False)
+    pin_costo = db.Column(db.Integer, nullable=True)  # Costo bcrypt de pin_hash
     estado = db.Column(db.Enum(EstadoTarjeta), default=EstadoTarjeta.ACTIVA, nullable=False)
     intentos_fallidos = db.Column(db.Integer, default=0)
     max_intentos = db.Column(db.Integer, default=3)
@@ -34,7 +39,10 @@ class Tarjeta(db.Model):
     cuenta_id = db.Column(db.Integer, db.ForeignKey('cuentas.id'), nullable=False, unique=True)
     
     # Relaciones
-    cuenta = db.relationship('Cuenta', back_populates='tarjeta')
+    cuenta = db.relationship('Cuenta', back_populates='tarjeta', foreign_keys=[cuenta_id])
+    
+    # Costo bcrypt objetivo para PINs nuevos y rehash al iniciar sesión
+    COSTO_BCRYPT_OBJETIVO = COSTO_BCRYPT_POR_DEFECTO
     
     def __init__(self, numero_tarjeta: str, pin: str = "1234", cuenta=None):
         self.numero_tarjeta = numero_tarjeta
@@ -45,18 +53,63 @@ class Tarjeta(db.Model):
         if cuenta:
             self.cuenta = cuenta
     
-    def set_pin(self, pin: str) -> None:
+    @classmethod
+    def configurar_costo_bcrypt(cls, costo: int) -> None:
+        """
+        Cambia el costo bcrypt objetivo. Los PINs existentes se rehashean
+        con el nuevo costo en su siguiente verificación exitosa.
+        
+        Args:
+            costo: Costo bcrypt (log2 de rondas)
+        """
+        cls.COSTO_BCRYPT_OBJETIVO = validar_costo(costo)
+    
+    def set_pin(self, pin: str, costo: Optional[int] = None) -> None:
         """
         Establece el PIN de la tarjeta (hasheado)
         
         Args:
             pin: PIN en texto plano
+            costo: Costo bcrypt (por defecto COSTO_BCRYPT_OBJETIVO)
         """
         if not pin or len(pin) != 4 or not pin.isdigit():
             raise ValueError("El PIN debe ser de 4 dígitos numéricos")
         
-        salt = bcrypt.gensalt()
-        self.pin_hash = bcrypt.hashpw(pin.encode('utf-8'), salt).decode('utf-8')
+        costo = costo or Tarjeta.COSTO_BCRYPT_OBJETIVO
+        self.actualizar_hash_pin(hashear_pin(pin, costo), costo)
+    
+    def actualizar_hash_pin(self, pin_hash: str, costo: int) -> None:
+        """
+        Guarda un hash de PIN ya calculado junto con su costo
+        
+        Args:
+            pin_hash: Hash bcrypt del PIN
+            costo: Costo con el que se generó
+        """
+        self.pin_hash = pin_hash
+        self.pin_costo = costo
+        self._invalidar_cache()
+    
+    def get_costo_pin(self) -> int:
+        """
+        Obtiene el costo bcrypt del hash almacenado
+        
+        Returns:
+            int: Costo bcrypt
+        """
+        if self.pin_costo is None:
+            # Filas creadas antes de existir pin_costo
+            return costo_de_hash(self.pin_hash)
+        return self.pin_costo
+    
+    def necesita_rehash(self) -> bool:
+        """
+        Indica si el hash del PIN usa un costo distinto al objetivo
+        
+        Returns:
+            bool: True si debe rehashearse
+        """
+        return self.get_costo_pin() != Tarjeta.COSTO_BCRYPT_OBJETIVO
     
     def verificar_pin(self, pin: str) -> bool:
         """
@@ -72,21 +125,36 @@ class Tarjeta(db.Model):
             raise ValueError(f"Tarjeta en estado {self.estado.value}")
         
         try:
-            es_correcto = bcrypt.checkpw(
-                pin.encode('utf-8'), 
-                self.pin_hash.encode('utf-8')
-            )
+            es_correcto = comprobar_pin(pin, self.pin_hash)
+            self.registrar_intento_pin(es_correcto)
             
-            if es_correcto:
-                self.reset_intentos()
-                return True
-            else:
-                self.incrementar_falla()
-                return False
+            # Rehash transparente si cambió el costo objetivo
+            if es_correcto and self.necesita_rehash():
+                self.set_pin(pin)
+            
+            return es_correcto
                 
         except Exception as e:
             raise ValueError(f"Error al verificar PIN: {str(e)}")
     
+    def registrar_intento_pin(self, es_correcto: bool) -> bool:
+        """
+        Aplica el resultado de una verificación de PIN ya calculada
+        (resetea intentos o incrementa fallas y bloquea)
+        
+        Args:
+            es_correcto: Resultado de comparar el PIN con el hash
+            
+        Returns:
+            bool: El mismo resultado recibido
+        """
+        if es_correcto:
+            self.reset_intentos()
+            return True
+        
+        self.incrementar_falla()
+        return False
+    
     def incrementar_falla(self) -> None:
         """
         Incrementa el contador de intentos fallidos
@@ -97,21 +165,24 @@ class Tarjeta(db.Model):
         if self.intentos_fallidos >= self.max_intentos:
             self.estado = EstadoTarjeta.BLOQUEADA
         
-        db.session.flush()
+        sesion_de(self).flush()
+        self._invalidar_cache()
     
     def reset_intentos(self) -> None:
         """
         Resetea el contador de intentos fallidos
         """
         self.intentos_fallidos = 0
-        db.session.flush()
+        sesion_de(self).flush()
+        self._invalidar_cache()
     
     def invalidar(self) -> None:
         """
         Invalida/bloquea la tarjeta permanentemente
         """
         self.estado = EstadoTarjeta.BLOQUEADA
-        db.session.flush()
+        sesion_de(self).flush()
+        self._invalidar_cache()
     
     def activar(self) -> None:
         """
@@ -120,7 +191,14 @@ class Tarjeta(db.Model):
         if self.estado == EstadoTarjeta.BLOQUEADA:
             self.estado = EstadoTarjeta.ACTIVA
             self.intentos_fallidos = 0
-            db.session.flush()
+            sesion_de(self).flush()
+            self._invalidar_cache()
+    
+    def _invalidar_cache(self) -> None:
+        """
+        Descarta la entrada de esta tarjeta en el caché de búsquedas
+        """
+        CacheTarjetas.get_instance().invalidar(self.numero_tarjeta)
     
     def esta_activa(self) -> bool:
         """
@@ -147,7 +225,13 @@ class Tarjeta(db.Model):
         if self.estado == EstadoTarjeta.VENCIDA:
             return False, "Tarjeta vencida."
         
-        if not self.cuenta.activa:
+        # Si la tarjeta está en caché se evita cargar la cuenta
+        entrada = CacheTarjetas.get_instance().consultar(self.numero_tarjeta)
+        if entrada is not None and entrada.id == self.id and entrada.cuenta_id == self.cuenta_id:
+            cuenta_activa = entrada.cuenta_activa
+        else:
+            cuenta_activa = self.cuenta.activa
+        if not cuenta_activa:
             return False, "Cuenta asociada inactiva."
         
         return True, ""
@@ -161,10 +245,63 @@ class Tarjeta(db.Model):
         """
         return max(0, self.max_intentos - self.intentos_fallidos)
     
+    def a_entrada_cache(self, cuenta_activa: bool) -> EntradaTarjeta:
+        """
+        Copia las columnas de la tarjeta para guardarlas en CacheTarjetas
+        
+        Args:
+            cuenta_activa: Estado de la cuenta de la tarjeta
+            
+        Returns:
+            EntradaTarjeta: Entrada de caché
+        """
+        return EntradaTarjeta(
+            id=self.id,
+            cuenta_id=self.cuenta_id,
+            cuenta_activa=cuenta_activa,
+            estado=self.estado,
+            pin_hash=self.pin_hash,
+            pin_costo=self.pin_costo,
+            intentos_fallidos=self.intentos_fallidos,
+            max_intentos=self.max_intentos
+        )
+    
+    @staticmethod
+    def _desde_entrada_cache(numero_tarjeta: str, entrada: EntradaTarjeta) -> 'Tarjeta':
+        """
+        Reconstruye la tarjeta de una entrada de caché en la sesión actual,
+        como si se hubiera leído de la BD (sin cambios pendientes)
+        
+        Args:
+            numero_tarjeta: Número de tarjeta
+            entrada: Entrada de caché
+            
+        Returns:
+            Tarjeta: Tarjeta persistente de db.session
+        """
+        from sqlalchemy import inspect
+        from sqlalchemy.orm import make_transient_to_detached
+        from sqlalchemy.orm.attributes import set_committed_value
+        
+        # Sin __init__: no se hashea ni se valida un PIN
+        tarjeta = inspect(Tarjeta).class_manager.new_instance()
+        valores = entrada._asdict()
+        del valores['cuenta_activa']
+        valores['numero_tarjeta'] = numero_tarjeta
+        for columna, valor in valores.items():
+            set_committed_value(tarjeta, columna, valor)
+        make_transient_to_detached(tarjeta)
+        return db.session.merge(tarjeta, load=False)
+    
     @staticmethod
     def buscar_por_numero(numero_tarjeta: str) -> Optional['Tarjeta']:
         """
-        Busca una tarjeta por su número
+        Busca una tarjeta por su número, pasando primero por CacheTarjetas
+        
+        Con la tarjeta en caché no se consulta la BD: se devuelve la de la
+        sesión si ya está cargada y vigente, o se reconstruye desde la
+        entrada. Si no, se consulta por número junto con el estado de la
+        cuenta, que cuesta lo mismo que cargarla por clave primaria.
         
         Args:
             numero_tarjeta: Número de tarjeta
@@ -172,7 +309,33 @@ class Tarjeta(db.Model):
         Returns:
             Tarjeta o None si no existe
         """
-        return Tarjeta.query.filter_by(numero_tarjeta=numero_tarjeta).first()
+        from sqlalchemy import inspect
+        from sqlalchemy.orm.util import identity_key
+        from modelo.cuenta import Cuenta
+        
+        cache = CacheTarjetas.get_instance()
+        entrada = cache.consultar(numero_tarjeta)
+        if entrada is not None:
+            cache.registrar(acierto=True)
+            # Una tarjeta vigente de la sesión puede tener cambios sin
+            # confirmar: no se pisa con la entrada
+            tarjeta = db.session.identity_map.get(identity_key(Tarjeta, entrada.id))
+            if tarjeta is not None and not inspect(tarjeta).expired:
+                return tarjeta
+            return Tarjeta._desde_entrada_cache(numero_tarjeta, entrada)
+        cache.registrar(acierto=False)
+        
+        fila = db.session.execute(
+            db.select(Tarjeta, Cuenta.activa)
+            .join(Cuenta, Tarjeta.cuenta_id == Cuenta.id)
+            .where(Tarjeta.numero_tarjeta == numero_tarjeta)
+        ).first()
+        if fila is None:
+            return None
+        
+        tarjeta, cuenta_activa = fila
+        cache.guardar(numero_tarjeta, tarjeta.a_entrada_cache(cuenta_activa))
+        return tarjeta
     
     def __repr__(self):
         return f"<Tarjeta {self.numero_tarjeta} - Estado: {self.estado.value}>"
@@ -1,6 +1,10 @@
 # modelo/Cuenta.py
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 from data.database import db 
-from decimal import Decimal
+from data.concurrencia import actualizar_condicional
+from modelo.CacheTarjetas import CacheTarjetas
+from modelo.Dinero import Dinero, TipoDinero
 from datetime import date
 from typing import Optional, Tuple
 
@@ -13,10 +17,14 @@ class Cuenta(db.Model):
     # Atributos
     id = db.Column(db.Integer, primary_key=True)
     numero_cuenta = db.Column('cuenta_numeroCuenta', db.String(20), unique=True, nullable=False)
-    saldo = db.Column('cuenta_saldo', db.Numeric(15, 2), default=Decimal('0.00'))
-    limite_diario = db.Column('cuenta_limiteDiario', db.Numeric(15, 2), default=Decimal('1000.00'))
-    total_retiros_diarios = db.Column('total_retiros_diarios', db.Numeric(15, 2), default=Decimal('0.00'))
+    saldo = db.Column('cuenta_saldo', TipoDinero, default=Dinero(0))
+    limite_diario = db.Column('cuenta_limiteDiario', TipoDinero, default=Dinero(100000))
+    total_retiros_diarios = db.Column('total_retiros_diarios', TipoDinero, default=Dinero(0))
     ultima_fecha_retiro = db.Column(db.Date, default=date.today)
+    activa = db.Column('cuenta_activa', db.Boolean, default=True, nullable=False)
+    # Saldo inicial más lo consolidado por purgas del historial; NULL si se
+    # desconoce (ver servicio.Conciliacion)
+    saldo_apertura = db.Column('cuenta_saldoApertura', TipoDinero, nullable=True)
     
     # Foreign Keys
     titular_id = db.Column('cuenta_titular', db.Integer, db.ForeignKey('clientes.id'), nullable=False)
@@ -25,62 +33,128 @@ class Cuenta(db.Model):
     # Relaciones
     titular = db.relationship('Cliente', back_populates='cuentas')
     operaciones = db.relationship('Operacion', back_populates='cuenta')
+    # La tarjeta se enlaza por tarjetas.cuenta_id (cuenta_tarjeta no se usa
+    # para la relación)
+    tarjeta = db.relationship('Tarjeta', back_populates='cuenta',
+                              foreign_keys='Tarjeta.cuenta_id', uselist=False)
     
     def __init__(self, numero: str, saldo_inicial: float, limite_diario: float = 1000.0):
         self.numero_cuenta = numero
-        self.saldo = Decimal(str(saldo_inicial))
-        self.limite_diario = Decimal(str(limite_diario))
-        self.total_retiros_diarios = Decimal('0.00')
+        self.saldo = Dinero.desde(saldo_inicial)
+        self.saldo_apertura = self.saldo
+        self.limite_diario = Dinero.desde(limite_diario)
+        self.total_retiros_diarios = Dinero(0)
         self.ultima_fecha_retiro = date.today()
+        self.activa = True
 
     # --- Getters ---
     
     def get_numero(self) -> str:
         return self.numero_cuenta
 
-    def consultar_saldo(self) -> Decimal:
+    def consultar_saldo(self) -> Dinero:
         return self.saldo
 
-    def get_limite_diario(self) -> Decimal:
+    def get_limite_diario(self) -> Dinero:
         return self.limite_diario
 
-    def get_total_retiros_diarios(self) -> Decimal:
+    def get_total_retiros_diarios(self) -> Dinero:
+        return self.get_total_retiros_hoy()
+
+    def get_total_retiros_hoy(self, hoy: Optional[date] = None) -> Dinero:
+        """
+        Total retirado en el día según el contador de la cuenta, que es la
+        fuente de verdad para los límites diarios (se actualiza con cada
+        Retiro en la misma transacción).
+        """
+        hoy = hoy or date.today()
+        if self.ultima_fecha_retiro != hoy or self.total_retiros_diarios is None:
+            return Dinero(0)
         return self.total_retiros_diarios
 
     # --- Métodos de Operación ---
 
-    def depositar(self, monto: float) -> bool:
-        monto_dec = Decimal(str(monto))
-        if monto_dec > 0:
-            self.saldo += monto_dec # SQLAlchemy registra el cambio
-            return True
+    def depositar(self, monto: Dinero) -> bool:
+        """Acredita el monto con un UPDATE atómico (saldo = saldo + monto)."""
+        monto = Dinero.desde(monto)
+        if monto.centavos > 0:
+            return actualizar_condicional(self, [], {'saldo': Cuenta.saldo + monto})
         return False
 
-    def retirar(self, monto: float) -> Tuple[bool, Optional[str]]:
-        """Implementa retirar() con validaciones y persistencia ORM."""
-        monto_dec = Decimal(str(monto))
+    def retirar(self, monto: Dinero) -> Tuple[bool, Optional[str]]:
+        """
+        Implementa retirar() con un único UPDATE condicional: descuenta el
+        saldo y acumula el contador diario solo si hay saldo y cupo, de modo
+        que dos retiros concurrentes no pueden pasar ambos la validación.
+        """
+        monto = Dinero.desde(monto)
+        hoy = date.today()
+        
+        # Total de hoy según la fila (0 si el último retiro fue otro día)
+        retirado_hoy = db.case(
+            (Cuenta.ultima_fecha_retiro == hoy, Cuenta.total_retiros_diarios),
+            else_=db.literal(Dinero(0), TipoDinero)
+        )
         
-        # 1. Verificar y Reiniciar Límite Diario si el día ha cambiado
-        if self.ultima_fecha_retiro < date.today():
-            self.total_retiros_diarios = Decimal('0.00')
-            self.ultima_fecha_retiro = date.today()
+        exito = actualizar_condicional(
+            self,
+            [Cuenta.saldo >= monto, retirado_hoy + monto <= Cuenta.limite_diario],
+            {
+                'saldo': Cuenta.saldo - monto,
+                'total_retiros_diarios': retirado_hoy + monto,
+                'ultima_fecha_retiro': hoy,
+            }
+        )
+        if exito:
+            return True, None
         
-        # 2. Verificar saldo
-        if monto_dec > self.saldo:
+        # La condición falló: determinar el motivo con los valores actuales
+        if monto > self.saldo:
             return False, "Saldo insuficiente."
+        return False, f"Límite diario de retiro excedido. Máximo: ${self.limite_diario}"
 
-        # 3. Verificar límite diario
-        if (self.total_retiros_diarios + monto_dec) > self.limite_diario:
-            return False, f"Límite diario de retiro excedido. Máximo: ${self.limite_diario}"
-        
-        # 4. Realizar retiro
-        self.saldo -= monto_dec
-        self.actualizar_total_ret(monto_dec)
-        
-        return True, None
+    def debitar(self, monto: Dinero) -> bool:
+        """
+        Descuenta un pago (sin afectar el límite de retiros) con un UPDATE
+        condicional sobre el saldo.
+        """
+        monto = Dinero.desde(monto)
+        return actualizar_condicional(
+            self,
+            [Cuenta.saldo >= monto],
+            {'saldo': Cuenta.saldo - monto}
+        )
 
-    def actualizar_total_ret(self, monto: Decimal):
-        self.total_retiros_diarios += monto
-        
     def __repr__(self):
-        return f"<Cuenta {self.numero_cuenta} - Saldo: ${self.saldo}>"
\ No newline at end of file
+        return f"<Cuenta {self.numero_cuenta} - Saldo: ${self.saldo}>"
+
+
+# Cuentas cuyo estado cambió en la transacción de una sesión (Session.info)
+_CLAVE_CUENTAS_MODIFICADAS = 'cuentas_estado_modificado'
+
+
+@event.listens_for(Cuenta.activa, 'set')
+def _al_cambiar_estado(cuenta: Cuenta, valor, anterior, iniciador) -> None:
+    """
+    Descarta del caché las tarjetas de una cuenta que se activa o desactiva.
+    Se descartan otra vez al terminar la transacción, por si otra sesión
+    volvió a guardar el estado anterior antes del commit.
+    """
+    if cuenta.id is None or valor == anterior:
+        return
+    CacheTarjetas.get_instance().invalidar_cuenta(cuenta.id)
+    sesion = object_session(cuenta)
+    if sesion is not None:
+        sesion.info.setdefault(_CLAVE_CUENTAS_MODIFICADAS, set()).add(cuenta.id)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _al_terminar_transaccion(sesion: Session) -> None:
+    """
+    Descarta del caché las tarjetas de las cuentas modificadas en la
+    transacción (confirmada o deshecha)
+    """
+    cache = CacheTarjetas.get_instance()
+    for cuenta_id in sesion.info.pop(_CLAVE_CUENTAS_MODIFICADAS, ()):
+        cache.invalidar_cuenta(cuenta_id)
@@ -0,0 +1,71 @@
+"""
+Funciones de hashing de PIN con bcrypt
+
+No dependen de la base de datos para poder ejecutarse en procesos
+trabajadores (ver servicio.VerificadorPin).
+"""
+import bcrypt
+
+# Costo (log2 de rondas) usado por bcrypt.gensalt() por defecto
+COSTO_BCRYPT_POR_DEFECTO = 12
+COSTO_BCRYPT_MINIMO = 4
+COSTO_BCRYPT_MAXIMO = 31
+
+
+def validar_costo(costo: int) -> int:
+    """
+    Valida que el costo esté en el rango aceptado por bcrypt
+
+    Args:
+        costo: Costo bcrypt
+
+    Returns:
+        int: El mismo costo
+    """
+    if not COSTO_BCRYPT_MINIMO <= costo <= COSTO_BCRYPT_MAXIMO:
+        raise ValueError(
+            f"El costo bcrypt debe estar entre {COSTO_BCRYPT_MINIMO} y {COSTO_BCRYPT_MAXIMO}"
+        )
+    return costo
+
+
+def hashear_pin(pin: str, costo: int = COSTO_BCRYPT_POR_DEFECTO) -> str:
+    """
+    Genera el hash bcrypt de un PIN
+
+    Args:
+        pin: PIN en texto plano
+        costo: Costo bcrypt a usar
+
+    Returns:
+        str: Hash bcrypt del PIN
+    """
+    salt = bcrypt.gensalt(rounds=validar_costo(costo))
+    return bcrypt.hashpw(pin.encode('utf-8'), salt).decode('utf-8')
+
+
+def comprobar_pin(pin: str, pin_hash: str) -> bool:
+    """
+    Compara un PIN contra su hash bcrypt
+
+    Args:
+        pin: PIN en texto plano
+        pin_hash: Hash almacenado
+
+    Returns:
+        bool: True si el PIN corresponde al hash
+    """
+    return bcrypt.checkpw(pin.encode('utf-8'), pin_hash.encode('utf-8'))
+
+
+def costo_de_hash(pin_hash: str) -> int:
+    """
+    Extrae el costo de un hash bcrypt ($2b$<costo>$...)
+
+    Args:
+        pin_hash: Hash bcrypt
+
+    Returns:
+        int: Costo con el que fue generado el hash
+    """
+    return int(pin_hash.split('$')[2])
@@ -1,9 +1,10 @@
 """
 Clase Cajero - Representa un cajero automático (ATM)
 """
-from typing import Optional
-from decimal import Decimal
-from data.database import db
+from typing import Callable, Optional
+from data.database import db, sesion_de
+from modelo.Dinero import Dinero, TipoDinero
+from data.concurrencia import actualizar_condicional
 
 
 class Cajero(db.Model):
@@ -15,8 +16,14 @@ class Cajero(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     codigo = db.Column(db.String(20), unique=True, nullable=False)
     ubicacion = db.Column(db.String(200), nullable=False)
-    monto_cajero = db.Column(db.Numeric(15, 2), default=100000.00)
+    monto_cajero = db.Column(TipoDinero, default=Dinero(10000000))
+    # Efectivo inicial más recargas (y lo consolidado por purgas); NULL si se
+    # desconoce (ver servicio.Conciliacion)
+    efectivo_cargado = db.Column(TipoDinero, nullable=True)
     activo = db.Column(db.Boolean, default=True)
+    # Si tiene casetes instalados: evita cargar la relación casetes en cada
+    # retiro de los cajeros que solo controlan el efectivo total
+    tiene_casetes = db.Column(db.Boolean, default=False, nullable=False)
     
     # Foreign Keys
     banco_id = db.Column(db.Integer, db.ForeignKey('bancos.id'), nullable=False)
@@ -24,31 +31,73 @@ class Cajero(db.Model):
     # Relaciones
     banco = db.relationship('Banco', back_populates='cajeros')
     operaciones = db.relationship('Operacion', back_populates='cajero')
+    casetes = db.relationship('Casete', back_populates='cajero',
+                              cascade='all, delete-orphan', order_by='Casete.id')
     
-    # Sesión actual
-    tarjeta_insertada_id = db.Column(db.Integer, db.ForeignKey('tarjetas.id'), nullable=True)
-    tarjeta_insertada = db.relationship('Tarjeta', foreign_keys=[tarjeta_insertada_id])
+    # La sesión en curso (tarjeta insertada) vive en memoria, en
+    # servicio.GestorSesiones, no en la fila del cajero
     
     def __init__(self, codigo: str, ubicacion: str, monto_inicial: float = 100000.00):
         self.codigo = codigo
         self.ubicacion = ubicacion
-        self.monto_cajero = Decimal(str(monto_inicial))
+        self.monto_cajero = Dinero.desde(monto_inicial)
+        self.efectivo_cargado = self.monto_cajero
         self.activo = True
+        self.tiene_casetes = False
     
-    def insertar_tarjeta(self, tarjeta: 'Tarjeta') -> tuple[bool, str]:
+    @property
+    def sesion(self) -> Optional['SesionCajero']:
         """
-        Inserta una tarjeta en el cajero
+        Sesión vigente del cajero (None si no hay tarjeta insertada o su
+        sesión venció)
+        """
+        from servicio.GestorSesiones import GestorSesiones
+        
+        return GestorSesiones.get_instance().obtener(self.id)
+    
+    @property
+    def tarjeta_insertada(self) -> Optional['Tarjeta']:
+        """
+        Tarjeta de la sesión vigente
+        """
+        sesion = self.sesion
+        if sesion is None:
+            return None
+        if sesion.contexto is not None:
+            return sesion.contexto.tarjeta
+        
+        from modelo.Tarjeta import Tarjeta
+        
+        return sesion_de(self).get(Tarjeta, sesion.tarjeta_id)
+    
+    @property
+    def contexto_sesion(self) -> Optional['ContextoSesion']:
+        """
+        Contexto precargado de la sesión vigente (ver iniciar_sesion)
+        """
+        sesion = self.sesion
+        return sesion.contexto if sesion is not None else None
+    
+    def insertar_tarjeta(self, tarjeta: 'Tarjeta',
+                         contexto: Optional['ContextoSesion'] = None) -> tuple[bool, str]:
+        """
+        Inserta una tarjeta en el cajero, abriendo su sesión en memoria
+        (sin escribir en la BD)
         
         Args:
             tarjeta: Tarjeta a insertar
+            contexto: Contexto precargado de la sesión, si existe
             
         Returns:
             tuple: (exito, mensaje)
         """
+        from servicio.GestorSesiones import GestorSesiones
+        
         if not self.activo:
             return False, "Cajero fuera de servicio"
         
-        if self.tarjeta_insertada:
+        gestor = GestorSesiones.get_instance()
+        if gestor.obtener(self.id) is not None:
             return False, "Ya hay una tarjeta insertada"
         
         # Verificar que la tarjeta puede usarse
@@ -56,16 +105,168 @@ class Cajero(db.Model):
         if not puede_usarse:
             return False, mensaje
         
-        self.tarjeta_insertada = tarjeta
-        db.session.flush()
-        return True, "Tarjeta insertada correctamente"
+        return gestor.abrir(self.id, tarjeta.id, contexto)
+    
+    def iniciar_sesion(self, numero_tarjeta: str) -> tuple[bool, str]:
+        """
+        Inserta una tarjeta a partir de su número cargando en una sola
+        consulta el contexto de la sesión (cuenta, titular, banco y total
+        retirado hoy)
+        
+        Args:
+            numero_tarjeta: Número de la tarjeta
+            
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        from modelo.ContextoSesion import ContextoSesion
+        
+        contexto = ContextoSesion.cargar(numero_tarjeta)
+        if contexto is None:
+            return False, "Tarjeta no encontrada"
+        
+        return self.insertar_tarjeta(contexto.tarjeta, contexto)
+    
+    def verificar_pin(self, pin: str) -> tuple[bool, str]:
+        """
+        Verifica el PIN de la tarjeta insertada y marca la sesión como
+        autenticada si es correcto
+        
+        Args:
+            pin: PIN ingresado
+            
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        from servicio.GestorSesiones import GestorSesiones
+        from servicio.VerificadorPin import VerificadorPin
+        
+        tarjeta = self.tarjeta_insertada
+        if tarjeta is None:
+            return False, "No hay tarjeta insertada"
+        
+        sesion = sesion_de(self)
+        try:
+            es_correcto = VerificadorPin.get_instance().verificar(tarjeta, pin)
+            # Persistir el contador de intentos (y el bloqueo, si hubo)
+            sesion.commit()
+        except Exception as e:
+            sesion.rollback()
+            return False, f"Error: {str(e)}"
+        
+        GestorSesiones.get_instance().marcar_autenticada(self.id, es_correcto)
+        if es_correcto:
+            return True, "PIN correcto"
+        return False, "PIN incorrecto"
+    
+    def sesion_autenticada(self) -> bool:
+        """
+        Indica si la sesión vigente verificó su PIN
+        
+        Returns:
+            bool: True si hay sesión vigente y está autenticada
+        """
+        sesion = self.sesion
+        return sesion is not None and sesion.autenticada
+    
+    def _validar_sesion(self, tarjeta: 'Tarjeta') -> Optional[str]:
+        """
+        Comprueba que la tarjeta sea la de la sesión vigente y que su PIN
+        esté verificado
+        
+        Args:
+            tarjeta: Tarjeta de la operación
+            
+        Returns:
+            str: Mensaje de error, o None si puede operar
+        """
+        sesion = self.sesion
+        if sesion is None:
+            return "No hay tarjeta insertada"
+        if not sesion.autenticada:
+            return "PIN no verificado"
+        if sesion.tarjeta_id != tarjeta.id:
+            return "La tarjeta no corresponde a la sesión"
+        return None
     
     def expulsar_tarjeta(self) -> None:
         """
         Expulsa la tarjeta del cajero
         """
-        self.tarjeta_insertada = None
-        db.session.flush()
+        from servicio.GestorSesiones import GestorSesiones
+        
+        GestorSesiones.get_instance().cerrar(self.id)
+    
+    def _contexto_de(self, tarjeta: 'Tarjeta') -> Optional['ContextoSesion']:
+        """
+        Obtiene el contexto de sesión si corresponde a la tarjeta,
+        registrando la actividad en la sesión
+        
+        Args:
+            tarjeta: Tarjeta de la operación
+            
+        Returns:
+            ContextoSesion o None
+        """
+        from servicio.GestorSesiones import GestorSesiones
+        
+        sesion = GestorSesiones.get_instance().tocar(self.id)
+        if sesion is None:
+            return None
+        contexto = sesion.contexto
+        # El contexto guarda objetos ORM: solo se reutiliza desde la sesión
+        # de BD que lo cargó
+        if (contexto is not None and contexto.es_de(tarjeta)
+                and contexto.cuenta in sesion_de(self)):
+            return contexto
+        return None
+    
+    def _ejecutar_operacion(self, cuenta: 'Cuenta',
+                            crear_operacion: Callable[['Cuenta', 'Cajero'], 'Operacion']
+                            ) -> 'ResultadoOperacion':
+        """
+        Crea, aplica y confirma una operación en la sesión del cajero,
+        agrupando el commit con el de otros cajeros si el coordinador de
+        commit agrupado está activo y el cajero es de db.session (el
+        coordinador trabaja en sus propias sesiones; una AsyncSession de
+        servicio.CajeroAsync confirma directamente para no bloquear el loop)
+        
+        Args:
+            cuenta: Cuenta sobre la que se opera
+            crear_operacion: Construye la operación a partir de (cuenta, cajero)
+            
+        Returns:
+            ResultadoOperacion: Resultado ya confirmado
+        """
+        from data.commit_agrupado import CoordinadorCommit
+        
+        sesion = sesion_de(self)
+        coordinador = CoordinadorCommit.get_instance()
+        if coordinador is None or sesion is not db.session():
+            operacion = crear_operacion(cuenta, self)
+            sesion.add(operacion)
+            operacion.ejecutar()
+            return operacion.resultado()
+        
+        from modelo.cuenta import Cuenta
+        
+        cuenta_id, cajero_id = cuenta.id, self.id
+        
+        # Liberar los bloqueos de esta sesión: el coordinador escribe en su
+        # propia conexión (el commit expira cuenta y cajero, que se releen
+        # ya actualizados en el próximo acceso)
+        sesion.commit()
+        
+        def unidad():
+            sesion = db.session
+            operacion = crear_operacion(
+                sesion.get(Cuenta, cuenta_id), sesion.get(Cajero, cajero_id)
+            )
+            sesion.add(operacion)
+            operacion.aplicar()
+            return operacion.resultado()
+        
+        return coordinador.ejecutar(unidad)
     
     def solicitar_pin(self) -> str:
         """
@@ -77,7 +278,7 @@ class Cajero(db.Model):
         # En la implementación real, esto vendría del frontend
         return ""
     
-    def procesar_retiro(self, tarjeta: 'Tarjeta', monto: float) -> tuple[bool, str]:
+    def procesar_retiro(self, tarjeta: 'Tarjeta', monto: Dinero) -> tuple[bool, str]:
         """
         Procesa un retiro de efectivo
         
@@ -90,25 +291,49 @@ class Cajero(db.Model):
         """
         from modelo.Operacion import Retiro
         
+        error = self._validar_sesion(tarjeta)
+        if error:
+            return False, error
+        
         try:
-            # Validar que hay efectivo suficiente
-            if self.monto_cajero < Decimal(str(monto)):
+            # Única conversión del monto (float/str de la interfaz)
+            monto = Dinero.desde(monto)
+            
+            # Validar que hay efectivo suficiente (y billetes para el monto)
+            if self.monto_cajero.centavos < monto.centavos:
                 return False, "Cajero sin efectivo suficiente"
+            if self.tiene_casetes and self.plan_dispensado(monto) is None:
+                return False, "El cajero no puede entregar ese monto con los billetes disponibles"
+            
+            # Validar saldo y límites diarios: con sesión, los límites salen
+            # del contexto y el saldo lo valida el UPDATE del retiro
+            contexto = self._contexto_de(tarjeta)
+            if contexto is not None:
+                cuenta = contexto.cuenta
+                if not contexto.permite_retiro(monto):
+                    return False, "Saldo insuficiente o límite diario excedido"
+            else:
+                cuenta = tarjeta.cuenta
+                if not self.banco.validar_transaccion(cuenta, monto):
+                    return False, "Saldo insuficiente o límite diario excedido"
             
             # Crear y ejecutar operación de retiro
-            retiro = Retiro(tarjeta.cuenta, monto, self)
-            db.session.add(retiro)
+            retiro = self._ejecutar_operacion(
+                cuenta, lambda cuenta, cajero: Retiro(cuenta, monto, cajero)
+            )
             
-            if retiro.ejecutar():
+            if retiro.exitosa:
+                if contexto is not None:
+                    contexto.registrar_retiro(monto)
                 return True, f"Retiro exitoso de ${monto}"
             else:
                 return False, retiro.mensaje_error or "Error al procesar retiro"
                 
         except Exception as e:
-            db.session.rollback()
+            sesion_de(self).rollback()
             return False, f"Error: {str(e)}"
     
-    def procesar_deposito(self, tarjeta: 'Tarjeta', monto: float, 
+    def procesar_deposito(self, tarjeta: 'Tarjeta', monto: Dinero, 
                          tipo: str = 'EFECTIVO') -> tuple[bool, str]:
         """
         Procesa un depósito
@@ -123,21 +348,30 @@ class Cajero(db.Model):
         """
         from modelo.Operacion import Deposito
         
+        error = self._validar_sesion(tarjeta)
+        if error:
+            return False, error
+        
         try:
+            monto = Dinero.desde(monto)
+            
             # Crear y ejecutar operación de depósito
-            deposito = Deposito(tarjeta.cuenta, monto, tipo, self)
-            db.session.add(deposito)
+            contexto = self._contexto_de(tarjeta)
+            cuenta = contexto.cuenta if contexto else tarjeta.cuenta
+            deposito = self._ejecutar_operacion(
+                cuenta, lambda cuenta, cajero: Deposito(cuenta, monto, tipo, cajero)
+            )
             
-            if deposito.ejecutar():
+            if deposito.exitosa:
                 return True, f"Depósito exitoso de ${monto}"
             else:
                 return False, deposito.mensaje_error or "Error al procesar depósito"
                 
         except Exception as e:
-            db.session.rollback()
+            sesion_de(self).rollback()
             return False, f"Error: {str(e)}"
     
-    def consultar_saldo(self, tarjeta: 'Tarjeta') -> tuple[bool, float, str]:
+    def consultar_saldo(self, tarjeta: 'Tarjeta') -> tuple[bool, Dinero, str]:
         """
         Consulta el saldo de una cuenta
         
@@ -149,20 +383,24 @@ class Cajero(db.Model):
         """
         from modelo.Operacion import ConsultaSaldo
         
+        error = self._validar_sesion(tarjeta)
+        if error:
+            return False, Dinero(0), error
+        
         try:
             # Crear y ejecutar operación de consulta
-            consulta = ConsultaSaldo(tarjeta.cuenta, self)
-            db.session.add(consulta)
+            contexto = self._contexto_de(tarjeta)
+            cuenta = contexto.cuenta if contexto else tarjeta.cuenta
+            consulta = self._ejecutar_operacion(cuenta, ConsultaSaldo)
             
-            if consulta.ejecutar():
-                saldo = tarjeta.cuenta.consultar_saldo()
-                return True, saldo, "Consulta exitosa"
+            if consulta.exitosa:
+                return True, consulta.monto, "Consulta exitosa"
             else:
-                return False, 0.0, consulta.mensaje_error or "Error al consultar saldo"
+                return False, Dinero(0), consulta.mensaje_error or "Error al consultar saldo"
                 
         except Exception as e:
-            db.session.rollback()
-            return False, 0.0, f"Error: {str(e)}"
+            sesion_de(self).rollback()
+            return False, Dinero(0), f"Error: {str(e)}"
     
     def imprimir_comprobante(self, operacion: 'Operacion') -> str:
         """
@@ -206,7 +444,7 @@ Estado: {'EXITOSA' if operacion.exitosa else 'FALLIDA'}
         
         return comprobante
     
-    def tiene_efectivo_suficiente(self, monto: float) -> bool:
+    def tiene_efectivo_suficiente(self, monto: Dinero) -> bool:
         """
         Verifica si el cajero tiene efectivo suficiente
         
@@ -216,17 +454,114 @@ Estado: {'EXITOSA' if operacion.exitosa else 'FALLIDA'}
         Returns:
             bool: True si hay efectivo suficiente
         """
-        return self.monto_cajero >= Decimal(str(monto))
+        return self.monto_cajero.centavos >= Dinero.desde(monto).centavos
     
-    def recargar_efectivo(self, monto: float) -> None:
+    def recargar_efectivo(self, monto: Dinero) -> None:
         """
-        Recarga efectivo en el cajero
+        Recarga efectivo en el cajero (no es una operación de cliente: se
+        suma también al efectivo cargado para la conciliación)
         
         Args:
             monto: Monto a recargar
         """
-        self.monto_cajero += Decimal(str(monto))
-        db.session.flush()
+        monto = Dinero.desde(monto)
+        actualizar_condicional(self, [], {
+            'monto_cajero': Cajero.monto_cajero + monto,
+            'efectivo_cargado': Cajero.efectivo_cargado + monto
+        })
+    
+    def agregar_casete(self, denominacion: Dinero, capacidad: int) -> 'Casete':
+        """
+        Instala un casete vacío en el cajero
+        
+        Args:
+            denominacion: Valor de los billetes del casete
+            capacidad: Billetes máximos del casete
+            
+        Returns:
+            Casete: Casete creado
+        """
+        from modelo.Casete import Casete
+        
+        casete = Casete(denominacion, capacidad)
+        self.casetes.append(casete)
+        self.tiene_casetes = True
+        sesion_de(self).flush()
+        return casete
+    
+    def cargar_casete(self, casete: 'Casete', billetes: int) -> tuple[bool, str]:
+        """
+        Carga billetes en un casete y suma su valor al efectivo del cajero
+        
+        Args:
+            casete: Casete del cajero
+            billetes: Billetes cargados
+            
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        if casete.cajero_id != self.id:
+            return False, "El casete no pertenece a este cajero"
+        
+        transaccion = sesion_de(self).begin_nested()
+        try:
+            if not casete.cargar_billetes(billetes):
+                transaccion.rollback()
+                return False, "Los billetes exceden la capacidad del casete"
+            self.recargar_efectivo(casete.denominacion * billetes)
+        except Exception:
+            transaccion.rollback()
+            raise
+        transaccion.commit()
+        return True, f"Casete de ${casete.denominacion} cargado con {billetes} billetes"
+    
+    def plan_dispensado(self, monto: Dinero) -> Optional[list[tuple['Casete', int]]]:
+        """
+        Elige los billetes que entregaría un retiro (ver servicio.Dispensador)
+        
+        Args:
+            monto: Monto a entregar
+            
+        Returns:
+            list: (casete, billetes), o None si no puede entregarse
+        """
+        from servicio.Dispensador import Dispensador
+        
+        return Dispensador.get_instance().planificar(monto, self.casetes)
+    
+    def entregar_efectivo(self, monto: Dinero,
+                          plan: Optional[list[tuple['Casete', int]]] = None) -> bool:
+        """
+        Descuenta efectivo entregado con un UPDATE condicional
+        (monto_cajero = monto_cajero - monto WHERE monto_cajero >= monto)
+        y, si hay plan de billetes, los billetes de cada casete. Si alguno
+        falla, el llamador debe deshacer su SAVEPOINT.
+        
+        Args:
+            monto: Monto entregado
+            plan: (casete, billetes) a descontar
+            
+        Returns:
+            bool: True si había efectivo (y billetes) suficiente
+        """
+        monto = Dinero.desde(monto)
+        if not actualizar_condicional(
+            self,
+            [Cajero.monto_cajero >= monto],
+            {'monto_cajero': Cajero.monto_cajero - monto}
+        ):
+            return False
+        return all(casete.retirar_billetes(billetes) for casete, billetes in plan or [])
+    
+    def recibir_efectivo(self, monto: Dinero) -> None:
+        """
+        Suma efectivo recibido con un UPDATE atómico
+        
+        Args:
+            monto: Monto recibido
+        """
+        monto = Dinero.desde(monto)
+        actualizar_condicional(self, [], {'monto_cajero': Cajero.monto_cajero + monto})
     
     def __repr__(self):
         return f"<Cajero {self.codigo} - {self.ubicacion}>"
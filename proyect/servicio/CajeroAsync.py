@@ -0,0 +1,376 @@
+"""
+Clase CajeroAsync - Operaciones de cajero sobre el motor asíncrono de SQLAlchemy
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional, TypeVar
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from data.database import db
+from modelo.Dinero import Dinero
+
+T = TypeVar('T')
+
+# Operaciones con conexión a la BD al mismo tiempo; el resto de las
+# sesiones de cajero espera en el event loop sin ocupar conexiones
+MAX_CONCURRENTES = 32
+
+# SQLite admite un solo escritor: más conexiones concurrentes no aumentan
+# el rendimiento y terminan en "database is locked"
+MAX_CONCURRENTES_SQLITE = 1
+
+# Driver asíncrono de cada backend
+_DRIVERS_ASYNC = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql',
+}
+
+
+def url_asincrona(uri: str) -> str:
+    """
+    Convierte la URI de la BD al driver asíncrono del mismo backend
+
+    Args:
+        uri: URI configurada (p. ej. SQLALCHEMY_DATABASE_URI)
+
+    Returns:
+        str: URI con driver asíncrono
+    """
+    url = make_url(uri)
+    if url.get_dialect().is_async:
+        return url.render_as_string(hide_password=False)
+
+    backend = url.get_backend_name()
+    driver = _DRIVERS_ASYNC.get(backend)
+    if driver is None:
+        raise ValueError(f"No hay driver asíncrono para la BD {backend}")
+    return url.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+class CajeroAsync:
+    """
+    Fachada asíncrona de las operaciones del Cajero para atender muchos
+    cajeros desde un solo event loop. Los cajeros se identifican por id y
+    la tarjeta insertada se toma de GestorSesiones, así que una sesión de
+    cajero no retiene objetos ORM ni conexiones entre llamadas.
+
+    Cada llamada abre una AsyncSession y ejecuta la misma lógica de Cajero
+    y Operacion con AsyncSession.run_sync: el cajero se carga en la sesión
+    síncrona que recibe el trabajo y el modelo opera sobre la sesión de sus
+    objetos (data.database.sesion_de), así que la E/S de la BD se espera en
+    el event loop en lugar de bloquear un hilo. La comprobación bcrypt del
+    PIN se delega al pool de procesos de VerificadorPin y se espera fuera
+    del semáforo, entre dos sesiones cortas.
+
+    Cada operación confirma su propia transacción (el CoordinadorCommit
+    agrupa commits de hilos bloqueantes y solo atiende a db.session). Una
+    instancia pertenece al event loop en el que se usa por primera vez.
+    """
+
+    def __init__(self, app, url: Optional[str] = None,
+                 max_concurrentes: Optional[int] = None, **opciones_motor):
+        """
+        Args:
+            app: Aplicación Flask (configuración y contexto de db)
+            url: URI asíncrona (por defecto la de la app con driver asíncrono)
+            max_concurrentes: Operaciones simultáneas contra la BD (por
+                defecto MAX_CONCURRENTES, o MAX_CONCURRENTES_SQLITE en SQLite)
+            **opciones_motor: Argumentos adicionales de create_async_engine
+        """
+        self.app = app
+        self.motor = create_async_engine(
+            url or url_asincrona(app.config['SQLALCHEMY_DATABASE_URI']), **opciones_motor
+        )
+        if max_concurrentes is None:
+            es_sqlite = self.motor.dialect.name == 'sqlite'
+            max_concurrentes = MAX_CONCURRENTES_SQLITE if es_sqlite else MAX_CONCURRENTES
+        if max_concurrentes < 1:
+            raise ValueError("Se necesita al menos una operación concurrente")
+        self._fabrica = async_sessionmaker(self.motor, expire_on_commit=False)
+        self._semaforo = asyncio.Semaphore(max_concurrentes)
+        self.operaciones = 0
+        self.errores = 0
+        self.ultimo_error: Optional[str] = None
+
+    async def cerrar(self) -> None:
+        """
+        Cierra las conexiones del motor asíncrono
+        """
+        await self.motor.dispose()
+
+    @asynccontextmanager
+    async def _sesion(self) -> AsyncIterator[AsyncSession]:
+        """
+        Abre una AsyncSession dentro de un contexto de app propio de la
+        tarea, esperando turno si hay demasiadas operaciones en curso
+
+        Yields:
+            AsyncSession: Sesión de la llamada
+        """
+        async with self._semaforo:
+            with self.app.app_context():
+                async with self._fabrica() as sesion:
+                    self.operaciones += 1
+                    yield sesion
+
+    async def _en_sesion(self, trabajo: Callable[[Session], T]) -> T:
+        """
+        Ejecuta código síncrono del modelo sobre una AsyncSession nueva
+
+        Args:
+            trabajo: Función que recibe la sesión síncrona de la AsyncSession
+
+        Returns:
+            El valor devuelto por el trabajo
+        """
+        async with self._sesion() as sesion:
+            return await sesion.run_sync(trabajo)
+
+    def _registrar_error(self, error: Exception) -> str:
+        """
+        Cuenta un error no controlado por el Cajero
+
+        Args:
+            error: Excepción capturada
+
+        Returns:
+            str: Mensaje para el llamador
+        """
+        self.errores += 1
+        self.ultimo_error = str(error)
+        return f"Error: {str(error)}"
+
+    @staticmethod
+    def _sesion_autenticada(cajero_id: int) -> tuple[bool, str]:
+        """
+        Comprueba que el cajero tenga una sesión con PIN verificado
+
+        Args:
+            cajero_id: Id del cajero
+
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        from servicio.GestorSesiones import GestorSesiones
+
+        sesion = GestorSesiones.get_instance().obtener(cajero_id)
+        if sesion is None:
+            return False, "No hay tarjeta insertada"
+        if not sesion.autenticada:
+            return False, "PIN no verificado"
+        return True, ""
+
+    @staticmethod
+    def _cargar_cajero(sesion: Session, cajero_id: int) -> Optional['Cajero']:
+        """
+        Carga el cajero en la sesión de la llamada
+
+        Args:
+            sesion: Sesión síncrona de la AsyncSession
+            cajero_id: Id del cajero
+
+        Returns:
+            Cajero o None si no existe
+        """
+        from servicio.Cajero import Cajero
+
+        return sesion.get(Cajero, cajero_id)
+
+    async def insertar_tarjeta(self, cajero_id: int, numero_tarjeta: str) -> tuple[bool, str]:
+        """
+        Inserta una tarjeta en un cajero a partir de su número
+
+        Args:
+            cajero_id: Id del cajero
+            numero_tarjeta: Número de la tarjeta
+
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        from modelo.Tarjeta import Tarjeta
+
+        def trabajo(sesion: Session):
+            cajero = self._cargar_cajero(sesion, cajero_id)
+            if cajero is None:
+                return False, "Cajero no encontrado"
+            tarjeta = sesion.execute(
+                db.select(Tarjeta).where(Tarjeta.numero_tarjeta == numero_tarjeta)
+            ).scalar_one_or_none()
+            if tarjeta is None:
+                return False, "Tarjeta no encontrada"
+            # Sin contexto precargado: sus objetos ORM no sobreviven a la
+            # AsyncSession de esta llamada
+            return cajero.insertar_tarjeta(tarjeta)
+
+        try:
+            return await self._en_sesion(trabajo)
+        except Exception as e:
+            return False, self._registrar_error(e)
+
+    async def verificar_pin(self, cajero_id: int, pin: str) -> tuple[bool, str]:
+        """
+        Verifica el PIN de la tarjeta insertada sin bloquear el event loop
+        y marca la sesión como autenticada si es correcto
+
+        Args:
+            cajero_id: Id del cajero
+            pin: PIN ingresado
+
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        from modelo.Tarjeta import Tarjeta
+        from servicio.GestorSesiones import GestorSesiones
+        from servicio.VerificadorPin import VerificadorPin
+
+        gestor = GestorSesiones.get_instance()
+        sesion_cajero = gestor.tocar(cajero_id)
+        if sesion_cajero is None:
+            return False, "No hay tarjeta insertada"
+
+        verificador = VerificadorPin.get_instance()
+        try:
+            # Sesiones cortas antes y después de bcrypt: la comprobación
+            # espera en el pool de procesos sin ocupar un turno del semáforo
+            # ni una conexión
+            async with self._sesion() as sesion:
+                tarjeta = await sesion.get(Tarjeta, sesion_cajero.tarjeta_id)
+            if tarjeta is None:
+                return False, "Tarjeta no encontrada"
+
+            try:
+                es_correcto = await verificador.comprobar_async(tarjeta, pin)
+            except ValueError as e:
+                return False, f"Error: {str(e)}"
+            costo = Tarjeta.COSTO_BCRYPT_OBJETIVO
+            pin_hash = None
+            if es_correcto and tarjeta.necesita_rehash():
+                pin_hash = await verificador.hashear_async(pin, costo)
+
+            def registrar(sesion: Session) -> None:
+                actual = sesion.get(Tarjeta, tarjeta.id)
+                # Persistir el contador de intentos (y el bloqueo, si hubo)
+                actual.registrar_intento_pin(es_correcto)
+                if pin_hash is not None:
+                    actual.actualizar_hash_pin(pin_hash, costo)
+
+            async with self._sesion() as sesion:
+                await sesion.run_sync(registrar)
+                await sesion.commit()
+        except Exception as e:
+            return False, self._registrar_error(e)
+
+        gestor.marcar_autenticada(cajero_id, es_correcto)
+        if es_correcto:
+            return True, "PIN correcto"
+        return False, "PIN incorrecto"
+
+    async def procesar_retiro(self, cajero_id: int, monto: Dinero) -> tuple[bool, str]:
+        """
+        Procesa un retiro de efectivo de la tarjeta insertada
+
+        Args:
+            cajero_id: Id del cajero
+            monto: Monto a retirar
+
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        autenticada, mensaje = self._sesion_autenticada(cajero_id)
+        if not autenticada:
+            return False, mensaje
+
+        def trabajo(sesion: Session):
+            cajero = self._cargar_cajero(sesion, cajero_id)
+            tarjeta = cajero.tarjeta_insertada if cajero else None
+            if tarjeta is None:
+                return False, "No hay tarjeta insertada"
+            return cajero.procesar_retiro(tarjeta, monto)
+
+        try:
+            return await self._en_sesion(trabajo)
+        except Exception as e:
+            return False, self._registrar_error(e)
+
+    async def procesar_deposito(self, cajero_id: int, monto: Dinero,
+                                tipo: str = 'EFECTIVO') -> tuple[bool, str]:
+        """
+        Procesa un depósito en la cuenta de la tarjeta insertada
+
+        Args:
+            cajero_id: Id del cajero
+            monto: Monto a depositar
+            tipo: Tipo de depósito ('EFECTIVO' o 'CHEQUE')
+
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        autenticada, mensaje = self._sesion_autenticada(cajero_id)
+        if not autenticada:
+            return False, mensaje
+
+        def trabajo(sesion: Session):
+            cajero = self._cargar_cajero(sesion, cajero_id)
+            tarjeta = cajero.tarjeta_insertada if cajero else None
+            if tarjeta is None:
+                return False, "No hay tarjeta insertada"
+            return cajero.procesar_deposito(tarjeta, monto, tipo)
+
+        try:
+            return await self._en_sesion(trabajo)
+        except Exception as e:
+            return False, self._registrar_error(e)
+
+    async def consultar_saldo(self, cajero_id: int) -> tuple[bool, Dinero, str]:
+        """
+        Consulta el saldo de la cuenta de la tarjeta insertada
+
+        Args:
+            cajero_id: Id del cajero
+
+        Returns:
+            tuple: (exito, saldo, mensaje)
+        """
+        autenticada, mensaje = self._sesion_autenticada(cajero_id)
+        if not autenticada:
+            return False, Dinero(0), mensaje
+
+        def trabajo(sesion: Session):
+            cajero = self._cargar_cajero(sesion, cajero_id)
+            tarjeta = cajero.tarjeta_insertada if cajero else None
+            if tarjeta is None:
+                return False, Dinero(0), "No hay tarjeta insertada"
+            return cajero.consultar_saldo(tarjeta)
+
+        try:
+            return await self._en_sesion(trabajo)
+        except Exception as e:
+            return False, Dinero(0), self._registrar_error(e)
+
+    def expulsar_tarjeta(self, cajero_id: int) -> None:
+        """
+        Expulsa la tarjeta del cajero (solo memoria, no toca la BD)
+
+        Args:
+            cajero_id: Id del cajero
+        """
+        from servicio.GestorSesiones import GestorSesiones
+
+        GestorSesiones.get_instance().cerrar(cajero_id)
+
+    def estadisticas(self) -> dict:
+        """
+        Obtiene los contadores de la fachada
+
+        Returns:
+            dict: Operaciones atendidas, errores y último error
+        """
+        return {
+            'operaciones': self.operaciones,
+            'errores': self.errores,
+            'ultimo_error': self.ultimo_error,
+        }
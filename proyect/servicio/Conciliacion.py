@@ -0,0 +1,320 @@
+"""
+Clase Conciliacion - Conciliación vectorizada de saldos contra operaciones
+"""
+import time
+from contextlib import contextmanager
+from itertools import chain
+from typing import Iterator, List, NamedTuple
+
+import numpy as np
+
+from data.database import db
+from modelo.Dinero import Dinero, expresion_centavos
+
+# Filas por lote al leer las operaciones
+TAMANO_LOTE = 200000
+
+# Código numérico de cada tipo de operación que mueve dinero
+_CODIGOS = {'deposito': 1, 'retiro': 2, 'pago_recibo': 3, 'compra_entradas': 4}
+
+# Signo de cada código sobre el saldo de la cuenta (índice = código)
+_SIGNO_CUENTA = np.array([0, 1, -1, -1, -1], dtype=np.int64)
+
+
+class Discrepancia(NamedTuple):
+    """
+    Diferencia entre el saldo registrado y el esperado según el historial
+    """
+    entidad: str          # 'cuenta' o 'cajero'
+    id: int
+    esperado: Dinero
+    registrado: Dinero
+    diferencia: Dinero    # registrado - esperado
+
+
+class ResultadoConciliacion(NamedTuple):
+    """
+    Resultado de una conciliación
+    """
+    operaciones: int
+    cuentas: int
+    cajeros: int
+    discrepancias: List[Discrepancia]
+    sin_apertura: List[tuple]   # (entidad, id) sin saldo de apertura conocido
+    segundos: float
+
+    @property
+    def conciliado(self) -> bool:
+        return not self.discrepancias
+
+
+class Conciliacion:
+    """
+    Verifica que Cuenta.saldo coincida con su saldo de apertura más los
+    depósitos menos los retiros, pagos y compras exitosos, y que
+    Cajero.monto_cajero coincida con su efectivo cargado más los depósitos
+    en efectivo menos los retiros hechos en él.
+
+    Las operaciones (de la tabla caliente y de las particiones frías) se
+    leen por lotes como arreglos de NumPy con los montos en centavos, y los
+    totales por cuenta y por cajero se acumulan con sumas agrupadas
+    vectorizadas (np.bincount), sin construir objetos ORM.
+
+    Operaciones, catálogo de particiones y saldos se leen en una misma
+    instantánea de la BD (ver _instantanea): una operación confirmada
+    durante la conciliación, o un lote trasladado de la tabla caliente a
+    una fría, no se cuenta a medias ni dos veces.
+    """
+
+    def __init__(self, tamano_lote: int = TAMANO_LOTE):
+        if tamano_lote < 1:
+            raise ValueError("El tamaño de lote debe ser al menos 1")
+        self.tamano_lote = tamano_lote
+
+    @staticmethod
+    @contextmanager
+    def _instantanea() -> Iterator['Connection']:
+        """
+        Abre una conexión con una transacción de lectura consistente: todas
+        sus consultas ven la BD como estaba al empezar. En PostgreSQL y
+        MySQL se usa REPEATABLE READ. En SQLite, pysqlite no abre
+        transacción antes de un SELECT, así que se emite BEGIN explícito
+        (en modo rollback journal esto impide confirmar escrituras hasta
+        terminar; con WAL no las bloquea).
+
+        Yields:
+            Connection: Conexión dentro de la transacción
+        """
+        with db.engine.connect() as conexion:
+            if conexion.dialect.name != 'sqlite':
+                conexion = conexion.execution_options(isolation_level='REPEATABLE READ')
+                with conexion.begin():
+                    yield conexion
+                return
+
+            conexion = conexion.execution_options(isolation_level='AUTOCOMMIT')
+            conexion.exec_driver_sql('BEGIN')
+            try:
+                yield conexion
+            except Exception:
+                conexion.exec_driver_sql('ROLLBACK')
+                raise
+            conexion.exec_driver_sql('COMMIT')
+
+    def _lotes_operaciones(self, conexion) -> Iterator[np.ndarray]:
+        """
+        Lee las operaciones exitosas que mueven dinero, por lotes
+
+        Args:
+            conexion: Conexión abierta
+
+        Yields:
+            np.ndarray: Matriz int64 (n, 5) con cuenta_id, cajero_id (0 si
+            no hay), código de tipo, 1 si es depósito en efectivo, centavos
+        """
+        from data.particiones import ParticionesOperaciones
+
+        for tabla in ParticionesOperaciones.get_instance().tablas_para_rango(conexion=conexion):
+            c = tabla.c
+            consulta = db.select(
+                c.cuenta_id,
+                db.func.coalesce(c.cajero_id, 0),
+                db.case(*[(c.tipo == tipo, codigo) for tipo, codigo in _CODIGOS.items()], else_=0),
+                db.case((c.tipo_deposito == 'EFECTIVO', 1), else_=0),
+                expresion_centavos(c.monto)
+            ).where(
+                c.exitosa == True,
+                c.tipo.in_(list(_CODIGOS)),
+                c.monto.is_not(None)
+            )
+
+            resultado = conexion.execution_options(stream_results=True).execute(consulta)
+            for filas in resultado.partitions(self.tamano_lote):
+                # fromiter sobre los valores planos evita inspeccionar cada Row
+                yield np.fromiter(chain.from_iterable(filas), dtype=np.int64,
+                                  count=len(filas) * 5).reshape(-1, 5)
+
+    @staticmethod
+    def _acumular(totales: np.ndarray, ids: np.ndarray, montos: np.ndarray) -> np.ndarray:
+        """
+        Suma montos agrupados por id sobre un arreglo de totales
+
+        Args:
+            totales: Totales acumulados (índice = id)
+            ids: Id de cada monto
+            montos: Montos en centavos
+
+        Returns:
+            np.ndarray: Totales actualizados (crece si aparece un id mayor)
+        """
+        if ids.size == 0:
+            return totales
+        # bincount suma en float64, exacto para enteros de hasta 2**53 centavos
+        sumas = np.rint(np.bincount(ids, weights=montos, minlength=totales.size)).astype(np.int64)
+        if sumas.size > totales.size:
+            totales = np.concatenate([totales, np.zeros(sumas.size - totales.size, dtype=np.int64)])
+        totales += sumas
+        return totales
+
+    def _saldos(self, conexion, tabla, columna_saldo, columna_apertura):
+        """
+        Carga saldo registrado y de apertura en centavos
+
+        Args:
+            conexion: Conexión abierta
+            tabla: Tabla de cuentas o cajeros
+            columna_saldo: Columna del saldo registrado
+            columna_apertura: Columna del saldo de apertura
+
+        Returns:
+            tuple: (ids, registrado, apertura, apertura_conocida) como arreglos
+        """
+        filas = conexion.execute(db.select(
+            tabla.c.id,
+            db.func.coalesce(expresion_centavos(columna_saldo), 0),
+            db.func.coalesce(expresion_centavos(columna_apertura), 0),
+            db.case((columna_apertura.is_(None), 0), else_=1)
+        ).order_by(tabla.c.id)).all()
+
+        datos = np.fromiter(chain.from_iterable(filas), dtype=np.int64,
+                            count=len(filas) * 4).reshape(-1, 4)
+        return datos[:, 0], datos[:, 1], datos[:, 2], datos[:, 3].astype(bool)
+
+    @staticmethod
+    def _comparar(entidad: str, ids: np.ndarray, registrado: np.ndarray,
+                  apertura: np.ndarray, conocida: np.ndarray,
+                  netos: np.ndarray) -> tuple:
+        """
+        Compara saldos registrados con los esperados
+
+        Returns:
+            tuple: (discrepancias, sin_apertura)
+        """
+        if netos.size <= (ids.max() if ids.size else 0):
+            netos = np.concatenate([netos, np.zeros(int(ids.max()) + 1 - netos.size, dtype=np.int64)])
+
+        esperado = apertura + netos[ids]
+        diferencia = registrado - esperado
+
+        discrepancias = [
+            Discrepancia(entidad, int(ids[i]), Dinero(int(esperado[i])),
+                         Dinero(int(registrado[i])), Dinero(int(diferencia[i])))
+            for i in np.flatnonzero(conocida & (diferencia != 0))
+        ]
+        sin_apertura = [(entidad, int(i)) for i in ids[~conocida]]
+        return discrepancias, sin_apertura
+
+    def _netos(self, conexion) -> tuple:
+        """
+        Acumula el neto de las operaciones por cuenta y por cajero
+
+        Args:
+            conexion: Conexión abierta
+
+        Returns:
+            tuple: (operaciones leídas, netos por cuenta, netos por cajero),
+            arreglos de centavos indexados por id
+        """
+        netos_cuenta = np.zeros(1, dtype=np.int64)
+        netos_cajero = np.zeros(1, dtype=np.int64)
+        operaciones = 0
+
+        for lote in self._lotes_operaciones(conexion):
+            cuenta_id, cajero_id, codigo, efectivo, centavos = lote.T
+            operaciones += lote.shape[0]
+
+            netos_cuenta = self._acumular(netos_cuenta, cuenta_id, _SIGNO_CUENTA[codigo] * centavos)
+
+            # El efectivo del cajero cambia con depósitos en efectivo y retiros
+            signo_cajero = np.where(
+                (codigo == _CODIGOS['deposito']) & (efectivo == 1), 1,
+                np.where(codigo == _CODIGOS['retiro'], -1, 0)
+            )
+            en_cajero = (cajero_id > 0) & (signo_cajero != 0)
+            netos_cajero = self._acumular(
+                netos_cajero, cajero_id[en_cajero], (signo_cajero * centavos)[en_cajero]
+            )
+
+        return operaciones, netos_cuenta, netos_cajero
+
+    @staticmethod
+    def _tablas():
+        """
+        Tablas conciliadas con sus columnas de saldo registrado y de apertura
+
+        Returns:
+            dict: entidad -> (tabla, columna de saldo, columna de apertura)
+        """
+        from modelo.cuenta import Cuenta
+        from servicio.Cajero import Cajero
+
+        cuentas, cajeros = Cuenta.__table__, Cajero.__table__
+        return {
+            'cuenta': (cuentas, cuentas.c.cuenta_saldo, cuentas.c.cuenta_saldoApertura),
+            'cajero': (cajeros, cajeros.c.monto_cajero, cajeros.c.efectivo_cargado),
+        }
+
+    def ejecutar(self) -> ResultadoConciliacion:
+        """
+        Concilia todas las cuentas y cajeros
+
+        Returns:
+            ResultadoConciliacion: Discrepancias encontradas
+        """
+        inicio = time.perf_counter()
+        tablas = self._tablas()
+
+        # Lectura consistente: operaciones y saldos en la misma instantánea
+        with self._instantanea() as conexion:
+            operaciones, netos_cuenta, netos_cajero = self._netos(conexion)
+            cuentas = self._saldos(conexion, *tablas['cuenta'])
+            cajeros = self._saldos(conexion, *tablas['cajero'])
+
+        discrepancias_cuenta, sin_cuenta = self._comparar('cuenta', *cuentas, netos_cuenta)
+        discrepancias_cajero, sin_cajero = self._comparar('cajero', *cajeros, netos_cajero)
+
+        return ResultadoConciliacion(
+            operaciones=operaciones,
+            cuentas=int(cuentas[0].size),
+            cajeros=int(cajeros[0].size),
+            discrepancias=discrepancias_cuenta + discrepancias_cajero,
+            sin_apertura=sin_cuenta + sin_cajero,
+            segundos=time.perf_counter() - inicio
+        )
+
+    def fijar_aperturas(self) -> int:
+        """
+        Fija el saldo de apertura de las cuentas y cajeros que no lo tienen
+        (p. ej. creados antes de existir la columna) como su saldo actual
+        menos el neto de su historial, para que las conciliaciones
+        siguientes los incluyan
+
+        Returns:
+            int: Cuentas y cajeros actualizados
+        """
+        tablas = self._tablas()
+        actualizados = 0
+
+        with self._instantanea() as conexion:
+            _, netos_cuenta, netos_cajero = self._netos(conexion)
+            netos = {'cuenta': netos_cuenta, 'cajero': netos_cajero}
+
+            for entidad, (tabla, saldo, apertura) in tablas.items():
+                ids, registrado, _, conocida = self._saldos(conexion, tabla, saldo, apertura)
+                pendientes = ~conocida
+                if not pendientes.any():
+                    continue
+
+                neto = netos[entidad]
+                neto = np.concatenate([neto, np.zeros(max(0, int(ids.max()) + 1 - neto.size), dtype=np.int64)])
+                valores = registrado[pendientes] - neto[ids[pendientes]]
+
+                conexion.execute(
+                    db.update(tabla)
+                    .where(tabla.c.id == db.bindparam('b_id'), apertura.is_(None))
+                    .values({apertura.name: db.bindparam('b_apertura')}),
+                    [{'b_id': int(i), 'b_apertura': Dinero(int(v))}
+                     for i, v in zip(ids[pendientes], valores)]
+                )
+                actualizados += int(pendientes.sum())
+        return actualizados
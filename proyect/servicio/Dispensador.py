@@ -0,0 +1,263 @@
+"""
+Clase Dispensador - Elige los billetes que entrega un retiro
+"""
+import threading
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from modelo.Dinero import Dinero
+
+# Billetes máximos que entrega un retiro (límite físico del dispensador)
+MAX_BILLETES = 40
+
+# Combinaciones memorizadas (monto, denominaciones) -> billetes por casete
+TAMANO_CACHE = 1024
+
+# Combinaciones máximas memorizadas por monto; con más (muchos casetes de
+# denominaciones bajas) se resuelve con la búsqueda sobre el inventario
+MAX_CANDIDATOS = 4096
+
+# (denominación en centavos, billetes disponibles, capacidad) por casete
+Inventario = Tuple[Tuple[int, int, int], ...]
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def _candidatos(monto: int, denominaciones: Tuple[int, ...],
+                max_billetes: int) -> Optional[np.ndarray]:
+    """
+    Enumera todas las combinaciones de billetes que suman exactamente el
+    monto sin pasar del máximo por retiro, sin mirar las existencias. Solo
+    depende del monto y de las denominaciones instaladas, así que se
+    comparte entre retiros y cajeros aunque cambie el inventario.
+
+    Args:
+        monto: Monto en centavos
+        denominaciones: Denominación de cada casete, en orden descendente
+        max_billetes: Billetes máximos del retiro
+
+    Returns:
+        np.ndarray: (combinaciones, casetes) billetes de cada casete (vacío
+        si no hay ninguna), o None si hay más de MAX_CANDIDATOS
+    """
+    ultimo = len(denominaciones) - 1
+    combinaciones = []
+    plan = [0] * len(denominaciones)
+
+    def enumerar(i: int, resto: int, disponibles: int) -> bool:
+        denominacion = denominaciones[i]
+        if i == ultimo:
+            billetes, sobra = divmod(resto, denominacion)
+            if sobra == 0 and billetes <= disponibles:
+                plan[i] = billetes
+                combinaciones.append(tuple(plan))
+            return len(combinaciones) <= MAX_CANDIDATOS
+        siguiente = denominaciones[i + 1]
+        for billetes in range(min(disponibles, resto // denominacion) + 1):
+            # Los casetes restantes (de denominación menor o igual) no
+            # cubren lo que falta con los billetes que quedan
+            if resto - billetes * denominacion > (disponibles - billetes) * siguiente:
+                continue
+            plan[i] = billetes
+            if not enumerar(i + 1, resto - billetes * denominacion, disponibles - billetes):
+                return False
+        return True
+
+    if not enumerar(0, monto, max_billetes):
+        return None
+    resultado = np.array(combinaciones, dtype=np.int16).reshape(-1, len(denominaciones))
+    resultado.flags.writeable = False
+    return resultado
+
+
+def _elegir(candidatos: np.ndarray, inventario: Inventario) -> Optional[Tuple[int, ...]]:
+    """
+    Elige entre las combinaciones del monto la que respetan las existencias
+    y deja los casetes más parejos (mismo criterio que _resolver)
+
+    Args:
+        candidatos: Combinaciones de _candidatos
+        inventario: Casetes en el mismo orden que las columnas
+
+    Returns:
+        tuple: Billetes a tomar de cada casete, o None si ninguna alcanza
+    """
+    cantidades = np.array([cantidad for _, cantidad, _ in inventario])
+    capacidades = np.array([capacidad for _, _, capacidad in inventario])
+
+    posibles = candidatos[(candidatos <= cantidades).all(axis=1)]
+    if not len(posibles):
+        return None
+
+    costos = ((1 - (cantidades - posibles) / capacidades) ** 2).sum(axis=1)
+    # A igual costo, la de menos billetes
+    mejor = np.lexsort((posibles.sum(axis=1), costos))[0]
+    return tuple(int(billetes) for billetes in posibles[mejor])
+
+
+def _resolver(monto: int, inventario: Inventario,
+              max_billetes: int) -> Optional[Tuple[int, ...]]:
+    """
+    Busca la combinación de billetes que suma exactamente el monto sin
+    exceder los billetes de cada casete ni el máximo por retiro, y que deja
+    los casetes lo más parejos posible: minimiza la suma de los cuadrados
+    de la fracción vacía de cada casete tras el retiro (a igual costo, la
+    de menos billetes). Como el costo es separable por casete, la búsqueda
+    memoriza el mejor resultado por (casete, resto, billetes disponibles).
+    Se usa cuando el monto tiene demasiadas combinaciones para _candidatos.
+
+    Args:
+        monto: Monto en centavos
+        inventario: Casetes ordenados por denominación descendente
+        max_billetes: Billetes máximos del retiro
+
+    Returns:
+        tuple: Billetes a tomar de cada casete, o None si no hay combinación
+    """
+    if monto <= 0 or not inventario:
+        return None
+
+    ultimo = len(inventario) - 1
+    denominaciones = [denominacion for denominacion, _, _ in inventario]
+
+    # Billetes que puede aportar cada casete, costo de tomar x billetes de
+    # cada uno, y monto máximo que cubren los casetes desde cada posición
+    # (para descartar ramas sin solución)
+    limites = [min(cantidad, max_billetes) for _, cantidad, _ in inventario]
+    costos = [
+        [(1 - (cantidad - x) / capacidad) ** 2 for x in range(limite + 1)]
+        for (_, cantidad, capacidad), limite in zip(inventario, limites)
+    ]
+    maximos = [0] * (ultimo + 2)
+    for i in range(ultimo, -1, -1):
+        maximos[i] = maximos[i + 1] + denominaciones[i] * limites[i]
+
+    # (i, resto, disponibles) -> (costo, billetes, billetes del casete i)
+    memo = {}
+
+    def mejor(i: int, resto: int, disponibles: int):
+        clave = (i, resto, disponibles)
+        if clave in memo:
+            return memo[clave]
+
+        denominacion = denominaciones[i]
+        resultado = None
+
+        if i == ultimo:
+            # El último casete debe cubrir exactamente el resto
+            billetes, sobra = divmod(resto, denominacion)
+            if sobra == 0 and billetes <= limites[i] and billetes <= disponibles:
+                resultado = (costos[i][billetes], billetes, billetes)
+        elif resto <= maximos[i] and -(-resto // denominacion) <= disponibles:
+            # Si el resto excede lo que cubren los casetes restantes, o
+            # necesita más billetes de los disponibles aun con la mayor
+            # denominación, no hay solución
+            costo_casete = costos[i]
+            siguiente_maximo = maximos[i + 1]
+            minimo = max(0, -(-(resto - siguiente_maximo) // denominacion))
+            maximo = min(limites[i], disponibles, resto // denominacion)
+            for billetes in range(minimo, maximo + 1):
+                siguiente = mejor(i + 1, resto - billetes * denominacion, disponibles - billetes)
+                if siguiente is None:
+                    continue
+                candidato = (siguiente[0] + costo_casete[billetes], siguiente[1] + billetes)
+                if resultado is None or candidato < resultado[:2]:
+                    resultado = candidato + (billetes,)
+
+        memo[clave] = resultado
+        return resultado
+
+    if mejor(0, monto, max_billetes) is None:
+        return None
+
+    # Reconstruir el plan siguiendo la elección de cada casete
+    plan = []
+    resto, disponibles = monto, max_billetes
+    for i in range(ultimo + 1):
+        billetes = memo[(i, resto, disponibles)][2]
+        plan.append(billetes)
+        resto -= billetes * denominaciones[i]
+        disponibles -= billetes
+    return tuple(plan)
+
+
+class Dispensador:
+    """
+    Planifica la entrega de billetes de un retiro a partir del inventario
+    de casetes del cajero. Las combinaciones posibles de cada monto se
+    memorizan por denominaciones instaladas (no por existencias, que
+    cambian con cada retiro); en cada retiro solo se filtran por las
+    existencias actuales y se elige la de menor costo.
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, max_billetes: int = MAX_BILLETES):
+        if max_billetes < 1:
+            raise ValueError("El máximo de billetes debe ser al menos 1")
+        self.max_billetes = max_billetes
+
+    @classmethod
+    def get_instance(cls) -> 'Dispensador':
+        """
+        Obtiene la instancia compartida del dispensador
+
+        Returns:
+            Dispensador: Instancia única
+        """
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def planificar(self, monto: Dinero,
+                   casetes: List['Casete']) -> Optional[List[Tuple['Casete', int]]]:
+        """
+        Elige los billetes a entregar
+
+        Args:
+            monto: Monto del retiro
+            casetes: Casetes del cajero
+
+        Returns:
+            list: (casete, billetes) de los casetes que entregan billetes, o
+            None si el monto no puede entregarse con el inventario actual
+        """
+        monto = Dinero.desde(monto)
+        ordenados = sorted(
+            (casete for casete in casetes if casete.cantidad > 0),
+            key=lambda casete: (-casete.denominacion.centavos, casete.id or 0)
+        )
+        inventario = tuple(
+            (casete.denominacion.centavos, casete.cantidad, casete.capacidad)
+            for casete in ordenados
+        )
+
+        if monto.centavos <= 0 or not inventario:
+            return None
+        denominaciones = tuple(denominacion for denominacion, _, _ in inventario)
+        candidatos = _candidatos(monto.centavos, denominaciones, self.max_billetes)
+        if candidatos is None:
+            plan = _resolver(monto.centavos, inventario, self.max_billetes)
+        else:
+            plan = _elegir(candidatos, inventario)
+        if plan is None:
+            return None
+        return [(casete, billetes) for casete, billetes in zip(ordenados, plan) if billetes]
+
+    def estadisticas(self) -> dict:
+        """
+        Obtiene los contadores del caché de combinaciones
+
+        Returns:
+            dict: Aciertos, fallos y tamaño del caché
+        """
+        info = _candidatos.cache_info()
+        return {'aciertos': info.hits, 'fallos': info.misses, 'tamano': info.currsize}
+
+    def limpiar_cache(self) -> None:
+        """
+        Descarta las combinaciones memorizadas
+        """
+        _candidatos.cache_clear()
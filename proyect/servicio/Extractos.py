@@ -0,0 +1,366 @@
+"""
+Clase GeneradorExtractos - Extractos de cuenta en CSV y texto plano
+"""
+import calendar
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.OperacionResumen import OperacionResumen
+
+DIRECTORIO_EXTRACTOS = 'extractos'
+FORMATOS = ('csv', 'txt')
+
+# Operaciones leídas por lote del cursor
+TAMANO_LOTE = 1000
+
+# Cuentas por tarea en el cierre mensual
+CUENTAS_POR_TAREA = 200
+
+_ANCHO = 86
+
+
+class ResumenExtracto(NamedTuple):
+    """
+    Totales de un extracto generado
+    """
+    cuenta_id: int
+    saldo_inicial: Dinero
+    saldo_final: Dinero
+    movimientos: int
+    total_debitos: Dinero
+    total_creditos: Dinero
+
+
+class _EscritorCsv:
+    """
+    Extracto en CSV: una fila por movimiento más saldo inicial y final
+    """
+
+    def __init__(self, salida: TextIO):
+        self._csv = csv.writer(salida)
+
+    def encabezado(self, cuenta, inicio: date, fin: date, saldo: Dinero) -> None:
+        self._csv.writerow(['fecha', 'tipo', 'descripcion', 'debito', 'credito', 'saldo'])
+        self._csv.writerow([inicio.isoformat(), 'saldo_inicial', '', '', '', str(saldo)])
+
+    def fila(self, operacion: OperacionResumen, debito: Optional[Dinero],
+             credito: Optional[Dinero], saldo: Dinero) -> None:
+        self._csv.writerow([
+            operacion.fecha.strftime('%Y-%m-%d %H:%M:%S'),
+            operacion.tipo,
+            operacion.descripcion or '',
+            str(debito) if debito is not None else '',
+            str(credito) if credito is not None else '',
+            str(saldo),
+        ])
+
+    def cierre(self, resumen: ResumenExtracto, fin: date) -> None:
+        self._csv.writerow([fin.isoformat(), 'saldo_final', '', str(resumen.total_debitos),
+                            str(resumen.total_creditos), str(resumen.saldo_final)])
+
+
+class _EscritorTexto:
+    """
+    Extracto en texto plano de ancho fijo
+    """
+
+    def __init__(self, salida: TextIO):
+        self._salida = salida
+
+    def encabezado(self, cuenta, inicio: date, fin: date, saldo: Dinero) -> None:
+        self._salida.write(f"""{'=' * _ANCHO}
+{'BANCO - EXTRACTO DE CUENTA':^{_ANCHO}}
+{'=' * _ANCHO}
+Cuenta: {cuenta.numero_cuenta}
+Periodo: {inicio.strftime('%d/%m/%Y')} - {fin.strftime('%d/%m/%Y')}
+Saldo inicial: ${saldo}
+{'-' * _ANCHO}
+{'Fecha':<17}{'Descripción':<33}{'Débito':>12}{'Crédito':>12}{'Saldo':>12}
+{'-' * _ANCHO}
+""")
+
+    def fila(self, operacion: OperacionResumen, debito: Optional[Dinero],
+             credito: Optional[Dinero], saldo: Dinero) -> None:
+        descripcion = (operacion.descripcion or operacion.tipo)[:32]
+        self._salida.write(
+            f"{operacion.fecha.strftime('%d/%m/%Y %H:%M'):<17}{descripcion:<33}"
+            f"{str(debito) if debito is not None else '':>12}"
+            f"{str(credito) if credito is not None else '':>12}"
+            f"{str(saldo):>12}\n"
+        )
+
+    def cierre(self, resumen: ResumenExtracto, fin: date) -> None:
+        self._salida.write(f"""{'-' * _ANCHO}
+Movimientos: {resumen.movimientos}
+Total débitos: ${resumen.total_debitos}
+Total créditos: ${resumen.total_creditos}
+Saldo final: ${resumen.saldo_final}
+{'=' * _ANCHO}
+""")
+
+
+_ESCRITORES = {'csv': _EscritorCsv, 'txt': _EscritorTexto}
+
+
+class GeneradorExtractos:
+    """
+    Genera extractos por rango de fechas con saldo corrido, leyendo las
+    operaciones en orden cronológico por lotes del cursor y escribiéndolas
+    a medida que llegan (memoria constante sin importar el volumen)
+    """
+
+    def __init__(self, tamano_lote: int = TAMANO_LOTE):
+        if tamano_lote < 1:
+            raise ValueError("El tamaño de lote debe ser al menos 1")
+        self.tamano_lote = tamano_lote
+
+    def movimientos(self, cuenta, fecha_inicio: date, fecha_fin: date,
+                    saldo_inicial: Optional[Dinero] = None
+                    ) -> Iterator[Tuple[OperacionResumen, Optional[Dinero], Optional[Dinero], Dinero]]:
+        """
+        Recorre los movimientos exitosos del rango con el saldo tras cada uno
+
+        Args:
+            cuenta: Cuenta del extracto
+            fecha_inicio: Primer día del rango
+            fecha_fin: Último día del rango (incluido)
+            saldo_inicial: Saldo al comienzo del rango (si ya se conoce)
+
+        Yields:
+            tuple: (operación, débito o None, crédito o None, saldo)
+        """
+        from modelo.RegistroOperaciones import RegistroOperaciones, TIPOS_DEBITO
+
+        registro = RegistroOperaciones.get_instance()
+        saldo = saldo_inicial
+        if saldo is None:
+            saldo = self.saldo_inicial(cuenta, fecha_inicio)
+
+        consulta = registro.consulta_movimientos(cuenta.id, fecha_inicio, fecha_fin)
+        for operacion in registro.iterar_resumenes_cronologico(consulta, self.tamano_lote):
+            if operacion.tipo in TIPOS_DEBITO:
+                saldo -= operacion.monto
+                yield operacion, operacion.monto, None, saldo
+            else:
+                saldo += operacion.monto
+                yield operacion, None, operacion.monto, saldo
+
+    @staticmethod
+    def saldo_inicial(cuenta, fecha_inicio: date) -> Dinero:
+        """
+        Saldo al comienzo del rango (ver RegistroOperaciones.obtener_saldo_a_fecha)
+
+        Args:
+            cuenta: Cuenta del extracto
+            fecha_inicio: Primer día del rango
+
+        Returns:
+            Dinero: Saldo antes de las operaciones del rango
+        """
+        from modelo.RegistroOperaciones import RegistroOperaciones
+
+        return RegistroOperaciones.get_instance().obtener_saldo_a_fecha(
+            cuenta, datetime.combine(fecha_inicio, datetime.min.time())
+        )
+
+    def generar(self, cuenta, fecha_inicio: date, fecha_fin: date,
+                salidas: Dict[str, TextIO]) -> ResumenExtracto:
+        """
+        Escribe el extracto en una o más salidas en una sola pasada
+
+        Args:
+            cuenta: Cuenta del extracto
+            fecha_inicio: Primer día del rango
+            fecha_fin: Último día del rango (incluido)
+            salidas: Formato ('csv' o 'txt') -> archivo de texto abierto
+
+        Returns:
+            ResumenExtracto: Saldos y totales del extracto
+        """
+        if fecha_fin < fecha_inicio:
+            raise ValueError("La fecha final no puede ser anterior a la inicial")
+        desconocidos = set(salidas) - set(_ESCRITORES)
+        if desconocidos:
+            raise ValueError(f"Formato de extracto no soportado: {', '.join(sorted(desconocidos))}")
+
+        escritores = [_ESCRITORES[formato](salida) for formato, salida in salidas.items()]
+        saldo_inicial = self.saldo_inicial(cuenta, fecha_inicio)
+        for escritor in escritores:
+            escritor.encabezado(cuenta, fecha_inicio, fecha_fin, saldo_inicial)
+
+        cantidad, debitos, creditos, saldo = 0, Dinero(0), Dinero(0), saldo_inicial
+        movimientos = self.movimientos(cuenta, fecha_inicio, fecha_fin, saldo_inicial)
+        for operacion, debito, credito, saldo in movimientos:
+            cantidad += 1
+            if debito is not None:
+                debitos += debito
+            else:
+                creditos += credito
+            for escritor in escritores:
+                escritor.fila(operacion, debito, credito, saldo)
+
+        resumen = ResumenExtracto(cuenta.id, saldo_inicial, saldo, cantidad, debitos, creditos)
+        for escritor in escritores:
+            escritor.cierre(resumen, fecha_fin)
+        return resumen
+
+    def escribir_csv(self, cuenta, fecha_inicio: date, fecha_fin: date,
+                     salida: TextIO) -> ResumenExtracto:
+        """
+        Escribe el extracto en CSV
+
+        Args:
+            cuenta: Cuenta del extracto
+            fecha_inicio: Primer día del rango
+            fecha_fin: Último día del rango (incluido)
+            salida: Archivo de texto abierto (con newline='')
+
+        Returns:
+            ResumenExtracto: Saldos y totales del extracto
+        """
+        return self.generar(cuenta, fecha_inicio, fecha_fin, {'csv': salida})
+
+    def escribir_texto(self, cuenta, fecha_inicio: date, fecha_fin: date,
+                       salida: TextIO) -> ResumenExtracto:
+        """
+        Escribe el extracto en texto plano
+
+        Args:
+            cuenta: Cuenta del extracto
+            fecha_inicio: Primer día del rango
+            fecha_fin: Último día del rango (incluido)
+            salida: Archivo de texto abierto
+
+        Returns:
+            ResumenExtracto: Saldos y totales del extracto
+        """
+        return self.generar(cuenta, fecha_inicio, fecha_fin, {'txt': salida})
+
+    def generar_archivos(self, cuenta, fecha_inicio: date, fecha_fin: date,
+                         directorio: str = DIRECTORIO_EXTRACTOS,
+                         formatos: Tuple[str, ...] = FORMATOS) -> ResumenExtracto:
+        """
+        Escribe el extracto en archivos extracto_<cuenta>_<inicio>_<fin>.<formato>
+        dentro de directorio (cada archivo se reemplaza de forma atómica)
+
+        Args:
+            cuenta: Cuenta del extracto
+            fecha_inicio: Primer día del rango
+            fecha_fin: Último día del rango (incluido)
+            directorio: Carpeta de destino
+            formatos: Formatos a generar
+
+        Returns:
+            ResumenExtracto: Saldos y totales del extracto
+        """
+        os.makedirs(directorio, exist_ok=True)
+        base = os.path.join(
+            directorio,
+            f"extracto_{cuenta.numero_cuenta}_{fecha_inicio:%Y%m%d}_{fecha_fin:%Y%m%d}"
+        )
+        rutas = {formato: f"{base}.{formato}" for formato in formatos}
+
+        salidas = {formato: open(ruta + '.tmp', 'w', encoding='utf-8', newline='')
+                   for formato, ruta in rutas.items()}
+        try:
+            resumen = self.generar(cuenta, fecha_inicio, fecha_fin, salidas)
+        except Exception:
+            for formato, salida in salidas.items():
+                salida.close()
+                os.remove(rutas[formato] + '.tmp')
+            raise
+
+        for formato, salida in salidas.items():
+            salida.close()
+            os.replace(rutas[formato] + '.tmp', rutas[formato])
+        return resumen
+
+
+def _iniciar_proceso(uri: str) -> None:
+    """
+    Prepara un proceso del cierre mensual con su propia aplicación y
+    conexión a la BD (las conexiones no se comparten entre procesos)
+
+    Args:
+        uri: URI de la BD
+    """
+    from flask import Flask
+    from data.database import importar_modelos
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    db.init_app(app)
+    importar_modelos()
+    app.app_context().push()
+
+
+def _generar_lote(cuenta_ids: List[int], fecha_inicio: date, fecha_fin: date,
+                  directorio: str, formatos: Tuple[str, ...],
+                  tamano_lote: int) -> List[ResumenExtracto]:
+    """
+    Genera los extractos de un grupo de cuentas (tarea del cierre mensual)
+
+    Returns:
+        List[ResumenExtracto]: Un resumen por cuenta
+    """
+    from modelo.cuenta import Cuenta
+
+    generador = GeneradorExtractos(tamano_lote)
+    return [
+        generador.generar_archivos(db.session.get(Cuenta, cuenta_id), fecha_inicio,
+                                   fecha_fin, directorio, formatos)
+        for cuenta_id in cuenta_ids
+    ]
+
+
+def generar_cierre_mensual(anio: int, mes: int,
+                           directorio: str = DIRECTORIO_EXTRACTOS,
+                           procesos: Optional[int] = None,
+                           formatos: Tuple[str, ...] = FORMATOS,
+                           cuentas_por_tarea: int = CUENTAS_POR_TAREA,
+                           tamano_lote: int = TAMANO_LOTE) -> List[ResumenExtracto]:
+    """
+    Genera los extractos del mes de todas las cuentas en un pool de
+    procesos, en <directorio>/<año>/<mes>/. Debe llamarse dentro de un
+    contexto de aplicación Flask.
+
+    Args:
+        anio: Año
+        mes: Mes
+        directorio: Directorio raíz de los extractos
+        procesos: Procesos del pool (por defecto os.cpu_count(); 1 = sin pool)
+        formatos: Formatos a generar
+        cuentas_por_tarea: Cuentas que procesa cada tarea
+        tamano_lote: Operaciones leídas por lote
+
+    Returns:
+        List[ResumenExtracto]: Resumen de cada extracto, por id de cuenta
+    """
+    from modelo.cuenta import Cuenta
+
+    if cuentas_por_tarea < 1:
+        raise ValueError("Cada tarea debe procesar al menos una cuenta")
+
+    fecha_inicio = date(anio, mes, 1)
+    fecha_fin = date(anio, mes, calendar.monthrange(anio, mes)[1])
+    carpeta = os.path.join(directorio, f"{anio:04d}", f"{mes:02d}")
+
+    cuenta_ids = db.session.execute(db.select(Cuenta.id).order_by(Cuenta.id)).scalars().all()
+    tareas = [cuenta_ids[i:i + cuentas_por_tarea]
+              for i in range(0, len(cuenta_ids), cuentas_por_tarea)]
+    argumentos = (fecha_inicio, fecha_fin, carpeta, tuple(formatos), tamano_lote)
+
+    if procesos == 1:
+        return [resumen for tarea in tareas
+                for resumen in _generar_lote(tarea, *argumentos)]
+
+    uri = db.engine.url.render_as_string(hide_password=False)
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                             initargs=(uri,)) as pool:
+        futuros = [pool.submit(_generar_lote, tarea, *argumentos) for tarea in tareas]
+        return [resumen for futuro in futuros for resumen in futuro.result()]
@@ -0,0 +1,303 @@
+"""
+Clase GestorSesiones - Sesiones activas de los cajeros, en memoria
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+# Duración máxima de una sesión desde la inserción de la tarjeta
+TTL_S = 300.0
+
+# Tiempo máximo sin actividad antes de expulsar la tarjeta
+INACTIVIDAD_S = 60.0
+
+# Intervalo del barrido de sesiones vencidas
+INTERVALO_BARRIDO_S = 5.0
+
+
+class SesionCajero:
+    """
+    Tarjeta insertada en un cajero y estado de su sesión
+    """
+    __slots__ = (
+        'cajero_id', 'tarjeta_id', 'contexto', 'autenticada',
+        'inicio', 'ultima_actividad'
+    )
+
+    def __init__(self, cajero_id: int, tarjeta_id: int,
+                 contexto: Optional['ContextoSesion'] = None):
+        ahora = time.monotonic()
+        self.cajero_id = cajero_id
+        self.tarjeta_id = tarjeta_id
+        self.contexto = contexto
+        self.autenticada = False
+        self.inicio = ahora
+        self.ultima_actividad = ahora
+
+    def motivo_vencimiento(self, ttl_s: float, inactividad_s: float,
+                           ahora: float) -> Optional[str]:
+        """
+        Indica si la sesión venció y por qué
+
+        Args:
+            ttl_s: Duración máxima de la sesión
+            inactividad_s: Tiempo máximo sin actividad
+            ahora: Instante actual (time.monotonic)
+
+        Returns:
+            str: 'ttl' o 'inactividad', o None si sigue vigente
+        """
+        if ahora - self.inicio >= ttl_s:
+            return 'ttl'
+        if ahora - self.ultima_actividad >= inactividad_s:
+            return 'inactividad'
+        return None
+
+    def __repr__(self):
+        estado = "autenticada" if self.autenticada else "sin autenticar"
+        return f"<SesionCajero cajero {self.cajero_id} tarjeta {self.tarjeta_id} - {estado}>"
+
+
+class GestorSesiones:
+    """
+    Registro en memoria de la sesión activa de cada cajero (por id), en
+    lugar de persistir la tarjeta insertada en la fila del cajero. Las
+    sesiones vencen por duración total (TTL) o por inactividad; una sesión
+    vencida se expulsa al consultarla o en el barrido periódico, si está
+    activo.
+
+    Solo los eventos de auditoría llegan a la BD, de forma asíncrona, a
+    través de AuditoriaSesiones (si no está activa no se auditan).
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, ttl_s: float = TTL_S, inactividad_s: float = INACTIVIDAD_S):
+        self.configurar(ttl_s, inactividad_s)
+        self._sesiones: Dict[int, SesionCajero] = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self.abiertas = 0
+        self.cerradas = 0
+        self.expiradas = 0
+
+    @classmethod
+    def get_instance(cls) -> 'GestorSesiones':
+        """
+        Obtiene la instancia compartida del gestor
+
+        Returns:
+            GestorSesiones: Instancia única
+        """
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def configurar(self, ttl_s: float, inactividad_s: float) -> None:
+        """
+        Ajusta los tiempos de vencimiento (aplican también a las sesiones
+        ya abiertas)
+
+        Args:
+            ttl_s: Duración máxima de una sesión
+            inactividad_s: Tiempo máximo sin actividad
+        """
+        if ttl_s <= 0 or inactividad_s <= 0:
+            raise ValueError("Los tiempos de vencimiento deben ser positivos")
+        self.ttl_s = ttl_s
+        self.inactividad_s = inactividad_s
+
+    @staticmethod
+    def _auditar(sesion: SesionCajero, evento: str, detalle: Optional[str] = None) -> None:
+        """
+        Encola un evento de auditoría de la sesión (sin esperar a la BD)
+
+        Args:
+            sesion: Sesión del evento
+            evento: Tipo de evento
+            detalle: Texto adicional
+        """
+        from data.auditoria import AuditoriaSesiones
+
+        auditoria = AuditoriaSesiones.get_instance()
+        if auditoria is not None:
+            auditoria.registrar(sesion.cajero_id, sesion.tarjeta_id, evento, detalle)
+
+    def _vigente(self, cajero_id: int) -> Optional[SesionCajero]:
+        """
+        Obtiene la sesión vigente, expulsándola si venció (debe llamarse
+        con el lock tomado)
+
+        Args:
+            cajero_id: Id del cajero
+
+        Returns:
+            SesionCajero o None
+        """
+        sesion = self._sesiones.get(cajero_id)
+        if sesion is None:
+            return None
+
+        motivo = sesion.motivo_vencimiento(self.ttl_s, self.inactividad_s, time.monotonic())
+        if motivo is None:
+            return sesion
+
+        del self._sesiones[cajero_id]
+        self.expiradas += 1
+        self._auditar(sesion, 'expulsion_automatica', motivo)
+        return None
+
+    def abrir(self, cajero_id: int, tarjeta_id: int,
+              contexto: Optional['ContextoSesion'] = None) -> tuple[bool, str]:
+        """
+        Abre la sesión de una tarjeta en un cajero
+
+        Args:
+            cajero_id: Id del cajero
+            tarjeta_id: Id de la tarjeta insertada
+            contexto: Contexto precargado de la sesión, si existe
+
+        Returns:
+            tuple: (exito, mensaje)
+        """
+        with self._lock:
+            if self._vigente(cajero_id) is not None:
+                return False, "Ya hay una tarjeta insertada"
+
+            sesion = SesionCajero(cajero_id, tarjeta_id, contexto)
+            self._sesiones[cajero_id] = sesion
+            self.abiertas += 1
+            self._auditar(sesion, 'insercion')
+        return True, "Tarjeta insertada correctamente"
+
+    def obtener(self, cajero_id: int) -> Optional[SesionCajero]:
+        """
+        Obtiene la sesión vigente de un cajero
+
+        Args:
+            cajero_id: Id del cajero
+
+        Returns:
+            SesionCajero o None si no hay tarjeta insertada (o su sesión venció)
+        """
+        with self._lock:
+            return self._vigente(cajero_id)
+
+    def tocar(self, cajero_id: int) -> Optional[SesionCajero]:
+        """
+        Registra actividad en la sesión, reiniciando su tiempo de inactividad
+
+        Args:
+            cajero_id: Id del cajero
+
+        Returns:
+            SesionCajero o None si no hay sesión vigente
+        """
+        with self._lock:
+            sesion = self._vigente(cajero_id)
+            if sesion is not None:
+                sesion.ultima_actividad = time.monotonic()
+            return sesion
+
+    def marcar_autenticada(self, cajero_id: int, exito: bool) -> bool:
+        """
+        Registra el resultado de la verificación del PIN de la sesión
+
+        Args:
+            cajero_id: Id del cajero
+            exito: True si el PIN fue correcto
+
+        Returns:
+            bool: False si no hay sesión vigente
+        """
+        with self._lock:
+            sesion = self._vigente(cajero_id)
+            if sesion is None:
+                return False
+            sesion.ultima_actividad = time.monotonic()
+            if exito:
+                sesion.autenticada = True
+            self._auditar(sesion, 'autenticacion' if exito else 'pin_incorrecto')
+            return True
+
+    def cerrar(self, cajero_id: int, motivo: str = 'expulsion') -> Optional[SesionCajero]:
+        """
+        Cierra la sesión de un cajero (expulsa la tarjeta)
+
+        Args:
+            cajero_id: Id del cajero
+            motivo: Evento de auditoría registrado
+
+        Returns:
+            SesionCajero cerrada o None si no había sesión vigente
+        """
+        with self._lock:
+            sesion = self._vigente(cajero_id)
+            if sesion is None:
+                return None
+            del self._sesiones[cajero_id]
+            self.cerradas += 1
+            self._auditar(sesion, motivo)
+            return sesion
+
+    def expirar_vencidas(self) -> int:
+        """
+        Expulsa todas las sesiones vencidas
+
+        Returns:
+            int: Sesiones expulsadas
+        """
+        with self._lock:
+            antes = self.expiradas
+            for cajero_id in list(self._sesiones):
+                self._vigente(cajero_id)
+            return self.expiradas - antes
+
+    def iniciar_barrido(self, intervalo_s: float = INTERVALO_BARRIDO_S) -> None:
+        """
+        Arranca un hilo que expulsa las sesiones vencidas periódicamente
+        (idempotente); sin él, vencen al consultarlas
+
+        Args:
+            intervalo_s: Segundos entre barridos
+        """
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(
+                target=self._barrer, args=(intervalo_s,),
+                name="barrido-sesiones", daemon=True
+            )
+            self._hilo.start()
+
+    def detener_barrido(self) -> None:
+        """
+        Detiene el hilo de barrido
+        """
+        with self._lock:
+            hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            self._detener.set()
+            hilo.join()
+
+    def _barrer(self, intervalo_s: float) -> None:
+        while not self._detener.wait(intervalo_s):
+            self.expirar_vencidas()
+
+    def estadisticas(self) -> dict:
+        """
+        Obtiene los contadores del gestor
+
+        Returns:
+            dict: Sesiones activas, abiertas, cerradas y expiradas
+        """
+        with self._lock:
+            return {
+                'activas': len(self._sesiones),
+                'abiertas': self.abiertas,
+                'cerradas': self.cerradas,
+                'expiradas': self.expiradas,
+            }
@@ -0,0 +1,284 @@
+"""
+Clase PronosticoEfectivo - Pronóstico de consumo de efectivo de los cajeros
+"""
+import time
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from data.database import db
+from modelo.Dinero import Dinero, expresion_centavos
+
+# Filas por lote al leer las operaciones
+TAMANO_LOTE = 200000
+
+# Historial usado para ajustar el modelo
+SEMANAS = 8
+
+# Peso relativo de cada semana respecto de la siguiente más reciente
+DECAIMIENTO = 0.8
+
+# Horas de una semana (perfil estacional día de semana × hora)
+HORAS_SEMANA = 7 * 24
+
+# Horizonte del pronóstico de tiempo hasta vaciarse
+HORIZONTE_HORAS = 14 * 24
+
+_MICROS_HORA = 3600 * 10**6
+
+
+class PronosticoCajero(NamedTuple):
+    """
+    Pronóstico de efectivo de un cajero
+    """
+    cajero_id: int
+    efectivo: Dinero                   # efectivo actual
+    consumo_diario: Dinero             # salida neta esperada por día
+    horas_hasta_vacio: Optional[int]   # None si no se vacía en el horizonte
+    recarga: Dinero                    # monto recomendado (0 si no hace falta)
+
+
+class ResultadoPronostico(NamedTuple):
+    """
+    Resultado de un pronóstico de la red de cajeros
+    """
+    cajeros: List[PronosticoCajero]
+    perfiles: np.ndarray     # (cajeros, 168) salida neta esperada por hora, en centavos
+    operaciones: int
+    segundos: float
+
+    def por_recargar(self) -> List[PronosticoCajero]:
+        """
+        Cajeros con recarga recomendada, del que se vacía antes al último
+
+        Returns:
+            List[PronosticoCajero]: Cajeros a recargar
+        """
+        pendientes = [p for p in self.cajeros if p.recarga]
+        return sorted(pendientes, key=lambda p: (p.horas_hasta_vacio is None,
+                                                 p.horas_hasta_vacio or 0))
+
+
+def hora_de_semana(fechas: np.ndarray) -> np.ndarray:
+    """
+    Posición de cada fecha en la semana (lunes 00h = 0 ... domingo 23h = 167)
+
+    Args:
+        fechas: Arreglo datetime64
+
+    Returns:
+        np.ndarray: Índices int64
+    """
+    horas = fechas.astype('M8[h]').astype(np.int64)
+    # La época (1970-01-01) fue jueves: día 3 con lunes = 0
+    return ((horas // 24 + 3) % 7) * 24 + horas % 24
+
+
+class PronosticoEfectivo:
+    """
+    Ajusta para todos los cajeros a la vez un perfil estacional de salida
+    neta de efectivo (retiros menos depósitos en efectivo) por día de la
+    semana y hora, como promedio ponderado de las últimas semanas (las más
+    recientes pesan más), y a partir de él estima en cuántas horas se vacía
+    cada cajero y cuánto recargar.
+
+    Las operaciones (de la tabla caliente y de las particiones frías) se
+    leen por lotes como arreglos de NumPy y se acumulan con sumas agrupadas
+    por (cajero, hora de la semana) vectorizadas (np.bincount).
+    """
+
+    def __init__(self, semanas: int = SEMANAS, decaimiento: float = DECAIMIENTO,
+                 tamano_lote: int = TAMANO_LOTE):
+        if semanas < 1:
+            raise ValueError("Se necesita al menos una semana de historial")
+        if not 0 < decaimiento <= 1:
+            raise ValueError("El decaimiento debe estar entre 0 (excluido) y 1")
+        if tamano_lote < 1:
+            raise ValueError("El tamaño de lote debe ser al menos 1")
+        self.semanas = semanas
+        self.decaimiento = decaimiento
+        self.tamano_lote = tamano_lote
+
+    def _lotes_operaciones(self, conexion, desde: datetime,
+                           hasta: datetime) -> Iterator[tuple]:
+        """
+        Lee los retiros y depósitos en efectivo exitosos hechos en cajeros,
+        por lotes
+
+        Args:
+            conexion: Conexión abierta
+            desde: Inicio de la ventana
+            hasta: Fin de la ventana (excluido)
+
+        Yields:
+            tuple: (cajero_id, fechas datetime64[us], centavos con signo:
+            positivo si sale efectivo del cajero)
+        """
+        from data.particiones import ParticionesOperaciones
+
+        for tabla in ParticionesOperaciones.get_instance().tablas_para_rango(desde, hasta):
+            c = tabla.c
+            centavos = expresion_centavos(c.monto)
+            consulta = db.select(
+                c.cajero_id,
+                # Como texto ISO: NumPy lo convierte a datetime64 mucho más
+                # rápido que a partir de objetos datetime
+                db.cast(c.fecha, db.String),
+                db.case((c.tipo == 'retiro', centavos), else_=-centavos)
+            ).where(
+                c.exitosa == True,
+                c.cajero_id.is_not(None),
+                c.monto.is_not(None),
+                c.fecha >= desde,
+                c.fecha < hasta,
+                db.or_(
+                    c.tipo == 'retiro',
+                    db.and_(c.tipo == 'deposito', c.tipo_deposito == 'EFECTIVO')
+                )
+            )
+
+            resultado = conexion.execution_options(stream_results=True).execute(consulta)
+            for filas in resultado.partitions(self.tamano_lote):
+                # Aplanar evita inspeccionar cada Row
+                valores = list(chain.from_iterable(filas))
+                yield (np.fromiter(valores[0::3], dtype=np.int64, count=len(filas)),
+                       np.array(valores[1::3], dtype='M8[us]'),
+                       np.fromiter(valores[2::3], dtype=np.int64, count=len(filas)))
+
+    def ajustar(self, conexion, ahora: datetime) -> tuple:
+        """
+        Ajusta el perfil horario de salida neta de cada cajero
+
+        Args:
+            conexion: Conexión abierta
+            ahora: Fin de la ventana de historial
+
+        Returns:
+            tuple: (operaciones leídas, perfiles (max_id + 1, 168) en
+            centavos por hora, indexados por id de cajero)
+        """
+        desde = ahora - timedelta(weeks=self.semanas)
+        fin = np.datetime64(ahora, 'us')
+        micros_semana = HORAS_SEMANA * _MICROS_HORA
+
+        # Peso de la semana k (0 = la más reciente) y su suma, para que las
+        # semanas sin operaciones cuenten como consumo cero
+        pesos = self.decaimiento ** np.arange(self.semanas)
+        total_pesos = pesos.sum()
+
+        sumas = np.zeros(HORAS_SEMANA, dtype=np.float64)
+        operaciones = 0
+
+        for cajeros, fechas, montos in self._lotes_operaciones(conexion, desde, ahora):
+            operaciones += cajeros.size
+            antiguedad = np.minimum((fin - fechas).astype(np.int64) // micros_semana,
+                                    self.semanas - 1)
+            indices = cajeros * HORAS_SEMANA + hora_de_semana(fechas)
+            parcial = np.bincount(indices, weights=montos * pesos[antiguedad])
+            if parcial.size > sumas.size:
+                sumas = np.concatenate([sumas, np.zeros(parcial.size - sumas.size)])
+            sumas[:parcial.size] += parcial
+
+        filas = -(-sumas.size // HORAS_SEMANA)
+        sumas = np.concatenate([sumas, np.zeros(filas * HORAS_SEMANA - sumas.size)])
+        return operaciones, sumas.reshape(filas, HORAS_SEMANA) / total_pesos
+
+    @staticmethod
+    def horas_hasta_vacio(perfiles: np.ndarray, efectivo: np.ndarray, hora_inicial: int,
+                          horizonte: int = HORIZONTE_HORAS) -> np.ndarray:
+        """
+        Proyecta el efectivo de cada cajero hora a hora
+
+        Args:
+            perfiles: (n, 168) salida neta esperada por hora
+            efectivo: (n,) efectivo actual
+            hora_inicial: Hora de la semana en curso
+            horizonte: Horas proyectadas
+
+        Returns:
+            np.ndarray: Horas hasta que el efectivo llega a cero (-1 si no
+            ocurre en el horizonte)
+        """
+        repeticiones = -(-(hora_inicial + horizonte) // HORAS_SEMANA)
+        proyeccion = np.tile(perfiles, repeticiones)[:, hora_inicial:hora_inicial + horizonte]
+        agotado = np.cumsum(proyeccion, axis=1) >= efectivo[:, None]
+        return np.where(agotado.any(axis=1), agotado.argmax(axis=1) + 1, -1)
+
+    def ejecutar(self, ahora: Optional[datetime] = None, dias_cobertura: float = 7,
+                 margen: float = 0.2, multiplo: Dinero = Dinero(1000000),
+                 capacidad: Optional[Dinero] = None) -> ResultadoPronostico:
+        """
+        Pronostica el efectivo de todos los cajeros activos
+
+        La recarga recomendada cubre el consumo previsto de los próximos
+        dias_cobertura días más el margen, descontando el efectivo actual,
+        redondeada hacia arriba al múltiplo y limitada por la capacidad.
+
+        Args:
+            ahora: Instante del pronóstico (por defecto el actual)
+            dias_cobertura: Días que debe durar el efectivo tras recargar
+            margen: Fracción de seguridad sobre el consumo previsto
+            multiplo: Unidad de recarga (p. ej. un fajo de billetes)
+            capacidad: Efectivo máximo del cajero (None = sin límite)
+
+        Returns:
+            ResultadoPronostico: Pronóstico por cajero
+        """
+        from servicio.Cajero import Cajero
+
+        inicio = time.perf_counter()
+        ahora = ahora or datetime.now()
+        tabla = Cajero.__table__
+
+        with db.engine.connect() as conexion, conexion.begin():
+            operaciones, perfiles = self.ajustar(conexion, ahora)
+            filas = conexion.execute(
+                db.select(tabla.c.id, db.func.coalesce(expresion_centavos(tabla.c.monto_cajero), 0))
+                .where(tabla.c.activo == True)
+                .order_by(tabla.c.id)
+            ).all()
+
+        ids = np.fromiter((fila[0] for fila in filas), dtype=np.int64, count=len(filas))
+        efectivo = np.fromiter((fila[1] for fila in filas), dtype=np.int64, count=len(filas))
+        if ids.size and ids.max() >= perfiles.shape[0]:
+            perfiles = np.vstack([perfiles, np.zeros((int(ids.max()) + 1 - perfiles.shape[0], HORAS_SEMANA))])
+        perfiles = perfiles[ids]
+
+        hora_inicial = int(hora_de_semana(np.array([np.datetime64(ahora, 'us')]))[0])
+        horas = self.horas_hasta_vacio(perfiles, efectivo, hora_inicial)
+
+        # Consumo previsto de las próximas horas de cobertura (sin contar
+        # entradas netas: un cajero no se recarga solo)
+        horas_cobertura = int(round(dias_cobertura * 24))
+        repeticiones = -(-(hora_inicial + horas_cobertura) // HORAS_SEMANA)
+        previsto = np.clip(
+            np.tile(perfiles, repeticiones)[:, hora_inicial:hora_inicial + horas_cobertura],
+            0, None
+        ).sum(axis=1) * (1 + margen)
+
+        faltante = np.maximum(np.ceil(previsto) - efectivo, 0)
+        unidad = multiplo.centavos
+        recarga = -(-faltante // unidad) * unidad
+        if capacidad is not None:
+            recarga = np.minimum(recarga, np.maximum(capacidad.centavos - efectivo, 0))
+
+        consumo_diario = perfiles.sum(axis=1) / 7
+        cajeros = [
+            PronosticoCajero(
+                cajero_id=int(ids[i]),
+                efectivo=Dinero(int(efectivo[i])),
+                consumo_diario=Dinero(int(round(consumo_diario[i]))),
+                horas_hasta_vacio=int(horas[i]) if horas[i] >= 0 else None,
+                recarga=Dinero(int(recarga[i]))
+            )
+            for i in range(ids.size)
+        ]
+
+        return ResultadoPronostico(
+            cajeros=cajeros,
+            perfiles=perfiles,
+            operaciones=operaciones,
+            segundos=time.perf_counter() - inicio
+        )
@@ -0,0 +1,189 @@
+"""
+Clase VerificadorPin - Verificación de PIN fuera del hilo llamador
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from modelo.hash_pin import comprobar_pin, hashear_pin
+
+
+class VerificadorPin:
+    """
+    Ejecuta las comprobaciones bcrypt en un pool de procesos para que el
+    hilo del cajero (o el event loop de Qt) no quede bloqueado y para
+    aprovechar todos los núcleos cuando se atienden muchos cajeros.
+
+    El resultado, el bloqueo por intentos y el rehash por cambio de costo
+    se aplican igual que en Tarjeta.verificar_pin, en el hilo que hace la
+    llamada.
+    """
+    _instance = None
+    _lock_instancia = threading.Lock()
+
+    def __init__(self, max_procesos: Optional[int] = None):
+        self.max_procesos = max_procesos or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'VerificadorPin':
+        """
+        Obtiene la instancia compartida del verificador
+
+        Returns:
+            VerificadorPin: Instancia única
+        """
+        with cls._lock_instancia:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """
+        Crea el pool de procesos la primera vez que se necesita
+
+        Returns:
+            ProcessPoolExecutor: Pool de trabajadores bcrypt
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_procesos)
+            return self._pool
+
+    @staticmethod
+    def _validar_estado(tarjeta: 'Tarjeta') -> None:
+        """
+        Aplica la misma validación de estado que Tarjeta.verificar_pin
+
+        Args:
+            tarjeta: Tarjeta a verificar
+        """
+        from modelo.Tarjeta import EstadoTarjeta
+
+        if tarjeta.estado != EstadoTarjeta.ACTIVA:
+            raise ValueError(f"Tarjeta en estado {tarjeta.estado.value}")
+
+    def verificar(self, tarjeta: 'Tarjeta', pin: str) -> bool:
+        """
+        Verifica el PIN en el pool de procesos (API síncrona)
+
+        Args:
+            tarjeta: Tarjeta a verificar
+            pin: PIN ingresado
+
+        Returns:
+            bool: True si el PIN es correcto
+        """
+        self._validar_estado(tarjeta)
+
+        pool = self._get_pool()
+        try:
+            es_correcto = pool.submit(comprobar_pin, pin, tarjeta.pin_hash).result()
+        except Exception as e:
+            raise ValueError(f"Error al verificar PIN: {str(e)}")
+
+        tarjeta.registrar_intento_pin(es_correcto)
+
+        if es_correcto and tarjeta.necesita_rehash():
+            costo = tarjeta.COSTO_BCRYPT_OBJETIVO
+            tarjeta.actualizar_hash_pin(pool.submit(hashear_pin, pin, costo).result(), costo)
+
+        return es_correcto
+
+    async def comprobar_async(self, tarjeta: 'Tarjeta', pin: str) -> bool:
+        """
+        Compara el PIN con el hash de la tarjeta en el pool de procesos, sin
+        registrar el intento (la tarjeta puede estar ya fuera de su sesión)
+
+        Args:
+            tarjeta: Tarjeta con el hash cargado
+            pin: PIN ingresado
+
+        Returns:
+            bool: True si el PIN es correcto
+        """
+        self._validar_estado(tarjeta)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), comprobar_pin, pin, tarjeta.pin_hash
+            )
+        except Exception as e:
+            raise ValueError(f"Error al verificar PIN: {str(e)}")
+
+    async def hashear_async(self, pin: str, costo: int) -> str:
+        """
+        Hashea un PIN en el pool de procesos (para el rehash)
+
+        Args:
+            pin: PIN en texto plano
+            costo: Costo bcrypt
+
+        Returns:
+            str: Hash bcrypt
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_pool(), hashear_pin, pin, costo
+        )
+
+    async def verificar_async(self, tarjeta: 'Tarjeta', pin: str,
+                              sesion: Optional['AsyncSession'] = None) -> bool:
+        """
+        Verifica el PIN en el pool de procesos (API awaitable)
+
+        Args:
+            tarjeta: Tarjeta a verificar
+            pin: PIN ingresado
+            sesion: AsyncSession que cargó la tarjeta; el intento y el
+                rehash se registran con su run_sync para no hacer E/S
+                bloqueante en el event loop
+
+        Returns:
+            bool: True si el PIN es correcto
+        """
+        es_correcto = await self.comprobar_async(tarjeta, pin)
+
+        async def en_sesion(trabajo) -> None:
+            if sesion is None:
+                trabajo()
+            else:
+                await sesion.run_sync(lambda _: trabajo())
+
+        await en_sesion(lambda: tarjeta.registrar_intento_pin(es_correcto))
+
+        if es_correcto and tarjeta.necesita_rehash():
+            costo = tarjeta.COSTO_BCRYPT_OBJETIVO
+            pin_hash = await self.hashear_async(pin, costo)
+            await en_sesion(lambda: tarjeta.actualizar_hash_pin(pin_hash, costo))
+
+        return es_correcto
+
+    def hashear_lote(self, pines: List[str], costo: int) -> List[str]:
+        """
+        Hashea varios PINs en paralelo en el pool de procesos
+
+        Args:
+            pines: PINs en texto plano
+            costo: Costo bcrypt
+
+        Returns:
+            List[str]: Hashes en el mismo orden que los PINs
+        """
+        if not pines:
+            return []
+        trozo = max(1, len(pines) // (self.max_procesos * 4))
+        return list(self._get_pool().map(
+            hashear_pin, pines, [costo] * len(pines), chunksize=trozo
+        ))
+
+    def cerrar(self) -> None:
+        """
+        Detiene el pool de procesos
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
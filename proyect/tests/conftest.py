@@ -0,0 +1,110 @@
+"""
+Fixtures comunes: aplicación sobre un SQLite temporal y datos mínimos
+(banco, cliente, cuenta, tarjeta y cajero)
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data.database import db, init_db  # noqa: E402
+
+PIN = '1234'
+NUMERO_TARJETA = '4000-0000-0000-0001'
+
+
+def _reiniciar_singletons() -> None:
+    """
+    Detiene los servicios en segundo plano y descarta las instancias
+    compartidas para que cada prueba empiece de cero
+    """
+    from data.auditoria import AuditoriaSesiones
+    from data.commit_agrupado import CoordinadorCommit
+    from data.diario import DiarioOperaciones
+    from data.eventos import DespachadorEventos
+    from data.particiones import ParticionesOperaciones
+    from modelo.CacheTarjetas import CacheTarjetas
+    from modelo.RegistroOperaciones import RegistroOperaciones
+    from servicio.Dispensador import Dispensador
+    from servicio.GestorSesiones import GestorSesiones
+    from servicio.VerificadorPin import VerificadorPin
+
+    for servicio in (CoordinadorCommit, AuditoriaSesiones, DespachadorEventos, DiarioOperaciones):
+        servicio.desactivar()
+    if VerificadorPin._instance is not None:
+        VerificadorPin._instance.cerrar()
+    if GestorSesiones._instance is not None:
+        GestorSesiones._instance.detener_barrido()
+    for clase in (VerificadorPin, GestorSesiones, CacheTarjetas, ParticionesOperaciones,
+                  Dispensador, RegistroOperaciones):
+        clase._instance = None
+    Dispensador.get_instance().limpiar_cache()
+
+
+@pytest.fixture
+def app(tmp_path):
+    """
+    Aplicación con las tablas creadas, dentro de su contexto
+    """
+    from modelo.Tarjeta import Tarjeta
+
+    aplicacion = Flask(__name__)
+    aplicacion.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'prueba.db'}"
+    init_db(aplicacion)
+
+    costo = Tarjeta.COSTO_BCRYPT_OBJETIVO
+    Tarjeta.configurar_costo_bcrypt(4)
+    with aplicacion.app_context():
+        try:
+            yield aplicacion
+        finally:
+            _reiniciar_singletons()
+            Tarjeta.configurar_costo_bcrypt(costo)
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def datos(app):
+    """
+    Banco con un cliente, su cuenta ($1000, límite diario $500), una
+    tarjeta y un cajero con $10000
+
+    Returns:
+        dict: banco, cliente, cuenta, tarjeta y cajero
+    """
+    from modelo.Banco import Banco
+    from modelo.Cliente import Cliente
+    from modelo.cuenta import Cuenta
+    from modelo.Tarjeta import Tarjeta
+    from servicio.Cajero import Cajero
+
+    banco = Banco('Banco de Prueba', 'BP01')
+    cliente = Cliente('Ana', 'Pérez', '100')
+    cliente.banco = banco
+    cuenta = Cuenta('000-001', 1000.0, 500.0)
+    cuenta.titular = cliente
+    tarjeta = Tarjeta(NUMERO_TARJETA, PIN, cuenta)
+    cajero = Cajero('ATM-01', 'Sucursal centro', 10000.0)
+    cajero.banco = banco
+    db.session.add_all([banco, cliente, cuenta, tarjeta, cajero])
+    db.session.commit()
+    return {'banco': banco, 'cliente': cliente, 'cuenta': cuenta,
+            'tarjeta': tarjeta, 'cajero': cajero}
+
+
+@pytest.fixture
+def sesion_autenticada(datos):
+    """
+    Cajero con la tarjeta de prueba insertada y el PIN verificado
+
+    Returns:
+        dict: Los mismos datos de la fixture datos
+    """
+    cajero = datos['cajero']
+    assert cajero.iniciar_sesion(NUMERO_TARJETA)[0]
+    assert cajero.verificar_pin(PIN)[0]
+    return datos
@@ -0,0 +1,64 @@
+"""
+Pruebas de la emisión de tarjetas en lote y la reserva de números
+"""
+import pytest
+
+from data.database import db
+from modelo.Banco import Banco
+from modelo.ContadorNumeracion import ContadorNumeracion
+from modelo.cuenta import Cuenta
+from modelo.Tarjeta import Tarjeta
+from tests.conftest import PIN
+
+
+def _cuentas(cliente, cantidad: int, desde: int = 10) -> list:
+    cuentas = []
+    for i in range(desde, desde + cantidad):
+        cuenta = Cuenta(f"100-{i:03d}", 500.0)
+        cuenta.titular = cliente
+        cuentas.append(cuenta)
+    db.session.add_all(cuentas)
+    return cuentas
+
+
+def _identificador(numero: str) -> int:
+    return int(numero.replace('-', '')[len(Banco.BIN_TARJETA):-1])
+
+
+def test_lotes_reciben_bloques_consecutivos_y_disjuntos(datos):
+    banco, cliente = datos['banco'], datos['cliente']
+    # Un número emitido antes del contador cae dentro del primer bloque
+    heredada = banco._completar_luhn(f"{Banco.BIN_TARJETA}{1:09d}")
+    cuenta = _cuentas(cliente, 1, desde=1)[0]
+    db.session.add(Tarjeta(banco._formatear_numero_tarjeta(heredada), PIN, cuenta))
+    db.session.commit()
+
+    primeras = banco.emitir_tarjetas_lote(_cuentas(cliente, 3))
+    segundas = banco.emitir_tarjetas_lote(_cuentas(cliente, 2, desde=20))
+    db.session.commit()
+
+    assert [_identificador(t.numero_tarjeta) for t in primeras] == [0, 2, 3]
+    assert [_identificador(t.numero_tarjeta) for t in segundas] == [4, 5]
+    assert db.session.get(ContadorNumeracion, f"tarjetas-{Banco.BIN_TARJETA}").siguiente == 6
+
+
+def test_rollback_libera_el_bloque(app):
+    assert ContadorNumeracion.reservar('prueba', 10, 100) == 0
+    db.session.rollback()
+    assert ContadorNumeracion.reservar('prueba', 10, 100) == 0
+    assert ContadorNumeracion.reservar('prueba', 5, 100) == 10
+
+
+def test_numeracion_agotada(app):
+    ContadorNumeracion.reservar('prueba', 3, 4)
+    with pytest.raises(ValueError):
+        ContadorNumeracion.reservar('prueba', 2, 4)
+
+
+def test_insert_sin_returning_conserva_el_orden(datos, monkeypatch):
+    monkeypatch.setattr(db.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order', False)
+    cuentas = _cuentas(datos['cliente'], 3)
+
+    tarjetas = datos['banco'].emitir_tarjetas_lote(cuentas)
+    assert [t.cuenta_id for t in tarjetas] == [c.id for c in cuentas]
+    assert len({t.numero_tarjeta for t in tarjetas}) == 3
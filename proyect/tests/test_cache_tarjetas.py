@@ -0,0 +1,102 @@
+"""
+Pruebas del caché de búsquedas de tarjeta por número
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from data.database import db
+from modelo.CacheTarjetas import CacheTarjetas, EntradaTarjeta
+from modelo.Tarjeta import EstadoTarjeta, Tarjeta
+from tests.conftest import NUMERO_TARJETA, PIN
+
+
+@contextmanager
+def _contar_consultas():
+    sentencias = []
+
+    def registrar(conexion, cursor, sql, parametros, contexto, multiples):
+        sentencias.append(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+
+def _entrada(id_tarjeta: int, cuenta_id: int, cuenta_activa: bool = True) -> EntradaTarjeta:
+    return EntradaTarjeta(id_tarjeta, cuenta_id, cuenta_activa, EstadoTarjeta.ACTIVA, 'hash', 4, 0, 3)
+
+
+def test_acierto_no_consulta_la_bd(datos):
+    cache = CacheTarjetas.get_instance()
+    tarjeta = Tarjeta.buscar_por_numero(NUMERO_TARJETA)
+    assert cache.consultar(NUMERO_TARJETA).estado == EstadoTarjeta.ACTIVA
+
+    with _contar_consultas() as sentencias:
+        assert Tarjeta.buscar_por_numero(NUMERO_TARJETA) is tarjeta
+        assert tarjeta.puede_usarse() == (True, "")
+        # Tras el commit la tarjeta expirada se completa desde el caché
+        db.session.commit()
+        assert Tarjeta.buscar_por_numero(NUMERO_TARJETA) is tarjeta
+        assert tarjeta.estado == EstadoTarjeta.ACTIVA
+    assert [sql for sql in sentencias if sql.startswith('SELECT')] == []
+    assert (cache.aciertos, cache.fallos) == (2, 1)
+
+
+def test_acierto_en_otra_sesion(datos):
+    Tarjeta.buscar_por_numero(NUMERO_TARJETA)
+    db.session.remove()
+
+    with _contar_consultas() as sentencias:
+        tarjeta = Tarjeta.buscar_por_numero(NUMERO_TARJETA)
+        assert tarjeta in db.session and not db.session.dirty
+        assert tarjeta.puede_usarse() == (True, "")
+        assert tarjeta.verificar_pin(PIN)
+    assert [sql for sql in sentencias if sql.startswith('SELECT')] == []
+
+    # Los cambios de la tarjeta reconstruida se guardan y la invalidan
+    tarjeta.invalidar()
+    db.session.commit()
+    assert CacheTarjetas.get_instance().consultar(NUMERO_TARJETA) is None
+    db.session.remove()
+    assert Tarjeta.buscar_por_numero(NUMERO_TARJETA).estado == EstadoTarjeta.BLOQUEADA
+
+
+def test_desactivar_la_cuenta_invalida_sus_tarjetas(datos):
+    cuenta = datos['cuenta']
+    tarjeta = Tarjeta.buscar_por_numero(NUMERO_TARJETA)
+    assert CacheTarjetas.get_instance().consultar(NUMERO_TARJETA).cuenta_activa
+
+    cuenta.activa = False
+    assert CacheTarjetas.get_instance().consultar(NUMERO_TARJETA) is None
+    db.session.commit()
+
+    assert tarjeta.puede_usarse() == (False, "Cuenta asociada inactiva.")
+    Tarjeta.buscar_por_numero(NUMERO_TARJETA)
+    assert not CacheTarjetas.get_instance().consultar(NUMERO_TARJETA).cuenta_activa
+
+
+def test_commit_descarta_el_estado_guardado_por_otra_sesion(datos):
+    cuenta = datos['cuenta']
+    cache = CacheTarjetas.get_instance()
+    cuenta.activa = False
+    # Otra sesión lee el estado anterior antes del commit
+    cache.guardar(NUMERO_TARJETA, _entrada(datos['tarjeta'].id, cuenta.id))
+
+    db.session.commit()
+    assert cache.consultar(NUMERO_TARJETA) is None
+
+
+def test_expulsion_lru_actualiza_el_indice_por_cuenta():
+    cache = CacheTarjetas(capacidad=2)
+    cache.guardar('1', _entrada(1, 10))
+    cache.guardar('2', _entrada(2, 10))
+    cache.guardar('3', _entrada(3, 20))
+    assert cache.consultar('1') is None
+
+    cache.invalidar_cuenta(10)
+    assert cache.consultar('2') is None
+    assert cache.consultar('3') is not None
+    assert cache.estadisticas()['invalidaciones'] == 1
@@ -0,0 +1,76 @@
+"""
+Pruebas de la fachada asíncrona del cajero
+"""
+import asyncio
+
+from data.commit_agrupado import CoordinadorCommit
+from data.database import db
+from modelo.cuenta import Cuenta
+from modelo.Dinero import Dinero
+from modelo.Tarjeta import Tarjeta
+from servicio.CajeroAsync import CajeroAsync
+from servicio.VerificadorPin import VerificadorPin
+from tests.conftest import NUMERO_TARJETA, PIN
+
+
+def _ejecutar(app, pasos):
+    async def principal():
+        cajeros = CajeroAsync(app)
+        try:
+            return await pasos(cajeros)
+        finally:
+            await cajeros.cerrar()
+    return asyncio.run(principal())
+
+
+def test_sesion_completa_en_la_sesion_asincrona(app, datos):
+    cajero_id = datos['cajero'].id
+    # El commit agrupado solo atiende a db.session: la fachada confirma sola
+    CoordinadorCommit.activar(app)
+
+    async def pasos(cajeros):
+        assert await cajeros.insertar_tarjeta(cajero_id, NUMERO_TARJETA) == (True, "Tarjeta insertada correctamente")
+        assert (await cajeros.verificar_pin(cajero_id, PIN))[0]
+        assert (await cajeros.procesar_retiro(cajero_id, 100))[0]
+        assert (await cajeros.procesar_deposito(cajero_id, 30))[0]
+        return await cajeros.consultar_saldo(cajero_id), cajeros.estadisticas()
+
+    (exito, saldo, _), estadisticas = _ejecutar(app, pasos)
+    assert exito and saldo == Dinero.desde(930)
+    assert estadisticas['errores'] == 0
+
+    # db.session no participó: lo escrito está en la BD
+    assert not db.session.new and not db.session.dirty
+    assert db.session.get(Cuenta, datos['cuenta'].id, populate_existing=True).saldo == Dinero.desde(930)
+
+
+def test_intento_fallido_se_persiste(app, datos):
+    cajero_id = datos['cajero'].id
+
+    async def pasos(cajeros):
+        await cajeros.insertar_tarjeta(cajero_id, NUMERO_TARJETA)
+        return (await cajeros.verificar_pin(cajero_id, '0000'),
+                await cajeros.procesar_retiro(cajero_id, 100))
+
+    assert _ejecutar(app, pasos) == ((False, "PIN incorrecto"), (False, "PIN no verificado"))
+    tarjeta = db.session.get(Tarjeta, datos['tarjeta'].id, populate_existing=True)
+    assert tarjeta.intentos_fallidos == 1
+
+
+def test_bcrypt_no_ocupa_el_semaforo(app, datos, monkeypatch):
+    cajero_id = datos['cajero'].id
+    comprobar = VerificadorPin.comprobar_async
+    ocupado = []
+
+    async def pasos(cajeros):
+        async def comprobar_registrando(verificador, tarjeta, pin):
+            ocupado.append(cajeros._semaforo.locked())
+            return await comprobar(verificador, tarjeta, pin)
+
+        monkeypatch.setattr(VerificadorPin, 'comprobar_async', comprobar_registrando)
+        await cajeros.insertar_tarjeta(cajero_id, NUMERO_TARJETA)
+        return await cajeros.verificar_pin(cajero_id, PIN)
+
+    assert _ejecutar(app, pasos) == (True, "PIN correcto")
+    # En SQLite el semáforo admite una sola operación a la vez
+    assert ocupado == [False]
@@ -0,0 +1,30 @@
+"""
+Prueba corta del generador de carga concurrente sobre cajeros
+"""
+import pytest
+
+from benchmarks import carga_cajeros
+from data.database import db
+
+
+def test_carga_breve_mantiene_los_invariantes(app):
+    uri = db.engine.url.render_as_string(hide_password=False)
+    cajero_ids = carga_cajeros.sembrar(cuentas=20, cajeros=2, costo_bcrypt=4)
+    mezcla = carga_cajeros.leer_mezcla(carga_cajeros.MEZCLA)
+
+    metricas = carga_cajeros.ejecutar_carga(uri, cajero_ids, sesiones=5, cuentas=20,
+                                            mezcla=mezcla, semilla=1)
+
+    assert len(metricas['latencias']['sesion']) == 10
+    assert metricas['resultados']['pin']['ok'] > 0
+    assert not metricas['errores']
+    db.session.expire_all()
+    assert set(carga_cajeros.verificar_invariantes(metricas).values()) == {0}
+
+
+def test_leer_mezcla():
+    assert carga_cajeros.leer_mezcla("retiro=2, consulta=1") == {'retiro': 2.0, 'consulta': 1.0}
+    with pytest.raises(ValueError, match="desconocida"):
+        carga_cajeros.leer_mezcla("transferencia=1")
+    with pytest.raises(ValueError):
+        carga_cajeros.leer_mezcla("retiro=0")
@@ -0,0 +1,61 @@
+"""
+Pruebas del commit agrupado de operaciones
+"""
+import pytest
+
+from data.commit_agrupado import CoordinadorCommit
+from data.database import db
+from modelo.cuenta import Cuenta
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito
+
+
+def _deposito(cuenta_id: int, monto: int):
+    def unidad():
+        deposito = Deposito(db.session.get(Cuenta, cuenta_id), Dinero.desde(monto), 'CHEQUE')
+        db.session.add(deposito)
+        deposito.aplicar()
+        return deposito.resultado()
+    return unidad
+
+
+def test_unidades_de_la_ventana_se_confirman_juntas(app, datos):
+    coordinador = CoordinadorCommit.activar(app, ventana_ms=500)
+    cuenta_id = datos['cuenta'].id
+
+    def fallida():
+        raise ValueError("Unidad inválida")
+
+    futuros = [coordinador.enviar(_deposito(cuenta_id, 10)) for _ in range(4)]
+    futuro_fallido = coordinador.enviar(fallida)
+
+    assert all(futuro.result(5).exitosa for futuro in futuros)
+    with pytest.raises(ValueError):
+        futuro_fallido.result(5)
+    estadisticas = coordinador.estadisticas()
+    assert (estadisticas['lotes'], estadisticas['unidades']) == (1, 5)
+
+    db.session.refresh(datos['cuenta'])
+    assert datos['cuenta'].saldo == Dinero.desde(1040)
+
+
+def test_cajero_opera_a_traves_del_coordinador(app, sesion_autenticada):
+    cajero, tarjeta, cuenta = (sesion_autenticada[clave] for clave in ('cajero', 'tarjeta', 'cuenta'))
+    coordinador = CoordinadorCommit.activar(app)
+
+    assert cajero.procesar_retiro(tarjeta, 100) == (True, "Retiro exitoso de $100.00")
+    assert cajero.procesar_deposito(tarjeta, 20)[0]
+    assert coordinador.estadisticas()['unidades'] == 2
+
+    db.session.refresh(cuenta)
+    assert cuenta.saldo == Dinero.desde(920)
+    assert cuenta.get_total_retiros_hoy() == Dinero.desde(100)
+
+
+def test_desactivar_vuelve_al_commit_por_operacion(app, sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    CoordinadorCommit.activar(app)
+    CoordinadorCommit.desactivar()
+
+    assert CoordinadorCommit.get_instance() is None
+    assert cajero.procesar_deposito(tarjeta, 20)[0]
@@ -0,0 +1,48 @@
+"""
+Pruebas de la conciliación vectorizada de saldos
+"""
+from data.database import db
+from modelo.Dinero import Dinero
+from servicio.Conciliacion import Conciliacion
+
+
+def test_historial_conciliado(sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    assert cajero.procesar_retiro(tarjeta, 200)[0]
+    assert cajero.procesar_deposito(tarjeta, 50)[0]
+
+    resultado = Conciliacion().ejecutar()
+    assert resultado.conciliado
+    assert resultado.operaciones == 2
+
+
+def test_discrepancia_de_saldo(sesion_autenticada):
+    cuenta = sesion_autenticada['cuenta']
+    cuenta.saldo = Dinero(123)
+    db.session.commit()
+
+    discrepancias = Conciliacion().ejecutar().discrepancias
+    assert [(d.entidad, d.id, d.diferencia) for d in discrepancias] == [
+        ('cuenta', cuenta.id, Dinero(123 - 100000))
+    ]
+
+
+def test_operacion_confirmada_durante_la_lectura(sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    # WAL: el depósito confirma mientras la conciliación lee (el modo no
+    # cambia con una transacción abierta)
+    db.session.commit()
+    db.session.execute(db.text('PRAGMA journal_mode=WAL'))
+    db.session.commit()
+
+    class DepositoIntermedio(Conciliacion):
+        def _lotes_operaciones(self, conexion):
+            yield from super()._lotes_operaciones(conexion)
+            # Entre leer las operaciones y leer los saldos
+            assert cajero.procesar_deposito(tarjeta, 70)[0]
+
+    assert cajero.procesar_retiro(tarjeta, 100)[0]
+    resultado = DepositoIntermedio().ejecutar()
+    assert resultado.conciliado
+    assert resultado.operaciones == 1
+    assert Conciliacion().ejecutar().operaciones == 2
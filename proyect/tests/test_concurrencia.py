@@ -0,0 +1,73 @@
+"""
+Pruebas de los reintentos ante conflictos de concurrencia
+"""
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from data.commit_agrupado import CoordinadorCommit
+from data.concurrencia import ejecutar_con_reintentos
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito
+from modelo.RegistroOperaciones import RegistroOperaciones
+
+
+def _error_postgres(codigo: str) -> OperationalError:
+    class ErrorDriver(Exception):
+        pgcode = codigo
+    return OperationalError('UPDATE cuentas ...', {}, ErrorDriver(codigo))
+
+
+def _falla_una_vez(funcion, error):
+    llamadas = []
+
+    def envoltura(*args, **kwargs):
+        llamadas.append(1)
+        if len(llamadas) == 1:
+            raise error
+        return funcion(*args, **kwargs)
+    return envoltura, llamadas
+
+
+def test_savepoint_reintenta_solo_locks_no_disponibles(app):
+    trabajo, llamadas = _falla_una_vez(lambda: 'ok', _error_postgres('55P03'))
+    assert ejecutar_con_reintentos(trabajo) == 'ok'
+    assert len(llamadas) == 2
+
+    trabajo, llamadas = _falla_una_vez(lambda: 'ok', _error_postgres('40001'))
+    with pytest.raises(OperationalError):
+        ejecutar_con_reintentos(trabajo)
+    assert len(llamadas) == 1
+
+
+def test_operacion_repite_la_transaccion_completa(sesion_autenticada, monkeypatch):
+    cajero, tarjeta, cuenta = (sesion_autenticada[clave] for clave in ('cajero', 'tarjeta', 'cuenta'))
+    registrar, llamadas = _falla_una_vez(
+        RegistroOperaciones.registrar, _error_postgres('40P01')
+    )
+    monkeypatch.setattr(RegistroOperaciones, 'registrar', registrar)
+
+    # El deadlock llega después de acreditar la cuenta en la transacción
+    assert cajero.procesar_deposito(tarjeta, 50)[0]
+    assert len(llamadas) == 2
+    db.session.refresh(cuenta)
+    assert cuenta.saldo == Dinero.desde(1050)
+    assert db.session.execute(db.select(db.func.count(Deposito.id))).scalar() == 1
+
+
+def test_coordinador_repite_la_unidad_en_conflicto(app, datos):
+    coordinador = CoordinadorCommit.activar(app)
+    cuenta_id = datos['cuenta'].id
+
+    def depositar():
+        from modelo.cuenta import Cuenta
+        deposito = Deposito(db.session.get(Cuenta, cuenta_id), Dinero.desde(20), 'CHEQUE')
+        db.session.add(deposito)
+        deposito.aplicar()
+        return deposito.resultado()
+
+    unidad, llamadas = _falla_una_vez(depositar, _error_postgres('40001'))
+    assert coordinador.ejecutar(unidad).exitosa
+    assert len(llamadas) == 2
+    db.session.refresh(datos['cuenta'])
+    assert datos['cuenta'].saldo == Dinero.desde(1020)
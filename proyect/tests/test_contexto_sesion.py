@@ -0,0 +1,73 @@
+"""
+Pruebas del contexto de sesión cargado en una sola consulta
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from data.database import db
+from modelo.ContextoSesion import ContextoSesion
+from modelo.Dinero import Dinero
+from tests.conftest import NUMERO_TARJETA
+
+
+def test_carga_en_una_consulta(datos):
+    sentencias = []
+
+    def registrar(conexion, cursor, sql, parametros, contexto, multiples):
+        sentencias.append(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        contexto = ContextoSesion.cargar(NUMERO_TARJETA)
+        assert contexto.tarjeta is datos['tarjeta']
+        assert (contexto.cuenta, contexto.titular, contexto.banco) == \
+            (datos['cuenta'], datos['cliente'], datos['banco'])
+        assert contexto.limite_diario == Dinero.desde(500)
+        assert contexto.get_total_retirado_hoy() == Dinero(0)
+        assert contexto.tarjeta.puede_usarse() == (True, "")
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    assert len(sentencias) == 1
+
+    assert ContextoSesion.cargar('0000-0000-0000-0000') is None
+
+
+def test_retiros_acumulan_en_el_contexto(sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    assert cajero.procesar_retiro(tarjeta, 150)[0]
+    assert cajero.procesar_retiro(tarjeta, 100)[0]
+
+    contexto = cajero.contexto_sesion
+    assert contexto.get_total_retirado_hoy() == Dinero.desde(250)
+    exito, mensaje = cajero.procesar_retiro(tarjeta, 300)
+    assert (exito, mensaje) == (False, "Saldo insuficiente o límite diario excedido")
+
+    # Al cruzar la medianoche el total del día se reinicia
+    contexto.fecha = date.today() - timedelta(days=1)
+    assert contexto.get_total_retirado_hoy() == Dinero(0)
+
+
+def test_limites_del_retiro_salen_del_contexto(sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    assert cajero.procesar_retiro(tarjeta, 100)[0]
+    sentencias = []
+
+    def registrar(conexion, cursor, sql, parametros, contexto, multiples):
+        sentencias.append(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        assert cajero.procesar_retiro(tarjeta, 100)[0]
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+    # El commit anterior expiró el banco: no se vuelve a leer
+    assert not any('FROM bancos' in sql for sql in sentencias)
+
+    contexto = cajero.contexto_sesion
+    contexto.limite_global = Dinero.desde(250)
+    assert not cajero.procesar_retiro(tarjeta, 100)[0]
+    contexto.limite_global = Dinero.desde(5000)
+    contexto.limite_diario = Dinero.desde(5000)
+    # El saldo ($800) lo valida el UPDATE condicional
+    assert cajero.procesar_retiro(tarjeta, 900) == (False, "Saldo insuficiente.")
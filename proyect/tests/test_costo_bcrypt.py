@@ -0,0 +1,45 @@
+"""
+Pruebas del costo bcrypt configurable y el rehash al iniciar sesión
+"""
+import pytest
+
+from data.database import db
+from modelo.hash_pin import costo_de_hash, validar_costo
+from modelo.Tarjeta import Tarjeta
+from tests.conftest import PIN
+
+
+def test_costo_fuera_de_rango():
+    with pytest.raises(ValueError):
+        validar_costo(3)
+    with pytest.raises(ValueError):
+        validar_costo(32)
+
+
+def test_pin_nuevo_usa_el_costo_objetivo(datos):
+    tarjeta = datos['tarjeta']
+    assert tarjeta.get_costo_pin() == 4
+    assert costo_de_hash(tarjeta.pin_hash) == 4
+    assert not tarjeta.necesita_rehash()
+
+
+def test_rehash_tras_verificacion_exitosa(datos):
+    tarjeta = datos['tarjeta']
+    Tarjeta.configurar_costo_bcrypt(5)
+    assert tarjeta.necesita_rehash()
+
+    assert tarjeta.verificar_pin(PIN)
+    db.session.commit()
+
+    assert tarjeta.get_costo_pin() == 5
+    assert costo_de_hash(tarjeta.pin_hash) == 5
+    assert tarjeta.verificar_pin(PIN)
+
+
+def test_pin_incorrecto_no_rehashea(datos):
+    tarjeta = datos['tarjeta']
+    hash_anterior = tarjeta.pin_hash
+    Tarjeta.configurar_costo_bcrypt(5)
+
+    assert not tarjeta.verificar_pin('9999')
+    assert tarjeta.pin_hash == hash_anterior
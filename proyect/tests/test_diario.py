@@ -0,0 +1,90 @@
+"""
+Pruebas del diario binario de operaciones
+"""
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from data.database import db
+from data.diario import (
+    CLASE_MARCA_COMMIT, CLASE_PENDIENTE, DTYPE_REGISTRO, DiarioOperaciones,
+    confirmar_en_duda, leer_diario, netos_por_cuenta, registros_confirmados,
+    registros_en_duda,
+)
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito
+
+
+@pytest.fixture
+def ruta_diario(tmp_path):
+    return str(tmp_path / 'diario.bin')
+
+
+def test_registros_se_escriben_antes_del_commit(sesion_autenticada, ruta_diario, monkeypatch):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    diario = DiarioOperaciones.activar(ruta_diario)
+    assert diario.sincronizar
+
+    # Caída justo después del commit en la BD: la marca no llega a escribirse
+    monkeypatch.setattr(diario, 'marcar', lambda transaccion, confirmada: None)
+    assert cajero.procesar_retiro(tarjeta, 100)[0]
+
+    registros = leer_diario(ruta_diario)
+    assert list(registros['clase']) == [CLASE_PENDIENTE]
+    assert len(registros_confirmados(registros)) == 0
+    en_duda = registros_en_duda(registros)
+    assert len(en_duda) == 1
+
+    confirmados = confirmar_en_duda(registros)
+    assert list(confirmados['centavos']) == [10000]
+
+
+def test_commit_agrega_marca_y_cuenta_en_los_netos(sesion_autenticada, ruta_diario):
+    cajero, tarjeta, cuenta = (sesion_autenticada[clave] for clave in ('cajero', 'tarjeta', 'cuenta'))
+    DiarioOperaciones.activar(ruta_diario)
+
+    assert cajero.procesar_retiro(tarjeta, 100)[0]
+    assert cajero.procesar_deposito(tarjeta, 30)[0]
+
+    registros = leer_diario(ruta_diario)
+    assert (registros['clase'] == CLASE_MARCA_COMMIT).sum() == 2
+    assert len(registros_en_duda(registros)) == 0
+    assert netos_por_cuenta(registros) == {cuenta.id: Dinero(-7000)}
+
+
+def test_commit_fallido_marca_descarte(sesion_autenticada, ruta_diario):
+    cuenta = sesion_autenticada['cuenta']
+    DiarioOperaciones.activar(ruta_diario)
+
+    deposito = Deposito(cuenta, Dinero(500), 'EFECTIVO')
+    deposito.marcar_exitosa()
+    db.session.add(deposito)
+    db.session.flush()
+
+    def fallar(conexion):
+        raise RuntimeError("fallo del commit")
+    event.listen(db.engine, 'commit', fallar)
+    try:
+        with pytest.raises(RuntimeError):
+            db.session.commit()
+    finally:
+        event.remove(db.engine, 'commit', fallar)
+    db.session.rollback()
+
+    registros = leer_diario(ruta_diario)
+    assert len(registros_confirmados(registros)) == 0
+    assert len(registros_en_duda(registros)) == 0
+    assert len(registros) == 2
+
+
+def test_numeracion_continua_al_reabrir(ruta_diario):
+    diario = DiarioOperaciones(ruta_diario)
+    registros = np.zeros(2, dtype=DTYPE_REGISTRO)
+    assert diario.escribir(registros) == 1
+    diario.marcar(1, confirmada=True)
+    diario.cerrar()
+
+    diario = DiarioOperaciones(ruta_diario)
+    assert diario.escribir(np.zeros(1, dtype=DTYPE_REGISTRO)) == 2
+    diario.cerrar()
+    assert len(registros_confirmados(leer_diario(ruta_diario))) == 2
@@ -0,0 +1,72 @@
+"""
+Pruebas del tipo Dinero (enteros de centavos)
+"""
+from decimal import Decimal
+
+import pytest
+
+from data.database import db
+from modelo.Dinero import Dinero
+
+
+@pytest.mark.parametrize('valor, esperado', [
+    (1.005, 101),
+    (0.285, 29),
+    (10.075, 1008),
+    (2.675, 268),
+    (-1.005, -101),
+    (0.1 + 0.2, 30),
+    (123.45, 12345),
+    (7, 700),
+])
+def test_desde_redondea_mitades_hacia_arriba(valor, esperado):
+    assert Dinero.desde(valor).centavos == esperado
+
+
+@pytest.mark.parametrize('valor', [1.005, 0.285, 10.075, 99999.995, 0.015])
+def test_float_y_texto_redondean_igual(valor):
+    assert Dinero.desde(valor) == Dinero.desde(repr(valor))
+    assert Dinero.desde(valor) == Dinero.desde(Decimal(repr(valor)))
+
+
+def test_igualdad_solo_entre_dinero():
+    assert Dinero(100) == Dinero.desde('1.00')
+    assert Dinero(100) != 1
+    assert Dinero(100) != Decimal('1.00')
+    assert Dinero(100) != None  # noqa: E711
+    assert not (Dinero(0) == None)  # noqa: E711
+
+
+def test_hash_coherente_con_igualdad():
+    montos = {Dinero(100): 'uno'}
+    assert montos[Dinero.desde(1)] == 'uno'
+    assert 1 not in montos
+    assert len({Dinero(5), Dinero.desde('0.05'), Dinero.desde(0.05)}) == 1
+
+
+def test_orden_solo_entre_dinero():
+    assert Dinero(150) > Dinero.desde(1)
+    assert Dinero(150) <= Dinero.desde(Decimal('1.50'))
+    # Como la igualdad, el orden no acepta números
+    assert Dinero(0) != 0
+    for otro in (0, 1.5, Decimal('1.50'), None):
+        with pytest.raises(TypeError):
+            Dinero(0) <= otro
+        with pytest.raises(TypeError):
+            Dinero(0) > otro
+
+
+def test_aritmetica_y_formato():
+    total = Dinero.desde('10.10') + 0.2 - Dinero(5)
+    assert total == Dinero(1025)
+    assert Dinero(250) * 3 == Dinero(750)
+    assert str(Dinero(-5)) == '-0.05'
+    assert f"{Dinero(123456):,.2f}" == '1,234.56'
+
+
+def test_columna_tipo_dinero(datos):
+    cuenta = datos['cuenta']
+    cuenta.saldo = 12.345
+    db.session.commit()
+    db.session.expire_all()
+    assert cuenta.saldo == Dinero(1235)
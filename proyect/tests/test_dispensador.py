@@ -0,0 +1,85 @@
+"""
+Pruebas del Dispensador y de los retiros con casetes
+"""
+import random
+from types import SimpleNamespace
+
+from data.database import db
+from modelo.Dinero import Dinero
+from servicio.Dispensador import Dispensador, _candidatos, _elegir, _resolver
+
+
+def _costo(inventario, plan):
+    return (round(sum((1 - (cantidad - x) / capacidad) ** 2
+                      for (_, cantidad, capacidad), x in zip(inventario, plan)), 9),
+            sum(plan))
+
+
+def test_elegir_coincide_con_la_busqueda_completa():
+    azar = random.Random(7)
+    for _ in range(300):
+        denominaciones = sorted(azar.sample([10000, 5000, 2000, 1000], azar.randint(1, 4)),
+                                reverse=True)
+        inventario = tuple((d, azar.randint(0, 60), 60) for d in denominaciones)
+        monto = azar.choice([1000, 2000, 5000, 12000, 30000, 60000, 100000])
+
+        plan = _elegir(_candidatos(monto, tuple(denominaciones), 40), inventario)
+        esperado = _resolver(monto, inventario, 40)
+        if esperado is None:
+            assert plan is None
+        else:
+            assert _costo(inventario, plan) == _costo(inventario, esperado)
+
+
+def test_demasiadas_combinaciones_usan_la_busqueda():
+    denominaciones = (500, 200, 100, 50, 20, 10)
+    assert _candidatos(5000, denominaciones, 40) is None
+
+    casetes = [SimpleNamespace(id=i, denominacion=Dinero(d), cantidad=50, capacidad=50)
+               for i, d in enumerate(denominaciones)]
+    plan = Dispensador().planificar(Dinero(5000), casetes)
+    assert sum(casete.denominacion.centavos * billetes for casete, billetes in plan) == 5000
+
+
+def test_cajero_sin_casetes_no_carga_la_relacion(sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    assert not cajero.tiene_casetes
+
+    assert cajero.procesar_retiro(tarjeta, 100)[0]
+    assert 'casetes' not in cajero.__dict__
+
+
+def test_retiro_descuenta_billetes_y_reutiliza_combinaciones(sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    cincuenta = cajero.agregar_casete(50, 100)
+    veinte = cajero.agregar_casete(20, 100)
+    assert cajero.cargar_casete(cincuenta, 10)[0]
+    assert cajero.cargar_casete(veinte, 10)[0]
+    db.session.commit()
+    assert cajero.tiene_casetes
+
+    Dispensador.get_instance().limpiar_cache()
+    for _ in range(3):
+        exito, mensaje = cajero.procesar_retiro(tarjeta, 90)
+        assert exito, mensaje
+
+    db.session.refresh(cincuenta)
+    db.session.refresh(veinte)
+    restante = cincuenta.get_total() + veinte.get_total()
+    assert restante == Dinero.desde(700 - 270)
+    # Las existencias cambian con cada retiro, pero las combinaciones del
+    # monto se calculan una sola vez
+    assert Dispensador.get_instance().estadisticas()['fallos'] == 1
+
+
+def test_monto_sin_combinacion_de_billetes(sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    casete = cajero.agregar_casete(50, 100)
+    cajero.cargar_casete(casete, 4)
+    db.session.commit()
+
+    exito, mensaje = cajero.procesar_retiro(tarjeta, 70)
+    assert not exito
+    assert "billetes" in mensaje
+    exito, _ = cajero.procesar_retiro(tarjeta, 250)
+    assert not exito
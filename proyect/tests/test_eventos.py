@@ -0,0 +1,144 @@
+"""
+Pruebas de la bandeja de salida y el despacho de eventos
+"""
+from sqlalchemy import MetaData
+from sqlalchemy.schema import CreateTable
+
+from data.database import db
+from data.eventos import DespachadorEventos, DestinoCola
+from data.migraciones import aplicar_migraciones
+from modelo.Dinero import Dinero
+from modelo.EventoOperacion import EventoOperacion
+from modelo.OffsetConsumidor import OffsetConsumidor
+from modelo.Operacion import Deposito
+from modelo.RegistroOperaciones import CLAVE_OUTBOX, RegistroOperaciones
+
+
+def _depositos(datos, cantidad: int) -> list:
+    ids = []
+    for _ in range(cantidad):
+        deposito = Deposito(datos['cuenta'], Dinero.desde(10), 'EFECTIVO', datos['cajero'])
+        db.session.add(deposito)
+        assert deposito.ejecutar()
+        ids.append(deposito.id)
+    return ids
+
+
+def _retener(id_evento: int) -> dict:
+    """
+    Quita de la tabla un evento ya registrado, como si su transacción aún
+    no hubiera confirmado
+
+    Returns:
+        dict: Columnas del evento, para confirmarlo después
+    """
+    tabla = EventoOperacion.__table__
+    fila = db.session.execute(db.select(tabla).where(tabla.c.id == id_evento)).mappings().one()
+    db.session.execute(db.delete(tabla).where(tabla.c.id == id_evento))
+    db.session.commit()
+    return dict(fila)
+
+
+def _confirmar(fila: dict) -> None:
+    db.session.execute(db.insert(EventoOperacion.__table__).values(fila))
+    db.session.commit()
+
+
+def _eventos(destino: DestinoCola) -> list:
+    eventos = []
+    while not destino.cola.empty():
+        eventos.append(destino.cola.get())
+    return eventos
+
+
+def test_registrar_publica_segun_la_configuracion(app, datos):
+    _depositos(datos, 1)
+    RegistroOperaciones.get_instance().activar_outbox()
+    assert app.config[CLAVE_OUTBOX]
+
+    # Otra instancia del registro (p. ej. en otro proceso con la misma
+    # configuración) también publica
+    RegistroOperaciones._instance = None
+    operaciones = _depositos(datos, 2)
+
+    destino = DestinoCola()
+    assert DespachadorEventos(app, [destino]).despachar() == 2
+    assert [evento['operacion_id'] for evento in _eventos(destino)] == operaciones
+
+    RegistroOperaciones.get_instance().desactivar_outbox()
+    _depositos(datos, 1)
+    assert db.session.execute(db.select(db.func.count(EventoOperacion.id))).scalar() == 0
+
+
+def test_eventos_nuevos_tras_depurar_la_bandeja(app, datos):
+    RegistroOperaciones.get_instance().activar_outbox()
+    destino = DestinoCola()
+    despachador = DespachadorEventos(app, [destino])
+
+    _depositos(datos, 2)
+    assert despachador.despachar() == 2
+    assert db.session.execute(db.select(db.func.count(EventoOperacion.id))).scalar() == 0
+
+    # La bandeja quedó vacía: los ids no se reutilizan
+    _depositos(datos, 2)
+    assert despachador.despachar() == 2
+    assert [evento['id'] for evento in _eventos(destino)] == [1, 2, 3, 4]
+    assert OffsetConsumidor.obtener_con_huecos('cola') == (4, [])
+
+
+def test_commit_tardio_con_id_menor_se_entrega(app, datos):
+    RegistroOperaciones.get_instance().activar_outbox()
+    destino = DestinoCola()
+    despachador = DespachadorEventos(app, [destino])
+
+    _depositos(datos, 3)
+    tardio = _retener(2)
+    assert despachador.despachar() == 2
+    assert OffsetConsumidor.obtener_con_huecos('cola') == (3, [2])
+    # La depuración no pasa del hueco pendiente
+    assert db.session.get(EventoOperacion, 3) is not None
+
+    _confirmar(tardio)
+    assert despachador.despachar() == 1
+    assert [evento['id'] for evento in _eventos(destino)] == [1, 3, 2]
+    assert OffsetConsumidor.obtener_con_huecos('cola') == (3, [])
+    assert db.session.execute(db.select(db.func.count(EventoOperacion.id))).scalar() == 0
+
+
+def test_hueco_vencido_se_descarta(app, datos):
+    RegistroOperaciones.get_instance().activar_outbox()
+    despachador = DespachadorEventos(app, [DestinoCola()], espera_huecos_s=0)
+
+    _depositos(datos, 3)
+    _retener(2)
+    assert despachador.despachar() == 2
+    assert OffsetConsumidor.obtener_con_huecos('cola') == (3, [])
+
+
+def test_destino_nuevo_no_espera_eventos_depurados(app, datos):
+    RegistroOperaciones.get_instance().activar_outbox()
+    _depositos(datos, 2)
+    assert DespachadorEventos(app, [DestinoCola()]).despachar() == 2
+
+    _depositos(datos, 2)
+    nuevo = DestinoCola(nombre='nuevo')
+    assert DespachadorEventos(app, [nuevo]).despachar() == 2
+    assert OffsetConsumidor.obtener_con_huecos('nuevo') == (4, [])
+
+
+def test_migracion_activa_autoincrement_sobre_los_offsets(app, datos):
+    tabla = EventoOperacion.__table__
+    anterior = tabla.to_metadata(MetaData())
+    anterior.dialect_kwargs['sqlite_autoincrement'] = False
+    with db.engine.begin() as conexion:
+        tabla.drop(conexion)
+        conexion.execute(CreateTable(anterior))
+    OffsetConsumidor.avanzar('cola', 7)
+    db.session.commit()
+
+    assert "Tabla outbox_operaciones reconstruida con AUTOINCREMENT" in aplicar_migraciones()
+    assert aplicar_migraciones() == []
+
+    RegistroOperaciones.get_instance().activar_outbox()
+    _depositos(datos, 1)
+    assert db.session.execute(db.select(EventoOperacion.id)).scalars().all() == [8]
@@ -0,0 +1,73 @@
+"""
+Pruebas de la generación de extractos por lotes
+"""
+import csv
+import io
+from datetime import date, datetime
+
+import pytest
+
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito, Retiro
+from servicio.Extractos import GeneradorExtractos, generar_cierre_mensual
+
+
+def _historial(datos) -> None:
+    movimientos = [
+        (Deposito, 100, datetime(2025, 2, 20)),
+        (Deposito, 40, datetime(2025, 3, 2)),
+        (Retiro, 25, datetime(2025, 3, 15)),
+        (Deposito, 10, datetime(2025, 3, 31, 23, 59)),
+        (Retiro, 5, datetime(2025, 4, 1)),
+    ]
+    for tipo, monto, fecha in movimientos:
+        operacion = tipo(datos['cuenta'], Dinero.desde(monto))
+        operacion.fecha = fecha
+        db.session.add(operacion)
+        assert operacion.ejecutar()
+
+
+def test_extracto_csv_con_saldo_corrido(datos):
+    _historial(datos)
+    salida = io.StringIO(newline='')
+    resumen = GeneradorExtractos(tamano_lote=2).escribir_csv(
+        datos['cuenta'], date(2025, 3, 1), date(2025, 3, 31), salida)
+
+    filas = list(csv.reader(io.StringIO(salida.getvalue())))
+    assert filas[1] == ['2025-03-01', 'saldo_inicial', '', '', '', '1100.00']
+    assert [fila[-1] for fila in filas[2:-1]] == ['1140.00', '1115.00', '1125.00']
+    assert filas[-1] == ['2025-03-31', 'saldo_final', '', '25.00', '50.00', '1125.00']
+    assert resumen.movimientos == 3
+    assert (resumen.saldo_inicial, resumen.saldo_final) == (Dinero.desde(1100), Dinero.desde(1125))
+
+
+def test_varios_formatos_en_una_pasada(datos, tmp_path):
+    _historial(datos)
+    directorio = tmp_path / 'extractos'
+    resumen = GeneradorExtractos().generar_archivos(
+        datos['cuenta'], date(2025, 3, 1), date(2025, 3, 31), str(directorio))
+
+    archivos = sorted(ruta.name for ruta in directorio.iterdir())
+    assert [nombre.rsplit('.', 1)[1] for nombre in archivos] == ['csv', 'txt']
+    texto = (directorio / archivos[1]).read_text(encoding='utf-8')
+    assert 'Movimientos: 3' in texto and 'Saldo final: $1125.00' in texto
+    assert resumen.total_creditos == Dinero.desde(50)
+
+
+def test_cierre_mensual(datos, tmp_path):
+    _historial(datos)
+    resumenes = generar_cierre_mensual(2025, 3, str(tmp_path), procesos=1)
+
+    assert [r.cuenta_id for r in resumenes] == [datos['cuenta'].id]
+    assert len(list((tmp_path / '2025' / '03').iterdir())) == 2
+
+
+def test_parametros_invalidos(datos):
+    with pytest.raises(ValueError):
+        GeneradorExtractos(tamano_lote=0)
+    with pytest.raises(ValueError, match="no soportado"):
+        GeneradorExtractos().generar(datos['cuenta'], date(2025, 3, 1), date(2025, 3, 31),
+                                     {'pdf': io.StringIO()})
+    with pytest.raises(ValueError):
+        GeneradorExtractos().generar(datos['cuenta'], date(2025, 3, 2), date(2025, 3, 1), {})
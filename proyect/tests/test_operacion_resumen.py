@@ -0,0 +1,42 @@
+"""
+Pruebas de las lecturas livianas de historial (OperacionResumen)
+"""
+from data.database import db
+from modelo.OperacionResumen import OperacionResumen
+from modelo.RegistroOperaciones import RegistroOperaciones
+
+
+def _operaciones(sesion_autenticada) -> int:
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+    cuenta_id = sesion_autenticada['cuenta'].id
+    assert cajero.procesar_deposito(tarjeta, 50)[0]
+    assert cajero.procesar_retiro(tarjeta, 30)[0]
+    assert cajero.consultar_saldo(tarjeta)[0]
+    db.session.expunge_all()
+    return cuenta_id
+
+
+def test_proyeccion_sin_columnas_de_subclases(sesion_autenticada):
+    registro = RegistroOperaciones.get_instance()
+    consulta = registro.consulta_por_cuenta(_operaciones(sesion_autenticada))
+
+    sql = str(registro.proyectar(consulta).statement)
+    assert 'tipo_deposito' not in sql and 'saldo_consultado' not in sql
+
+    resumenes = registro.obtener_resumenes(consulta)
+    assert all(isinstance(r, OperacionResumen) for r in resumenes)
+    assert [r.tipo for r in resumenes] == ['consulta_saldo', 'retiro', 'deposito']
+    # Las filas proyectadas no pasan por el mapa de identidades
+    assert len(db.session.identity_map) == 0
+    assert [r.id for r in resumenes] == [op.id for op in consulta.all()]
+
+
+def test_iteradores_de_resumenes(sesion_autenticada):
+    registro = RegistroOperaciones.get_instance()
+    consulta = registro.consulta_por_cuenta(_operaciones(sesion_autenticada))
+
+    descendente = [r.id for r in registro.iterar_resumenes(consulta, tamano_pagina=2)]
+    cronologico = [r.id for r in registro.iterar_resumenes_cronologico(consulta, tamano_lote=2)]
+    assert len(descendente) == 3
+    assert cronologico == descendente[::-1]
+    assert len(db.session.identity_map) == 0
@@ -0,0 +1,61 @@
+"""
+Pruebas de la paginación por clave del historial de operaciones
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito, Retiro
+from modelo.RegistroOperaciones import RegistroOperaciones, decodificar_cursor
+
+
+def _historial(cuenta) -> list:
+    base = datetime(2026, 1, 10, 12, 0)
+    operaciones = []
+    for i in range(7):
+        tipo = Retiro if i % 3 == 0 else Deposito
+        operacion = tipo(cuenta, Dinero.desde(10 + i))
+        # Pares de operaciones con la misma fecha: el id desempata
+        operacion.fecha = base + timedelta(minutes=i // 2)
+        operacion.exitosa = i != 4
+        operaciones.append(operacion)
+    db.session.add_all(operaciones)
+    db.session.commit()
+    return sorted(operaciones, key=lambda op: (op.fecha, op.id), reverse=True)
+
+
+def test_paginas_sin_repetir_ni_saltar(datos):
+    registro = RegistroOperaciones.get_instance()
+    esperadas = [op.id for op in _historial(datos['cuenta'])]
+    consulta = registro.consulta_por_cuenta(datos['cuenta'].id)
+
+    pagina, cursor = registro.obtener_pagina(consulta, 3)
+    assert [op.id for op in pagina] == esperadas[:3]
+    assert decodificar_cursor(cursor)[1] == esperadas[2]
+
+    # Se continúa desde el cursor (p. ej. en otra petición)
+    resto = [op.id for op in registro.iterar(consulta, 3, cursor)]
+    assert resto == esperadas[3:]
+    assert [op.id for op in registro.iterar_por_cuenta(datos['cuenta'], 2)] == esperadas
+
+
+def test_iteradores_filtrados(datos):
+    registro = RegistroOperaciones.get_instance()
+    historial = _historial(datos['cuenta'])
+
+    assert [op.id for op in registro.iterar_por_tipo(datos['cuenta'], 'retiro', 2)] == \
+        [op.id for op in historial if op.tipo == 'retiro']
+    assert [op.id for op in registro.iterar_fallidas(datos['cuenta'], 2)] == \
+        [op.id for op in historial if not op.exitosa]
+    assert len(list(registro.iterar_exitosas(datos['cuenta'], 2))) == 6
+
+
+def test_parametros_invalidos(datos):
+    registro = RegistroOperaciones.get_instance()
+    consulta = registro.consulta_por_cuenta(datos['cuenta'].id)
+    with pytest.raises(ValueError):
+        registro.obtener_pagina(consulta, 0)
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        registro.obtener_pagina(consulta, 5, 'no-es-un-cursor')
@@ -0,0 +1,106 @@
+"""
+Pruebas de la partición en caliente/frío de operaciones
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from data.database import db
+from data.particiones import ParticionesOperaciones
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito, Operacion
+from modelo.ParticionOperaciones import ParticionOperaciones
+
+
+def _depositos_antiguos(cuenta, cantidad: int) -> None:
+    fecha = datetime.now() - timedelta(days=200)
+    for _ in range(cantidad):
+        deposito = Deposito(cuenta, Dinero(100), 'EFECTIVO')
+        deposito.fecha = fecha
+        db.session.add(deposito)
+    db.session.commit()
+
+
+def _ids_frios(particiones: ParticionesOperaciones) -> set:
+    return {
+        id_operacion
+        for tabla in particiones.tablas_frias()
+        for id_operacion in db.session.execute(db.select(tabla.c.id)).scalars()
+    }
+
+
+def test_otro_proceso_ve_tablas_nuevas(datos):
+    lector = ParticionesOperaciones()
+    vencido = ParticionesOperaciones(vigencia_catalogo_s=0)
+    assert lector.tablas_frias() == vencido.tablas_frias() == []
+
+    _depositos_antiguos(datos['cuenta'], 3)
+    movidas = ParticionesOperaciones.get_instance().mover_a_frio()
+    assert sum(movidas.values()) == 3
+
+    # El catálogo en memoria sigue vigente hasta que vence o se invalida
+    assert lector.tablas_frias() == []
+    assert [tabla.name for tabla in vencido.tablas_frias()] == list(movidas)
+    lector.invalidar_catalogo()
+    assert [tabla.name for tabla in lector.tablas_frias()] == list(movidas)
+    assert db.session.execute(db.select(ParticionOperaciones.nombre)).scalars().all() == list(movidas)
+
+
+def test_ids_no_se_reutilizan_al_vaciar_la_tabla_caliente(datos):
+    particiones = ParticionesOperaciones.get_instance()
+    _depositos_antiguos(datos['cuenta'], 3)
+    particiones.mover_a_frio()
+    assert db.session.execute(db.select(db.func.count(Operacion.id))).scalar() == 0
+
+    nueva = Deposito(datos['cuenta'], Dinero(100), 'EFECTIVO')
+    db.session.add(nueva)
+    db.session.commit()
+    assert nueva.id > max(_ids_frios(particiones))
+
+
+def test_sin_autoincrement_se_conserva_el_id_mas_alto(datos, monkeypatch):
+    particiones = ParticionesOperaciones.get_instance()
+    monkeypatch.setattr(ParticionesOperaciones, '_reutiliza_ids', staticmethod(lambda caliente: True))
+    _depositos_antiguos(datos['cuenta'], 3)
+
+    assert sum(particiones.mover_a_frio().values()) == 2
+    restante = db.session.execute(db.select(Operacion.id)).scalars().all()
+    assert restante == [max(_ids_frios(particiones)) + 1]
+
+
+def test_eliminar_tabla_vacia_la_quita_del_catalogo(datos):
+    particiones = ParticionesOperaciones.get_instance()
+    _depositos_antiguos(datos['cuenta'], 1)
+    particiones.mover_a_frio()
+    tabla = particiones.tablas_frias()[0]
+    db.session.execute(db.delete(tabla))
+    db.session.commit()
+
+    assert particiones.eliminar_si_vencida(tabla, datetime.now())
+    assert particiones.tablas_frias() == []
+    assert db.session.execute(db.select(ParticionOperaciones.nombre)).first() is None
+
+
+def test_lecturas_no_consultan_el_catalogo(datos):
+    particiones = ParticionesOperaciones.get_instance()
+    _depositos_antiguos(datos['cuenta'], 2)
+    particiones.mover_a_frio()
+    hasta = datetime.now()
+    esperadas = particiones.tablas_para_rango(None, hasta)
+
+    sentencias = []
+    escuchar = lambda conn, cursor, sql, *args: sentencias.append(sql)
+    event.listen(db.engine, 'before_cursor_execute', escuchar)
+    try:
+        for _ in range(5):
+            assert particiones.tablas_para_rango(None, hasta) == esperadas
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', escuchar)
+    assert sentencias == []
+
+    # Eliminar una tabla invalida el catálogo
+    tabla = particiones.tablas_frias()[0]
+    db.session.execute(db.delete(tabla))
+    db.session.commit()
+    assert particiones.eliminar_si_vencida(tabla, datetime.now())
+    assert tabla not in particiones.tablas_para_rango(None, hasta)
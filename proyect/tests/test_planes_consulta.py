@@ -0,0 +1,28 @@
+"""
+Pruebas de los índices de operaciones y la verificación de planes
+"""
+from data.database import db
+from data.migraciones import aplicar_migraciones
+from data.planes_consulta import es_escaneo_completo, explicar, verificar_planes_registro
+from modelo.Operacion import Operacion
+
+
+def test_consultas_del_registro_usan_indices(datos):
+    planes = verificar_planes_registro(datos['cuenta'].id, datos['cajero'].id)
+    assert planes
+    assert not any(es_escaneo_completo(plan) for plan in planes.values())
+
+
+def test_detecta_recorrido_completo(app):
+    plan = explicar(db.select(Operacion.id).where(Operacion.descripcion == 'x'))
+    assert es_escaneo_completo(plan)
+    assert not es_escaneo_completo(['SEARCH operaciones USING INDEX ix_operaciones_fecha (fecha>?)'])
+    assert es_escaneo_completo(['SCAN operaciones_2024_01'])
+
+
+def test_migracion_crea_indices_faltantes(app):
+    with db.engine.begin() as conexion:
+        conexion.exec_driver_sql('DROP INDEX ix_operaciones_cuenta_fecha')
+
+    assert 'Índice ix_operaciones_cuenta_fecha creado en operaciones' in aplicar_migraciones()
+    assert aplicar_migraciones() == []
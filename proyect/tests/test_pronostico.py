@@ -0,0 +1,79 @@
+"""
+Pruebas del pronóstico de efectivo de los cajeros
+"""
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito, Retiro
+from servicio.Pronostico import PronosticoEfectivo, hora_de_semana
+
+# Lunes a medianoche: hora 0 de la semana
+AHORA = datetime(2026, 1, 12)
+
+
+def _historial(datos) -> None:
+    """
+    Un retiro de $6000 cada lunes a las 10h en las dos últimas semanas,
+    más operaciones que el pronóstico no cuenta
+    """
+    cuenta, cajero = datos['cuenta'], datos['cajero']
+    operaciones = []
+    for fecha in (datetime(2025, 12, 29, 10), datetime(2026, 1, 5, 10, 30)):
+        retiro = Retiro(cuenta, Dinero.desde(6000), cajero)
+        retiro.fecha, retiro.exitosa = fecha, True
+        operaciones.append(retiro)
+
+    cheque = Deposito(cuenta, Dinero.desde(5000), 'CHEQUE', cajero)
+    fallido = Retiro(cuenta, Dinero.desde(5000), cajero)
+    antiguo = Retiro(cuenta, Dinero.desde(5000), cajero)
+    cheque.fecha, cheque.exitosa = datetime(2026, 1, 6, 9), True
+    fallido.fecha, fallido.exitosa = datetime(2026, 1, 6, 9), False
+    antiguo.fecha, antiguo.exitosa = datetime(2025, 12, 1, 9), True
+    db.session.add_all(operaciones + [cheque, fallido, antiguo])
+    db.session.commit()
+
+
+def test_hora_de_semana():
+    fechas = np.array(['2026-01-05T00:00', '2026-01-07T13:30', '2026-01-11T23:59'], dtype='M8[us]')
+    assert hora_de_semana(fechas).tolist() == [0, 2 * 24 + 13, 167]
+
+
+def test_horas_hasta_vacio():
+    perfiles = np.zeros((2, 168))
+    perfiles[0, 10] = perfiles[1, 5] = 100
+    horas = PronosticoEfectivo.horas_hasta_vacio(perfiles, np.array([150, 500]), hora_inicial=0)
+    assert horas.tolist() == [168 + 11, -1]
+
+
+def test_pronostico_y_recarga(datos):
+    _historial(datos)
+    pronostico = PronosticoEfectivo(semanas=2, decaimiento=0.5)
+
+    resultado = pronostico.ejecutar(AHORA, dias_cobertura=7)
+    assert resultado.operaciones == 2
+    cajero = resultado.cajeros[0]
+    assert cajero.efectivo == Dinero.desde(10000)
+    assert resultado.perfiles[0, 10] == Dinero.desde(6000).centavos
+    assert cajero.horas_hasta_vacio == 168 + 11
+    assert cajero.consumo_diario == Dinero(round(Dinero.desde(6000).centavos / 7))
+    assert cajero.recarga == Dinero(0)
+    assert resultado.por_recargar() == []
+
+    # 14 días: $12000 × 1.2 = $14400, faltan $4400 -> un fajo de $10000
+    resultado = pronostico.ejecutar(AHORA, dias_cobertura=14)
+    assert resultado.cajeros[0].recarga == Dinero.desde(10000)
+    resultado = pronostico.ejecutar(AHORA, dias_cobertura=14, capacidad=Dinero.desde(12000))
+    assert [p.recarga for p in resultado.por_recargar()] == [Dinero.desde(2000)]
+
+
+def test_parametros_invalidos():
+    with pytest.raises(ValueError):
+        PronosticoEfectivo(semanas=0)
+    with pytest.raises(ValueError):
+        PronosticoEfectivo(decaimiento=0)
+    with pytest.raises(ValueError):
+        PronosticoEfectivo(tamano_lote=0)
@@ -0,0 +1,61 @@
+"""
+Pruebas de los puntos de control de saldo y el saldo histórico
+"""
+from datetime import date, datetime
+
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito, Retiro
+from modelo.PuntoControlSaldo import PuntoControlSaldo
+from modelo.RegistroOperaciones import RegistroOperaciones
+
+INICIO_FEBRERO = datetime(2025, 2, 1)
+
+
+def _historial(datos) -> None:
+    movimientos = [
+        (Deposito, 100, datetime(2025, 1, 5)),
+        (Retiro, 50, datetime(2025, 1, 25)),
+        (Deposito, 30, datetime(2025, 2, 3)),
+        (Deposito, 20, datetime(2025, 2, 10)),
+    ]
+    for tipo, monto, fecha in movimientos:
+        operacion = tipo(datos['cuenta'], Dinero.desde(monto))
+        operacion.fecha = fecha
+        db.session.add(operacion)
+        assert operacion.ejecutar()
+
+
+def _saldos(cuenta) -> list:
+    registro = RegistroOperaciones.get_instance()
+    return [
+        registro.obtener_saldo_a_fecha(cuenta, fecha)
+        for fecha in (datetime(2025, 1, 1), date(2025, 1, 10), INICIO_FEBRERO,
+                      datetime(2025, 2, 5), date(2025, 3, 1))
+    ]
+
+
+def test_saldo_a_fecha_con_y_sin_puntos_de_control(datos):
+    _historial(datos)
+    cuenta = datos['cuenta']
+    esperados = [Dinero.desde(x) for x in (1000, 1100, 1050, 1080, 1100)]
+    assert _saldos(cuenta) == esperados
+
+    assert PuntoControlSaldo.generar(INICIO_FEBRERO) == 1
+    assert PuntoControlSaldo.generar(INICIO_FEBRERO) == 0
+    punto = db.session.execute(db.select(PuntoControlSaldo)).scalar_one()
+    assert punto.saldo == Dinero.desde(1050)
+
+    assert PuntoControlSaldo.generar(datetime(2025, 2, 7)) == 1
+    assert _saldos(cuenta) == esperados
+
+
+def test_depurar_conserva_los_cierres_de_mes(datos):
+    _historial(datos)
+    for corte in (INICIO_FEBRERO, datetime(2025, 2, 4), datetime(2025, 2, 8)):
+        PuntoControlSaldo.generar(corte)
+
+    assert PuntoControlSaldo.depurar() == 2
+    assert db.session.execute(db.select(PuntoControlSaldo.fecha)).scalars().all() == [INICIO_FEBRERO]
+    assert RegistroOperaciones.get_instance().obtener_saldo_a_fecha(
+        datos['cuenta'], datetime(2025, 2, 5)) == Dinero.desde(1080)
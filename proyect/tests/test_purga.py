@@ -0,0 +1,97 @@
+"""
+Pruebas de la purga por lotes con archivo comprimido
+"""
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from data import purga
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.Operacion import Deposito, Operacion
+from servicio.Conciliacion import Conciliacion
+
+LIMITE = datetime(2025, 3, 1)
+
+
+def _depositos(datos, fechas) -> None:
+    for fecha in fechas:
+        deposito = Deposito(datos['cuenta'], Dinero.desde(10), 'EFECTIVO', datos['cajero'])
+        deposito.fecha = fecha
+        db.session.add(deposito)
+        assert deposito.ejecutar()
+
+
+def _archivadas(directorio: Path) -> list:
+    ids = []
+    for ruta in sorted(directorio.rglob('*.jsonl.gz')):
+        with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+            ids += [json.loads(linea)['id'] for linea in archivo]
+    return sorted(ids)
+
+
+def test_archiva_por_mes_y_mantiene_la_conciliacion(datos, tmp_path):
+    _depositos(datos, [datetime(2025, 1, 5), datetime(2025, 1, 20), datetime(2025, 2, 3),
+                       datetime(2025, 2, 10), datetime(2025, 2, 28), datetime(2025, 4, 1)])
+    antiguas = db.session.execute(
+        db.select(Operacion.id).where(Operacion.fecha < LIMITE)
+    ).scalars().all()
+
+    assert purga.purgar_operaciones(LIMITE, str(tmp_path), tamano_lote=2) == 5
+    assert _archivadas(tmp_path) == sorted(antiguas)
+    assert {ruta.parent.name for ruta in tmp_path.rglob('*.jsonl.gz')} == {'01', '02'}
+    assert not (tmp_path / purga.ARCHIVO_CONTROL).exists()
+
+    assert db.session.execute(db.select(db.func.count(Operacion.id))).scalar() == 1
+    assert Conciliacion().ejecutar().conciliado
+
+
+def test_reanuda_una_purga_interrumpida(datos, tmp_path, monkeypatch):
+    _depositos(datos, [datetime(2025, 1, d) for d in range(1, 6)])
+    archivar = purga._archivar_lote
+    llamadas = []
+
+    def falla_en_el_segundo_lote(*args):
+        llamadas.append(1)
+        if len(llamadas) == 2:
+            raise OSError("Disco lleno")
+        archivar(*args)
+
+    monkeypatch.setattr(purga, '_archivar_lote', falla_en_el_segundo_lote)
+    with pytest.raises(OSError):
+        purga.purgar_operaciones(LIMITE, str(tmp_path), tamano_lote=2)
+    assert (tmp_path / purga.ARCHIVO_CONTROL).exists()
+
+    monkeypatch.setattr(purga, '_archivar_lote', archivar)
+    assert purga.reanudar_purga(str(tmp_path), tamano_lote=2) == 3
+    assert len(_archivadas(tmp_path)) == 5
+    assert purga.reanudar_purga(str(tmp_path)) == 0
+
+
+def test_reanudar_con_otro_tamano_de_lote_no_duplica(datos, tmp_path, monkeypatch):
+    _depositos(datos, [datetime(2025, 1, d) for d in range(1, 6)])
+    archivar = purga._archivar_lote
+    llamadas = []
+
+    def falla_tras_archivar_el_segundo_lote(*args):
+        archivar(*args)
+        llamadas.append(1)
+        if len(llamadas) == 2:
+            raise OSError("Conexión perdida")
+
+    monkeypatch.setattr(purga, '_archivar_lote', falla_tras_archivar_el_segundo_lote)
+    with pytest.raises(OSError):
+        purga.purgar_operaciones(LIMITE, str(tmp_path), tamano_lote=2)
+
+    monkeypatch.setattr(purga, '_archivar_lote', archivar)
+    assert purga.reanudar_purga(str(tmp_path), tamano_lote=3) == 3
+    archivadas = _archivadas(tmp_path)
+    assert len(archivadas) == len(set(archivadas)) == 5
+
+
+def test_tamano_de_lote_invalido(app, tmp_path):
+    with pytest.raises(ValueError):
+        purga.purgar_operaciones(LIMITE, str(tmp_path), tamano_lote=0)
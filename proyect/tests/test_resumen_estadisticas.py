@@ -0,0 +1,45 @@
+"""
+Pruebas del resumen incremental de estadísticas por cuenta
+"""
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.EstadisticaCuenta import EstadisticaCuenta
+from modelo.RegistroOperaciones import CLAVE_RESUMEN, RegistroOperaciones
+
+
+def test_configuracion_se_lee_al_registrar(app, sesion_autenticada):
+    cajero, tarjeta, cuenta = (sesion_autenticada[clave] for clave in ('cajero', 'tarjeta', 'cuenta'))
+    registro = RegistroOperaciones.get_instance()
+    assert not registro.usar_resumen
+
+    assert cajero.procesar_deposito(tarjeta, 100)[0]
+    assert db.session.get(EstadisticaCuenta, cuenta.id) is None
+
+    # El singleton ya existía: toma la configuración sin reactivarse
+    app.config[CLAVE_RESUMEN] = True
+    assert cajero.procesar_retiro(tarjeta, 40)[0]
+    resumen = db.session.get(EstadisticaCuenta, cuenta.id)
+    assert (resumen.total_operaciones, resumen.total_retirado, resumen.total_depositado) == \
+        (2, Dinero.desde(40), Dinero.desde(100))
+
+    assert cajero.procesar_deposito(tarjeta, 10)[0]
+    db.session.refresh(resumen)
+    assert resumen.total_operaciones == 3
+    assert registro.obtener_estadisticas_cuenta(cuenta)['total_operaciones'] == 3
+
+
+def test_activar_descarta_resumenes_y_configura_la_app(app, sesion_autenticada):
+    cajero, tarjeta, cuenta = (sesion_autenticada[clave] for clave in ('cajero', 'tarjeta', 'cuenta'))
+    app.config[CLAVE_RESUMEN] = True
+    assert cajero.procesar_deposito(tarjeta, 100)[0]
+
+    RegistroOperaciones.get_instance().desactivar_resumen()
+    assert app.config[CLAVE_RESUMEN] is False
+    assert cajero.procesar_deposito(tarjeta, 100)[0]
+
+    # El resumen quedó desactualizado: activar lo descarta
+    RegistroOperaciones.get_instance().activar_resumen()
+    assert app.config[CLAVE_RESUMEN] is True
+    assert db.session.get(EstadisticaCuenta, cuenta.id) is None
+    assert cajero.procesar_deposito(tarjeta, 100)[0]
+    assert db.session.get(EstadisticaCuenta, cuenta.id).total_operaciones == 3
@@ -0,0 +1,45 @@
+"""
+Pruebas del contador diario de retiros por cuenta
+"""
+from datetime import date, datetime, timedelta
+
+from data.database import db
+from modelo.Dinero import Dinero
+from modelo.Operacion import Retiro
+
+
+def test_retirar_acumula_el_contador_y_respeta_el_limite(datos):
+    cuenta = datos['cuenta']
+    assert cuenta.retirar(Dinero.desde(300)) == (True, None)
+    assert cuenta.retirar(Dinero.desde(150)) == (True, None)
+    db.session.commit()
+
+    assert cuenta.get_total_retiros_hoy() == Dinero.desde(450)
+    exito, mensaje = cuenta.retirar(Dinero.desde(100))
+    assert not exito and mensaje.startswith("Límite diario")
+    assert cuenta.saldo == Dinero.desde(550)
+
+
+def test_contador_se_reinicia_al_cambiar_el_dia(datos):
+    cuenta = datos['cuenta']
+    cuenta.total_retiros_diarios = Dinero.desde(500)
+    cuenta.ultima_fecha_retiro = date.today() - timedelta(days=1)
+    db.session.commit()
+
+    assert cuenta.get_total_retiros_hoy() == Dinero(0)
+    assert cuenta.retirar(Dinero.desde(200)) == (True, None)
+    db.session.commit()
+    assert (cuenta.total_retiros_diarios, cuenta.ultima_fecha_retiro) == (Dinero.desde(200), date.today())
+
+
+def test_fechas_pasadas_se_suman_del_historial(datos):
+    banco, cuenta = datos['banco'], datos['cuenta']
+    ayer = datetime.now() - timedelta(days=1)
+    retiro = Retiro(cuenta, Dinero.desde(120))
+    retiro.fecha, retiro.exitosa = ayer, True
+    db.session.add(retiro)
+    assert cuenta.retirar(Dinero.desde(80)) == (True, None)
+    db.session.commit()
+
+    assert banco.get_total_retirado_hoy(cuenta, date.today()) == Dinero.desde(80)
+    assert banco.get_total_retirado_hoy(cuenta, ayer.date()) == Dinero.desde(120)
@@ -0,0 +1,54 @@
+"""
+Pruebas de la sesión en memoria del cajero y su autenticación
+"""
+from data.database import db
+from modelo.cuenta import Cuenta
+from modelo.Dinero import Dinero
+from modelo.Tarjeta import Tarjeta
+from tests.conftest import NUMERO_TARJETA, PIN
+
+
+def test_operaciones_requieren_tarjeta_insertada(datos):
+    cajero, tarjeta = datos['cajero'], datos['tarjeta']
+
+    assert cajero.procesar_retiro(tarjeta, 100) == (False, "No hay tarjeta insertada")
+    assert cajero.procesar_deposito(tarjeta, 100) == (False, "No hay tarjeta insertada")
+    assert cajero.consultar_saldo(tarjeta) == (False, Dinero(0), "No hay tarjeta insertada")
+
+
+def test_operaciones_requieren_pin_verificado(datos):
+    cajero, tarjeta, cuenta = datos['cajero'], datos['tarjeta'], datos['cuenta']
+    assert cajero.iniciar_sesion(NUMERO_TARJETA)[0]
+
+    assert cajero.procesar_retiro(tarjeta, 100) == (False, "PIN no verificado")
+    assert cajero.procesar_deposito(tarjeta, 100) == (False, "PIN no verificado")
+    assert cajero.consultar_saldo(tarjeta)[2] == "PIN no verificado"
+    assert not cajero.verificar_pin('0000')[0]
+    assert cajero.procesar_retiro(tarjeta, 100)[1] == "PIN no verificado"
+
+    db.session.refresh(cuenta)
+    assert cuenta.saldo == Dinero(100000)
+
+
+def test_tarjeta_ajena_a_la_sesion(sesion_autenticada):
+    cajero = sesion_autenticada['cajero']
+    cuenta = Cuenta('000-002', 1000.0)
+    cuenta.titular = sesion_autenticada['cliente']
+    otra = Tarjeta('4000-0000-0000-0002', PIN, cuenta)
+    db.session.add_all([cuenta, otra])
+    db.session.commit()
+
+    exito, mensaje = cajero.procesar_retiro(otra, 100)
+    assert not exito
+    assert mensaje == "La tarjeta no corresponde a la sesión"
+
+
+def test_sesion_autenticada_opera_hasta_expulsar(sesion_autenticada):
+    cajero, tarjeta = sesion_autenticada['cajero'], sesion_autenticada['tarjeta']
+
+    assert cajero.procesar_retiro(tarjeta, 100)[0]
+    assert cajero.consultar_saldo(tarjeta)[1] == Dinero(90000)
+
+    cajero.expulsar_tarjeta()
+    assert not cajero.sesion_autenticada()
+    assert cajero.procesar_deposito(tarjeta, 100) == (False, "No hay tarjeta insertada")
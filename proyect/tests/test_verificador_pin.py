@@ -0,0 +1,58 @@
+"""
+Pruebas de la verificación de PIN en el pool de procesos
+"""
+import asyncio
+
+import pytest
+
+from data.database import db
+from modelo.hash_pin import comprobar_pin, costo_de_hash
+from modelo.Tarjeta import EstadoTarjeta, Tarjeta
+from servicio.VerificadorPin import VerificadorPin
+from tests.conftest import PIN
+
+
+def test_verificar_aplica_intentos_y_bloqueo(datos):
+    tarjeta = datos['tarjeta']
+    verificador = VerificadorPin(max_procesos=1)
+    try:
+        assert not verificador.verificar(tarjeta, '0000')
+        assert tarjeta.intentos_fallidos == 1
+        assert verificador.verificar(tarjeta, PIN)
+        assert tarjeta.intentos_fallidos == 0
+
+        for _ in range(tarjeta.max_intentos):
+            verificador.verificar(tarjeta, '0000')
+        db.session.commit()
+        assert tarjeta.estado == EstadoTarjeta.BLOQUEADA
+        with pytest.raises(ValueError):
+            verificador.verificar(tarjeta, PIN)
+    finally:
+        verificador.cerrar()
+
+
+def test_verificar_async_rehashea_con_el_costo_objetivo(datos):
+    tarjeta = datos['tarjeta']
+    Tarjeta.configurar_costo_bcrypt(5)
+    verificador = VerificadorPin(max_procesos=1)
+    try:
+        assert asyncio.run(verificador.verificar_async(tarjeta, PIN))
+    finally:
+        verificador.cerrar()
+    db.session.commit()
+
+    assert tarjeta.get_costo_pin() == 5
+    assert costo_de_hash(tarjeta.pin_hash) == 5
+
+
+def test_hashear_lote_conserva_el_orden():
+    verificador = VerificadorPin(max_procesos=2)
+    try:
+        pines = ['1111', '2222', '3333']
+        hashes = verificador.hashear_lote(pines, 4)
+    finally:
+        verificador.cerrar()
+
+    assert [comprobar_pin(pin, pin_hash) for pin, pin_hash in zip(pines, hashes)] == [True] * 3
+    assert not comprobar_pin('1111', hashes[1])
+    assert verificador.hashear_lote([], 4) == []